@@ -10,11 +10,14 @@ from datetime import datetime
 from typing import Dict, List, Any, Optional
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import logging
 
+from jarvis.llm.streaming import sse_event
+from jarvis.utils.metrics_registry import CONTENT_TYPE as METRICS_CONTENT_TYPE, get_metrics_registry
+
 # Setup logging
 logger = logging.getLogger(__name__)
 
@@ -409,6 +412,7 @@ async def read_root():
         <script>
             let ws = null;
             let sessionId = Date.now().toString();
+            let streamingMessage = null;
             
             function connectWebSocket() {
                 const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
@@ -447,8 +451,24 @@ async def read_root():
             }
             
             function handleWebSocketMessage(data) {
-                if (data.type === 'chat_response') {
-                    addMessage(data.content, 'bot');
+                if (data.type === 'chat_stream_start') {
+                    streamingMessage = addMessage('', 'bot');
+                } else if (data.type === 'chat_token') {
+                    if (!streamingMessage) {
+                        streamingMessage = addMessage('', 'bot');
+                    }
+                    streamingMessage.textContent += data.content;
+                    const messagesContainer = document.getElementById('chatMessages');
+                    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+                } else if (data.type === 'chat_response') {
+                    if (streamingMessage) {
+                        streamingMessage.textContent = data.content;
+                        streamingMessage = null;
+                    } else {
+                        addMessage(data.content, 'bot');
+                    }
+                } else if (data.type === 'chat_cancelled') {
+                    streamingMessage = null;
                 } else if (data.type === 'status_update') {
                     updateSystemStatus(data.data);
                 } else if (data.type === 'file_processed') {
@@ -464,7 +484,8 @@ async def read_root():
                     addMessage(message, 'user');
                     ws.send(JSON.stringify({
                         type: 'chat_message',
-                        content: message
+                        content: message,
+                        stream: true
                     }));
                     input.value = '';
                 }
@@ -477,6 +498,7 @@ async def read_root():
                 messageDiv.textContent = content;
                 messagesContainer.appendChild(messageDiv);
                 messagesContainer.scrollTop = messagesContainer.scrollHeight;
+                return messageDiv;
             }
             
             function updateSystemStatus(data) {
@@ -612,6 +634,40 @@ async def chat_endpoint(message: ChatMessage):
         logger.error(f"Chat endpoint error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint(message: ChatMessage):
+    """Stream the chat response as server-sent events (token, done, error)."""
+    if not llm_interface:
+        raise HTTPException(status_code=503, detail="LLM interface not available")
+    
+    chunks = llm_interface.stream_response(
+        message.message,
+        context_messages=5 if message.include_context else 0,
+        model=message.model
+    )
+    
+    async def events():
+        # Starlette cancels this generator when the client disconnects;
+        # closing the chunk stream then aborts the upstream Ollama request
+        try:
+            async for chunk in chunks:
+                yield sse_event(chunk.to_dict(), event="token", event_id=chunk.index)
+            yield sse_event({
+                "model": message.model or llm_interface.get_current_model(),
+                "timestamp": datetime.now().isoformat()
+            }, event="done")
+        except Exception as e:
+            logger.error(f"Chat stream error: {e}")
+            yield sse_event({"error": str(e)}, event="error")
+        finally:
+            await chunks.aclose()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/memory/store")
 async def store_memory(entry: MemoryEntry):
     """Store new memory entry."""
@@ -767,6 +823,11 @@ async def get_performance_metrics():
         logger.error(f"Performance metrics error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_exposition():
+    """Current metrics in the text exposition format, for scrapers."""
+    return PlainTextResponse(get_metrics_registry().render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.post("/api/system/command")
 async def execute_system_command(command: SystemCommand):
     """Execute system command."""
@@ -787,11 +848,61 @@ async def execute_system_command(command: SystemCommand):
         logger.error(f"System command error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def stream_chat_to_websocket(websocket: WebSocket, session_id: str, content: str,
+                                   model: Optional[str] = None, context_messages: int = 3):
+    """
+    Send a chat response as incremental WebSocket frames.
+    
+    Frames are chat_stream_start, one chat_token per chunk and a final
+    chat_response with the assembled text. Each send waits for the socket,
+    so a slow client paces the upstream read instead of buffering tokens.
+    """
+    stream_id = f"{session_id}-{int(time.time() * 1000)}"
+    chunks = llm_interface.stream_response(content, context_messages=context_messages, model=model)
+    parts = []
+    try:
+        await websocket.send_text(json.dumps({
+            'type': 'chat_stream_start',
+            'stream_id': stream_id,
+            'timestamp': datetime.now().isoformat()
+        }))
+        async for chunk in chunks:
+            parts.append(chunk.text)
+            await websocket.send_text(json.dumps({
+                'type': 'chat_token',
+                'stream_id': stream_id,
+                'content': chunk.text,
+                'index': chunk.index
+            }))
+        await websocket.send_text(json.dumps({
+            'type': 'chat_response',
+            'stream_id': stream_id,
+            'content': "".join(parts).strip(),
+            'done': True,
+            'timestamp': datetime.now().isoformat()
+        }))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"WebSocket stream error: {e}")
+        try:
+            await websocket.send_text(json.dumps({
+                'type': 'error',
+                'stream_id': stream_id,
+                'content': f"Error processing message: {str(e)}",
+                'timestamp': datetime.now().isoformat()
+            }))
+        except Exception:
+            pass
+    finally:
+        await chunks.aclose()
+
 # WebSocket endpoint
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     """WebSocket endpoint for real-time communication."""
     await manager.connect(websocket, session_id)
+    stream_task: Optional[asyncio.Task] = None
     
     try:
         while True:
@@ -801,7 +912,14 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             if message.get('type') == 'chat_message':
                 # Process chat message
                 content = message.get('content', '')
-                if content and llm_interface:
+                if content and llm_interface and message.get('stream', True):
+                    # Stream in a task so cancel messages and disconnects are seen mid-response
+                    if stream_task and not stream_task.done():
+                        stream_task.cancel()
+                    stream_task = asyncio.create_task(stream_chat_to_websocket(
+                        websocket, session_id, content, model=message.get('model')
+                    ))
+                elif content and llm_interface:
                     try:
                         response = llm_interface.generate_with_context(content, context_messages=3)
                         await manager.send_personal_message({
@@ -816,6 +934,14 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
                             'timestamp': datetime.now().isoformat()
                         }, session_id)
             
+            elif message.get('type') == 'cancel':
+                if stream_task and not stream_task.done():
+                    stream_task.cancel()
+                    await manager.send_personal_message({
+                        'type': 'chat_cancelled',
+                        'timestamp': datetime.now().isoformat()
+                    }, session_id)
+            
             elif message.get('type') == 'get_status':
                 # Send system status
                 try:
@@ -854,6 +980,10 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
         manager.disconnect(websocket, session_id)
+    finally:
+        # A client that goes away stops its in-flight generation
+        if stream_task and not stream_task.done():
+            stream_task.cancel()
 
 # Startup event
 @app.on_event("startup")
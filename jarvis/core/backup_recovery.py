@@ -160,6 +160,7 @@ class BackupRecoveryManager:
                 include_files = [
                     ARCHIVE_DB_PATH,  # Archive database
                     MEMORY_FILE,      # Memory file
+                    f"{MEMORY_FILE}.log",  # Memory append log (facts since last compaction)
                     "config/",        # Configuration directory
                     "data/test_reports/",  # Test reports
                     "logs/",          # Log files
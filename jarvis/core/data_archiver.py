@@ -13,6 +13,8 @@ from dataclasses import dataclass
 import os
 import uuid
 
+from ..utils.metrics_registry import get_metrics_registry
+
 # Archive database path
 ARCHIVE_DB_PATH = "data/jarvis_archive.db"
 _archive_lock = threading.Lock()
@@ -341,12 +343,85 @@ class DataArchiver:
             conn.commit()
             conn.close()
             
+        self._record_ingest({data_type: 1})
+        
         # Update CRDT metrics if enabled
         if self.enable_crdt and self.crdt_manager:
             self._update_crdt_metrics(operation, data_type, entry_id)
             
         return entry_id
     
+    def archive_batch(self, entries: List[Dict[str, Any]]) -> List[int]:
+        """
+        Archive many pieces of data in one transaction
+        
+        Args:
+            entries: Dicts with the arguments of archive_data (data_type,
+                content, source, operation and optionally metadata)
+            
+        Returns:
+            Archive entry IDs, in the order of entries
+        """
+        timestamp = datetime.now().isoformat()
+        entry_ids = []
+        
+        with _archive_lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                cursor = conn.cursor()
+                for entry in entries:
+                    data_type = entry['data_type']
+                    content = entry['content']
+                    cursor.execute('''
+                        INSERT INTO archive_entries (
+                            timestamp, data_type, content, source, operation,
+                            content_hash, metadata, verification_status, program_version
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        timestamp,
+                        data_type,
+                        content,
+                        entry['source'],
+                        entry['operation'],
+                        self._calculate_content_hash(content),
+                        json.dumps(entry.get('metadata') or {}),
+                        'pending',
+                        self.current_version
+                    ))
+                    entry_id = cursor.lastrowid
+                    entry_ids.append(entry_id)
+                    
+                    if data_type in ['input', 'output']:
+                        cursor.execute('''
+                            INSERT INTO verification_queue (archive_entry_id, priority)
+                            VALUES (?, ?)
+                        ''', (entry_id, 1 if data_type == 'output' else 2))
+                conn.commit()
+            finally:
+                conn.close()
+        
+        counts = {}
+        for entry in entries:
+            counts[entry['data_type']] = counts.get(entry['data_type'], 0) + 1
+        self._record_ingest(counts)
+        
+        if self.enable_crdt and self.crdt_manager:
+            for entry, entry_id in zip(entries, entry_ids):
+                self._update_crdt_metrics(entry['operation'], entry['data_type'], entry_id)
+        
+        return entry_ids
+    
+    def _record_ingest(self, counts: Dict[str, int]):
+        """Count archived entries (and those queued for verification) per data type"""
+        registry = get_metrics_registry()
+        for data_type, count in counts.items():
+            labels = {'data_type': data_type}
+            registry.inc('archive.entries_ingested', count, labels,
+                         help="Entries written to the archive")
+            if data_type in ['input', 'output']:
+                registry.inc('archive.verification_enqueued', count, labels,
+                             help="Archive entries queued for verification")
+    
     def _update_crdt_metrics(self, operation: str, data_type: str, entry_id: int):
         """Update CRDT metrics based on archive operation"""
         try:
@@ -395,13 +470,26 @@ class DataArchiver:
             ''', (status, score, model, verification_timestamp, details, entry_id))
             
             # Remove from verification queue if verification is complete
+            archived_at = None
             if status in ['verified', 'rejected', 'error']:
                 cursor.execute('''
                     DELETE FROM verification_queue WHERE archive_entry_id = ?
                 ''', (entry_id,))
+                row = cursor.execute('SELECT timestamp FROM archive_entries WHERE id = ?',
+                                     (entry_id,)).fetchone()
+                archived_at = row[0] if row else None
             
             conn.commit()
             conn.close()
+        
+        if archived_at:
+            # Lag between archiving an entry and its verification completing
+            lag = (datetime.fromisoformat(verification_timestamp) - datetime.fromisoformat(archived_at)).total_seconds()
+            registry = get_metrics_registry()
+            registry.inc('archive.verifications_completed', 1, {'status': status},
+                         help="Archive entries whose verification completed")
+            registry.observe('archive.verification_lag_seconds', max(0.0, lag), {'status': status},
+                             help="Time from archiving an entry to completing its verification")
     
     def get_pending_verification(self, limit: int = 10) -> List[ArchiveEntry]:
         """Get entries pending verification"""
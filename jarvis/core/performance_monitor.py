@@ -411,12 +411,15 @@ class PerformanceMonitor:
     def _get_system_health_data(self) -> Dict[str, float]:
         """Get system health data"""
         try:
-            # Simulate system health metrics
+            from ..monitoring.system_sampler import get_system_sampler
+            snapshot = get_system_sampler().latest(max_age=30)
+            if not snapshot.available:
+                return {}
             return {
-                'system_health_score': 95.0,  # This would come from actual system monitoring
-                'memory_usage_percent': 45.0,
-                'cpu_usage_percent': 25.0,
-                'disk_usage_percent': 60.0
+                'system_health_score': float(snapshot.resource_score()),
+                'memory_usage_percent': snapshot.memory_percent,
+                'cpu_usage_percent': snapshot.cpu_percent,
+                'disk_usage_percent': snapshot.disk_percent
             }
         except:
             return {}
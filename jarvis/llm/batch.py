@@ -0,0 +1,244 @@
+"""
+Concurrent batch execution for LLM calls
+
+``BatchExecutor`` runs one callable over many inputs with a bounded number
+of calls in flight and returns results in input order. Each item may carry
+its own deadline (propagated to the HTTP transport through
+``deadline_scope``), the whole batch can be cancelled, and failures are
+reported per item instead of aborting the batch.
+
+The in-flight limit is steered by an AIMD controller: every success below
+the latency target grows the window by ``increase / window`` (about +1 per
+round trip), while an error or a latency spike shrinks it multiplicatively,
+at most once per round trip.
+"""
+
+import math
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import requests
+
+from .transport import deadline_scope
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+STATUS_CANCELLED = "cancelled"
+
+
+@dataclass
+class BatchConfig:
+    """Batch concurrency settings"""
+    max_in_flight: int = 4
+    min_in_flight: int = 1
+    initial_in_flight: Optional[int] = None   # defaults to max_in_flight when not adaptive, else 2
+    item_timeout: Optional[float] = None      # seconds per item, None for no limit
+    adaptive: bool = True
+    latency_target: Optional[float] = None    # None: latency_tolerance x best observed latency
+    latency_tolerance: float = 2.0
+    increase: float = 1.0
+    decrease: float = 0.5
+
+    def __post_init__(self):
+        if self.max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        if not 1 <= self.min_in_flight <= self.max_in_flight:
+            raise ValueError("min_in_flight must be between 1 and max_in_flight")
+        if not 0 < self.decrease < 1:
+            raise ValueError("decrease must be between 0 and 1")
+
+
+class AIMDController:
+    """Additive-increase / multiplicative-decrease concurrency limit"""
+
+    def __init__(self, initial: int, minimum: int, maximum: int,
+                 increase: float = 1.0, decrease: float = 0.5,
+                 latency_target: Optional[float] = None, latency_tolerance: float = 2.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.latency_tolerance = latency_tolerance
+        self._clock = clock
+        self._window = float(min(max(initial, minimum), maximum))
+        self._best_latency = None
+        self._last_decrease = float("-inf")
+        self._lock = threading.Lock()
+        self.history: List[int] = [self.limit]
+
+    @property
+    def limit(self) -> int:
+        return int(min(self.maximum, max(self.minimum, math.floor(self._window))))
+
+    def target(self) -> Optional[float]:
+        if self.latency_target is not None:
+            return self.latency_target
+        if self._best_latency is None:
+            return None
+        return self._best_latency * self.latency_tolerance
+
+    def on_success(self, latency: float, started_at: float):
+        with self._lock:
+            if self._best_latency is None or latency < self._best_latency:
+                self._best_latency = latency
+            target = self.target()
+            if target is not None and latency > target:
+                self._decrease(started_at)
+            else:
+                self._window = min(self.maximum, self._window + self.increase / max(1.0, self._window))
+            self._record()
+
+    def on_failure(self, started_at: float):
+        with self._lock:
+            self._decrease(started_at)
+            self._record()
+
+    def _decrease(self, started_at: float):
+        # Requests started before the last decrease saw the old window; react once per round trip
+        if started_at < self._last_decrease:
+            return
+        self._window = max(self.minimum, self._window * self.decrease)
+        self._last_decrease = self._clock()
+
+    def _record(self):
+        if self.history[-1] != self.limit:
+            self.history.append(self.limit)
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of one batch item"""
+    index: int
+    input: Any
+    status: str
+    value: Any = None
+    error: Optional[str] = None
+    latency: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return self.status == STATUS_OK
+
+
+@dataclass
+class BatchReport:
+    """Ordered results plus partial-failure summary"""
+    results: List[BatchItemResult]
+    elapsed: float
+    concurrency_history: List[int] = field(default_factory=list)
+
+    def count(self, status: str) -> int:
+        return sum(1 for result in self.results if result.status == status)
+
+    @property
+    def failed(self) -> List[BatchItemResult]:
+        return [result for result in self.results if not result.success]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total": len(self.results),
+            "succeeded": self.count(STATUS_OK),
+            "errors": self.count(STATUS_ERROR),
+            "timed_out": self.count(STATUS_TIMEOUT),
+            "cancelled": self.count(STATUS_CANCELLED),
+            "elapsed": self.elapsed,
+            "final_concurrency": self.concurrency_history[-1] if self.concurrency_history else None
+        }
+
+
+def _is_timeout(error: Exception) -> bool:
+    return isinstance(error, (TimeoutError, requests.exceptions.Timeout))
+
+
+class BatchExecutor:
+    """Run ``func`` over a sequence of inputs with bounded, adaptive parallelism"""
+
+    def __init__(self, func: Callable[[Any], Any], config: BatchConfig = None):
+        self.func = func
+        self.config = config or BatchConfig()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Stop dispatching new items; in-flight items finish, the rest are reported as cancelled"""
+        self._cancel_event.set()
+
+    def _make_controller(self) -> AIMDController:
+        config = self.config
+        if config.initial_in_flight is not None:
+            initial = config.initial_in_flight
+        else:
+            initial = min(2, config.max_in_flight) if config.adaptive else config.max_in_flight
+        return AIMDController(
+            initial=initial,
+            minimum=config.min_in_flight if config.adaptive else initial,
+            maximum=config.max_in_flight if config.adaptive else initial,
+            increase=config.increase, decrease=config.decrease,
+            latency_target=config.latency_target, latency_tolerance=config.latency_tolerance
+        )
+
+    def run(self, items: Sequence[Any], cancel_event: threading.Event = None) -> BatchReport:
+        """
+        Execute the batch
+
+        Args:
+            items: Inputs passed to ``func`` one at a time
+            cancel_event: Optional external cancellation signal
+
+        Returns:
+            BatchReport with one result per input, in input order
+        """
+        items = list(items)
+        self._cancel_event.clear()
+        controller = self._make_controller()
+        results: List[Optional[BatchItemResult]] = [None] * len(items)
+        condition = threading.Condition()
+        in_flight = [0]
+        start = time.monotonic()
+
+        def cancelled() -> bool:
+            return self._cancel_event.is_set() or (cancel_event is not None and cancel_event.is_set())
+
+        def worker(index: int, item: Any):
+            started_at = time.monotonic()
+            try:
+                with deadline_scope(self.config.item_timeout):
+                    value = self.func(item)
+                latency = time.monotonic() - started_at
+                results[index] = BatchItemResult(index, item, STATUS_OK, value=value, latency=latency)
+                controller.on_success(latency, started_at)
+            except Exception as e:
+                status = STATUS_TIMEOUT if _is_timeout(e) else STATUS_ERROR
+                results[index] = BatchItemResult(index, item, status, error=str(e),
+                                                 latency=time.monotonic() - started_at)
+                controller.on_failure(started_at)
+            finally:
+                with condition:
+                    in_flight[0] -= 1
+                    condition.notify_all()
+
+        with ThreadPoolExecutor(max_workers=self.config.max_in_flight,
+                                thread_name_prefix="llm-batch") as pool:
+            for index, item in enumerate(items):
+                with condition:
+                    while in_flight[0] >= controller.limit and not cancelled():
+                        condition.wait(0.05)
+                    if cancelled():
+                        break
+                    in_flight[0] += 1
+                # Each item runs in a copy of the caller's context so enclosing deadlines apply
+                pool.submit(contextvars.copy_context().run, worker, index, item)
+
+        for index, result in enumerate(results):
+            if result is None:
+                results[index] = BatchItemResult(index, items[index], STATUS_CANCELLED,
+                                                 error="cancelled before dispatch")
+
+        return BatchReport(results=results, elapsed=time.monotonic() - start,
+                           concurrency_history=list(controller.history))
@@ -0,0 +1,338 @@
+"""
+Token-budgeted context assembly
+
+Prompts used to be built by concatenating the last N conversation turns
+or retrieved chunks up to a character limit, which either overflows the
+model's context window or spends it on stale turns. ``ContextAssembler``
+instead counts tokens with a local tokenizer and splits a per-request
+budget (model window minus the space reserved for the answer) between:
+
+- the system prompt and the user prompt, which are always included;
+- conversation history: a rolling summary of older turns plus the most
+  useful recent turns, ranked by relevance to the prompt and recency;
+- retrieved documents, in relevance order, the last one truncated at a
+  token boundary if it only partly fits.
+
+``RollingSummary`` folds turns into the summary one at a time as they age
+out, so the summary is never recomputed from the whole conversation.
+"""
+
+import re
+import logging
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w{3,}")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+class TokenCounter:
+    """Memoizing wrapper around a local tokenizer"""
+
+    def __init__(self, tokenizer: str = None, cache_size: int = 4096):
+        # Imported lazily: jarvis.vectordb imports the LLM interface
+        from ..vectordb.chunking import get_tokenizer
+
+        self.tokenizer = get_tokenizer(tokenizer)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                return cached
+        tokens = self.tokenizer.count(text)
+        with self._lock:
+            self._cache[text] = tokens
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def truncate(self, text: str, max_tokens: int, keep_end: bool = False) -> str:
+        """Cut text to at most ``max_tokens`` tokens (the "..." marker included) at a token boundary"""
+        spans = self.tokenizer.spans(text)
+        if len(spans) <= max_tokens:
+            return text
+        keep = max_tokens - 1
+        if keep <= 0:
+            return ""
+        if keep_end:
+            return "..." + text[spans[-keep][0]:]
+        return text[:spans[keep - 1][1]] + "..."
+
+
+_counters: Dict[str, TokenCounter] = {}
+
+
+def get_token_counter(tokenizer: str = None) -> TokenCounter:
+    """Shared token counter per tokenizer name"""
+    key = tokenizer or ""
+    if key not in _counters:
+        _counters[key] = TokenCounter(tokenizer)
+    return _counters[key]
+
+
+@dataclass
+class ContextBudget:
+    """How many tokens a request may use and how they are shared"""
+    max_tokens: int = 2048          # Model context window
+    reserve_output: int = 512       # Left free for the answer
+    history_share: float = 0.4      # Of the flexible space, when documents compete with history
+    summary_share: float = 0.25     # Of the history allotment
+    min_piece_tokens: int = 32      # Smallest truncated document worth including
+    recency_half_life: float = 4.0  # Turns until a turn's recency score halves
+    relevance_weight: float = 0.6
+    recency_weight: float = 0.4
+
+    def __post_init__(self):
+        if self.max_tokens <= 0 or self.reserve_output < 0 or self.reserve_output >= self.max_tokens:
+            raise ValueError("reserve_output must be non-negative and smaller than max_tokens")
+        for name in ("history_share", "summary_share"):
+            if not 0 <= getattr(self, name) <= 1:
+                raise ValueError(f"{name} must be between 0 and 1")
+        if self.recency_half_life <= 0:
+            raise ValueError("recency_half_life must be positive")
+
+    @property
+    def available(self) -> int:
+        return self.max_tokens - self.reserve_output
+
+
+@dataclass
+class AssembledContext:
+    """Result of fitting history and documents into a budget"""
+    history: List[int] = field(default_factory=list)    # Indices of included turns, oldest first
+    history_text: str = ""
+    summary_text: str = ""
+    documents: List[int] = field(default_factory=list)  # Indices of included documents, best first
+    documents_text: str = ""
+    truncated_documents: int = 0
+    dropped_turns: int = 0
+    dropped_documents: int = 0
+    usage: Dict[str, int] = field(default_factory=dict)
+
+
+def _words(text: str) -> set:
+    return set(_WORD.findall(text.lower()))
+
+
+class ContextAssembler:
+    """Fit system prompt, history, documents and prompt into a token budget"""
+
+    def __init__(self, budget: ContextBudget = None, counter: TokenCounter = None,
+                 labels: Tuple[str, str] = ("User", "Assistant")):
+        self.budget = budget or ContextBudget()
+        self.counter = counter or get_token_counter()
+        self.labels = labels
+
+    def format_turn(self, user: str, assistant: str) -> str:
+        return f"{self.labels[0]}: {user}\n{self.labels[1]}: {assistant}"
+
+    def assemble(self,
+                 prompt: str,
+                 system_prompt: str = "",
+                 history: Sequence[Tuple[str, str]] = (),
+                 documents: Sequence[Tuple[str, float]] = (),
+                 summary: str = "",
+                 max_turns: int = None,
+                 max_document_chars: int = None) -> AssembledContext:
+        """
+        Select context for one request
+
+        Args:
+            prompt: Current user prompt (always included)
+            system_prompt: System prompt (always included)
+            history: (user, assistant) turns, oldest first
+            documents: (text, relevance) pairs
+            summary: Rolling summary of turns no longer in ``history``
+            max_turns: Upper bound on verbatim turns
+            max_document_chars: Optional character cap on the document text
+
+        Returns:
+            AssembledContext with the selected pieces and token usage
+        """
+        budget = self.budget
+        count = self.counter.count
+        fixed = count(system_prompt) + count(prompt)
+        remaining = max(0, budget.available - fixed)
+        if fixed > budget.available:
+            logger.warning(f"Prompt alone ({fixed} tokens) exceeds the context budget ({budget.available})")
+
+        result = AssembledContext()
+        has_history = bool(history or summary)
+        history_budget = remaining
+        if has_history and documents:
+            history_budget = int(remaining * budget.history_share)
+
+        summary_used, turns_used = self._fill_history(result, prompt, history, summary, history_budget, max_turns)
+        documents_used = self._fill_documents(result, documents, remaining - summary_used - turns_used,
+                                              max_document_chars)
+
+        # Space the documents did not need goes back to history
+        spare = remaining - summary_used - turns_used - documents_used
+        if spare > 0 and history_budget < remaining and result.dropped_turns:
+            summary_used, turns_used = self._fill_history(result, prompt, history, summary,
+                                                          history_budget + spare, max_turns)
+
+        result.usage = {
+            'budget': budget.available,
+            'system': count(system_prompt),
+            'prompt': count(prompt),
+            'summary': summary_used,
+            'history': turns_used,
+            'documents': documents_used,
+        }
+        result.usage['total'] = sum(result.usage[k] for k in ('system', 'prompt', 'summary', 'history', 'documents'))
+        return result
+
+    def _fill_history(self, result: AssembledContext, prompt: str, history: Sequence[Tuple[str, str]],
+                      summary: str, allotment: int, max_turns: Optional[int]) -> Tuple[int, int]:
+        budget = self.budget
+        summary_used = 0
+        result.summary_text = ""
+        if summary and allotment > 0:
+            cap = max(1, int(allotment * budget.summary_share)) if history else allotment
+            result.summary_text = self.counter.truncate(summary, cap, keep_end=True)
+            summary_used = self.counter.count(result.summary_text)
+
+        limit = len(history) if max_turns is None else min(max_turns, len(history))
+        prompt_words = _words(prompt)
+        newest = len(history) - 1
+        scored = []
+        for index, (user, assistant) in enumerate(history):
+            text = self.format_turn(user, assistant)
+            recency = 0.5 ** ((newest - index) / budget.recency_half_life)
+            relevance = len(prompt_words & _words(text)) / len(prompt_words) if prompt_words else 0.0
+            score = budget.relevance_weight * relevance + budget.recency_weight * recency
+            scored.append((score, index, text))
+        scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+
+        space = allotment - summary_used
+        chosen = {}
+        for score, index, text in scored:
+            if len(chosen) >= limit:
+                break
+            tokens = self.counter.count(text)
+            if tokens <= space:
+                chosen[index] = text
+                space -= tokens
+
+        result.history = sorted(chosen)
+        result.history_text = "\n".join(chosen[index] for index in result.history)
+        result.dropped_turns = len(history) - len(chosen)
+        return summary_used, allotment - summary_used - space
+
+    def _fill_documents(self, result: AssembledContext, documents: Sequence[Tuple[str, float]],
+                        allotment: int, max_chars: int = None) -> int:
+        ranked = sorted(range(len(documents)), key=lambda i: documents[i][1], reverse=True)
+        space = allotment
+        char_space = max_chars if max_chars is not None else float('inf')
+        parts = []
+        result.documents = []
+        result.truncated_documents = 0
+        for index in ranked:
+            text = documents[index][0]
+            tokens = self.counter.count(text)
+            if tokens > space or len(text) > char_space:
+                # Include the beginning of the document if a meaningful part fits
+                if len(text) > char_space:
+                    text = text[:max(0, int(char_space) - 3)] + "..."
+                text = self.counter.truncate(text, space)
+                tokens = self.counter.count(text)
+                if tokens >= self.budget.min_piece_tokens:
+                    parts.append(text)
+                    result.documents.append(index)
+                    result.truncated_documents = 1
+                    space -= tokens
+                break
+            parts.append(text)
+            result.documents.append(index)
+            space -= tokens
+            char_space -= len(text) + 2
+
+        result.documents_text = "\n\n".join(parts)
+        result.dropped_documents = len(documents) - len(result.documents)
+        return allotment - space
+
+
+def _first_sentence(text: str, max_words: int = 25) -> str:
+    sentence = _SENTENCE_END.split(text.strip(), maxsplit=1)[0]
+    words = sentence.split()
+    if len(words) > max_words:
+        return " ".join(words[:max_words]) + "..."
+    return " ".join(words)
+
+
+class RollingSummary:
+    """
+    Incrementally maintained summary of conversation turns
+
+    The default summarizer is extractive: each folded turn becomes one line
+    with the first sentence of the question and of the answer, and the
+    oldest lines are dropped once the summary exceeds ``max_tokens``. A
+    custom ``summarizer(previous_summary, user, assistant) -> str`` (for
+    example one backed by an LLM) can replace it; it is still called once
+    per turn with the previous summary rather than the whole history.
+    """
+
+    def __init__(self, max_tokens: int = 256, counter: TokenCounter = None,
+                 summarizer: Callable[[str, str, str], str] = None,
+                 labels: Tuple[str, str] = ("User", "Assistant")):
+        self.max_tokens = max_tokens
+        self.counter = counter or get_token_counter()
+        self.summarizer = summarizer
+        self.labels = labels
+        self.folded_turns = 0
+        self._lines = deque()  # (line, tokens) for the extractive summary
+        self._tokens = 0
+        self._text = ""
+        self._lock = threading.Lock()
+
+    @property
+    def text(self) -> str:
+        with self._lock:
+            if self.summarizer is None:
+                return "\n".join(line for line, _ in self._lines)
+            return self._text
+
+    @property
+    def tokens(self) -> int:
+        with self._lock:
+            if self.summarizer is None:
+                return self._tokens
+            return self.counter.count(self._text)
+
+    def fold(self, user: str, assistant: str):
+        """Add one turn to the summary"""
+        with self._lock:
+            self.folded_turns += 1
+            if self.summarizer is not None:
+                self._text = self.summarizer(self._text, user, assistant)
+                return
+
+            line = f"- {self.labels[0]}: {_first_sentence(user)} / {self.labels[1]}: {_first_sentence(assistant)}"
+            tokens = self.counter.count(line)
+            self._lines.append((line, tokens))
+            self._tokens += tokens
+            while self._tokens > self.max_tokens and len(self._lines) > 1:
+                _, dropped = self._lines.popleft()
+                self._tokens -= dropped
+
+    def clear(self):
+        with self._lock:
+            self.folded_turns = 0
+            self._lines.clear()
+            self._tokens = 0
+            self._text = ""
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'folded_turns': self.folded_turns, 'tokens': self.tokens}
@@ -0,0 +1,125 @@
+"""
+Provider dispatch for the production LLM interface
+
+Each ``ModelConfig`` is executed by the dispatcher registered for its
+provider. The dispatcher merges the model's configured defaults with the
+per-request overrides and turns them into the provider's wire request, so
+model selection, fallback chains and model parameters all reach the backend.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import requests
+
+from .transport import HTTPTransport, deadline_scope, get_transport
+
+# Ollama /api/generate fields that live next to "options" rather than inside it
+OLLAMA_TOP_LEVEL_PARAMS = {"format", "keep_alive", "template", "raw", "context", "images", "suffix"}
+
+
+class ProviderError(Exception):
+    """A provider call failed; the next model in the fallback chain is tried"""
+    pass
+
+
+@dataclass
+class DispatchResult:
+    """Provider-neutral result of one model call"""
+    content: str
+    tokens_used: Optional[int] = None
+    finish_reason: str = "completed"
+    raw: Dict[str, Any] = field(default_factory=dict)
+
+
+def resolve_parameters(model_config, request) -> Dict[str, Any]:
+    """Effective generation parameters; request overrides win over model defaults"""
+    return {
+        "model": model_config.name,
+        "temperature": request.temperature if request.temperature is not None else model_config.temperature,
+        "top_p": model_config.top_p,
+        "max_tokens": request.max_tokens if request.max_tokens is not None else model_config.max_tokens,
+        "frequency_penalty": model_config.frequency_penalty,
+        "presence_penalty": model_config.presence_penalty,
+        "stop": list(model_config.stop_sequences),
+        "system_prompt": request.system_prompt,
+        "custom_params": dict(model_config.custom_params)
+    }
+
+
+class ProviderDispatcher(ABC):
+    """Executes requests for every model of one provider"""
+
+    @abstractmethod
+    def execute(self, model_config, request) -> DispatchResult:
+        """Run ``request`` on ``model_config``; raise ProviderError on failure"""
+        pass
+
+
+class OllamaDispatcher(ProviderDispatcher):
+    """Dispatch to Ollama's /api/generate through the shared HTTP transport"""
+
+    def __init__(self, url: str = None, transport: HTTPTransport = None):
+        self._url = url
+        self._transport = transport
+
+    @property
+    def url(self) -> str:
+        if self._url:
+            return self._url
+        from . import llm_interface
+        return llm_interface.OLLAMA_URL
+
+    def build_payload(self, model_config, request) -> Dict[str, Any]:
+        """Wire payload for one model"""
+        params = resolve_parameters(model_config, request)
+        options = {
+            "temperature": float(params["temperature"]),
+            "top_p": float(params["top_p"]),
+            "num_predict": int(params["max_tokens"]),
+            "frequency_penalty": float(params["frequency_penalty"]),
+            "presence_penalty": float(params["presence_penalty"])
+        }
+        if params["stop"]:
+            options["stop"] = params["stop"]
+
+        payload = {
+            "model": params["model"],
+            "prompt": request.prompt,
+            # Responses are returned whole; streaming has its own entry point
+            "stream": False,
+            "options": options
+        }
+        if params["system_prompt"] and str(params["system_prompt"]).strip():
+            payload["system"] = str(params["system_prompt"]).strip()
+
+        for key, value in params["custom_params"].items():
+            if key in OLLAMA_TOP_LEVEL_PARAMS:
+                payload[key] = value
+            else:
+                options[key] = value
+        return payload
+
+    def execute(self, model_config, request) -> DispatchResult:
+        payload = self.build_payload(model_config, request)
+        transport = self._transport or get_transport()
+        try:
+            with deadline_scope(request.timeout):
+                data = transport.post_json(self.url, payload, timeout=request.timeout)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise ProviderError(f"Ollama request for {model_config.name} failed: {e}") from e
+
+        if not isinstance(data, dict) or "response" not in data:
+            raise ProviderError(f"Unexpected Ollama response for {model_config.name}: {str(data)[:200]}")
+
+        tokens_used = None
+        if "eval_count" in data or "prompt_eval_count" in data:
+            tokens_used = data.get("prompt_eval_count", 0) + data.get("eval_count", 0)
+
+        return DispatchResult(
+            content=str(data["response"]).strip(),
+            tokens_used=tokens_used,
+            finish_reason="length" if data.get("done_reason") == "length" else "completed",
+            raw=data
+        )
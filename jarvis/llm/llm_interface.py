@@ -1,10 +1,20 @@
 import requests
 import os
+import json
 import time
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional, Union
+import threading
+from dataclasses import replace
+from typing import Dict, Any, AsyncIterator, List, Optional, Union
 from abc import ABC, abstractmethod
 
+from .transport import get_transport, get_async_transport, deadline_scope
+from .batch import BatchConfig, BatchExecutor, BatchReport
+from .single_flight import SingleFlight
+from .streaming import StreamChunk, stream_ollama
+from .context import ContextAssembler, ContextBudget, RollingSummary
+
 # Setup logging
 logger = logging.getLogger(__name__)
 
@@ -30,6 +40,9 @@ OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
 # Globalny aktualnie wybrany model
 CURRENT_OLLAMA_MODEL = DEFAULT_OLLAMA_MODEL
 
+# Identical non-streaming requests in flight at the same time share one call
+_query_flight = SingleFlight()
+
 DEFAULT_LLM_PARAMS = {
     "temperature": 0.7,
     "top_p": 0.95,
@@ -71,9 +84,7 @@ def validate_llm_params(**params):
             return False
     return True
 
-def query_llm(prompt, model=None, stream=False, timeout=None, temperature=None, top_p=None, max_tokens=None, repetition_penalty=None, system_prompt=None):
-    model = model or CURRENT_OLLAMA_MODEL
-    timeout = timeout if timeout is not None else get_dynamic_timeout(model)
+def _build_payload(prompt, model, stream, temperature, top_p, max_tokens, repetition_penalty, system_prompt):
     payload = {
         "model": model,
         "prompt": prompt,
@@ -88,47 +99,82 @@ def query_llm(prompt, model=None, stream=False, timeout=None, temperature=None,
         payload["system"] = str(system_prompt).strip()
     elif DEFAULT_LLM_PARAMS["system_prompt"]:
         payload["system"] = DEFAULT_LLM_PARAMS["system_prompt"]
+    return payload
 
-    try:
-        response = requests.post(OLLAMA_URL, json=payload, timeout=timeout)
-        response.raise_for_status()
-        if stream:
-            def stream_response():
-                for line in response.iter_lines():
-                    if line:
-                        try:
-                            data = line.decode("utf-8")
-                            yield data
-                        except Exception:
-                            continue
-            return stream_response()
-        data = response.json()
-        if "response" in data:
-            return data["response"].strip()
-        if isinstance(data, list):
-            return "\n".join(str(x) for x in data)
-        return str(data)
-    except requests.exceptions.Timeout:
+def _format_response(data):
+    if isinstance(data, dict) and "response" in data:
+        return data["response"].strip()
+    if isinstance(data, list):
+        return "\n".join(str(x) for x in data)
+    return str(data)
+
+def _format_error(e):
+    if isinstance(e, (requests.exceptions.Timeout, TimeoutError)):
         return "[LLM ERROR: timeout]"
-    except requests.exceptions.ConnectionError:
+    if isinstance(e, requests.exceptions.ConnectionError):
         return "[LLM ERROR: nie można połączyć się z Ollama (czy serwer działa?)]"
-    except requests.exceptions.RequestException as e:
-        return f"[LLM ERROR: {e}]"
+    return f"[LLM ERROR: {e}]"
+
+def _flight_key(url, payload):
+    return url + "\n" + json.dumps(payload, sort_keys=True)
+
+def get_coalescing_stats():
+    """Executions and coalesced duplicates of query_llm/async_query_llm"""
+    return _query_flight.get_stats()
+
+def query_llm(prompt, model=None, stream=False, timeout=None, temperature=None, top_p=None, max_tokens=None, repetition_penalty=None, system_prompt=None, url=None):
+    model = model or CURRENT_OLLAMA_MODEL
+    timeout = timeout if timeout is not None else get_dynamic_timeout(model)
+    payload = _build_payload(prompt, model, stream, temperature, top_p, max_tokens, repetition_penalty, system_prompt)
+    url = url or OLLAMA_URL
+
+    def call():
+        try:
+            # The timeout bounds the whole call, retries included; a tighter caller deadline wins
+            with deadline_scope(timeout):
+                if stream:
+                    return get_transport().stream_lines(url, payload, timeout=timeout)
+                data = get_transport().post_json(url, payload, timeout=timeout)
+            return _format_response(data)
+        except Exception as e:
+            return _format_error(e)
+
+    if stream:
+        return call()
+    try:
+        return _query_flight.do(_flight_key(url, payload), call, timeout=timeout)[0]
     except Exception as e:
-        return f"[LLM ERROR: {e}]"
+        return _format_error(e)
 
-def ask_local_llm(prompt, temperature=None, top_p=None, max_tokens=None, repetition_penalty=None, system_prompt=None, timeout=None, model=None):
-    if not validate_llm_params(temperature=temperature, top_p=top_p, max_tokens=max_tokens, repetition_penalty=repetition_penalty, system_prompt=system_prompt, timeout=timeout):
-        print("[LLM][ERROR] Nieobsługiwane parametry w ask_local_llm!")
-        return "[LLM ERROR: invalid params]"
-    
-    # Archive the input prompt
+async def async_query_llm(prompt, model=None, stream=False, timeout=None, temperature=None, top_p=None, max_tokens=None, repetition_penalty=None, system_prompt=None, url=None):
+    """asyncio twin of query_llm; with stream=True returns an async iterator of raw lines"""
+    model = model or CURRENT_OLLAMA_MODEL
+    timeout = timeout if timeout is not None else get_dynamic_timeout(model)
+    payload = _build_payload(prompt, model, stream, temperature, top_p, max_tokens, repetition_penalty, system_prompt)
+    url = url or OLLAMA_URL
+
+    async def call():
+        try:
+            with deadline_scope(timeout):
+                data = await get_async_transport().post_json(url, payload, timeout=timeout)
+            return _format_response(data)
+        except Exception as e:
+            return _format_error(e)
+
+    try:
+        if stream:
+            return get_async_transport().stream_lines(url, payload, timeout=timeout)
+        return (await _query_flight.do_async(_flight_key(url, payload), call, timeout=timeout))[0]
+    except Exception as e:
+        return _format_error(e)
+
+def _archive_prompt(prompt, operation, model, temperature=None, max_tokens=None, timeout=None):
     if ARCHIVING_ENABLED:
         try:
             archive_input(
                 content=prompt,
                 source="llm_interface",
-                operation="ask_local_llm",
+                operation=operation,
                 metadata={
                     "model": model or CURRENT_OLLAMA_MODEL,
                     "temperature": temperature,
@@ -138,26 +184,14 @@ def ask_local_llm(prompt, temperature=None, top_p=None, max_tokens=None, repetit
             )
         except Exception as e:
             print(f"[WARN] Failed to archive LLM input: {e}")
-    
-    # Get LLM response
-    response = query_llm(
-        prompt,
-        model=model,
-        temperature=temperature,
-        top_p=top_p,
-        max_tokens=max_tokens,
-        repetition_penalty=repetition_penalty,
-        system_prompt=system_prompt,
-        timeout=timeout
-    )
-    
-    # Archive the output response
+
+def _archive_response(prompt, response, model, operation="llm_response"):
     if ARCHIVING_ENABLED:
         try:
             archive_output(
                 content=response,
                 source="llm_interface",
-                operation="llm_response",
+                operation=operation,
                 metadata={
                     "model": model or CURRENT_OLLAMA_MODEL,
                     "prompt_length": len(prompt),
@@ -167,6 +201,30 @@ def ask_local_llm(prompt, temperature=None, top_p=None, max_tokens=None, repetit
             )
         except Exception as e:
             print(f"[WARN] Failed to archive LLM output: {e}")
+
+def ask_local_llm(prompt, temperature=None, top_p=None, max_tokens=None, repetition_penalty=None, system_prompt=None, timeout=None, model=None, url=None):
+    if not validate_llm_params(temperature=temperature, top_p=top_p, max_tokens=max_tokens, repetition_penalty=repetition_penalty, system_prompt=system_prompt, timeout=timeout):
+        print("[LLM][ERROR] Nieobsługiwane parametry w ask_local_llm!")
+        return "[LLM ERROR: invalid params]"
+    
+    # Archive the input prompt
+    _archive_prompt(prompt, "ask_local_llm", model, temperature, max_tokens, timeout)
+    
+    # Get LLM response
+    response = query_llm(
+        prompt,
+        model=model,
+        temperature=temperature,
+        top_p=top_p,
+        max_tokens=max_tokens,
+        repetition_penalty=repetition_penalty,
+        system_prompt=system_prompt,
+        timeout=timeout,
+        url=url
+    )
+    
+    # Archive the output response
+    _archive_response(prompt, response, model)
     
     return response
 
@@ -206,13 +264,26 @@ class OllamaLLMInterface(LLMInterface):
             'total_requests': 0,
             'successful_requests': 0,
             'failed_requests': 0,
+            'cancelled_requests': 0,    # Streams closed early by the consumer
             'average_response_time': 0.0
         }
+        self.batch_config = BatchConfig()
+        self.last_batch_report: Optional[BatchReport] = None
+        # Context assembly: turns older than keep_recent_turns are folded
+        # into history_summary and no longer sent verbatim
+        self.context_budget = ContextBudget()
+        self.keep_recent_turns = 20
+        self.history_summary = RollingSummary()
+        self.last_context_usage: Optional[Dict[str, int]] = None
+        self._turns = 0
+        self._folded_upto = 0
+        self._lock = threading.Lock()
     
     def generate_response(self, prompt: str, **kwargs) -> str:
         """Generate response with enhanced features."""
         start_time = time.time()
-        self.response_stats['total_requests'] += 1
+        with self._lock:
+            self.response_stats['total_requests'] += 1
         
         try:
             # Use existing ask_local_llm function
@@ -220,7 +291,8 @@ class OllamaLLMInterface(LLMInterface):
                 prompt, 
                 model=kwargs.get('model', self.current_model),
                 system_prompt=kwargs.get('system_prompt', ''),
-                timeout=kwargs.get('timeout')
+                timeout=kwargs.get('timeout'),
+                url=self.base_url
             )
             
             # Update statistics
@@ -229,17 +301,7 @@ class OllamaLLMInterface(LLMInterface):
             
             # Store in conversation history if enabled
             if kwargs.get('store_history', True):
-                self.conversation_history.append({
-                    'timestamp': time.time(),
-                    'prompt': prompt,
-                    'response': response,
-                    'model': self.current_model,
-                    'response_time': response_time
-                })
-                
-                # Limit history size
-                if len(self.conversation_history) > 100:
-                    self.conversation_history = self.conversation_history[-50:]
+                self._remember(prompt, response, self.current_model, response_time)
             
             return response
             
@@ -249,15 +311,77 @@ class OllamaLLMInterface(LLMInterface):
             return f"[LLM ERROR: {str(e)}]"
     
     def generate_with_context(self, prompt: str, context_messages: int = 5, **kwargs) -> str:
-        """Generate response with conversation context."""
-        if context_messages > 0 and self.conversation_history:
-            # Get recent conversation history
-            recent_history = self.conversation_history[-context_messages:]
-            context_prompt = self._build_context_prompt(recent_history, prompt)
-            return self.generate_response(context_prompt, **kwargs)
+        """
+        Generate response with conversation context.
+        
+        Up to context_messages earlier turns, chosen by relevance and
+        recency, are included together with the rolling summary of older
+        turns, within context_budget. History records the plain prompt.
+        """
+        if context_messages > 0 and (self.conversation_history or self.history_summary.folded_turns):
+            start_time = time.time()
+            context_prompt = self._assemble_context_prompt(prompt, context_messages,
+                                                           kwargs.get('system_prompt', ''))
+            response = self.generate_response(context_prompt, **{**kwargs, 'store_history': False})
+            if kwargs.get('store_history', True):
+                self._remember(prompt, response, kwargs.get('model', self.current_model),
+                               time.time() - start_time)
+            return response
         else:
             return self.generate_response(prompt, **kwargs)
     
+    async def stream_response(self, prompt: str, context_messages: int = 0,
+                              **kwargs) -> AsyncIterator[StreamChunk]:
+        """
+        Stream a response token by token.
+        
+        Yields StreamChunk objects as Ollama produces them. Statistics,
+        conversation history and the output archive are updated once, with
+        the assembled text, when the stream completes; a stream that fails
+        or is closed early by the consumer archives no partial output.
+        """
+        model = kwargs.get('model') or self.current_model
+        user_prompt = prompt
+        if context_messages > 0 and (self.conversation_history or self.history_summary.folded_turns):
+            prompt = self._assemble_context_prompt(prompt, context_messages, kwargs.get('system_prompt', ''))
+        
+        start_time = time.time()
+        with self._lock:
+            self.response_stats['total_requests'] += 1
+        _archive_prompt(prompt, "stream_response", model, timeout=kwargs.get('timeout'))
+        
+        parts = []
+        chunks = stream_ollama(
+            prompt,
+            model=model,
+            url=self.base_url,
+            system_prompt=kwargs.get('system_prompt'),
+            timeout=kwargs.get('timeout')
+        )
+        try:
+            async for chunk in chunks:
+                parts.append(chunk.text)
+                yield chunk
+        except (GeneratorExit, asyncio.CancelledError):
+            # Closed by the consumer (a cancel or a disconnect): neither a
+            # success nor a failure, and kept out of the average latency
+            with self._lock:
+                self.response_stats['cancelled_requests'] += 1
+            raise
+        except Exception:
+            self._update_response_stats(time.time() - start_time, success=False)
+            raise
+        finally:
+            await chunks.aclose()
+        
+        # Only reached when the stream ran to completion
+        response = "".join(parts).strip()
+        response_time = time.time() - start_time
+        self._update_response_stats(response_time, success=True)
+        if kwargs.get('store_history', True):
+            self._remember(user_prompt, response, model, response_time)
+        _archive_response(prompt, response, model)
+    
     def semantic_search_response(self, query: str, **kwargs) -> Dict[str, Any]:
         """Generate response with semantic analysis."""
         # Enhanced prompt for semantic understanding
@@ -286,26 +410,49 @@ Response:"""
             }
         }
     
-    def batch_generate(self, prompts: List[str], **kwargs) -> List[Dict[str, Any]]:
-        """Generate responses for multiple prompts."""
-        results = []
+    def batch_generate(self, prompts: List[str], max_in_flight: int = None,
+                       item_timeout: float = None, cancel_event: threading.Event = None,
+                       **kwargs) -> List[Dict[str, Any]]:
+        """
+        Generate responses for multiple prompts concurrently.
+        
+        Up to max_in_flight prompts run at once (adaptively reduced on errors
+        or latency spikes). Results are returned in input order; failed,
+        timed-out and cancelled items are reported individually and the full
+        report is kept in last_batch_report.
+        """
+        config = self.batch_config
+        if max_in_flight is not None:
+            config = replace(config, max_in_flight=max_in_flight,
+                             min_in_flight=min(config.min_in_flight, max_in_flight))
+        if item_timeout is not None:
+            config = replace(config, item_timeout=item_timeout)
         
-        for i, prompt in enumerate(prompts):
-            try:
-                response = self.generate_response(prompt, **kwargs)
-                results.append({
-                    'index': i,
-                    'prompt': prompt,
-                    'response': response,
-                    'success': True
-                })
-            except Exception as e:
-                results.append({
-                    'index': i,
-                    'prompt': prompt,
-                    'error': str(e),
-                    'success': False
-                })
+        def generate(prompt: str) -> str:
+            response = self.generate_response(prompt, **kwargs)
+            if response == "[LLM ERROR: timeout]":
+                raise TimeoutError(response)
+            if response.startswith("[LLM ERROR"):
+                raise RuntimeError(response)
+            return response
+        
+        report = BatchExecutor(generate, config).run(prompts, cancel_event=cancel_event)
+        self.last_batch_report = report
+        
+        results = []
+        for item in report.results:
+            entry = {
+                'index': item.index,
+                'prompt': item.input,
+                'success': item.success,
+                'status': item.status,
+                'latency': item.latency
+            }
+            if item.success:
+                entry['response'] = item.value
+            else:
+                entry['error'] = item.error
+            results.append(entry)
         
         return results
     
@@ -333,7 +480,10 @@ Response:"""
     
     def clear_history(self):
         """Clear conversation history."""
-        self.conversation_history.clear()
+        with self._lock:
+            self.conversation_history.clear()
+            self._folded_upto = self._turns
+        self.history_summary.clear()
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get interface statistics."""
@@ -341,9 +491,63 @@ Response:"""
             'response_stats': self.response_stats.copy(),
             'current_model': self.current_model,
             'history_length': len(self.conversation_history),
-            'available_models': self.get_available_models()
+            'available_models': self.get_available_models(),
+            'last_batch': self.last_batch_report.summary() if self.last_batch_report else None,
+            'coalescing': get_coalescing_stats(),
+            'context': {
+                'summary': self.history_summary.get_stats(),
+                'last_usage': self.last_context_usage
+            }
         }
     
+    def _remember(self, prompt: str, response: str, model: str, response_time: float):
+        """Append a turn to the history and fold turns leaving the live window into the summary"""
+        with self._lock:
+            self.conversation_history.append({
+                'timestamp': time.time(),
+                'prompt': prompt,
+                'response': response,
+                'model': model,
+                'response_time': response_time,
+                'turn': self._turns
+            })
+            self._turns += 1
+            
+            cutoff = self._turns - self.keep_recent_turns
+            expired = [entry for entry in self.conversation_history
+                       if self._folded_upto <= entry['turn'] < cutoff]
+            self._folded_upto = max(self._folded_upto, cutoff)
+            
+            # Limit history size
+            if len(self.conversation_history) > 100:
+                self.conversation_history = self.conversation_history[-50:]
+        
+        for entry in expired:
+            self.history_summary.fold(entry['prompt'], entry['response'])
+    
+    def _assemble_context_prompt(self, prompt: str, context_messages: int, system_prompt: str = '') -> str:
+        """Build a prompt with the summary and the best recent turns that fit the budget"""
+        with self._lock:
+            live = [entry for entry in self.conversation_history if entry['turn'] >= self._folded_upto]
+        
+        assembled = ContextAssembler(self.context_budget).assemble(
+            prompt,
+            system_prompt=system_prompt or '',
+            history=[(entry['prompt'], entry['response']) for entry in live],
+            summary=self.history_summary.text,
+            max_turns=context_messages
+        )
+        self.last_context_usage = assembled.usage
+        
+        context_parts = []
+        if assembled.summary_text:
+            context_parts.append(f"Earlier in this conversation:\n{assembled.summary_text}\n")
+        if assembled.history_text:
+            context_parts.append(assembled.history_text)
+        context_parts.append(f"User: {prompt}")
+        
+        return "\n".join(context_parts)
+    
     def _build_context_prompt(self, history: List[Dict[str, Any]], current_prompt: str) -> str:
         """Build prompt with conversation context."""
         context_parts = []
@@ -358,6 +562,10 @@ Response:"""
     
     def _update_response_stats(self, response_time: float, success: bool):
         """Update response statistics."""
+        with self._lock:
+            self._record_response_stats(response_time, success)
+    
+    def _record_response_stats(self, response_time: float, success: bool):
         if success:
             self.response_stats['successful_requests'] += 1
         else:
@@ -5,14 +5,22 @@ Enterprise-grade LLM management with advanced features
 
 import time
 import json
+import asyncio
 import threading
+import contextvars
 from typing import Dict, List, Any, Optional, Union, Callable
-from datetime import datetime, timedelta
-from dataclasses import dataclass, field
+from datetime import datetime
+from dataclasses import dataclass, field, asdict
 from enum import Enum
 import hashlib
 
 from ..core.error_handler import error_handler, ErrorLevel, safe_execute
+from ..utils.metrics_registry import get_metrics_registry
+from .dispatch import OllamaDispatcher, ProviderDispatcher, ProviderError
+from .rate_limit import RateLimit, RateLimitExceeded, RateLimiter, SCOPE_MODEL, MODE_REJECT
+from .response_cache import ResponseCache
+from .single_flight import SingleFlight
+from .transport import deadline_scope
 
 class LLMProvider(Enum):
     """Supported LLM providers"""
@@ -49,6 +57,9 @@ class ModelConfig:
     latency_target: float = 5.0  # seconds
     reliability_score: float = 1.0
     custom_params: Dict[str, Any] = field(default_factory=dict)
+    rate_limit_rpm: Optional[float] = 60  # None disables the per-model limit
+    rate_limit_burst: Optional[int] = None
+    rate_limit_algorithm: str = "gcra"  # or "token_bucket"
 
 @dataclass
 class LLMRequest:
@@ -65,6 +76,8 @@ class LLMRequest:
     timeout: float = 30.0
     retry_attempts: int = 3
     cache_enabled: bool = True
+    rate_limit_mode: str = MODE_REJECT  # "wait" queues for a slot until the timeout
+    coalesce: bool = True  # share the result of an identical request already in flight
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 @dataclass
@@ -82,6 +95,20 @@ class LLMResponse:
     metadata: Dict[str, Any] = field(default_factory=dict)
     timestamp: datetime = field(default_factory=datetime.now)
     request_id: str = ""
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form used by the response cache"""
+        data = asdict(self)
+        data["provider_used"] = self.provider_used.value
+        data["timestamp"] = self.timestamp.isoformat()
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LLMResponse":
+        data = dict(data)
+        data["provider_used"] = LLMProvider(data["provider_used"])
+        data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+        return cls(**data)
 
 class ProductionLLMInterface:
     """
@@ -94,11 +121,14 @@ class ProductionLLMInterface:
     - Model performance monitoring
     """
     
-    def __init__(self):
+    def __init__(self, response_cache: ResponseCache = None):
         self.models: Dict[str, ModelConfig] = {}
-        self.providers: Dict[LLMProvider, Any] = {}
+        self.providers: Dict[LLMProvider, ProviderDispatcher] = {}
         self.fallback_chains: Dict[str, List[str]] = {}
-        self.response_cache: Dict[str, LLMResponse] = {}
+        # Configured from JARVIS_LLM_CACHE_* (set JARVIS_LLM_CACHE_PATH to persist)
+        self.response_cache = response_cache if response_cache is not None else ResponseCache.from_env()
+        self.metrics = get_metrics_registry()
+        self.metrics.track_cache('llm_response', self.response_cache)
         self.usage_stats: Dict[str, Any] = {
             "total_requests": 0,
             "successful_requests": 0,
@@ -108,11 +138,13 @@ class ProductionLLMInterface:
             "average_latency": 0.0,
             "model_usage": {},
             "provider_usage": {},
-            "error_counts": {}
+            "error_counts": {},
+            "coalesced_requests": 0
         }
         
         self._lock = threading.RLock()
-        self._rate_limits: Dict[str, List[float]] = {}
+        self.rate_limiter = RateLimiter()
+        self._single_flight = SingleFlight()
         self._request_queue: List[LLMRequest] = []
         self._active_requests: Dict[str, LLMRequest] = {}
         
@@ -155,7 +187,7 @@ class ProductionLLMInterface:
         ]
         
         for model in ollama_models:
-            self.models[model.name] = model
+            self.add_custom_model(model)
         
         # Set up fallback chains
         self.fallback_chains = {
@@ -167,18 +199,12 @@ class ProductionLLMInterface:
     
     def _initialize_providers(self):
         """Initialize LLM providers"""
-        try:
-            # Import and initialize Ollama
-            from ...llm.llm_interface import OllamaInterface
-            ollama = OllamaInterface()
-            self.providers[LLMProvider.OLLAMA] = ollama
-            
-        except ImportError:
-            error_handler.log_error(
-                ImportError("Ollama interface not available"),
-                "LLM Provider Initialization", ErrorLevel.WARNING,
-                "Ollama provider not initialized"
-            )
+        self.providers[LLMProvider.OLLAMA] = OllamaDispatcher()
+    
+    def register_provider(self, provider: LLMProvider, dispatcher: ProviderDispatcher):
+        """Register the dispatcher that executes models of a provider"""
+        with self._lock:
+            self.providers[provider] = dispatcher
     
     @safe_execute(fallback_value=None, context="LLM Request Processing")
     def process_request(self, request: LLMRequest) -> Optional[LLMResponse]:
@@ -195,39 +221,41 @@ class ProductionLLMInterface:
             self.usage_stats["total_requests"] += 1
         
         try:
-            # Check cache first
-            if request.cache_enabled:
-                cached_response = self._check_cache(request)
-                if cached_response:
-                    cached_response.request_id = request_id
-                    return cached_response
-            
-            # Check rate limits
-            if not self._check_rate_limits(request.model):
-                raise Exception("Rate limit exceeded")
-            
-            # Select optimal model
-            selected_model = self._select_model(request)
-            
-            # Execute request with fallback
-            response = self._execute_with_fallback(request, selected_model)
-            
-            if response:
-                response.request_id = request_id
-                response.latency = time.time() - start_time
+            # One deadline bounds rate limit waits and every fallback attempt
+            with deadline_scope(request.timeout):
+                # Check cache first
+                if request.cache_enabled:
+                    cached_response = self._check_cache(request)
+                    if cached_response:
+                        cached_response.request_id = request_id
+                        self._count_request('cache_hit')
+                        return cached_response
                 
-                # Cache successful response
-                if request.cache_enabled and response.finish_reason == "completed":
-                    self._cache_response(request, response)
+                if request.coalesce:
+                    # Identical requests already in flight wait for that call; the
+                    # result is shared encoded so each caller decodes its own copy
+                    encoded, shared = self._single_flight.do(
+                        self._generate_cache_key(request),
+                        lambda: json.dumps(self._execute_request(request, start_time).to_dict(), default=str),
+                        timeout=request.timeout
+                    )
+                    response = LLMResponse.from_dict(json.loads(encoded))
+                else:
+                    response, shared = self._execute_request(request, start_time), False
                 
-                # Update usage statistics
-                self._update_usage_stats(response, success=True)
+                response.request_id = request_id
+                response.latency = time.time() - start_time
+                if shared:
+                    response.metadata["coalesced"] = True
                 
                 with self._lock:
                     self.usage_stats["successful_requests"] += 1
+                    if shared:
+                        self.usage_stats["coalesced_requests"] += 1
+                self._count_request('coalesced' if shared else 'completed')
+                
+                return response
                 
-            return response
-            
         except Exception as e:
             error_handler.log_error(
                 e, "LLM Request Processing", ErrorLevel.ERROR,
@@ -240,6 +268,9 @@ class ProductionLLMInterface:
                 if error_type not in self.usage_stats["error_counts"]:
                     self.usage_stats["error_counts"][error_type] = 0
                 self.usage_stats["error_counts"][error_type] += 1
+            self._count_request('failed')
+            if isinstance(e, RateLimitExceeded):
+                request.metadata["retry_after"] = e.retry_after
             
             return None
             
@@ -247,6 +278,34 @@ class ProductionLLMInterface:
             with self._lock:
                 self._active_requests.pop(request_id, None)
     
+    async def process_request_async(self, request: LLMRequest) -> Optional[LLMResponse]:
+        """asyncio entry point; coalesces with thread callers of process_request"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, contextvars.copy_context().run, self.process_request, request)
+    
+    def _execute_request(self, request: LLMRequest, start_time: float) -> LLMResponse:
+        """Select a model, execute with fallback, then cache and account the response"""
+        selected_model = self._select_model(request)
+        response = self._execute_with_fallback(request, selected_model)
+        response.latency = time.time() - start_time
+        
+        # Cache successful response
+        if request.cache_enabled and response.finish_reason == "completed":
+            self._cache_response(request, response)
+        
+        # Update usage statistics (once per backend call, not per coalesced caller)
+        self._update_usage_stats(response, success=True)
+        self.metrics.observe(
+            'llm.request_latency_seconds', response.latency,
+            {'model': response.model_used, 'provider': response.provider_used.value},
+            help="LLM backend call latency, including fallbacks"
+        )
+        return response
+    
+    def _count_request(self, outcome: str):
+        self.metrics.inc('llm.requests', 1, {'outcome': outcome},
+                         help="LLM requests by outcome (completed, cache_hit, coalesced, failed)")
+    
     def _generate_request_id(self, request: LLMRequest) -> str:
         """Generate unique request ID"""
         timestamp = str(int(time.time() * 1000))
@@ -254,21 +313,14 @@ class ProductionLLMInterface:
         return f"req_{timestamp}_{content_hash}"
     
     def _check_cache(self, request: LLMRequest) -> Optional[LLMResponse]:
-        """Check response cache for existing result"""
-        cache_key = self._generate_cache_key(request)
-        
-        cached_response = self.response_cache.get(cache_key)
-        if cached_response:
-            # Check if cache is still valid (1 hour default)
-            cache_age = datetime.now() - cached_response.timestamp
-            if cache_age < timedelta(hours=1):
-                cached_response.cached = True
-                return cached_response
-            else:
-                # Remove expired cache entry
-                self.response_cache.pop(cache_key, None)
+        """Check response cache for existing result (each hit is a private copy)"""
+        cached = self.response_cache.get(self._generate_cache_key(request))
+        if cached is None:
+            return None
         
-        return None
+        response = LLMResponse.from_dict(cached)
+        response.cached = True
+        return response
     
     def _generate_cache_key(self, request: LLMRequest) -> str:
         """Generate cache key for request"""
@@ -282,40 +334,26 @@ class ProductionLLMInterface:
         return hashlib.md5(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
     
     def _cache_response(self, request: LLMRequest, response: LLMResponse):
-        """Cache successful response"""
-        cache_key = self._generate_cache_key(request)
-        
-        # Limit cache size (keep last 1000 responses)
-        if len(self.response_cache) >= 1000:
-            # Remove oldest entries
-            sorted_cache = sorted(
-                self.response_cache.items(),
-                key=lambda x: x[1].timestamp
-            )
-            for current_key, _ in sorted_cache[:100]:
-                self.response_cache.pop(current_key, None)
-        
-        self.response_cache[cache_key] = response
+        """Cache successful response (LRU/TTL bounded, stored as a snapshot)"""
+        self.response_cache.put(self._generate_cache_key(request), response.to_dict())
     
-    def _check_rate_limits(self, model: str) -> bool:
-        """Check if request is within rate limits"""
-        current_time = time.time()
-        
-        if model not in self._rate_limits:
-            self._rate_limits[model] = []
-        
-        # Remove old requests (older than 1 minute)
-        self._rate_limits[model] = [
-            req_time for req_time in self._rate_limits[model]
-            if current_time - req_time < 60
-        ]
-        
-        # Check if under limit (60 requests per minute default)
-        if len(self._rate_limits[model]) < 60:
-            self._rate_limits[model].append(current_time)
-            return True
+    def _check_rate_limits(self, request: LLMRequest, model: str):
+        """Admit one attempt on a model or raise RateLimitExceeded
         
-        return False
+        Model, session and API key limits are checked and committed together,
+        so an attempt rejected by one scope uses no budget in the others.
+        """
+        self.rate_limiter.acquire(
+            model=model,
+            session_id=request.conversation_id,
+            api_key=request.metadata.get("api_key"),
+            mode=request.rate_limit_mode,
+            timeout=request.timeout
+        )
+    
+    def set_rate_limit(self, scope: str, limit: Optional[RateLimit], key: str = None):
+        """Set a session/api_key/model rate limit (scope default when key is None)"""
+        self.rate_limiter.set_limit(scope, limit, key)
     
     def _select_model(self, request: LLMRequest) -> str:
         """Select optimal model based on request requirements"""
@@ -345,19 +383,37 @@ class ProductionLLMInterface:
         # Default for general chat
         return "llama3:8b"
     
+    def _fallback_chain(self, request: LLMRequest, model: str) -> List[str]:
+        """Models to try in order: the selected model, then request or configured fallbacks"""
+        if request.fallback_models:
+            chain = [model] + list(request.fallback_models)
+        else:
+            chain = [model] + self.fallback_chains.get(model, [])
+        
+        unique = []
+        for name in chain:
+            if name not in unique:
+                unique.append(name)
+        return unique[:max(1, request.retry_attempts)]
+    
     def _execute_with_fallback(self, request: LLMRequest, model: str) -> Optional[LLMResponse]:
         """Execute request with automatic fallback"""
-        fallback_models = self.fallback_chains.get(model, [model])
+        attempted = []
+        rate_limited = []
         
-        for attempt, fallback_model in enumerate(fallback_models):
-            if attempt >= request.retry_attempts:
-                break
-            
+        for attempt, fallback_model in enumerate(self._fallback_chain(request, model)):
+            attempted.append(fallback_model)
             try:
                 response = self._execute_single_request(request, fallback_model)
-                if response:
-                    response.fallback_used = attempt > 0
-                    return response
+                response.fallback_used = attempt > 0
+                response.metadata["attempted_models"] = attempted
+                return response
+            
+            except RateLimitExceeded as e:
+                if e.scope != SCOPE_MODEL:
+                    # Session and API key limits reject every model alike
+                    raise
+                rate_limited.append(e)
                     
             except Exception as e:
                 error_handler.log_error(
@@ -367,60 +423,46 @@ class ProductionLLMInterface:
                 )
                 continue
         
-        return None
+        if rate_limited and len(rate_limited) == len(attempted):
+            # Only rate limits stood in the way: keep the earliest retry hint
+            raise min(rate_limited, key=lambda e: e.retry_after)
+        raise ProviderError(f"All models failed: {', '.join(attempted)}")
     
-    def _execute_single_request(self, request: LLMRequest, model: str) -> Optional[LLMResponse]:
-        """Execute single LLM request"""
+    def _execute_single_request(self, request: LLMRequest, model: str) -> LLMResponse:
+        """Execute single LLM request on one model through its provider"""
         model_config = self.models.get(model)
         if not model_config:
             raise ValueError(f"Model {model} not configured")
         
-        provider = self.providers.get(model_config.provider)
-        if not provider:
+        dispatcher = self.providers.get(model_config.provider)
+        if not dispatcher:
             raise ValueError(f"Provider {model_config.provider} not available")
         
-        start_time = time.time()
-        
-        # Prepare request parameters
-        params = {
-            "model": model,
-            "temperature": request.temperature or model_config.temperature,
-            "max_tokens": request.max_tokens or model_config.max_tokens,
-            "system_prompt": request.system_prompt,
-            "stream": request.stream
-        }
-        
-        # Execute based on provider type
-        if model_config.provider == LLMProvider.OLLAMA:
-            result = self._execute_ollama_request(request.prompt, params)
-        else:
-            raise ValueError(f"Provider {model_config.provider} not implemented")
+        self._check_rate_limits(request, model)
         
+        start_time = time.time()
+        result = dispatcher.execute(model_config, request)
         execution_time = time.time() - start_time
         
+        if not result.content:
+            raise ProviderError(f"Empty response from {model}")
+        
         # Calculate cost (if available)
-        tokens_used = len(request.prompt.split()) + len(result.split()) if result else 0
+        tokens_used = result.tokens_used
+        if tokens_used is None:
+            tokens_used = len(request.prompt.split()) + len(result.content.split())
         cost = tokens_used * model_config.cost_per_token
         
         return LLMResponse(
-            content=result,
+            content=result.content,
             model_used=model,
             provider_used=model_config.provider,
             tokens_used=tokens_used,
             latency=execution_time,
             cost=cost,
-            finish_reason="completed" if result else "error"
+            finish_reason=result.finish_reason
         )
     
-    def _execute_ollama_request(self, prompt: str, params: Dict[str, Any]) -> str:
-        """Execute Ollama-specific request"""
-        try:
-            # Use existing ollama interface
-            from ...llm.llm_interface import ask_local_llm
-            return ask_local_llm(prompt)
-        except Exception as e:
-            raise Exception(f"Ollama execution failed: {str(e)}")
-    
     def _update_usage_stats(self, response: LLMResponse, success: bool):
         """Update usage statistics"""
         with self._lock:
@@ -484,13 +526,17 @@ class ProductionLLMInterface:
                 stats["failure_rate"] = 0.0
             
             # Add cache statistics
+            cache_stats = self.response_cache.get_stats()
             stats["cache_stats"] = {
-                "cached_responses": len(self.response_cache),
-                "cache_hit_rate": 0.0  # Would need tracking to calculate accurately
+                "cached_responses": cache_stats["size"],
+                "cache_hit_rate": cache_stats["hit_rate"] / 100,
+                **cache_stats
             }
             
             # Add active request count
             stats["active_requests"] = len(self._active_requests)
+            stats["rate_limits"] = self.rate_limiter.get_stats()
+            stats["coalescing"] = self._single_flight.get_stats()
             
             return stats
     
@@ -498,6 +544,11 @@ class ProductionLLMInterface:
         """Add custom model configuration"""
         with self._lock:
             self.models[config.name] = config
+            limit = None
+            if config.rate_limit_rpm:
+                limit = RateLimit(config.rate_limit_rpm, 60.0, config.rate_limit_burst,
+                                  config.rate_limit_algorithm)
+            self.rate_limiter.set_limit(SCOPE_MODEL, limit, key=config.name)
     
     def set_fallback_chain(self, model: str, fallback_models: List[str]):
         """Set custom fallback chain for a model"""
@@ -506,8 +557,7 @@ class ProductionLLMInterface:
     
     def clear_cache(self):
         """Clear response cache"""
-        with self._lock:
-            self.response_cache.clear()
+        self.response_cache.clear()
     
     def get_model_performance(self, model: str) -> Dict[str, Any]:
         """Get performance metrics for specific model"""
@@ -8,6 +8,8 @@ from .anthropic_provider import AnthropicProvider
 from .mistral_provider import MistralProvider
 from .ollama_provider import OllamaProvider
 from .orchestrator import LLMOrchestrator, TaskRouter
+from .routing import RoutingConfig
+from .circuit_breaker import CircuitBreaker, CircuitBreakerConfig, CircuitState
 
 __all__ = [
     'LLMProvider',
@@ -21,5 +23,9 @@ __all__ = [
     'MistralProvider',
     'OllamaProvider',
     'LLMOrchestrator',
-    'TaskRouter'
+    'TaskRouter',
+    'RoutingConfig',
+    'CircuitBreaker',
+    'CircuitBreakerConfig',
+    'CircuitState'
 ]
\ No newline at end of file
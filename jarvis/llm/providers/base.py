@@ -3,6 +3,7 @@ Base classes and models for LLM providers
 """
 
 import time
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional, Union
 from dataclasses import dataclass
@@ -220,6 +221,32 @@ class LLMProvider(ABC):
         response = self.generate_response(request)
         yield response
     
+    async def astream_response(self, request: LLMRequest):
+        """
+        Async twin of stream_response
+        
+        The default pulls the synchronous stream in a worker thread, one
+        partial response at a time; providers with a native async stream
+        override it.
+        """
+        loop = asyncio.get_running_loop()
+        iterator = iter(self.stream_response(request))
+        done = object()
+        try:
+            while True:
+                response = await loop.run_in_executor(None, next, iterator, done)
+                if response is done:
+                    break
+                yield response
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close:
+                try:
+                    await loop.run_in_executor(None, close)
+                except ValueError:
+                    # Still running in a worker thread after cancellation; it ends on its own
+                    pass
+    
     def estimate_cost(self, request: LLMRequest) -> float:
         """
         Estimate cost for the request
@@ -285,9 +312,9 @@ class BaseLLMProvider(LLMProvider):
         self.default_model = default_model
         self._client = None
     
-    def validate_request(self, request: LLMRequest) -> bool:
-        """Basic request validation"""
-        capabilities = self.get_capabilities()
+    def validate_request(self, request: LLMRequest, capabilities: ProviderCapabilities = None) -> bool:
+        """Basic request validation; ``capabilities`` skips rebuilding the descriptor"""
+        capabilities = capabilities or self.get_capabilities()
         
         # Check multimodal support
         if request.requires_multimodal and not (capabilities.supports_vision or capabilities.supports_audio):
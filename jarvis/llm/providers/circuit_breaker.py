@@ -0,0 +1,192 @@
+"""
+Per-provider circuit breakers
+
+A breaker watches the outcomes of the last ``window_size`` calls to one
+provider. Once at least ``minimum_calls`` are recorded and either the
+failure rate or the slow-call rate crosses its threshold, the circuit
+opens and calls are rejected immediately instead of waiting for a dead
+provider's timeout. After ``open_duration`` seconds the circuit goes
+half-open and lets ``half_open_max_calls`` trial calls through: if they
+all succeed it closes, if any fails it opens again.
+
+The clock is injectable so state transitions can be tested
+deterministically.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(Enum):
+    """Circuit breaker states"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class CircuitBreakerConfig:
+    """Thresholds for opening and closing a circuit"""
+    window_size: int = 20
+    minimum_calls: int = 5
+    failure_rate_threshold: float = 0.5
+    slow_call_threshold: float = 30.0
+    slow_call_rate_threshold: float = 0.8
+    open_duration: float = 30.0
+    half_open_max_calls: int = 1
+    probe_prompt: str = "ping"
+
+    def __post_init__(self):
+        if self.window_size < 1 or self.minimum_calls < 1 or self.half_open_max_calls < 1:
+            raise ValueError("window_size, minimum_calls and half_open_max_calls must be positive")
+        if self.minimum_calls > self.window_size:
+            raise ValueError("minimum_calls cannot exceed window_size")
+        for name in ("failure_rate_threshold", "slow_call_rate_threshold"):
+            if not 0 < getattr(self, name) <= 1:
+                raise ValueError(f"{name} must be in (0, 1]")
+        if self.slow_call_threshold <= 0 or self.open_duration < 0:
+            raise ValueError("slow_call_threshold must be positive and open_duration non-negative")
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a count-based sliding window"""
+
+    def __init__(self, name: str, config: CircuitBreakerConfig = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.config = config or CircuitBreakerConfig()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._outcomes = deque(maxlen=self.config.window_size)  # (failed, slow)
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        self.stats = {
+            'calls': 0,
+            'failures': 0,
+            'slow_calls': 0,
+            'rejected': 0,
+            'times_opened': 0
+        }
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def _refresh(self):
+        """Move an expired open circuit to half-open (caller holds the lock)"""
+        if self._state == CircuitState.OPEN and self._clock() - self._opened_at >= self.config.open_duration:
+            self._transition(CircuitState.HALF_OPEN)
+
+    def _transition(self, state: CircuitState):
+        previous, self._state = self._state, state
+        if state == CircuitState.OPEN:
+            self._opened_at = self._clock()
+            self.stats['times_opened'] += 1
+        if state != CircuitState.HALF_OPEN:
+            self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        if state == CircuitState.CLOSED:
+            self._outcomes.clear()
+        log = logger.warning if state == CircuitState.OPEN else logger.info
+        log(f"Circuit for {self.name}: {previous.value} -> {state.value}")
+
+    def is_available(self) -> bool:
+        """Whether a call would currently be allowed, without claiming a trial slot"""
+        with self._lock:
+            self._refresh()
+            if self._state == CircuitState.CLOSED:
+                return True
+            if self._state == CircuitState.HALF_OPEN:
+                return self._half_open_in_flight < self.config.half_open_max_calls
+            return False
+
+    def allow_request(self) -> bool:
+        """
+        Claim permission for one call
+
+        Every allowed call must be followed by ``record``; a rejected call
+        must not be.
+        """
+        with self._lock:
+            self._refresh()
+            if self._state == CircuitState.CLOSED:
+                return True
+            if (self._state == CircuitState.HALF_OPEN and
+                    self._half_open_in_flight < self.config.half_open_max_calls):
+                self._half_open_in_flight += 1
+                return True
+            self.stats['rejected'] += 1
+            return False
+
+    def record(self, duration: float, success: bool):
+        """Record the outcome of an allowed call"""
+        slow = duration >= self.config.slow_call_threshold
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['failures'] += not success
+            self.stats['slow_calls'] += slow
+
+            if self._state == CircuitState.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                if not success or slow:
+                    self._transition(CircuitState.OPEN)
+                else:
+                    self._half_open_successes += 1
+                    if self._half_open_successes >= self.config.half_open_max_calls:
+                        self._transition(CircuitState.CLOSED)
+                return
+
+            if self._state == CircuitState.OPEN:
+                # A call allowed before the circuit opened; it no longer matters
+                return
+
+            self._outcomes.append((not success, slow))
+            if len(self._outcomes) < self.config.minimum_calls:
+                return
+            failure_rate, slow_rate = self._rates()
+            if (failure_rate >= self.config.failure_rate_threshold or
+                    slow_rate >= self.config.slow_call_rate_threshold):
+                self._transition(CircuitState.OPEN)
+
+    def _rates(self):
+        count = len(self._outcomes)
+        if not count:
+            return 0.0, 0.0
+        failures = sum(failed for failed, _ in self._outcomes)
+        slow = sum(slow for _, slow in self._outcomes)
+        return failures / count, slow / count
+
+    def force_open(self):
+        with self._lock:
+            self._transition(CircuitState.OPEN)
+
+    def reset(self):
+        with self._lock:
+            self._transition(CircuitState.CLOSED)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            failure_rate, slow_rate = self._rates()
+            retry_in = 0.0
+            if self._state == CircuitState.OPEN:
+                retry_in = max(0.0, self.config.open_duration - (self._clock() - self._opened_at))
+            return {
+                **self.stats,
+                'state': self._state.value,
+                'failure_rate': failure_rate,
+                'slow_call_rate': slow_rate,
+                'window_calls': len(self._outcomes),
+                'retry_in': retry_in
+            }
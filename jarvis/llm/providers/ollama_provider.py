@@ -4,9 +4,10 @@ Ollama Provider for local models
 
 import time
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional
 
 from .base import BaseLLMProvider, ProviderType, ProviderCapabilities, LLMRequest, LLMResponse, LLMError
+from ..streaming import iter_ollama_stream, stream_ollama
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +18,7 @@ class OllamaProvider(BaseLLMProvider):
     """
     
     def __init__(self, 
-                 base_url: str = "http://localhost:11434",
+                 base_url: Optional[str] = None,
                  default_model: str = "llama3:8b"):
         super().__init__(
             provider_type=ProviderType.OLLAMA,
@@ -25,13 +26,22 @@ class OllamaProvider(BaseLLMProvider):
             default_model=default_model
         )
     
+    @property
+    def generate_url(self) -> str:
+        """/api/generate endpoint; defaults to the configured OLLAMA_URL"""
+        if not self.base_url:
+            from ..llm_interface import OLLAMA_URL
+            return OLLAMA_URL
+        base = self.base_url.rstrip("/")
+        return base if base.endswith("/api/generate") else f"{base}/api/generate"
+    
     def generate_response(self, request: LLMRequest) -> LLMResponse:
         """Generate response using Ollama API"""
         start_time = time.time()
         
         try:
             # Import existing Ollama interface
-            from ...llm_interface import ask_local_llm
+            from ..llm_interface import ask_local_llm
             
             # Use existing Ollama implementation
             response_text = ask_local_llm(
@@ -39,7 +49,8 @@ class OllamaProvider(BaseLLMProvider):
                 system_prompt=request.system_prompt,
                 temperature=request.temperature,
                 max_tokens=request.max_tokens,
-                model=self.default_model
+                model=self.default_model,
+                url=self.generate_url
             )
             
             # Check for errors
@@ -74,10 +85,77 @@ class OllamaProvider(BaseLLMProvider):
             self._update_stats(error_response)
             return error_response
     
+    def _stream_kwargs(self, request: LLMRequest) -> Dict[str, Any]:
+        return {
+            'model': self.default_model,
+            'url': self.generate_url,
+            'system_prompt': request.system_prompt,
+            'temperature': request.temperature,
+            'top_p': request.top_p,
+            'max_tokens': request.max_tokens
+        }
+    
+    def _partial(self, text: str, accumulated: str, start_time: float) -> LLMResponse:
+        return LLMResponse(
+            content=text,
+            provider="ollama",
+            model=self.default_model,
+            response_time=time.time() - start_time,
+            metadata={"is_partial": True, "accumulated_content": accumulated}
+        )
+    
+    def _final(self, accumulated: str, start_time: float, error: str = None) -> LLMResponse:
+        response = LLMResponse(
+            content=accumulated if error is None else "",
+            provider="ollama",
+            model=self.default_model,
+            response_time=time.time() - start_time,
+            finish_reason="stop" if error is None else None,
+            metadata={"is_final": True},
+            error=error
+        )
+        self._update_stats(response)
+        return response
+    
+    def stream_response(self, request: LLMRequest) -> Iterator[LLMResponse]:
+        """Stream partial responses as Ollama generates them"""
+        request.stream = True
+        start_time = time.time()
+        accumulated = ""
+        try:
+            for chunk in iter_ollama_stream(request.prompt, **self._stream_kwargs(request)):
+                accumulated += chunk.text
+                if chunk.text:
+                    yield self._partial(chunk.text, accumulated, start_time)
+        except Exception as e:
+            logger.error(f"Ollama streaming error: {e}")
+            yield self._final(accumulated, start_time, error=str(e))
+            return
+        yield self._final(accumulated, start_time)
+    
+    async def astream_response(self, request: LLMRequest) -> AsyncIterator[LLMResponse]:
+        """Native async stream over the pooled asyncio transport"""
+        request.stream = True
+        start_time = time.time()
+        accumulated = ""
+        chunks = stream_ollama(request.prompt, **self._stream_kwargs(request))
+        try:
+            async for chunk in chunks:
+                accumulated += chunk.text
+                if chunk.text:
+                    yield self._partial(chunk.text, accumulated, start_time)
+        except Exception as e:
+            logger.error(f"Ollama streaming error: {e}")
+            yield self._final(accumulated, start_time, error=str(e))
+            return
+        finally:
+            await chunks.aclose()
+        yield self._final(accumulated, start_time)
+    
     def get_capabilities(self) -> ProviderCapabilities:
         """Get Ollama provider capabilities"""
         return ProviderCapabilities(
-            supports_streaming=False,  # Not implemented in current interface
+            supports_streaming=True,
             supports_function_calling=False,
             supports_vision=False,
             supports_audio=False,
@@ -94,11 +172,11 @@ class OllamaProvider(BaseLLMProvider):
     def get_available_models(self) -> List[str]:
         """Get list of available Ollama models"""
         try:
-            from ...llm_interface import get_available_models
+            from ..llm_interface import get_available_models
             return get_available_models()
         except:
             return ["llama3:8b", "codellama:13b", "codellama:34b", "llama3:70b"]
     
     def estimate_cost(self, request: LLMRequest) -> float:
         """Estimate cost for Ollama request (always free)"""
-        return 0.0
\ No newline at end of file
+        return 0.0
@@ -4,11 +4,15 @@ LLM Orchestrator for intelligent provider selection and task routing
 
 import time
 import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Dict, Any, List, Optional, Union
 from dataclasses import dataclass
 from enum import Enum
 
-from .base import LLMProvider, LLMRequest, LLMResponse, TaskType, ProviderType
+from .base import BaseLLMProvider, LLMProvider, LLMRequest, LLMResponse, TaskType, ProviderType
+from .routing import CapabilityCache, ProviderPerformance, RoutingConfig
+from .circuit_breaker import CircuitBreaker, CircuitBreakerConfig, CircuitState
 
 logger = logging.getLogger(__name__)
 
@@ -21,14 +25,27 @@ class ProviderScore:
     reasoning: str
     estimated_cost: float
     estimated_time: float
+    success_rate: float = 1.0
+    within_constraints: bool = True
 
 
 class TaskRouter:
     """
     Intelligent task routing for LLM providers
+    
+    Capability descriptors are cached per provider, and each provider's
+    latency and success rate are learned from ``record_outcome``. Providers
+    are ranked by predicted tail latency (p95 by default) and cost under the
+    request's constraints (``max_latency`` / ``max_cost`` in the preferences
+    or request metadata).
     """
     
-    def __init__(self):
+    def __init__(self, config: RoutingConfig = None, clock=time.monotonic):
+        self.config = config or RoutingConfig()
+        self.capabilities = CapabilityCache(ttl=self.config.capability_ttl, clock=clock)
+        self._performance: Dict[int, Any] = {}
+        self._capability_scores: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
         self.routing_rules = {
             TaskType.MULTIMODAL: {
                 'preferred_providers': [ProviderType.OPENAI],
@@ -72,7 +89,8 @@ class TaskRouter:
         Args:
             request: LLM request
             available_providers: List of available providers
-            preferences: User preferences (cost_priority, speed_priority, etc.)
+            preferences: User preferences (cost_priority, speed_priority,
+                max_latency, max_cost, etc.)
             
         Returns:
             Selected LLM provider or None
@@ -80,31 +98,57 @@ class TaskRouter:
         if not available_providers:
             return None
         
-        task_type = request.task_type
-        routing_rule = self.routing_rules.get(task_type, self.routing_rules[TaskType.GENERAL_CHAT])
-        
-        # Score all providers
-        provider_scores = []
-        
-        for provider in available_providers:
-            score = self._score_provider(provider, request, routing_rule, preferences or {})
-            if score.score > 0:  # Only consider viable providers
-                provider_scores.append(score)
+        provider_scores = self.rank_providers(request, available_providers, preferences)
         
         if not provider_scores:
             # Fallback to first available provider
-            logger.warning(f"No suitable providers found for {task_type}, using first available")
+            logger.warning(f"No suitable providers found for {request.task_type}, using first available")
             return available_providers[0]
         
-        # Sort by score and return best
-        provider_scores.sort(key=lambda x: x.score, reverse=True)
         best_provider = provider_scores[0]
         
-        logger.info(f"Selected {best_provider.provider.provider_type.value} for {task_type} "
+        logger.info(f"Selected {best_provider.provider.provider_type.value} for {request.task_type} "
                    f"(score: {best_provider.score:.2f}, reason: {best_provider.reasoning})")
         
         return best_provider.provider
     
+    def rank_providers(self,
+                       request: LLMRequest,
+                       available_providers: List[LLMProvider],
+                       preferences: Dict[str, Any] = None) -> List[ProviderScore]:
+        """
+        Viable providers, best first
+        
+        Providers that meet the latency and cost constraints come first; if
+        none do, the constraints are treated as soft and the remaining
+        viable providers are returned in score order.
+        """
+        preferences = preferences or {}
+        routing_rule = self.routing_rules.get(request.task_type, self.routing_rules[TaskType.GENERAL_CHAT])
+        
+        provider_scores = [
+            score for score in (
+                self._score_provider(provider, request, routing_rule, preferences)
+                for provider in available_providers
+            )
+            if score.score > 0  # Only consider viable providers
+        ]
+        # Equal scores go to the provider with the shorter predicted tail
+        provider_scores.sort(key=lambda x: (x.score, -x.estimated_time), reverse=True)
+        
+        within = [score for score in provider_scores if score.within_constraints]
+        if within or not provider_scores:
+            return within
+        logger.warning(f"No provider meets the constraints for {request.task_type}, relaxing them")
+        return provider_scores
+    
+    def _constraints(self, request: LLMRequest, preferences: Dict[str, Any]) -> Dict[str, Optional[float]]:
+        """Latency and cost limits from preferences, falling back to request metadata"""
+        return {
+            name: preferences.get(name, request.metadata.get(name))
+            for name in ('max_latency', 'max_cost')
+        }
+    
     def _score_provider(self, 
                        provider: LLMProvider,
                        request: LLMRequest,
@@ -112,7 +156,7 @@ class TaskRouter:
                        preferences: Dict[str, Any]) -> ProviderScore:
         """Score a provider for the given request"""
         
-        capabilities = provider.get_capabilities()
+        capabilities = self.capabilities.get(provider)
         
         # Check requirements
         requirements = routing_rule.get('requirements', [])
@@ -127,7 +171,11 @@ class TaskRouter:
                 )
         
         # Check if provider can handle the request
-        if not provider.validate_request(request):
+        if isinstance(provider, BaseLLMProvider):
+            valid = provider.validate_request(request, capabilities)
+        else:
+            valid = provider.validate_request(request)
+        if not valid:
             return ProviderScore(
                 provider=provider,
                 score=0.0,
@@ -145,7 +193,7 @@ class TaskRouter:
         estimated_cost = provider.estimate_cost(request)
         cost_score = self._calculate_cost_score(estimated_cost, preferences)
         
-        # Calculate speed score
+        # Calculate speed score from the predicted tail latency
         estimated_time = self._estimate_response_time(provider, request)
         speed_score = self._calculate_speed_score(estimated_time, preferences)
         
@@ -163,14 +211,27 @@ class TaskRouter:
         elif preferences.get('speed_priority') == 'high':
             final_score = final_score * 0.7 + speed_score * 0.3
         
-        reasoning = f"capability: {capability_score:.2f}, cost: {cost_score:.2f}, speed: {speed_score:.2f}"
+        # A provider that keeps failing is worth proportionally less
+        success_rate = self.performance_for(provider).success_rate
+        final_score *= success_rate
+        
+        constraints = self._constraints(request, preferences)
+        within_constraints = (
+            (constraints['max_latency'] is None or estimated_time <= constraints['max_latency']) and
+            (constraints['max_cost'] is None or estimated_cost <= constraints['max_cost'])
+        )
+        
+        reasoning = (f"capability: {capability_score:.2f}, cost: {cost_score:.2f}, speed: {speed_score:.2f}, "
+                     f"p{int(self.config.quantile * 100)}: {estimated_time:.2f}s, success: {success_rate:.2f}")
         
         return ProviderScore(
             provider=provider,
             score=final_score,
             reasoning=reasoning,
             estimated_cost=estimated_cost,
-            estimated_time=estimated_time
+            estimated_time=estimated_time,
+            success_rate=success_rate,
+            within_constraints=within_constraints
         )
     
     def _calculate_capability_score(self, 
@@ -178,9 +239,16 @@ class TaskRouter:
                                    request: LLMRequest,
                                    routing_rule: Dict[str, Any]) -> float:
         """Calculate capability score for provider"""
+        capabilities = self.capabilities.get(provider)
+        
+        # Memoized per descriptor; a refreshed descriptor is scored again
+        key = (id(provider), id(routing_rule), request.requires_multimodal, request.requires_function_calling)
+        cached = self._capability_scores.get(key)
+        if cached is not None and cached[0] is capabilities:
+            return cached[1]
+        
         score = 0.5  # Base score
         
-        capabilities = provider.get_capabilities()
         provider_type = provider.provider_type
         
         # Preference bonus
@@ -201,7 +269,9 @@ class TaskRouter:
         elif capabilities.max_context_length >= 8000:
             score += 0.05
         
-        return min(1.0, score)
+        score = min(1.0, score)
+        self._capability_scores[key] = (capabilities, score)
+        return score
     
     def _calculate_cost_score(self, estimated_cost: float, preferences: Dict[str, Any]) -> float:
         """Calculate cost score (higher score = lower cost)"""
@@ -226,11 +296,11 @@ class TaskRouter:
             return 0.2
     
     def _estimate_response_time(self, provider: LLMProvider, request: LLMRequest) -> float:
-        """Estimate response time for provider"""
-        stats = provider.get_stats()
-        avg_time = stats.get('avg_response_time', 2.0)
-        
-        # Adjust for request complexity
+        """Predicted tail latency for provider"""
+        return self.predict_latency(provider, request)
+    
+    def _complexity_factor(self, request: LLMRequest) -> float:
+        """Adjust for request complexity"""
         complexity_factor = 1.0
         
         if request.requires_multimodal:
@@ -239,29 +309,115 @@ class TaskRouter:
         if request.max_tokens and request.max_tokens > 1000:
             complexity_factor *= 1.3
         
-        return avg_time * complexity_factor
+        return complexity_factor
+    
+    def performance_for(self, provider: LLMProvider) -> ProviderPerformance:
+        """Learned performance model for provider"""
+        key = id(provider)
+        with self._lock:
+            entry = self._performance.get(key)
+            if entry is None or entry[0] is not provider:
+                entry = (provider, ProviderPerformance(self.config))
+                self._performance[key] = entry
+            return entry[1]
+    
+    def predict_latency(self, provider: LLMProvider, request: LLMRequest, quantile: float = None) -> float:
+        """
+        Predicted response time at ``quantile`` (the configured one by default)
+        
+        Before the provider is calibrated the prior is its own average
+        response time, or ``config.prior_latency`` if it has none.
+        """
+        prior = provider.get_stats().get('avg_response_time') or self.config.prior_latency
+        predicted = self.performance_for(provider).predict(quantile, prior=prior)
+        return predicted * self._complexity_factor(request)
+    
+    def hedge_delay(self, provider: LLMProvider, request: LLMRequest) -> Optional[float]:
+        """
+        How long to wait on provider before hedging to a second one
+        
+        None when hedging is disabled or the provider's tail is not yet
+        known; hedging on a guessed tail would mostly duplicate requests.
+        """
+        if not self.config.hedge or not self.performance_for(provider).calibrated:
+            return None
+        delay = self.predict_latency(provider, request, self.config.hedge_quantile)
+        return max(self.config.min_hedge_delay, delay)
+    
+    def record_outcome(self, provider: LLMProvider, latency: float, success: bool):
+        """Feed one completed call into provider's performance model"""
+        self.performance_for(provider).observe(latency, success)
+    
+    def invalidate(self, provider: LLMProvider = None):
+        """Drop cached capabilities (and derived scores) for provider, or all providers"""
+        self.capabilities.invalidate(provider)
+        with self._lock:
+            if provider is None:
+                self._capability_scores.clear()
+            else:
+                for key in [key for key in self._capability_scores if key[0] == id(provider)]:
+                    del self._capability_scores[key]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Capability cache and per-provider performance statistics"""
+        with self._lock:
+            entries = list(self._performance.values())
+        return {
+            'capability_cache': self.capabilities.get_stats(),
+            'providers': {
+                f"{provider.provider_type.value}:{id(provider):x}": performance.get_stats()
+                for provider, performance in entries
+            }
+        }
 
 
 class LLMOrchestrator:
     """
     Main orchestrator for managing multiple LLM providers
+    
+    Every call's latency and outcome feed the task router's performance
+    model. Once the selected provider's tail latency is known, a request
+    that outlives it is hedged to the next-ranked provider and the first
+    successful response wins.
+    
+    Each provider also has a circuit breaker. Providers with an open
+    circuit are left out of selection and the fallback chain, so requests
+    do not pay a dead provider's timeout; ``probe_open_circuits`` (or the
+    background prober) sends trial requests to bring them back.
     """
     
-    def __init__(self):
+    def __init__(self, routing_config: RoutingConfig = None, max_hedge_workers: int = 8,
+                 clock=time.monotonic, breaker_config: CircuitBreakerConfig = None):
         self.providers: Dict[str, LLMProvider] = {}
-        self.task_router = TaskRouter()
+        self.task_router = TaskRouter(routing_config, clock=clock)
+        self._clock = clock
+        self.breaker_config = breaker_config or CircuitBreakerConfig()
+        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
         self.fallback_chain: List[str] = []
+        self.max_hedge_workers = max_hedge_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._probe_thread: Optional[threading.Thread] = None
+        self._probe_stop = threading.Event()
+        self._stats_lock = threading.RLock()
         self.usage_stats = {
             'total_requests': 0,
             'successful_requests': 0,
             'failed_requests': 0,
+            'hedged_requests': 0,
+            'hedge_wins': 0,
+            'short_circuited': 0,
+            'probes': 0,
             'provider_usage': {},
             'total_cost': 0.0
         }
     
     def register_provider(self, name: str, provider: LLMProvider):
         """Register a new provider"""
+        previous = self.providers.get(name)
+        if previous is not None:
+            self.task_router.invalidate(previous)
         self.providers[name] = provider
+        self.circuit_breakers[name] = CircuitBreaker(name, self.breaker_config, clock=self._clock)
         self.usage_stats['provider_usage'][name] = {
             'requests': 0,
             'successes': 0,
@@ -290,29 +446,51 @@ class LLMOrchestrator:
         Returns:
             LLM response
         """
-        self.usage_stats['total_requests'] += 1
+        with self._stats_lock:
+            self.usage_stats['total_requests'] += 1
+        
+        tried = set()
         
         # Try preferred provider first
-        if preferred_provider and preferred_provider in self.providers:
+        if preferred_provider and preferred_provider in self.providers and self._is_available(preferred_provider):
             provider = self.providers[preferred_provider]
             if provider.validate_request(request):
+                tried.add(preferred_provider)
                 response = self._try_provider(provider, request, preferred_provider)
                 if response.is_successful:
                     return response
         
-        # Select best provider using task router
-        available_providers = list(self.providers.values())
-        selected_provider = self.task_router.select_provider(request, available_providers, preferences)
+        # Select best provider using task router, skipping open circuits
+        available_providers = [
+            provider for name, provider in self.providers.items()
+            if name not in tried and self._is_available(name)
+        ]
+        ranked = self.task_router.rank_providers(request, available_providers, preferences)
+        if ranked:
+            selected_provider = ranked[0].provider
+        elif available_providers:
+            logger.warning(f"No suitable providers found for {request.task_type}, using first available")
+            selected_provider = available_providers[0]
+        else:
+            selected_provider = None
         
         if selected_provider:
             provider_name = self._get_provider_name(selected_provider)
-            response = self._try_provider(selected_provider, request, provider_name)
+            tried.add(provider_name)
+            backup = next((score.provider for score in ranked[1:] if score.provider is not selected_provider), None)
+            hedge_after = self.task_router.hedge_delay(selected_provider, request) if backup else None
+            if hedge_after is not None:
+                response = self._try_hedged(selected_provider, provider_name, backup,
+                                            self._get_provider_name(backup), request, hedge_after)
+            else:
+                response = self._try_provider(selected_provider, request, provider_name)
             if response.is_successful:
                 return response
         
         # Try fallback chain
         for provider_name in self.fallback_chain:
-            if provider_name in self.providers:
+            if provider_name in self.providers and provider_name not in tried and self._is_available(provider_name):
+                tried.add(provider_name)
                 provider = self.providers[provider_name]
                 if provider.validate_request(request):
                     response = self._try_provider(provider, request, provider_name)
@@ -321,7 +499,8 @@ class LLMOrchestrator:
                         return response
         
         # All providers failed
-        self.usage_stats['failed_requests'] += 1
+        with self._stats_lock:
+            self.usage_stats['failed_requests'] += 1
         return LLMResponse(
             content="",
             provider="orchestrator",
@@ -331,16 +510,61 @@ class LLMOrchestrator:
     
     def _try_provider(self, provider: LLMProvider, request: LLMRequest, provider_name: str) -> LLMResponse:
         """Try to get response from a specific provider"""
+        response = self._call_provider(provider, request, provider_name)
+        self._count_outcome(response)
+        return response
+    
+    def _is_available(self, provider_name: str) -> bool:
+        breaker = self.circuit_breakers.get(provider_name)
+        return breaker is None or breaker.is_available()
+    
+    def _call_provider(self, provider: LLMProvider, request: LLMRequest, provider_name: str) -> LLMResponse:
+        """
+        Call provider through its circuit breaker, updating its usage
+        statistics and the router's performance model
+        """
+        breaker = self.circuit_breakers.get(provider_name)
+        if breaker is not None and not breaker.allow_request():
+            with self._stats_lock:
+                self.usage_stats['short_circuited'] += 1
+            return LLMResponse(
+                content="",
+                provider=provider_name,
+                model="unknown",
+                error=f"Circuit open for provider {provider_name}"
+            )
+        
+        start_time = self._clock()
         try:
             response = provider.generate_response(request)
+        except Exception as e:
+            logger.error(f"Provider {provider_name} error: {e}")
+            duration = self._clock() - start_time
+            self.task_router.record_outcome(provider, duration, False)
+            if breaker is not None:
+                breaker.record(duration, False)
+            with self._stats_lock:
+                self.usage_stats['provider_usage'][provider_name]['failures'] += 1
             
-            # Update statistics
+            return LLMResponse(
+                content="",
+                provider=provider_name,
+                model="unknown",
+                error=str(e)
+            )
+        
+        duration = self._clock() - start_time
+        self.task_router.record_outcome(provider, duration, response.is_successful)
+        if breaker is not None:
+            breaker.record(duration, response.is_successful)
+        
+        # Update statistics
+        with self._stats_lock:
             stats = self.usage_stats['provider_usage'][provider_name]
             stats['requests'] += 1
             
             if response.is_successful:
                 stats['successes'] += 1
-                self.usage_stats['successful_requests'] += 1
                 
                 # Update cost tracking
                 if response.total_tokens and hasattr(provider, 'estimate_cost'):
@@ -349,21 +573,114 @@ class LLMOrchestrator:
                     self.usage_stats['total_cost'] += estimated_cost
             else:
                 stats['failures'] += 1
+        
+        return response
+    
+    def _count_outcome(self, response: LLMResponse):
+        with self._stats_lock:
+            if response.is_successful:
+                self.usage_stats['successful_requests'] += 1
+            else:
                 self.usage_stats['failed_requests'] += 1
-            
+    
+    def _try_hedged(self,
+                    primary: LLMProvider,
+                    primary_name: str,
+                    backup: LLMProvider,
+                    backup_name: str,
+                    request: LLMRequest,
+                    hedge_after: float) -> LLMResponse:
+        """
+        Call primary; if it outlives ``hedge_after`` seconds, race backup against it
+        
+        The first successful response is returned. Provider calls cannot be
+        interrupted, so the loser runs to completion in the background and
+        still feeds the router's statistics.
+        """
+        executor = self._get_executor()
+        first = executor.submit(self._call_provider, primary, request, primary_name)
+        done, _ = wait([first], timeout=hedge_after)
+        if done:
+            response = first.result()
+            self._count_outcome(response)
             return response
-            
-        except Exception as e:
-            logger.error(f"Provider {provider_name} error: {e}")
-            self.usage_stats['provider_usage'][provider_name]['failures'] += 1
-            self.usage_stats['failed_requests'] += 1
-            
-            return LLMResponse(
-                content="",
-                provider=provider_name,
-                model="unknown",
-                error=str(e)
-            )
+        
+        logger.info(f"Hedging {primary_name} after {hedge_after:.2f}s with {backup_name}")
+        with self._stats_lock:
+            self.usage_stats['hedged_requests'] += 1
+        second = executor.submit(self._call_provider, backup, request, backup_name)
+        
+        pending = {first, second}
+        failed = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                response = future.result()
+                if response.is_successful:
+                    if future is second:
+                        with self._stats_lock:
+                            self.usage_stats['hedge_wins'] += 1
+                    self._count_outcome(response)
+                    return response
+                failed = failed or response
+        
+        self._count_outcome(failed)
+        return failed
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._stats_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_hedge_workers,
+                                                    thread_name_prefix="llm-hedge")
+            return self._executor
+    
+    def probe_open_circuits(self) -> Dict[str, str]:
+        """
+        Send a trial request to every provider whose circuit is half-open
+        
+        Returns the circuit state of each probed provider afterwards.
+        """
+        probed = {}
+        for name, breaker in list(self.circuit_breakers.items()):
+            if breaker.state != CircuitState.HALF_OPEN:
+                continue
+            with self._stats_lock:
+                self.usage_stats['probes'] += 1
+            probe = LLMRequest(prompt=self.breaker_config.probe_prompt, max_tokens=1,
+                               metadata={'health_probe': True})
+            self._call_provider(self.providers[name], probe, name)
+            probed[name] = breaker.state.value
+        return probed
+    
+    def start_health_probes(self, interval: float = 5.0):
+        """Probe half-open circuits from a background thread every ``interval`` seconds"""
+        if self._probe_thread is not None and self._probe_thread.is_alive():
+            return
+        self._probe_stop.clear()
+        
+        def run():
+            while not self._probe_stop.wait(interval):
+                try:
+                    self.probe_open_circuits()
+                except Exception as e:
+                    logger.error(f"Health probe error: {e}")
+        
+        self._probe_thread = threading.Thread(target=run, name="llm-health-probe", daemon=True)
+        self._probe_thread.start()
+    
+    def stop_health_probes(self):
+        self._probe_stop.set()
+        thread, self._probe_thread = self._probe_thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+    
+    def shutdown(self):
+        """Stop health probes and release the hedging worker threads"""
+        self.stop_health_probes()
+        with self._stats_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
     
     def _get_provider_name(self, provider: LLMProvider) -> str:
         """Get provider name from provider instance"""
@@ -376,6 +693,10 @@ class LLMOrchestrator:
         """Get orchestrator statistics"""
         return {
             **self.usage_stats,
+            'routing': self.task_router.get_stats(),
+            'circuit_breakers': {
+                name: breaker.get_stats() for name, breaker in self.circuit_breakers.items()
+            },
             'provider_count': len(self.providers),
             'available_providers': list(self.providers.keys()),
             'fallback_chain': self.fallback_chain,
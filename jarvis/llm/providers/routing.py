@@ -0,0 +1,158 @@
+"""
+Online provider performance model for task routing
+
+``TaskRouter`` used to ask every provider for its capabilities and guess
+its response time on every request. This module keeps the pieces that do
+not change per request:
+
+- ``CapabilityCache`` holds each provider's ``ProviderCapabilities`` for a
+  TTL, so routing does not rebuild descriptors per call.
+- ``ProviderPerformance`` learns a provider's latency and success rate
+  online: an EWMA for the typical case plus a sliding window of recent
+  latencies for tail percentiles (p95 by default).
+
+Until a provider has ``min_samples`` observations its predictions fall back
+to the static prior (the provider's own average or ``prior_latency``).
+"""
+
+import math
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from .base import LLMProvider, ProviderCapabilities
+
+
+@dataclass
+class RoutingConfig:
+    """Tuning for the router's performance model and hedging"""
+    ewma_alpha: float = 0.2
+    window: int = 200
+    min_samples: int = 10
+    quantile: float = 0.95
+    prior_latency: float = 2.0
+    capability_ttl: float = 300.0
+    hedge: bool = True
+    hedge_quantile: float = 0.95
+    min_hedge_delay: float = 0.05
+
+    def __post_init__(self):
+        if not 0 < self.ewma_alpha <= 1:
+            raise ValueError("ewma_alpha must be in (0, 1]")
+        if self.window < 1 or self.min_samples < 1:
+            raise ValueError("window and min_samples must be positive")
+        for name in ("quantile", "hedge_quantile"):
+            if not 0 < getattr(self, name) < 1:
+                raise ValueError(f"{name} must be in (0, 1)")
+        if self.prior_latency <= 0 or self.capability_ttl < 0 or self.min_hedge_delay < 0:
+            raise ValueError("prior_latency must be positive and ttl/delays non-negative")
+
+
+class CapabilityCache:
+    """Per-provider cache of capability descriptors"""
+
+    def __init__(self, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[int, Any] = {}
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, provider: LLMProvider) -> ProviderCapabilities:
+        now = self._clock()
+        key = id(provider)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is provider and now - entry[1] < self.ttl:
+                self.stats["hits"] += 1
+                return entry[2]
+            self.stats["misses"] += 1
+        capabilities = provider.get_capabilities()
+        with self._lock:
+            self._entries[key] = (provider, now, capabilities)
+        return capabilities
+
+    def invalidate(self, provider: LLMProvider = None):
+        with self._lock:
+            if provider is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(id(provider), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.stats["hits"] + self.stats["misses"]
+            return {**self.stats, "size": len(self._entries),
+                    "hit_rate": self.stats["hits"] / total if total else 0.0}
+
+
+class ProviderPerformance:
+    """Online latency and success model for one provider"""
+
+    def __init__(self, config: RoutingConfig = None):
+        self.config = config or RoutingConfig()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=self.config.window)
+        self._sorted = None
+        self.ewma_latency: Optional[float] = None
+        self.success_rate = 1.0
+        self.observations = 0
+        self.failures = 0
+
+    def observe(self, latency: float, success: bool):
+        """Record one completed call; only successful latencies shape the distribution"""
+        alpha = self.config.ewma_alpha
+        with self._lock:
+            self.observations += 1
+            self.success_rate += alpha * ((1.0 if success else 0.0) - self.success_rate)
+            if not success:
+                self.failures += 1
+                return
+            self._latencies.append(latency)
+            self._sorted = None
+            if self.ewma_latency is None:
+                self.ewma_latency = latency
+            else:
+                self.ewma_latency += alpha * (latency - self.ewma_latency)
+
+    @property
+    def calibrated(self) -> bool:
+        return len(self._latencies) >= self.config.min_samples
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank percentile of the recent window, or None without samples"""
+        with self._lock:
+            if not self._latencies:
+                return None
+            if self._sorted is None:
+                self._sorted = sorted(self._latencies)
+            rank = max(0, math.ceil(q * len(self._sorted)) - 1)
+            return self._sorted[rank]
+
+    def predict(self, q: float = None, prior: float = None) -> float:
+        """
+        Predicted latency at quantile ``q``
+
+        Uses the learned percentile once calibrated; before that the larger
+        of the prior and what has been seen so far, so a slow first call is
+        not ignored.
+        """
+        q = self.config.quantile if q is None else q
+        prior = self.config.prior_latency if prior is None else prior
+        if self.calibrated:
+            return self.percentile(q)
+        observed = self.percentile(1.0) if self._latencies else None
+        return max(prior, observed or 0.0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "observations": self.observations,
+            "failures": self.failures,
+            "success_rate": self.success_rate,
+            "ewma_latency": self.ewma_latency,
+            "p50_latency": self.percentile(0.5),
+            "p95_latency": self.percentile(0.95),
+            "calibrated": self.calibrated,
+        }
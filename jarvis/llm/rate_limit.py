@@ -0,0 +1,225 @@
+"""
+Rate limiting for LLM requests
+
+Two algorithms keep O(1) state per key:
+
+- ``GCRA`` (generic cell rate algorithm): a single "theoretical arrival
+  time" per key; smooth spacing with a configurable burst
+- ``TokenBucket``: (tokens, last refill) per key; refills continuously
+
+``RateLimiter`` applies limits per scope (``model``, ``session``,
+``api_key``) with optional per-key overrides. A request either is rejected
+immediately with a ``retry_after`` hint or reserves its slot and waits for
+it, bounded by a timeout and any enclosing ``deadline_scope``.
+
+Each decision is a few float operations done under one short lock (CPython
+has no atomic compare-and-set); waiting always happens outside the lock, and
+all scopes of a request are checked and committed together so a request
+rejected by one scope never consumes another scope's budget.
+"""
+
+import time
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .transport import remaining_time
+
+ALGORITHM_GCRA = "gcra"
+ALGORITHM_TOKEN_BUCKET = "token_bucket"
+
+MODE_REJECT = "reject"
+MODE_WAIT = "wait"
+
+SCOPE_MODEL = "model"
+SCOPE_SESSION = "session"
+SCOPE_API_KEY = "api_key"
+
+
+class RateLimitExceeded(Exception):
+    """Request rejected by a rate limit"""
+
+    def __init__(self, scope: str, key: str, retry_after: float):
+        super().__init__(f"Rate limit exceeded for {scope} '{key}' (retry after {retry_after:.2f}s)")
+        self.scope = scope
+        self.key = key
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """``requests`` per ``period`` seconds with bursts of up to ``burst``"""
+    requests: float
+    period: float = 60.0
+    burst: Optional[int] = None
+    algorithm: str = ALGORITHM_GCRA
+
+    def __post_init__(self):
+        if self.requests <= 0 or self.period <= 0:
+            raise ValueError("requests and period must be positive")
+        if self.burst is not None and self.burst < 1:
+            raise ValueError("burst must be at least 1")
+        if self.algorithm not in (ALGORITHM_GCRA, ALGORITHM_TOKEN_BUCKET):
+            raise ValueError(f"Unknown rate limit algorithm: {self.algorithm}")
+
+    @property
+    def rate(self) -> float:
+        """Requests per second"""
+        return self.requests / self.period
+
+    @property
+    def capacity(self) -> float:
+        return float(self.burst if self.burst is not None else max(1, int(self.requests)))
+
+
+class GCRA:
+    """Generic cell rate algorithm; state is the theoretical arrival time"""
+
+    def __init__(self, limit: RateLimit):
+        self.interval = 1.0 / limit.rate
+        self.tolerance = self.interval * limit.capacity
+
+    def initial_state(self, now: float) -> float:
+        return now
+
+    def evaluate(self, state: float, cost: float, now: float) -> Tuple[float, float]:
+        """Returns (seconds to wait, state after admitting the request)"""
+        new_tat = max(state, now) + self.interval * cost
+        return max(0.0, new_tat - self.tolerance - now), new_tat
+
+    def is_idle(self, state: float, now: float) -> bool:
+        return state <= now
+
+
+class TokenBucket:
+    """Continuously refilled token bucket; state is (tokens, last update)"""
+
+    def __init__(self, limit: RateLimit):
+        self.rate = limit.rate
+        self.capacity = limit.capacity
+
+    def initial_state(self, now: float) -> Tuple[float, float]:
+        return self.capacity, now
+
+    def evaluate(self, state: Tuple[float, float], cost: float, now: float) -> Tuple[float, Tuple[float, float]]:
+        tokens, updated_at = state
+        tokens = min(self.capacity, tokens + max(0.0, now - updated_at) * self.rate) - cost
+        # A negative balance is a reservation that is paid back by the refill
+        return max(0.0, -tokens / self.rate), (tokens, now)
+
+    def is_idle(self, state: Tuple[float, float], now: float) -> bool:
+        tokens, updated_at = state
+        return tokens + (now - updated_at) * self.rate >= self.capacity
+
+
+_ALGORITHMS = {ALGORITHM_GCRA: GCRA, ALGORITHM_TOKEN_BUCKET: TokenBucket}
+
+
+class RateLimiter:
+    """Multi-scope rate limiter with reject and wait modes"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep,
+                 max_keys: int = 10000):
+        self._clock = clock
+        self._sleep = sleep
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._defaults: Dict[str, RateLimit] = {}
+        self._overrides: Dict[Tuple[str, str], RateLimit] = {}
+        self._algorithms: Dict[RateLimit, Any] = {}
+        self._state: Dict[Tuple[str, str], Tuple[RateLimit, Any]] = {}
+        self.stats = {"allowed": 0, "rejected": 0, "waited": 0, "wait_time": 0.0}
+
+    def set_limit(self, scope: str, limit: Optional[RateLimit], key: str = None):
+        """Set the default limit of a scope, or of one key in it; None removes it"""
+        with self._lock:
+            target, index = (self._defaults, scope) if key is None else (self._overrides, (scope, key))
+            if limit is None:
+                target.pop(index, None)
+            else:
+                target[index] = limit
+
+    def get_limit(self, scope: str, key: str) -> Optional[RateLimit]:
+        return self._overrides.get((scope, key), self._defaults.get(scope))
+
+    def _algorithm(self, limit: RateLimit):
+        algorithm = self._algorithms.get(limit)
+        if algorithm is None:
+            algorithm = self._algorithms[limit] = _ALGORITHMS[limit.algorithm](limit)
+        return algorithm
+
+    def _reserve(self, keys: Dict[str, str], cost: float, max_wait: float) -> Tuple[float, Optional[RateLimitExceeded]]:
+        """Check every scope and commit all of them only if the longest wait fits"""
+        now = self._clock()
+        with self._lock:
+            decisions = []
+            for scope, key in keys.items():
+                limit = self.get_limit(scope, key)
+                if limit is None:
+                    continue
+                algorithm = self._algorithm(limit)
+                current = self._state.get((scope, key))
+                state = current[1] if current is not None and current[0] == limit else algorithm.initial_state(now)
+                wait, new_state = algorithm.evaluate(state, cost, now)
+                decisions.append((scope, key, limit, wait, new_state))
+
+            if not decisions:
+                self.stats["allowed"] += 1
+                return 0.0, None
+
+            scope, key, _, wait, _ = max(decisions, key=lambda d: d[3])
+            if wait > max_wait:
+                self.stats["rejected"] += 1
+                return wait, RateLimitExceeded(scope, key, wait)
+
+            for scope, key, limit, _, new_state in decisions:
+                self._state[(scope, key)] = (limit, new_state)
+            if len(self._state) > self.max_keys:
+                self._prune(now)
+
+            self.stats["allowed"] += 1
+            if wait > 0:
+                self.stats["waited"] += 1
+                self.stats["wait_time"] += wait
+            return wait, None
+
+    def _prune(self, now: float):
+        idle = [index for index, (limit, state) in self._state.items()
+                if self._algorithm(limit).is_idle(state, now)]
+        for index in idle:
+            del self._state[index]
+
+    def acquire(self, model: str = None, session_id: str = None, api_key: str = None,
+                cost: float = 1.0, mode: str = MODE_REJECT, timeout: float = None):
+        """
+        Admit one request or raise RateLimitExceeded
+
+        In wait mode the request queues for its slot for at most ``timeout``
+        seconds (and never past the current deadline).
+        """
+        keys = {scope: key for scope, key in ((SCOPE_MODEL, model), (SCOPE_SESSION, session_id),
+                                              (SCOPE_API_KEY, api_key)) if key is not None}
+        max_wait = 0.0
+        if mode == MODE_WAIT:
+            remaining = remaining_time()
+            bounds = [bound for bound in (timeout, remaining) if bound is not None]
+            max_wait = max(0.0, min(bounds)) if bounds else float("inf")
+
+        wait, error = self._reserve(keys, cost, max_wait)
+        if error is not None:
+            raise error
+        if wait > 0:
+            self._sleep(wait)
+
+    def try_acquire(self, **kwargs) -> bool:
+        """Reject-mode acquire returning a bool"""
+        try:
+            self.acquire(mode=MODE_REJECT, **kwargs)
+            return True
+        except RateLimitExceeded:
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "tracked_keys": len(self._state)}
@@ -0,0 +1,273 @@
+"""
+Response cache for the production LLM interface
+
+Entries are kept as encoded JSON strings in an ``OrderedDict`` in LRU
+order, so a lookup or an eviction is O(1) and every hit decodes a fresh
+object that callers can modify without affecting each other. The encoded
+length is the entry's size for byte-based limits.
+
+With ``path`` set, entries are also written to SQLite so that a warm
+cache survives restarts. Puts and evictions are written through;
+recency updates from hits are batched and written with the next put or
+on ``flush()``.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    value: str
+    created_at: float
+    size_bytes: int
+
+
+class ResponseCache:
+    """LRU + TTL cache of JSON-serializable values with optional SQLite persistence"""
+
+    def __init__(self,
+                 max_entries: int = 1000,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 ttl_seconds: float = 3600.0,
+                 path: Optional[str] = None,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize response cache
+
+        Args:
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum encoded size of all cached responses
+            ttl_seconds: Lifetime of an entry (0 or None disables expiry)
+            path: SQLite file for persistence, None for memory only
+            clock: Time source, injectable for tests
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._total_bytes = 0
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'loaded': 0
+        }
+
+        if path:
+            self._open(path)
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """Build a cache from JARVIS_LLM_CACHE_* environment variables"""
+        return cls(
+            max_entries=int(os.environ.get("JARVIS_LLM_CACHE_ENTRIES", 1000)),
+            max_bytes=int(os.environ.get("JARVIS_LLM_CACHE_BYTES", 64 * 1024 * 1024)),
+            ttl_seconds=float(os.environ.get("JARVIS_LLM_CACHE_TTL", 3600.0)),
+            path=os.environ.get("JARVIS_LLM_CACHE_PATH") or None
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a fresh copy of the cached value, or None on miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            if self._is_expired(entry):
+                self._remove(key, persist=True)
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if self._db is not None:
+                self._touched[key] = self._clock()
+            self.stats['hits'] += 1
+            value = entry.value
+        return json.loads(value)
+
+    def put(self, key: str, value: Any):
+        """Store a copy of ``value`` and evict least recently used entries over the limits"""
+        encoded = json.dumps(value, default=str)
+        size_bytes = len(encoded.encode('utf-8'))
+        if self.max_bytes and size_bytes > self.max_bytes:
+            logger.debug(f"Response of {size_bytes} bytes exceeds cache limit, not cached")
+            return
+
+        with self._lock:
+            now = self._clock()
+            if key in self._entries:
+                self._remove(key, persist=False)
+            self._entries[key] = _Entry(encoded, now, size_bytes)
+            self._total_bytes += size_bytes
+
+            evicted = []
+            while self._entries and (
+                len(self._entries) > self.max_entries or
+                (self.max_bytes and self._total_bytes > self.max_bytes)
+            ):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key, persist=False)
+                evicted.append(oldest_key)
+                self.stats['evictions'] += 1
+
+            if self._db is not None:
+                self._write(key, encoded, now, size_bytes, evicted)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key, persist=True)
+
+    def clear(self):
+        """Remove all entries, including persisted ones"""
+        with self._lock:
+            self._entries.clear()
+            self._touched.clear()
+            self._total_bytes = 0
+            if self._db is not None:
+                self._execute(lambda db: db.execute("DELETE FROM response_cache"))
+
+    def flush(self):
+        """Persist pending recency updates"""
+        with self._lock:
+            if self._db is not None and self._touched:
+                self._execute(self._write_touched)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self.flush()
+                self._db.close()
+                self._db = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'size': len(self._entries),
+                'size_bytes': self._total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'persistent': self._db is not None,
+                'hit_rate': self.stats['hits'] / lookups * 100 if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def _is_expired(self, entry: _Entry) -> bool:
+        if not self.ttl_seconds:
+            return False
+        return self._clock() - entry.created_at > self.ttl_seconds
+
+    def _remove(self, key: str, persist: bool):
+        entry = self._entries.pop(key, None)
+        self._touched.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size_bytes
+            if persist and self._db is not None:
+                self._execute(lambda db: db.execute("DELETE FROM response_cache WHERE key = ?", (key,)))
+
+    # Persistence
+
+    def _open(self, path: str):
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    size_bytes INTEGER NOT NULL
+                )
+            """)
+            self._db.commit()
+            self._load()
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache persistence disabled ({path}): {e}")
+            if self._db is not None:
+                self._db.close()
+            self._db = None
+
+    def _load(self):
+        """Warm the in-memory cache with the most recently used live entries"""
+        now = self._clock()
+        if self.ttl_seconds:
+            self._db.execute("DELETE FROM response_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        rows = self._db.execute(
+            "SELECT key, value, created_at, size_bytes FROM response_cache "
+            "ORDER BY accessed_at DESC LIMIT ?", (self.max_entries,)
+        ).fetchall()
+
+        # Rows arrive most recent first; insert oldest first to rebuild LRU order
+        kept = []
+        total = 0
+        for key, value, created_at, size_bytes in rows:
+            if self.max_bytes and total + size_bytes > self.max_bytes:
+                break
+            kept.append((key, _Entry(value, created_at, size_bytes)))
+            total += size_bytes
+        for key, entry in reversed(kept):
+            self._entries[key] = entry
+        self._total_bytes = total
+        self.stats['loaded'] = len(kept)
+
+        # Drop rows that no longer fit so the file stays bounded
+        self._db.execute("CREATE TEMP TABLE IF NOT EXISTS kept_keys (key TEXT PRIMARY KEY)")
+        self._db.execute("DELETE FROM kept_keys")
+        self._db.executemany("INSERT INTO kept_keys VALUES (?)", [(key,) for key, _ in kept])
+        self._db.execute("DELETE FROM response_cache WHERE key NOT IN (SELECT key FROM kept_keys)")
+        self._db.execute("DROP TABLE kept_keys")
+        self._db.commit()
+
+    def _write(self, key: str, encoded: str, now: float, size_bytes: int, evicted):
+        def write(db):
+            db.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, created_at, accessed_at, size_bytes) "
+                "VALUES (?, ?, ?, ?, ?)", (key, encoded, now, now, size_bytes)
+            )
+            if evicted:
+                db.executemany("DELETE FROM response_cache WHERE key = ?", [(k,) for k in evicted])
+            self._write_touched(db)
+        self._execute(write)
+
+    def _write_touched(self, db: sqlite3.Connection):
+        db.executemany("UPDATE response_cache SET accessed_at = ? WHERE key = ?",
+                       [(accessed_at, key) for key, accessed_at in self._touched.items()])
+        self._touched.clear()
+
+    def _execute(self, operation: Callable[[sqlite3.Connection], Any]):
+        """Run one write transaction; persistence failures never fail the caller"""
+        try:
+            with self._db:
+                operation(self._db)
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache write failed: {e}")
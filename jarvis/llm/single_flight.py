@@ -0,0 +1,130 @@
+"""
+Single-flight request coalescing
+
+``SingleFlight`` makes concurrent calls with the same key share one
+execution: the first caller (the leader) runs the function, callers that
+arrive while it is in flight wait for the leader's future and receive its
+result or exception. The key is forgotten as soon as the call completes,
+so later calls execute again (caching is a separate concern).
+
+Threads use ``do``; coroutines use ``do_async``. Both wait on the same
+``concurrent.futures.Future``, so a thread and a coroutine asking for the
+same key are coalesced too.
+"""
+
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .transport import remaining_time
+
+# Flights led by the current context; a leader that re-enters its own key
+# runs the call itself instead of waiting on its own future
+_leading: contextvars.ContextVar = contextvars.ContextVar("single_flight_leading", default=frozenset())
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, Future] = {}
+        self.stats = {"executions": 0, "coalesced": 0, "errors": 0}
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """Return the in-flight future for ``key`` and whether the caller leads it"""
+        reentrant = (id(self), key) in _leading.get()
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and not reentrant:
+                self.stats["coalesced"] += 1
+                return flight, False
+            future = Future()
+            # A running future cannot be cancelled by one impatient waiter
+            future.set_running_or_notify_cancel()
+            if flight is None:
+                self._flights[key] = future
+            self.stats["executions"] += 1
+            return future, True
+
+    def _finish(self, key: Hashable, future: Future, value: Any = None, error: BaseException = None):
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is future:
+                del self._flights[key]
+            if error is not None:
+                self.stats["errors"] += 1
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    @staticmethod
+    def _wait_bound(timeout: Optional[float]) -> Optional[float]:
+        bounds = [bound for bound in (timeout, remaining_time()) if bound is not None]
+        return max(0.0, min(bounds)) if bounds else None
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: float = None) -> Tuple[Any, bool]:
+        """
+        Run ``fn`` once for all concurrent callers of ``key``
+
+        Args:
+            key: Coalescing key
+            fn: Zero-argument callable executed by the leader
+            timeout: How long a follower waits for the leader (bounded by the
+                current deadline); the leader itself is not interrupted
+
+        Returns:
+            (value, shared) where ``shared`` is True for coalesced callers
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return future.result(self._wait_bound(timeout)), True
+
+        token = _leading.set(_leading.get() | {(id(self), key)})
+        try:
+            value = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        finally:
+            _leading.reset(token)
+        self._finish(key, future, value)
+        return value, False
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any], timeout: float = None) -> Tuple[Any, bool]:
+        """
+        asyncio twin of ``do``
+
+        ``fn`` may be a coroutine function (awaited by the leader) or a plain
+        callable (run in the loop's default executor).
+        """
+        future, leader = self._join(key)
+        if not leader:
+            wait = asyncio.wrap_future(future)
+            return await asyncio.wait_for(wait, self._wait_bound(timeout)), True
+
+        token = _leading.set(_leading.get() | {(id(self), key)})
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                value = await fn()
+            else:
+                loop = asyncio.get_running_loop()
+                value = await loop.run_in_executor(None, contextvars.copy_context().run, fn)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        finally:
+            _leading.reset(token)
+        self._finish(key, future, value)
+        return value, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "in_flight": len(self._flights)}
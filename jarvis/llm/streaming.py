@@ -0,0 +1,116 @@
+"""
+Token streaming for LLM responses
+
+Ollama streams ``/api/generate`` as NDJSON, one JSON object per token
+batch. ``stream_ollama`` turns that into an async iterator of
+``StreamChunk`` objects over the pooled asyncio transport, and
+``iter_ollama_stream`` does the same for the blocking transport.
+
+Streams are pull-based: the next line is only read from the socket when the
+consumer asks for the next chunk, so a slow client slows the upstream read
+instead of buffering the whole generation in memory. Closing the iterator
+early (client disconnect, cancellation) closes the upstream connection,
+which stops generation on the Ollama side.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from .transport import get_async_transport, get_transport
+
+
+class StreamError(Exception):
+    """The provider reported an error in the middle of a stream"""
+    pass
+
+
+@dataclass
+class StreamChunk:
+    """One incremental piece of a streamed response"""
+    text: str
+    index: int
+    done: bool = False
+    model: Optional[str] = None
+    raw: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"content": self.text, "index": self.index, "done": self.done, "model": self.model}
+
+
+def parse_ollama_line(line: str, index: int) -> Optional[StreamChunk]:
+    """Parse one NDJSON line; returns None for lines without text that do not end the stream"""
+    data = json.loads(line)
+    if "error" in data:
+        raise StreamError(str(data["error"]))
+    text = data.get("response", "")
+    done = bool(data.get("done"))
+    if not text and not done:
+        return None
+    return StreamChunk(text=text, index=index, done=done, model=data.get("model"), raw=data)
+
+
+def _stream_request(prompt, model, url, timeout, temperature, top_p, max_tokens,
+                    repetition_penalty, system_prompt):
+    from . import llm_interface
+    model = model or llm_interface.CURRENT_OLLAMA_MODEL
+    timeout = timeout if timeout is not None else llm_interface.get_dynamic_timeout(model)
+    payload = llm_interface._build_payload(prompt, model, True, temperature, top_p, max_tokens,
+                                           repetition_penalty, system_prompt)
+    return url or llm_interface.OLLAMA_URL, payload, timeout
+
+
+async def stream_ollama(prompt: str, model: str = None, url: str = None, timeout: float = None,
+                        temperature: float = None, top_p: float = None, max_tokens: int = None,
+                        repetition_penalty: float = None,
+                        system_prompt: str = None) -> AsyncIterator[StreamChunk]:
+    """Stream a generation from Ollama as StreamChunk objects"""
+    url, payload, timeout = _stream_request(prompt, model, url, timeout, temperature, top_p,
+                                            max_tokens, repetition_penalty, system_prompt)
+    lines = get_async_transport().stream_lines(url, payload, timeout=timeout)
+    index = 0
+    try:
+        async for line in lines:
+            chunk = parse_ollama_line(line, index)
+            if chunk is None:
+                continue
+            index += 1
+            yield chunk
+            if chunk.done:
+                break
+    finally:
+        await lines.aclose()
+
+
+def iter_ollama_stream(prompt: str, model: str = None, url: str = None, timeout: float = None,
+                       temperature: float = None, top_p: float = None, max_tokens: int = None,
+                       repetition_penalty: float = None,
+                       system_prompt: str = None) -> Iterator[StreamChunk]:
+    """Blocking twin of stream_ollama"""
+    url, payload, timeout = _stream_request(prompt, model, url, timeout, temperature, top_p,
+                                            max_tokens, repetition_penalty, system_prompt)
+    lines = get_transport().stream_lines(url, payload, timeout=timeout)
+    index = 0
+    try:
+        for line in lines:
+            chunk = parse_ollama_line(line, index)
+            if chunk is None:
+                continue
+            index += 1
+            yield chunk
+            if chunk.done:
+                break
+    finally:
+        lines.close()
+
+
+def sse_event(data: Any, event: str = None, event_id: Any = None) -> str:
+    """Format one server-sent event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    payload = data if isinstance(data, str) else json.dumps(data)
+    lines.extend(f"data: {line}" for line in payload.split("\n"))
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,533 @@
+"""
+Shared HTTP transport for LLM backends
+
+All Ollama traffic goes through one pooled keep-alive client per process
+instead of a fresh ``requests.post`` (and TCP handshake) per prompt:
+
+- ``HTTPTransport``: ``requests.Session`` with a sized connection pool
+- ``AsyncHTTPTransport``: the same contract on asyncio streams (HTTP/1.1
+  keep-alive, chunked responses), no extra dependency
+
+Both cap concurrent requests per host, retry connect errors with jittered
+exponential backoff, and honour deadlines set with ``deadline_scope`` so a
+caller's time budget covers retries and nested calls. Errors are raised as
+``requests`` exceptions in both twins so callers handle them the same way.
+"""
+
+import os
+import ssl
+import json
+import time
+import random
+import asyncio
+import logging
+import weakref
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar("jarvis_llm_deadline", default=None)
+
+
+class DeadlineExceeded(requests.exceptions.Timeout, TimeoutError):
+    """The request deadline passed before a response was received"""
+    pass
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """
+    Bound everything inside the block (including retries and nested calls)
+    to ``seconds``; an enclosing tighter deadline always wins.
+    """
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current deadline, or None when unbounded"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+@dataclass
+class TransportConfig:
+    """Connection pool and retry settings"""
+    pool_connections: int = 10       # hosts kept in the pool
+    pool_maxsize: int = 8            # keep-alive connections per host
+    max_per_host: int = 8            # concurrent in-flight requests per host
+    max_retries: int = 2             # retries after a connect error
+    backoff_base: float = 0.05
+    backoff_max: float = 1.0
+    connect_timeout: float = 5.0
+    default_timeout: float = 60.0
+
+    @classmethod
+    def from_env(cls) -> "TransportConfig":
+        pool_size = int(os.getenv("JARVIS_HTTP_POOL_SIZE", cls.pool_maxsize))
+        return cls(
+            pool_maxsize=pool_size,
+            max_per_host=int(os.getenv("JARVIS_HTTP_MAX_PER_HOST", pool_size)),
+            max_retries=int(os.getenv("JARVIS_HTTP_MAX_RETRIES", cls.max_retries))
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for a retry attempt (0-based)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+def _host_key(url: str) -> Tuple[str, str, int]:
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    return parts.scheme, parts.hostname or "", port
+
+
+def _attempt_timeout(timeout: Optional[float], config: TransportConfig) -> float:
+    """Per-attempt timeout clipped to the remaining deadline"""
+    timeout = config.default_timeout if timeout is None else timeout
+    remaining = remaining_time()
+    if remaining is not None:
+        if remaining <= 0:
+            raise DeadlineExceeded("request deadline exceeded")
+        timeout = min(timeout, remaining)
+    return timeout
+
+
+def _backoff_delay(config: TransportConfig, attempt: int) -> Optional[float]:
+    """Delay before the next retry, or None when no retry fits the deadline"""
+    if attempt >= config.max_retries:
+        return None
+    delay = config.backoff(attempt)
+    remaining = remaining_time()
+    if remaining is not None and remaining <= delay:
+        return None
+    return delay
+
+
+class HTTPTransport:
+    """Pooled keep-alive HTTP client built on ``requests.Session``"""
+
+    def __init__(self, config: TransportConfig = None):
+        self.config = config or TransportConfig()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.config.pool_connections,
+                              pool_maxsize=self.config.pool_maxsize,
+                              max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._host_slots: Dict[Tuple[str, str, int], threading.BoundedSemaphore] = {}
+        self.stats = {"requests": 0, "retries": 0, "connect_errors": 0, "deadline_exceeded": 0}
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        key = _host_key(url)
+        with self._lock:
+            slot = self._host_slots.get(key)
+            if slot is None:
+                slot = self._host_slots[key] = threading.BoundedSemaphore(self.config.max_per_host)
+            return slot
+
+    def _acquire(self, slot: threading.BoundedSemaphore):
+        remaining = remaining_time()
+        if not slot.acquire(timeout=remaining if remaining is not None else -1):
+            self.stats["deadline_exceeded"] += 1
+            raise DeadlineExceeded("deadline exceeded waiting for a connection slot")
+
+    def _send(self, url: str, payload: Any, timeout: Optional[float], stream: bool) -> requests.Response:
+        attempt = 0
+        while True:
+            try:
+                attempt_timeout = _attempt_timeout(timeout, self.config)
+            except DeadlineExceeded:
+                self.stats["deadline_exceeded"] += 1
+                raise
+            try:
+                self.stats["requests"] += 1
+                response = self.session.post(
+                    url, json=payload, stream=stream,
+                    timeout=(min(self.config.connect_timeout, attempt_timeout), attempt_timeout)
+                )
+                try:
+                    response.raise_for_status()
+                except requests.exceptions.HTTPError:
+                    # A streamed error body is never read, so release the
+                    # connection here rather than leaking it from the pool
+                    response.close()
+                    raise
+                return response
+            except requests.exceptions.ConnectionError as e:
+                self.stats["connect_errors"] += 1
+                delay = _backoff_delay(self.config, attempt)
+                if delay is None:
+                    raise
+                logger.debug(f"Connect error to {url} ({e}); retrying in {delay:.2f}s")
+                self.stats["retries"] += 1
+                attempt += 1
+                time.sleep(delay)
+
+    def post_json(self, url: str, payload: Any, timeout: float = None) -> Any:
+        """POST a JSON payload and decode the JSON response"""
+        slot = self._slot(url)
+        self._acquire(slot)
+        try:
+            return self._send(url, payload, timeout, stream=False).json()
+        finally:
+            slot.release()
+
+    def stream_lines(self, url: str, payload: Any, timeout: float = None) -> Iterator[str]:
+        """POST a JSON payload and yield the response body line by line"""
+        slot = self._slot(url)
+        self._acquire(slot)
+        try:
+            response = self._send(url, payload, timeout, stream=True)
+        except Exception:
+            slot.release()
+            raise
+
+        def lines():
+            # The host slot is held until the stream is consumed or closed
+            try:
+                for line in response.iter_lines():
+                    if line:
+                        yield line.decode("utf-8", errors="replace")
+            finally:
+                response.close()
+                slot.release()
+
+        return lines()
+
+    def close(self):
+        self.session.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+
+class _AsyncConnection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @property
+    def usable(self) -> bool:
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self):
+        self.writer.close()
+
+
+class _AsyncResponse:
+    def __init__(self, status: int, reason: str, headers: Dict[str, str]):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+
+    @property
+    def keep_alive(self) -> bool:
+        return self.headers.get("connection", "").lower() != "close"
+
+
+class AsyncHTTPTransport:
+    """
+    asyncio twin of ``HTTPTransport``: a per-host pool of HTTP/1.1
+    keep-alive connections over ``asyncio.open_connection``.
+
+    Instances are bound to the event loop they are first used on.
+    """
+
+    def __init__(self, config: TransportConfig = None):
+        self.config = config or TransportConfig()
+        self._idle: Dict[Tuple[str, str, int], List[_AsyncConnection]] = {}
+        self._host_slots: Dict[Tuple[str, str, int], asyncio.Semaphore] = {}
+        self.stats = {"requests": 0, "retries": 0, "connect_errors": 0,
+                      "deadline_exceeded": 0, "connections_opened": 0}
+
+    def _slot(self, key: Tuple[str, str, int]) -> asyncio.Semaphore:
+        slot = self._host_slots.get(key)
+        if slot is None:
+            slot = self._host_slots[key] = asyncio.Semaphore(self.config.max_per_host)
+        return slot
+
+    async def _acquire(self, slot: asyncio.Semaphore):
+        remaining = remaining_time()
+        try:
+            await asyncio.wait_for(slot.acquire(), timeout=remaining)
+        except asyncio.TimeoutError:
+            self.stats["deadline_exceeded"] += 1
+            raise DeadlineExceeded("deadline exceeded waiting for a connection slot")
+
+    async def _connect(self, key: Tuple[str, str, int], timeout: float) -> _AsyncConnection:
+        idle = self._idle.get(key, [])
+        while idle:
+            connection = idle.pop()
+            if connection.usable:
+                return connection
+            connection.close()
+
+        scheme, host, port = key
+        ssl_context = ssl.create_default_context() if scheme == "https" else None
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=ssl_context),
+                timeout=min(self.config.connect_timeout, timeout)
+            )
+        except asyncio.TimeoutError as e:
+            raise requests.exceptions.ConnectTimeout(f"connect to {host}:{port} timed out") from e
+        except OSError as e:
+            raise requests.exceptions.ConnectionError(f"cannot connect to {host}:{port}: {e}") from e
+        self.stats["connections_opened"] += 1
+        return _AsyncConnection(reader, writer)
+
+    def _release(self, key: Tuple[str, str, int], connection: _AsyncConnection, reusable: bool):
+        idle = self._idle.setdefault(key, [])
+        if reusable and connection.usable and len(idle) < self.config.pool_maxsize:
+            idle.append(connection)
+        else:
+            connection.close()
+
+    @staticmethod
+    def _encode_request(url: str, payload: Any) -> bytes:
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        body = json.dumps(payload).encode("utf-8")
+        host = parts.netloc
+        head = (f"POST {path} HTTP/1.1\r\n"
+                f"Host: {host}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Accept: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: keep-alive\r\n\r\n")
+        return head.encode("latin-1") + body
+
+    @staticmethod
+    async def _read_head(reader: asyncio.StreamReader) -> _AsyncResponse:
+        status_line = await reader.readline()
+        if not status_line:
+            raise requests.exceptions.ConnectionError("connection closed before response")
+        try:
+            _, status, reason = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        except ValueError:
+            _, status = status_line.decode("latin-1").split()[:2]
+            reason = ""
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return _AsyncResponse(int(status), reason, headers)
+
+    @staticmethod
+    async def _iter_body(reader: asyncio.StreamReader, response: _AsyncResponse) -> AsyncIterator[bytes]:
+        if response.headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size_line = await reader.readline()
+                size = int(size_line.split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    # Trailers end with an empty line
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                yield await reader.readexactly(size)
+                await reader.readexactly(2)
+        elif "content-length" in response.headers:
+            length = int(response.headers["content-length"])
+            if length:
+                yield await reader.readexactly(length)
+        else:
+            response.headers["connection"] = "close"
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    return
+                yield data
+
+    async def _open_exchange(self, key, url: str, payload: Any,
+                             timeout: Optional[float]) -> Tuple[_AsyncConnection, _AsyncResponse]:
+        """Send the request (retrying connect errors) and read the response head"""
+        attempt = 0
+        request = self._encode_request(url, payload)
+        while True:
+            try:
+                attempt_timeout = _attempt_timeout(timeout, self.config)
+            except DeadlineExceeded:
+                self.stats["deadline_exceeded"] += 1
+                raise
+            connection = None
+            try:
+                self.stats["requests"] += 1
+                connection = await self._connect(key, attempt_timeout)
+                connection.writer.write(request)
+                await connection.writer.drain()
+                try:
+                    response = await asyncio.wait_for(self._read_head(connection.reader),
+                                                      timeout=attempt_timeout)
+                except asyncio.TimeoutError as e:
+                    connection.close()
+                    if remaining_time() is not None and remaining_time() <= 0:
+                        self.stats["deadline_exceeded"] += 1
+                        raise DeadlineExceeded("request deadline exceeded") from e
+                    raise requests.exceptions.ReadTimeout(f"read from {url} timed out") from e
+                return connection, response
+            except (requests.exceptions.ConnectionError, ConnectionError, asyncio.IncompleteReadError) as e:
+                # Also covers a pooled keep-alive connection the server already closed
+                if connection is not None:
+                    connection.close()
+                self.stats["connect_errors"] += 1
+                delay = _backoff_delay(self.config, attempt)
+                if delay is None:
+                    if isinstance(e, requests.exceptions.ConnectionError):
+                        raise
+                    raise requests.exceptions.ConnectionError(str(e)) from e
+                self.stats["retries"] += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _check_status(url: str, response: _AsyncResponse, body: bytes):
+        if response.status >= 400:
+            raise requests.exceptions.HTTPError(
+                f"{response.status} {response.reason} for url: {url}: {body[:200]!r}"
+            )
+
+    async def post_json(self, url: str, payload: Any, timeout: float = None) -> Any:
+        """POST a JSON payload and decode the JSON response"""
+        key = _host_key(url)
+        slot = self._slot(key)
+        await self._acquire(slot)
+        try:
+            connection, response = await self._open_exchange(key, url, payload, timeout)
+            reusable = False
+            try:
+                read_timeout = _attempt_timeout(timeout, self.config)
+                body = b"".join([chunk async for chunk in
+                                 _with_timeout(self._iter_body(connection.reader, response), read_timeout)])
+                reusable = response.keep_alive
+            finally:
+                self._release(key, connection, reusable)
+            self._check_status(url, response, body)
+            return json.loads(body.decode("utf-8"))
+        finally:
+            slot.release()
+
+    async def stream_lines(self, url: str, payload: Any, timeout: float = None) -> AsyncIterator[str]:
+        """POST a JSON payload and yield the response body line by line"""
+        key = _host_key(url)
+        slot = self._slot(key)
+        await self._acquire(slot)
+        try:
+            connection, response = await self._open_exchange(key, url, payload, timeout)
+            reusable = False
+            try:
+                if response.status >= 400:
+                    body = b"".join([chunk async for chunk in self._iter_body(connection.reader, response)])
+                    self._check_status(url, response, body)
+                buffer = b""
+                async for chunk in _with_timeout(self._iter_body(connection.reader, response),
+                                                 _attempt_timeout(timeout, self.config)):
+                    buffer += chunk
+                    *lines, buffer = buffer.split(b"\n")
+                    for line in lines:
+                        if line.strip():
+                            yield line.decode("utf-8", errors="replace")
+                if buffer.strip():
+                    yield buffer.decode("utf-8", errors="replace")
+                reusable = response.keep_alive
+            finally:
+                self._release(key, connection, reusable)
+        finally:
+            slot.release()
+
+    async def close(self):
+        for idle in self._idle.values():
+            for connection in idle:
+                connection.close()
+        self._idle.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+
+async def _with_timeout(chunks: AsyncIterator[bytes], timeout: float) -> AsyncIterator[bytes]:
+    """Apply an overall read deadline to an async byte stream"""
+    deadline = time.monotonic() + timeout
+    iterator = chunks.__aiter__()
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded("response body deadline exceeded")
+        try:
+            chunk = await asyncio.wait_for(iterator.__anext__(), timeout=remaining)
+        except StopAsyncIteration:
+            return
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceeded("response body deadline exceeded") from e
+        except asyncio.IncompleteReadError as e:
+            raise requests.exceptions.ChunkedEncodingError("connection closed mid-response") from e
+        yield chunk
+
+
+_config: Optional[TransportConfig] = None
+_transport: Optional[HTTPTransport] = None
+_async_transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncHTTPTransport]" = \
+    weakref.WeakKeyDictionary()
+_transport_lock = threading.Lock()
+
+
+def _shared_config() -> TransportConfig:
+    global _config
+    if _config is None:
+        _config = TransportConfig.from_env()
+    return _config
+
+
+def get_transport() -> HTTPTransport:
+    """Process-wide pooled transport"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HTTPTransport(_shared_config())
+    return _transport
+
+
+def get_async_transport() -> AsyncHTTPTransport:
+    """Async transport for the running event loop"""
+    loop = asyncio.get_running_loop()
+    with _transport_lock:
+        transport = _async_transports.get(loop)
+        if transport is None:
+            transport = _async_transports[loop] = AsyncHTTPTransport(_shared_config())
+    return transport
+
+
+def configure_transport(config: TransportConfig) -> HTTPTransport:
+    """Replace the shared transports with ones using ``config``"""
+    global _config, _transport
+    with _transport_lock:
+        if _transport is not None:
+            _transport.close()
+        _config = config
+        _transport = HTTPTransport(config)
+        _async_transports.clear()
+    return _transport
@@ -0,0 +1,192 @@
+"""
+Buffered access tracking for the production memory system
+
+Reads only bump an in-memory counter. A background thread periodically
+flushes all pending counters to SQLite in one executemany transaction and
+maintains a decayed access frequency (LFU with aging) per memory.
+"""
+
+import math
+import time
+import sqlite3
+import threading
+from typing import Dict, Callable, Iterable, List, Tuple
+
+from ..core.error_handler import error_handler, ErrorLevel
+
+DEFAULT_HALF_LIFE_SECONDS = 7 * 24 * 3600
+
+
+def decayed_score(score: float, updated_at: float, now: float,
+                  half_life: float = DEFAULT_HALF_LIFE_SECONDS) -> float:
+    """Decay a frequency score recorded at updated_at to time now"""
+    if not score:
+        return 0.0
+    elapsed = max(0.0, now - (updated_at or 0.0))
+    return score * math.pow(0.5, elapsed / half_life)
+
+
+def register_sql_functions(conn: sqlite3.Connection,
+                           half_life: float = DEFAULT_HALF_LIFE_SECONDS):
+    """Register jarvis_decay(score, updated_at, now) on a connection for ranking queries"""
+    conn.create_function(
+        "jarvis_decay", 3,
+        lambda score, updated_at, now: decayed_score(score or 0.0, updated_at or 0.0, now, half_life),
+        deterministic=True
+    )
+
+
+class AccessTracker:
+    """
+    Access counter buffer with periodic batched flush.
+
+    Each flush applies, per key, ``access_count += n`` and
+    ``frequency_score = decay(frequency_score) + n`` in a single transaction.
+    An in-memory copy of the decayed scores is kept for cache eviction.
+    """
+
+    def __init__(self, db_path: str,
+                 flush_interval_ms: int = 500,
+                 half_life_seconds: float = DEFAULT_HALF_LIFE_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.db_path = db_path
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.half_life = half_life_seconds
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[str, List[float]] = {}   # key -> [count, last access time]
+        self._scores: Dict[str, Tuple[float, float]] = {}  # key -> (score, updated_at)
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.stats = {
+            "recorded": 0,
+            "flushes": 0,
+            "rows_flushed": 0,
+            "flush_errors": 0
+        }
+
+    def record(self, key: str, count: int = 1):
+        """Record an access; O(1) and never touches the database"""
+        now = self._clock()
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = [count, now]
+            else:
+                entry[0] += count
+                entry[1] = now
+
+            score, updated_at = self._scores.get(key, (0.0, now))
+            self._scores[key] = (decayed_score(score, updated_at, now, self.half_life) + count, now)
+            self.stats["recorded"] += count
+
+        self._ensure_started()
+
+    def score(self, key: str, now: float = None) -> float:
+        """Current decayed access frequency of a key known to this tracker"""
+        now = self._clock() if now is None else now
+        with self._lock:
+            score, updated_at = self._scores.get(key, (0.0, now))
+        return decayed_score(score, updated_at, now, self.half_life)
+
+    def seed(self, key: str, score: float, updated_at: float):
+        """Load a persisted score, e.g. when a memory is read from the database"""
+        with self._lock:
+            if key not in self._scores:
+                self._scores[key] = (score or 0.0, updated_at or self._clock())
+
+    def coldest(self, keys: Iterable[str], count: int) -> List[str]:
+        """Get the count keys with the lowest decayed scores"""
+        now = self._clock()
+        return sorted(keys, key=lambda k: self.score(k, now))[:count]
+
+    def forget(self, key: str):
+        """Drop buffered state for a deleted memory"""
+        with self._lock:
+            self._pending.pop(key, None)
+            self._scores.pop(key, None)
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """
+        Write all pending access counts in one transaction
+
+        Returns:
+            Number of keys flushed
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                pending, self._pending = self._pending, {}
+
+            rows = [
+                (count, last_access, last_access, count, last_access, key)
+                for key, (count, last_access) in pending.items()
+            ]
+
+            try:
+                conn = sqlite3.connect(self.db_path, timeout=30)
+                try:
+                    register_sql_functions(conn, self.half_life)
+                    conn.executemany("""
+                        UPDATE memories
+                        SET access_count = access_count + ?,
+                            last_accessed = datetime(?, 'unixepoch'),
+                            frequency_score = jarvis_decay(frequency_score, score_updated_at, ?) + ?,
+                            score_updated_at = ?
+                        WHERE key = ? AND active = 1
+                    """, rows)
+                    conn.commit()
+                finally:
+                    conn.close()
+            except Exception as e:
+                # Put the counts back so they are retried on the next flush
+                with self._lock:
+                    for key, (count, last_access) in pending.items():
+                        entry = self._pending.setdefault(key, [0, last_access])
+                        entry[0] += count
+                        entry[1] = max(entry[1], last_access)
+                self.stats["flush_errors"] += 1
+                error_handler.log_error(
+                    e, "Memory Access Tracking", ErrorLevel.WARNING,
+                    "Failed to flush memory access counts"
+                )
+                return 0
+
+            self.stats["flushes"] += 1
+            self.stats["rows_flushed"] += len(rows)
+            return len(rows)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._flush_loop,
+                                            name="memory-access-flush", daemon=True)
+            self._thread.start()
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def stop(self):
+        """Stop the background thread and flush remaining counts"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "pending": self.pending_count}
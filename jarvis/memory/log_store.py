@@ -0,0 +1,363 @@
+"""
+Log-structured key/value store for the JSON fact memory
+
+Writes append a CRC-checked record to ``<snapshot>.log`` instead of
+rewriting the whole JSON file. An in-memory dict is the index and is rebuilt
+on startup by loading the JSON snapshot and replaying the log; a torn or
+corrupt tail (e.g. the writer was killed mid-append) is truncated at the
+last valid record. A background thread batches fsyncs and compacts the log
+into a fresh snapshot once it outgrows it.
+
+Compaction rotates the live log to ``<snapshot>.log.1`` so writers are never
+blocked while the snapshot is written. Recovery replays snapshot, ``.log.1``
+and ``.log`` in that order; replaying records already folded into a newer
+snapshot is harmless because sets and deletes are idempotent.
+"""
+
+import os
+import json
+import zlib
+import struct
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+_HEADER = struct.Struct("<II")  # payload length, crc32(payload)
+_MAX_RECORD_BYTES = 64 * 1024 * 1024
+
+OP_SET = "s"
+OP_DELETE = "d"
+
+
+def encode_record(op: str, key: str, value: Any = None) -> bytes:
+    """Encode one log record"""
+    payload = json.dumps([op, key, value], ensure_ascii=False).encode("utf-8")
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def iter_records(data: bytes) -> Iterator[Tuple[int, str, str, Any]]:
+    """
+    Decode records from a log buffer
+
+    Yields (end_offset, op, key, value) and stops at the first truncated or
+    corrupt record.
+    """
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        length, crc = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        end = start + length
+        if length > _MAX_RECORD_BYTES or end > len(data):
+            return
+        payload = data[start:end]
+        if zlib.crc32(payload) != crc:
+            return
+        try:
+            op, key, value = json.loads(payload.decode("utf-8"))
+        except (ValueError, TypeError):
+            return
+        if op not in (OP_SET, OP_DELETE):
+            return
+        offset = end
+        yield offset, op, key, value
+
+
+class LogStructuredStore:
+    """
+    Append-only fact store with snapshot compaction.
+
+    ``set``/``delete`` cost one small append (flushed to the OS, fsynced in
+    batches every ``fsync_interval_ms``), reads are dict lookups.
+    """
+
+    def __init__(self, snapshot_path: str,
+                 fsync_interval_ms: int = 200,
+                 compact_min_bytes: int = 1024 * 1024,
+                 compact_ratio: float = 1.0):
+        self.snapshot_path = snapshot_path
+        self.log_path = f"{snapshot_path}.log"
+        self.rotated_log_path = f"{snapshot_path}.log.1"
+        self.fsync_interval = fsync_interval_ms / 1000.0
+        self.compact_min_bytes = compact_min_bytes
+        self.compact_ratio = compact_ratio
+
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._data: Dict[str, Any] = {}
+        self._log = None
+        self._log_size = 0
+        self._dirty = False
+        self._signature = None
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.stats = {
+            "appends": 0,
+            "fsyncs": 0,
+            "compactions": 0,
+            "recovered_records": 0,
+            "truncated_bytes": 0
+        }
+
+        self.reload()
+
+    # Recovery
+
+    def reload(self):
+        """Rebuild the index from the snapshot and logs on disk"""
+        with self._lock:
+            self._close_log()
+            self._data = self._load_snapshot()
+
+            had_rotated = os.path.exists(self.rotated_log_path)
+            if had_rotated:
+                self._replay(self.rotated_log_path)
+            self._replay(self.log_path)
+
+            self._open_log()
+            if had_rotated:
+                # A previous compaction was interrupted; finish it now
+                self._write_snapshot(dict(self._data))
+                self._remove(self.rotated_log_path)
+                self._truncate_log()
+            self._signature = self._disk_signature()
+
+    def _load_snapshot(self) -> Dict[str, Any]:
+        if not os.path.exists(self.snapshot_path):
+            return {}
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                content = f.read().strip()
+            data = json.loads(content) if content else {}
+            if not isinstance(data, dict):
+                raise ValueError("memory snapshot is not a JSON object")
+            return data
+        except (ValueError, OSError) as e:
+            print(f"[WARN] Memory file corrupted, creating backup and new file: {e}")
+            backup_name = f"{self.snapshot_path}.corrupt_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            try:
+                os.rename(self.snapshot_path, backup_name)
+                print(f"[FOLDER] Corrupted memory backed up to: {backup_name}")
+            except OSError:
+                pass
+            return {}
+
+    def _replay(self, path: str):
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            data = f.read()
+
+        valid_end = 0
+        for valid_end, op, key, value in iter_records(data):
+            if op == OP_SET:
+                self._data[key] = value
+            else:
+                self._data.pop(key, None)
+            self.stats["recovered_records"] += 1
+
+        if valid_end < len(data):
+            # Torn or corrupt tail from an interrupted append
+            print(f"[WARN] Truncating {len(data) - valid_end} bytes of incomplete memory log: {path}")
+            self.stats["truncated_bytes"] += len(data) - valid_end
+            with open(path, "r+b") as f:
+                f.truncate(valid_end)
+                f.flush()
+                os.fsync(f.fileno())
+
+    # Reads and writes
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.get(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Copy of the current contents"""
+        with self._lock:
+            return dict(self._data)
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._append(encode_record(OP_SET, key, value))
+            self._data[key] = value
+
+    def delete(self, key: str) -> bool:
+        """Delete a key; returns False when it did not exist"""
+        with self._lock:
+            if key not in self._data:
+                return False
+            self._append(encode_record(OP_DELETE, key))
+            del self._data[key]
+            return True
+
+    def replace_all(self, data: Dict[str, Any]):
+        """Replace the entire contents with a new snapshot"""
+        with self._compact_lock, self._lock:
+            snapshot = dict(data)
+            self._write_snapshot(snapshot)
+            self._remove(self.rotated_log_path)
+            self._truncate_log()
+            self._data = snapshot
+            self._signature = self._disk_signature()
+
+    def _append(self, record: bytes):
+        if self._log is None:
+            self._open_log()
+        self._log.write(record)
+        self._log.flush()
+        self._log_size += len(record)
+        self._dirty = True
+        self.stats["appends"] += 1
+        self._signature = self._disk_signature()
+        self._ensure_started()
+
+    # Durability and compaction
+
+    def sync(self):
+        """fsync pending appends"""
+        with self._lock:
+            if self._dirty and self._log is not None:
+                os.fsync(self._log.fileno())
+                self._dirty = False
+                self.stats["fsyncs"] += 1
+
+    def needs_compaction(self) -> bool:
+        with self._lock:
+            snapshot_size = self._file_size(self.snapshot_path)
+        return (self._log_size >= self.compact_min_bytes
+                and self._log_size >= snapshot_size * self.compact_ratio)
+
+    def compact(self):
+        """Fold the log into a new snapshot without blocking writers"""
+        with self._compact_lock:
+            with self._lock:
+                if self._log_size == 0:
+                    return
+                snapshot = dict(self._data)
+                self.sync()
+                self._close_log()
+                os.replace(self.log_path, self.rotated_log_path)
+                self._open_log()
+
+            self._write_snapshot(snapshot)
+
+            with self._lock:
+                self._remove(self.rotated_log_path)
+                self._signature = self._disk_signature()
+                self.stats["compactions"] += 1
+
+    def _write_snapshot(self, data: Dict[str, Any]):
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_file = f"{self.snapshot_path}.tmp"
+        try:
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.snapshot_path)
+        except Exception:
+            self._remove(temp_file)
+            raise
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._background_loop,
+                                        name="memory-log-sync", daemon=True)
+        self._thread.start()
+
+    def _background_loop(self):
+        while not self._stop_event.wait(self.fsync_interval):
+            try:
+                self.sync()
+                if self.needs_compaction():
+                    self.compact()
+            except Exception as e:
+                print(f"[WARN] Memory log maintenance failed: {e}")
+
+    def close(self):
+        """Stop background work, fsync and close the log"""
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._thread = None
+        with self._lock:
+            self.sync()
+            self._close_log()
+
+    # File helpers
+
+    def _open_log(self):
+        directory = os.path.dirname(self.log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._log = open(self.log_path, "ab")
+        self._log_size = self._log.tell()
+
+    def _close_log(self):
+        if self._log is not None:
+            try:
+                self._log.close()
+            except OSError:
+                pass
+            self._log = None
+
+    def _truncate_log(self):
+        if self._log is None:
+            self._open_log()
+        self._log.truncate(0)
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._log_size = 0
+        self._dirty = False
+
+    def _disk_signature(self) -> Tuple[Optional[Tuple[int, int, int]], int]:
+        try:
+            st = os.stat(self.snapshot_path)
+            snapshot = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            snapshot = None
+        return snapshot, self._file_size(self.log_path)
+
+    def refresh(self) -> bool:
+        """Reload when the files were changed or removed by someone else"""
+        with self._compact_lock, self._lock:
+            if self._disk_signature() == self._signature:
+                return False
+            self.reload()
+            return True
+
+    @staticmethod
+    def _file_size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "keys": len(self._data),
+                "log_bytes": self._log_size,
+                "snapshot_bytes": self._file_size(self.snapshot_path)
+            }
@@ -1,8 +1,11 @@
 import json
 import os
+import atexit
 import threading
 from datetime import datetime
 
+from .log_store import LogStructuredStore
+
 # Import archiving system
 try:
     from ..core.data_archiver import archive_input, archive_output, archive_system
@@ -12,6 +15,7 @@ except ImportError:
 
 MEMORY_FILE = "data/jarvis_mem.json"
 _memory_lock = threading.Lock()  # Prevent concurrent access
+_stores = {}  # absolute MEMORY_FILE path -> LogStructuredStore
 
 # Poprawne dostępne modele zgodnie z ollama list (możesz użyć do walidacji lub informacji)
 AVAILABLE_MODELS = [
@@ -21,58 +25,43 @@ AVAILABLE_MODELS = [
     "llama3:70b"
 ]
 
-def load_memory():
-    if os.path.exists(MEMORY_FILE):
+def _get_store() -> LogStructuredStore:
+    """Store for the current MEMORY_FILE (reloaded if the files changed underneath it)"""
+    path = os.path.abspath(MEMORY_FILE)
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = LogStructuredStore(path)
+    else:
+        store.refresh()
+    return store
+
+def _close_stores():
+    for store in list(_stores.values()):
         try:
-            with open(MEMORY_FILE, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if not content:
-                    return {}
-                return json.loads(content)
-        except (json.JSONDecodeError, FileNotFoundError, PermissionError) as e:
-            print(f"[WARN] Memory file corrupted, creating backup and new file: {e}")
-            # Backup corrupted file
-            if os.path.exists(MEMORY_FILE):
-                backup_name = f"{MEMORY_FILE}.corrupt_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                try:
-                    os.rename(MEMORY_FILE, backup_name)
-                    print(f"[FOLDER] Corrupted memory backed up to: {backup_name}")
-                except:
-                    pass
-            return {}
-    return {}
+            store.close()
+        except Exception:
+            pass
+
+atexit.register(_close_stores)
+
+def load_memory():
+    with _memory_lock:
+        return _get_store().to_dict()
 
 def save_memory(memory):
     try:
-        # Create a temporary file first to prevent corruption
-        temp_file = f"{MEMORY_FILE}.tmp"
-        with open(temp_file, "w", encoding="utf-8") as f:
-            json.dump(memory, f, indent=2, ensure_ascii=False)
-        
-        # Verify the JSON is valid before replacing the original
-        with open(temp_file, "r", encoding="utf-8") as f:
-            json.load(f)  # This will raise an exception if JSON is invalid
-        
-        # If we get here, the JSON is valid, so replace the original
-        os.replace(temp_file, MEMORY_FILE)
+        with _memory_lock:
+            _get_store().replace_all(memory)
     except Exception as e:
         print(f"[FAIL] Error saving memory: {e}")
-        # Clean up temp file if it exists
-        if os.path.exists(temp_file):
-            try:
-                os.remove(temp_file)
-            except:
-                pass
         raise
 
 def remember_fact(fact: str):
     with _memory_lock:
-        memory = load_memory()
         if " to " not in fact:
             return "[FAIL] Niepoprawny format. Użyj: X to Y"
         key, value = fact.split(" to ", 1)
-        memory[key.strip()] = value.strip()
-        save_memory(memory)
+        _get_store().set(key.strip(), value.strip())
         
         # Archive the memory operation
         if ARCHIVING_ENABLED:
@@ -90,8 +79,9 @@ def remember_fact(fact: str):
 
 def recall_fact(key: str):
     with _memory_lock:
-        memory = load_memory()
-        result = memory.get(key.strip(), "[QUESTION] Nie znam tej informacji.")
+        store = _get_store()
+        found = key.strip() in store
+        result = store.get(key.strip(), "[QUESTION] Nie znam tej informacji.")
         
         # Archive the recall operation
         if ARCHIVING_ENABLED:
@@ -100,7 +90,7 @@ def recall_fact(key: str):
                     content=f"Recall '{key}': {result}",
                     source="memory_system", 
                     operation="recall_fact",
-                    metadata={"query_key": key.strip(), "found": key.strip() in memory}
+                    metadata={"query_key": key.strip(), "found": found}
                 )
             except Exception as e:
                 print(f"[WARN] Failed to archive recall operation: {e}")
@@ -109,11 +99,10 @@ def recall_fact(key: str):
 
 def forget_fact(key: str):
     with _memory_lock:
-        memory = load_memory()
-        if key.strip() in memory:
-            deleted_value = memory[key.strip()]
-            del memory[key.strip()]
-            save_memory(memory)
+        store = _get_store()
+        if key.strip() in store:
+            deleted_value = store.get(key.strip())
+            store.delete(key.strip())
             
             # Archive the forget operation
             if ARCHIVING_ENABLED:
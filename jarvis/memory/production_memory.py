@@ -11,10 +11,13 @@ from datetime import datetime
 from typing import Dict, List, Any, Optional, Union
 import hashlib
 import re
+import time
 from pathlib import Path
 
 from ..core.error_handler import error_handler, ErrorLevel, safe_execute
 from ..core.data_archiver import archive_input, archive_output
+from .access_tracker import AccessTracker, register_sql_functions
+from .tag_query import And, all_of, compile_tag_expression, normalize_tags, parse_tag_expression
 
 class ProductionMemorySystem:
     """
@@ -27,7 +30,7 @@ class ProductionMemorySystem:
     - CRDT-compatible distributed memory
     """
     
-    def __init__(self, memory_dir: str = "data/memory"):
+    def __init__(self, memory_dir: str = "data/memory", access_flush_interval_ms: int = 500):
         self.memory_dir = Path(memory_dir)
         self.memory_dir.mkdir(parents=True, exist_ok=True)
         
@@ -39,6 +42,9 @@ class ProductionMemorySystem:
         # Thread safety
         self._lock = threading.RLock()
         
+        # Buffered access counting, flushed in batches by a background thread
+        self._access_tracker = AccessTracker(str(self.sqlite_file), access_flush_interval_ms)
+        
         # Initialize storage systems
         self._initialize_storage()
         
@@ -93,10 +99,29 @@ class ProductionMemorySystem:
                     metadata TEXT DEFAULT '{}',
                     hash TEXT,
                     version INTEGER DEFAULT 1,
-                    active BOOLEAN DEFAULT 1
+                    active BOOLEAN DEFAULT 1,
+                    frequency_score REAL DEFAULT 0,
+                    score_updated_at REAL DEFAULT 0
                 )
             """)
             
+            # Add decayed-frequency columns to databases created before they existed
+            cursor.execute("PRAGMA table_info(memories)")
+            columns = {row[1] for row in cursor.fetchall()}
+            for column in ("frequency_score", "score_updated_at"):
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE memories ADD COLUMN {column} REAL DEFAULT 0")
+            
+            # Normalized tag index: one row per (memory, tag)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS memory_tags (
+                    memory_id INTEGER NOT NULL,
+                    tag TEXT NOT NULL,
+                    PRIMARY KEY (memory_id, tag)
+                ) WITHOUT ROWID
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_memory_tags_tag ON memory_tags(tag, memory_id)")
+            
             # Create full-text search table
             cursor.execute("""
                 CREATE VIRTUAL TABLE IF NOT EXISTS memory_search 
@@ -121,6 +146,8 @@ class ProductionMemorySystem:
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_access_count ON memories(access_count)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_active ON memories(active)")
             
+            self._migrate_tags(cursor)
+            
             conn.commit()
             conn.close()
             
@@ -130,6 +157,32 @@ class ProductionMemorySystem:
                 "Failed to initialize SQLite memory database"
             )
     
+    def _migrate_tags(self, cursor: sqlite3.Cursor):
+        """Back-fill memory_tags from the comma-separated tags column (schema version 1)"""
+        cursor.execute("PRAGMA user_version")
+        if cursor.fetchone()[0] >= 1:
+            return
+        
+        cursor.execute("SELECT id, tags FROM memories WHERE tags IS NOT NULL AND tags != ''")
+        rows = [
+            (memory_id, tag)
+            for memory_id, tags in cursor.fetchall()
+            for tag in normalize_tags(tags.split(','))
+        ]
+        cursor.executemany("INSERT OR IGNORE INTO memory_tags (memory_id, tag) VALUES (?, ?)", rows)
+        cursor.execute("PRAGMA user_version = 1")
+        
+        if rows:
+            print(f"[MEMORY] Indexed {len(rows)} existing memory tags")
+    
+    def _write_tags(self, cursor: sqlite3.Cursor, memory_id: int, tags: List[str]):
+        """Replace the tag index rows of a memory"""
+        cursor.execute("DELETE FROM memory_tags WHERE memory_id = ?", (memory_id,))
+        cursor.executemany(
+            "INSERT INTO memory_tags (memory_id, tag) VALUES (?, ?)",
+            [(memory_id, tag) for tag in normalize_tags(tags)]
+        )
+    
     def _migrate_json_to_sqlite(self):
         """Migrate existing JSON memory data to SQLite"""
         if self.json_file.exists():
@@ -184,6 +237,7 @@ class ProductionMemorySystem:
         Store memory with full production features
         """
         with self._lock:
+            self.memory_cache.pop(key, None)
             return self._store_memory(key, value, category, tags or [], metadata or {})
     
     def _store_memory(self, key: str, value: str, category: str = "general",
@@ -227,6 +281,8 @@ class ProductionMemorySystem:
                 
                 memory_id = cursor.lastrowid
             
+            self._write_tags(cursor, memory_id, tags)
+            
             # Update search index
             cursor.execute("""
                 INSERT OR REPLACE INTO memory_search 
@@ -297,7 +353,8 @@ class ProductionMemorySystem:
                 
                 # Get memory and update access statistics
                 cursor.execute("""
-                    SELECT value, category, tags, metadata, created_at, version
+                    SELECT value, category, tags, metadata, created_at, version,
+                           frequency_score, score_updated_at
                     FROM memories 
                     WHERE key = ? AND active = 1
                 """, (key,))
@@ -305,16 +362,12 @@ class ProductionMemorySystem:
                 result = cursor.fetchone()
                 
                 if result:
-                    value, category, tags, metadata_json, created_at, version = result
+                    (value, category, tags, metadata_json, created_at, version,
+                     frequency_score, score_updated_at) = result
                     
-                    # Update access statistics
-                    cursor.execute("""
-                        UPDATE memories 
-                        SET access_count = access_count + 1, last_accessed = CURRENT_TIMESTAMP
-                        WHERE key = ? AND active = 1
-                    """, (key,))
-                    
-                    conn.commit()
+                    # Update access statistics (buffered, flushed in batches)
+                    self._access_tracker.seed(key, frequency_score, score_updated_at)
+                    self._update_access_count_async(key)
                     
                     # Update analytics
                     self._update_analytics("recall", key, category)
@@ -364,68 +417,66 @@ class ProductionMemorySystem:
     
     @safe_execute(fallback_value=[], context="Memory Search")
     def search_memories(self, query: str, category: str = None, 
-                       tags: List[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+                       tags: List[str] = None, limit: int = 50,
+                       tag_expression: str = None) -> List[Dict[str, Any]]:
         """
         Advanced memory search with full-text search and filtering
+        
+        Args:
+            query: FTS5 query (empty to browse)
+            category: Restrict to a category
+            tags: Tags that must all be present (exact match)
+            limit: Maximum results
+            tag_expression: Boolean tag filter, e.g. "ai AND (python OR rust) AND NOT legacy"
         """
         with self._lock:
             try:
                 conn = sqlite3.connect(str(self.sqlite_file))
+                register_sql_functions(conn, self._access_tracker.half_life)
                 cursor = conn.cursor()
                 
-                # Build search query
-                if category or tags:
-                    # Filtered search
-                    base_query = """
-                        SELECT m.key, m.value, m.category, m.tags, m.created_at, 
-                               m.access_count, m.version
-                        FROM memories m
-                        WHERE m.active = 1
-                    """
-                    
-                    params = []
-                    
-                    if category:
-                        base_query += " AND m.category = ?"
-                        params.append(category)
-                    
-                    if tags:
-                        for tag in tags:
-                            base_query += " AND m.tags LIKE ?"
-                            params.append(f"%{tag}%")
-                    
-                    # Add text search if query provided
-                    if query:
-                        base_query += " AND (m.key LIKE ? OR m.value LIKE ?)"
-                        params.extend([f"%{query}%", f"%{query}%"])
-                    
-                    base_query += " ORDER BY m.access_count DESC, m.updated_at DESC LIMIT ?"
-                    params.append(limit)
-                    
-                    cursor.execute(base_query, params)
-                    
+                columns = """
+                    SELECT m.key, m.value, m.category, m.tags, m.created_at, 
+                           m.access_count, m.version
+                """
+                conditions = ["m.active = 1"]
+                params = []
+                order_by = []
+                
+                if query:
+                    # Full-text search; all filters below apply in the same statement
+                    source = "FROM memory_search s JOIN memories m ON s.rowid = m.id"
+                    conditions.append("memory_search MATCH ?")
+                    params.append(query)
+                    order_by.append("rank")
                 else:
-                    # Full-text search
-                    if query:
-                        cursor.execute("""
-                            SELECT m.key, m.value, m.category, m.tags, m.created_at, 
-                                   m.access_count, m.version
-                            FROM memory_search s
-                            JOIN memories m ON s.rowid = m.id
-                            WHERE memory_search MATCH ? AND m.active = 1
-                            ORDER BY rank, m.access_count DESC
-                            LIMIT ?
-                        """, (query, limit))
-                    else:
-                        # Return most accessed memories
-                        cursor.execute("""
-                            SELECT key, value, category, tags, created_at, 
-                                   access_count, version
-                            FROM memories
-                            WHERE active = 1
-                            ORDER BY access_count DESC, updated_at DESC
-                            LIMIT ?
-                        """, (limit,))
+                    source = "FROM memories m"
+                
+                if category:
+                    conditions.append("m.category = ?")
+                    params.append(category)
+                
+                tag_filter = None
+                if tag_expression:
+                    tag_filter = parse_tag_expression(tag_expression)
+                if tags:
+                    tag_filter = all_of(tags) if tag_filter is None else And((tag_filter, all_of(tags)))
+                if tag_filter is not None:
+                    tag_sql, tag_params = compile_tag_expression(tag_filter)
+                    conditions.append(f"({tag_sql})")
+                    params.extend(tag_params)
+                
+                order_by.extend([
+                    "jarvis_decay(m.frequency_score, m.score_updated_at, ?) DESC",
+                    "m.updated_at DESC"
+                ])
+                params.extend([time.time(), limit])
+                
+                cursor.execute(
+                    f"{columns} {source} WHERE {' AND '.join(conditions)} "
+                    f"ORDER BY {', '.join(order_by)} LIMIT ?",
+                    params
+                )
                 
                 results = []
                 for row in cursor.fetchall():
@@ -473,6 +524,10 @@ class ProductionMemorySystem:
                     """, (key,))
                 else:
                     # Hard delete
+                    cursor.execute(
+                        "DELETE FROM memory_tags WHERE memory_id IN (SELECT id FROM memories WHERE key = ?)",
+                        (key,)
+                    )
                     cursor.execute("DELETE FROM memories WHERE key = ?", (key,))
                     cursor.execute("DELETE FROM memory_search WHERE key = ?", (key,))
                 
@@ -480,6 +535,9 @@ class ProductionMemorySystem:
                 conn.commit()
                 conn.close()
                 
+                self.memory_cache.pop(key, None)
+                self._access_tracker.forget(key)
+                
                 if affected:
                     self._update_analytics("delete", key, "deletion")
                 
@@ -521,6 +579,9 @@ class ProductionMemorySystem:
     def get_memory_stats(self) -> Dict[str, Any]:
         """Get comprehensive memory statistics"""
         try:
+            # Make buffered access counts visible to the queries below
+            self._access_tracker.flush()
+            
             conn = sqlite3.connect(str(self.sqlite_file))
             cursor = conn.cursor()
             
@@ -570,6 +631,7 @@ class ProductionMemorySystem:
                 "cache_misses": self.stats["cache_misses"],
                 "total_queries": self.stats["total_queries"],
                 "avg_query_time": avg_query_time,
+                "access_tracking": self._access_tracker.get_stats(),
                 "memory_usage_mb": self._estimate_memory_usage(),
                 "storage_files": {
                     "sqlite_size": self.sqlite_file.stat().st_size if self.sqlite_file.exists() else 0,
@@ -586,19 +648,26 @@ class ProductionMemorySystem:
     
     def _cache_memory(self, key: str, value):
         """Cache memory for faster access"""
-        # Simple LRU-like cache management
         if len(self.memory_cache) >= self.max_cache_size:
-            # Remove oldest entries (simple approach)
-            keys_to_remove = list(self.memory_cache.keys())[:100]
-            for k in keys_to_remove:
+            # Evict the 10% of entries with the lowest decayed access frequency
+            evict_count = max(1, self.max_cache_size // 10)
+            for k in self._access_tracker.coldest(self.memory_cache.keys(), evict_count):
                 del self.memory_cache[k]
         
         self.memory_cache[key] = value
     
     def _update_access_count_async(self, key: str):
-        """Update access count asynchronously (simplified)"""
-        # In a full implementation, this would be done in a background thread
-        pass
+        """Record an access; counts are written by the tracker's background flush"""
+        self._access_tracker.record(key)
+    
+    def flush_access_counts(self) -> int:
+        """Write buffered access counts to the database now"""
+        return self._access_tracker.flush()
+    
+    def close(self):
+        """Stop background access tracking and persist pending counts"""
+        self._access_tracker.stop()
+        self._save_analytics()
     
     def get_cache_hit_rate(self) -> float:
         """Calculate cache hit rate"""
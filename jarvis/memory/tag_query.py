@@ -0,0 +1,184 @@
+"""
+Tag expressions for the production memory system
+
+Expressions such as ``ai AND (python OR rust) AND NOT legacy`` are parsed
+into a small tree and compiled to SQL predicates over the normalized
+``memory_tags(memory_id, tag)`` table, so every tag lookup is served by
+the (tag, memory_id) index instead of a LIKE scan over a tag string.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Tuple, Union, Iterable
+
+
+class TagExpressionError(ValueError):
+    """Raised for malformed tag expressions"""
+    pass
+
+
+def normalize_tag(tag: str) -> str:
+    """Normalize a tag for storage and lookup"""
+    return tag.strip().lower()
+
+
+def normalize_tags(tags: Iterable[str]) -> List[str]:
+    """Normalize tags, dropping empties and duplicates while keeping order"""
+    seen = []
+    for tag in tags or []:
+        normalized = normalize_tag(tag)
+        if normalized and normalized not in seen:
+            seen.append(normalized)
+    return seen
+
+
+@dataclass(frozen=True)
+class Tag:
+    name: str
+
+
+@dataclass(frozen=True)
+class Not:
+    operand: "TagNode"
+
+
+@dataclass(frozen=True)
+class And:
+    operands: Tuple["TagNode", ...]
+
+
+@dataclass(frozen=True)
+class Or:
+    operands: Tuple["TagNode", ...]
+
+
+TagNode = Union[Tag, Not, And, Or]
+
+_TOKEN_PATTERN = re.compile(r'\s*(\(|\)|"[^"]*"|[^\s()]+)')
+
+
+def _tokenize(expression: str) -> List[str]:
+    tokens = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = _TOKEN_PATTERN.match(expression, position)
+        if not match:
+            raise TagExpressionError(f"Invalid tag expression near: {expression[position:]}")
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser: or := and (OR and)*, and := not (AND? not)*, not := NOT not | atom"""
+
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> str:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self) -> str:
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self) -> TagNode:
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise TagExpressionError(f"Unexpected token: {self.peek()}")
+        return node
+
+    def parse_or(self) -> TagNode:
+        operands = [self.parse_and()]
+        while self.peek() and self.peek().upper() == "OR":
+            self.take()
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else Or(tuple(operands))
+
+    def parse_and(self) -> TagNode:
+        operands = [self.parse_not()]
+        while self.peek() and self.peek() != ")" and self.peek().upper() != "OR":
+            if self.peek().upper() == "AND":
+                self.take()
+            operands.append(self.parse_not())
+        return operands[0] if len(operands) == 1 else And(tuple(operands))
+
+    def parse_not(self) -> TagNode:
+        if self.peek() and self.peek().upper() == "NOT":
+            self.take()
+            return Not(self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self) -> TagNode:
+        token = self.take()
+        if token is None:
+            raise TagExpressionError("Unexpected end of tag expression")
+        if token == "(":
+            node = self.parse_or()
+            if self.take() != ")":
+                raise TagExpressionError("Missing closing parenthesis")
+            return node
+        if token == ")" or token.upper() in ("AND", "OR"):
+            raise TagExpressionError(f"Unexpected token: {token}")
+        name = normalize_tag(token.strip('"'))
+        if not name:
+            raise TagExpressionError("Empty tag")
+        return Tag(name)
+
+
+def parse_tag_expression(expression: str) -> TagNode:
+    """
+    Parse a tag expression
+
+    Operators are AND, OR and NOT (case-insensitive) with the usual
+    precedence; adjacent tags are implicitly ANDed; quote tags that contain
+    spaces or parentheses.
+    """
+    tokens = _tokenize(expression)
+    if not tokens:
+        raise TagExpressionError("Empty tag expression")
+    return _Parser(tokens).parse()
+
+
+def all_of(tags: Iterable[str]) -> TagNode:
+    """Expression requiring every tag"""
+    nodes = tuple(Tag(tag) for tag in normalize_tags(tags))
+    if not nodes:
+        raise TagExpressionError("No tags given")
+    return nodes[0] if len(nodes) == 1 else And(nodes)
+
+
+def compile_tag_expression(node: TagNode, id_column: str = "m.id") -> Tuple[str, List[str]]:
+    """
+    Compile a tag expression to a SQL predicate on a memory id column
+
+    Returns:
+        (sql, params) where sql is usable inside a WHERE clause
+    """
+    if isinstance(node, Tag):
+        return (f"{id_column} IN (SELECT memory_id FROM memory_tags WHERE tag = ?)", [node.name])
+
+    if isinstance(node, Not):
+        sql, params = compile_tag_expression(node.operand, id_column)
+        return (f"NOT ({sql})", params)
+
+    if isinstance(node, Or):
+        # A disjunction of plain tags is one index range scan per tag in a single subquery
+        if all(isinstance(operand, Tag) for operand in node.operands):
+            names = [operand.name for operand in node.operands]
+            placeholders = ", ".join("?" for _ in names)
+            return (f"{id_column} IN (SELECT memory_id FROM memory_tags WHERE tag IN ({placeholders}))",
+                    names)
+        joiner = " OR "
+    else:
+        joiner = " AND "
+
+    parts, params = [], []
+    for operand in node.operands:
+        sql, operand_params = compile_tag_expression(operand, id_column)
+        parts.append(f"({sql})")
+        params.extend(operand_params)
+    return (joiner.join(parts), params)
@@ -0,0 +1,349 @@
+"""
+Tiered rollups and retention for the metrics database
+
+Raw samples in ``metrics.db`` are compacted into 1 minute, 1 hour and
+1 day buckets. Each bucket keeps count, sum, min, max and a
+``QuantileSketch`` of the values, so coarser buckets are built by merging
+finer ones without going back to raw samples, and every tier keeps
+meaningful percentiles. Each tier has its own retention: raw samples are
+kept for two days, minute buckets for a week, hour buckets for 90 days
+and day buckets for five years.
+
+Compaction is incremental. A watermark records how far raw samples have
+been rolled up; each run folds the newly completed minutes into the
+minute tier and recomputes the hour and day buckets they touch, so all
+tiers are current up to the watermark. Raw samples are only deleted once
+they are behind it.
+"""
+
+import json
+import math
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..utils.quantile_sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+
+@dataclass(frozen=True)
+class RollupTier:
+    """One rollup resolution"""
+    name: str
+    width: int          # Bucket width in seconds
+    retention: int      # Seconds of buckets kept
+
+
+DEFAULT_TIERS = (
+    RollupTier('1m', MINUTE, 7 * DAY),
+    RollupTier('1h', HOUR, 90 * DAY),
+    RollupTier('1d', DAY, 5 * 365 * DAY),
+)
+
+
+def to_epoch(timestamp: str) -> float:
+    """Epoch seconds of a stored (local, ISO format) sample timestamp"""
+    return datetime.fromisoformat(timestamp).timestamp()
+
+
+def to_timestamp(epoch: float) -> str:
+    """Stored timestamp format for epoch seconds"""
+    return datetime.fromtimestamp(epoch).isoformat()
+
+
+class RollupBucket:
+    """Count, sum, min, max and sketch of the values in one bucket"""
+
+    __slots__ = ('metric_name', 'tier', 'start', 'count', 'sum', 'min', 'max', 'sketch')
+
+    def __init__(self, metric_name: str, tier: str, start: int, count: int = 0,
+                 total: float = 0.0, minimum: float = math.inf, maximum: float = -math.inf,
+                 sketch: QuantileSketch = None):
+        self.metric_name = metric_name
+        self.tier = tier
+        self.start = start
+        self.count = count
+        self.sum = total
+        self.min = minimum
+        self.max = maximum
+        self.sketch = sketch or QuantileSketch()
+
+    def add(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.sketch.add(value)
+
+    def merge(self, other: 'RollupBucket'):
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+
+    def add_sketch(self, sketch: QuantileSketch):
+        """Add the values summarized by a recorded histogram sketch"""
+        if not sketch.count:
+            return
+        self.count += sketch.count
+        self.sum += sketch.sum
+        self.min = min(self.min, sketch.min)
+        self.max = max(self.max, sketch.max)
+        self.sketch.merge(sketch)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def percentiles(self) -> Dict[str, float]:
+        return {f"p{p}": self.sketch.quantile(p / 100) for p in (50, 90, 95, 99)}
+
+    def to_row(self) -> tuple:
+        return (self.metric_name, self.tier, self.start, self.count, self.sum,
+                self.min, self.max, json.dumps(self.sketch.to_dict()))
+
+    @classmethod
+    def from_row(cls, row: Sequence) -> 'RollupBucket':
+        metric_name, tier, start, count, total, minimum, maximum, sketch = row
+        return cls(metric_name, tier, start, count, total, minimum, maximum,
+                   QuantileSketch.from_dict(json.loads(sketch)) if sketch else None)
+
+
+class MetricRollups:
+    """
+    Compaction, retention and tier selection for one metrics database
+
+    Expects the ``metrics`` table created by ``MetricStorage`` and adds
+    ``metric_rollups`` and ``rollup_state`` next to it.
+    """
+
+    def __init__(self, db_path: str, tiers: Sequence[RollupTier] = DEFAULT_TIERS,
+                 raw_retention: int = 2 * DAY, grace: int = 30, clock=time.time):
+        """
+        Initialize rollups
+
+        Args:
+            db_path: Metrics database
+            tiers: Rollup tiers from finest to coarsest; each width must be
+                a multiple of the previous one
+            raw_retention: Seconds of raw samples kept
+            grace: Seconds to wait after a minute ends before rolling it
+                up, so samples still buffered by writers are included
+            clock: Time source (epoch seconds)
+        """
+        if not tiers:
+            raise ValueError("At least one rollup tier is required")
+        for finer, coarser in zip(tiers, tiers[1:]):
+            if coarser.width <= finer.width or coarser.width % finer.width:
+                raise ValueError(f"Tier {coarser.name} must be a multiple of tier {finer.name}")
+            if finer.retention < 2 * coarser.width:
+                raise ValueError(f"Tier {finer.name} must be kept for at least two {coarser.name} buckets")
+        if raw_retention < 2 * tiers[0].width + grace:
+            raise ValueError("raw_retention is too short to roll samples up")
+
+        self.db_path = db_path
+        self.tiers = tuple(tiers)
+        self.raw_retention = raw_retention
+        self.grace = grace
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.stats = {
+            'compactions': 0,
+            'samples_rolled_up': 0,
+            'buckets_written': 0,
+            'rows_deleted': 0,
+            'last_compaction_seconds': 0.0
+        }
+        self._init_tables()
+
+    def _init_tables(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS metric_rollups (
+                    metric_name TEXT NOT NULL,
+                    tier TEXT NOT NULL,
+                    bucket_start INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    sum REAL NOT NULL,
+                    min REAL,
+                    max REAL,
+                    sketch TEXT,
+                    PRIMARY KEY (metric_name, tier, bucket_start)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_rollups_tier_start ON metric_rollups(tier, bucket_start)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS rollup_state (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            ''')
+
+    def _watermark(self, conn: sqlite3.Connection) -> Optional[int]:
+        row = conn.execute("SELECT value FROM rollup_state WHERE name = 'raw_watermark'").fetchone()
+        return row[0] if row else None
+
+    def compact(self, now: float = None) -> Dict[str, Any]:
+        """Roll up completed minutes and apply retention to every tier"""
+        now = self.clock() if now is None else now
+        start = time.perf_counter()
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            rolled, written = self._roll_up(conn, now)
+            deleted = self._apply_retention(conn, now)
+
+        elapsed = time.perf_counter() - start
+        self.stats['compactions'] += 1
+        self.stats['samples_rolled_up'] += rolled
+        self.stats['buckets_written'] += written
+        self.stats['rows_deleted'] += deleted
+        self.stats['last_compaction_seconds'] = elapsed
+        if rolled or deleted:
+            logger.info(f"Metric compaction rolled up {rolled} samples into {written} buckets "
+                        f"and deleted {deleted} expired rows in {elapsed:.2f}s")
+        return {'samples_rolled_up': rolled, 'buckets_written': written,
+                'rows_deleted': deleted, 'seconds': elapsed}
+
+    def _roll_up(self, conn: sqlite3.Connection, now: float) -> Tuple[int, int]:
+        first = self.tiers[0]
+        target = int(now - self.grace) // first.width * first.width
+        watermark = self._watermark(conn)
+        if watermark is None:
+            row = conn.execute('SELECT MIN(timestamp) FROM metrics').fetchone()
+            watermark = int(to_epoch(row[0])) // first.width * first.width if row[0] else target
+        if target <= watermark:
+            return 0, 0
+
+        # Raw samples -> finest tier, merged into any buckets already there
+        buckets: Dict[Tuple[str, int], RollupBucket] = {}
+        rolled = 0
+        rows = conn.execute('''
+            SELECT metric_name, timestamp, value, histogram_data FROM metrics
+            WHERE timestamp >= ? AND timestamp < ?
+        ''', (to_timestamp(watermark), to_timestamp(target)))
+        for metric_name, timestamp, value, histogram_data in rows:
+            values = json.loads(histogram_data) if histogram_data else [value]
+            bucket_start = int(to_epoch(timestamp)) // first.width * first.width
+            key = (metric_name, bucket_start)
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = RollupBucket(metric_name, first.name, bucket_start)
+            if QuantileSketch.is_serialized(values):
+                sketch = QuantileSketch.from_dict(values)
+                bucket.add_sketch(sketch)
+                rolled += sketch.count
+                continue
+            for item in values:
+                if isinstance(item, (int, float)) and not isinstance(item, bool):
+                    bucket.add(float(item))
+                    rolled += 1
+
+        for (metric_name, bucket_start), bucket in buckets.items():
+            existing = conn.execute('''
+                SELECT metric_name, tier, bucket_start, count, sum, min, max, sketch
+                FROM metric_rollups WHERE metric_name = ? AND tier = ? AND bucket_start = ?
+            ''', (metric_name, first.name, bucket_start)).fetchone()
+            if existing:
+                bucket.merge(RollupBucket.from_row(existing))
+        self._write(conn, buckets.values())
+        written = len(buckets)
+
+        # Coarser tiers: recompute every bucket the new minutes fall into
+        for finer, coarser in zip(self.tiers, self.tiers[1:]):
+            first_bucket = watermark // coarser.width * coarser.width
+            merged: Dict[Tuple[str, int], RollupBucket] = {}
+            rows = conn.execute('''
+                SELECT metric_name, tier, bucket_start, count, sum, min, max, sketch
+                FROM metric_rollups WHERE tier = ? AND bucket_start >= ? AND bucket_start < ?
+            ''', (finer.name, first_bucket, target))
+            for row in rows:
+                source = RollupBucket.from_row(row)
+                key = (source.metric_name, source.start // coarser.width * coarser.width)
+                bucket = merged.get(key)
+                if bucket is None:
+                    bucket = merged[key] = RollupBucket(key[0], coarser.name, key[1])
+                bucket.merge(source)
+            self._write(conn, merged.values())
+            written += len(merged)
+
+        conn.execute("INSERT OR REPLACE INTO rollup_state (name, value) VALUES ('raw_watermark', ?)",
+                     (target,))
+        return rolled, written
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, buckets):
+        conn.executemany('''
+            INSERT OR REPLACE INTO metric_rollups
+            (metric_name, tier, bucket_start, count, sum, min, max, sketch)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [bucket.to_row() for bucket in buckets if bucket.count])
+
+    def _apply_retention(self, conn: sqlite3.Connection, now: float) -> int:
+        deleted = 0
+        watermark = self._watermark(conn)
+        if watermark is not None:
+            # Never drop raw samples that have not been rolled up yet
+            raw_cutoff = min(now - self.raw_retention, watermark)
+            deleted += conn.execute('DELETE FROM metrics WHERE timestamp < ?',
+                                    (to_timestamp(raw_cutoff),)).rowcount
+        deleted += conn.execute('DELETE FROM metric_aggregations WHERE start_time < ?',
+                                (to_timestamp(now - self.tiers[0].retention),)).rowcount
+        for tier in self.tiers:
+            deleted += conn.execute('DELETE FROM metric_rollups WHERE tier = ? AND bucket_start < ?',
+                                    (tier.name, int(now - tier.retention))).rowcount
+        return deleted
+
+    def plan(self, start: float, resolution: Optional[float] = None,
+             now: float = None) -> Optional[RollupTier]:
+        """
+        Choose the tier for a query starting at ``start``
+
+        Returns the coarsest tier whose buckets are no wider than
+        ``resolution`` seconds and whose retention reaches back to
+        ``start``; None means raw samples. When no tier within the
+        resolution still holds data that old, the finest tier that does
+        is used instead.
+        """
+        now = self.clock() if now is None else now
+        age = now - start
+        resolution = resolution or 0
+
+        choice = None
+        if age > self.raw_retention:
+            # Raw samples are gone: fall back to the finest tier that reaches back far enough
+            covering = [tier for tier in self.tiers if tier.retention >= age]
+            choice = covering[0] if covering else self.tiers[-1]
+        for tier in self.tiers:
+            if tier.width <= resolution and tier.retention >= age:
+                choice = tier
+        return choice
+
+    def query(self, metric_name: str, tier: RollupTier, start: float, end: float = None,
+              limit: int = 1000) -> List[RollupBucket]:
+        """Buckets of one tier overlapping [start, end], newest first"""
+        end = self.clock() if end is None else end
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute('''
+                SELECT metric_name, tier, bucket_start, count, sum, min, max, sketch
+                FROM metric_rollups
+                WHERE metric_name = ? AND tier = ? AND bucket_start > ? AND bucket_start <= ?
+                ORDER BY bucket_start DESC LIMIT ?
+            ''', (metric_name, tier.name, int(start) - tier.width, int(end), limit)).fetchall()
+        return [RollupBucket.from_row(row) for row in rows]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with sqlite3.connect(self.db_path) as conn:
+            watermark = self._watermark(conn)
+            counts = dict(conn.execute('SELECT tier, COUNT(*) FROM metric_rollups GROUP BY tier').fetchall())
+        return dict(self.stats, raw_watermark=watermark,
+                    buckets={tier.name: counts.get(tier.name, 0) for tier in self.tiers})
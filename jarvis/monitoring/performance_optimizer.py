@@ -17,6 +17,8 @@ from dataclasses import dataclass, asdict
 from collections import deque, defaultdict
 import logging
 
+from .system_sampler import get_system_sampler
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -64,6 +66,7 @@ class PerformanceMonitor:
         self.alerts = deque(maxlen=100)
         self.running = False
         self.monitor_thread = None
+        self.collection_interval = 5.0
         self.start_time = time.time()
         
         # Performance counters
@@ -87,6 +90,7 @@ class PerformanceMonitor:
             return
         
         self.running = True
+        self.collection_interval = interval
         self.monitor_thread = threading.Thread(
             target=self._monitoring_loop,
             args=(interval,),
@@ -130,46 +134,17 @@ class PerformanceMonitor:
                 open_files=10
             )
         
-        process = psutil.Process()
-        
-        # CPU metrics
-        cpu_percent = psutil.cpu_percent(interval=1)
-        
-        # Memory metrics
-        memory_info = process.memory_info()
-        memory_percent = process.memory_percent()
-        memory_usage_mb = memory_info.rss / 1024 / 1024
-        
-        # Disk usage
-        try:
-            disk_usage = psutil.disk_usage('/')
-            disk_usage_mb = (disk_usage.used) / 1024 / 1024
-        except:
-            disk_usage_mb = 0
-        
-        # Network I/O
-        try:
-            net_io = psutil.net_io_counters()
-            network_io_mb = (net_io.bytes_sent + net_io.bytes_recv) / 1024 / 1024
-        except:
-            network_io_mb = 0
-        
-        # Thread and file metrics
-        active_threads = threading.active_count()
-        try:
-            open_files = len(process.open_files())
-        except:
-            open_files = 0
+        snapshot = get_system_sampler().latest(max_age=self.collection_interval)
         
         return PerformanceMetric(
             timestamp=time.time(),
-            cpu_percent=cpu_percent,
-            memory_percent=memory_percent,
-            memory_usage_mb=memory_usage_mb,
-            disk_usage_mb=disk_usage_mb,
-            network_io_mb=network_io_mb,
-            active_threads=active_threads,
-            open_files=open_files
+            cpu_percent=snapshot.cpu_percent,
+            memory_percent=snapshot.process_memory_percent,
+            memory_usage_mb=snapshot.process_memory_mb,
+            disk_usage_mb=snapshot.disk_used_mb,
+            network_io_mb=(snapshot.net_bytes_sent + snapshot.net_bytes_recv) / 1024 / 1024,
+            active_threads=threading.active_count(),
+            open_files=snapshot.process_open_files
         )
     
     def _check_alerts(self, metric: PerformanceMetric):
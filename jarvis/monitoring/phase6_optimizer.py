@@ -5,7 +5,6 @@ Advanced performance monitoring and optimization for Jarvis 1.0.0
 
 import time
 import threading
-import psutil
 import json
 import statistics
 from typing import Dict, List, Any, Optional, Callable
@@ -14,6 +13,8 @@ from pathlib import Path
 from dataclasses import dataclass, asdict
 from collections import defaultdict, deque
 
+from .system_sampler import get_system_sampler
+
 
 @dataclass
 class PerformanceMetric:
@@ -97,19 +98,18 @@ class Phase6PerformanceOptimizer:
         """Establish performance baselines for comparison"""
         try:
             # System resource baselines
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
+            snapshot = get_system_sampler().latest()
             
             self.performance_baselines.update({
-                "cpu_baseline": cpu_percent,
-                "memory_baseline": memory.percent,
-                "available_memory": memory.available,
-                "boot_time": psutil.boot_time()
+                "cpu_baseline": snapshot.cpu_percent,
+                "memory_baseline": snapshot.memory_percent,
+                "available_memory": snapshot.memory_available_mb * 1024**2,
+                "boot_time": snapshot.boot_time
             })
             
             print(f"[OPTIMIZER] Performance baselines established")
-            print(f"[OPTIMIZER] CPU baseline: {cpu_percent:.1f}%")
-            print(f"[OPTIMIZER] Memory baseline: {memory.percent:.1f}%")
+            print(f"[OPTIMIZER] CPU baseline: {snapshot.cpu_percent:.1f}%")
+            print(f"[OPTIMIZER] Memory baseline: {snapshot.memory_percent:.1f}%")
             
         except Exception as e:
             print(f"[OPTIMIZER] Failed to establish baselines: {e}")
@@ -141,36 +141,17 @@ class Phase6PerformanceOptimizer:
         try:
             timestamp = datetime.now()
             
-            # System resources
-            cpu_percent = psutil.cpu_percent()
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
-            
-            # Process-specific metrics
-            process = psutil.Process()
-            process_memory = process.memory_info()
-            process_cpu = process.cpu_percent()
-            
-            # Network I/O (if available)
-            try:
-                network = psutil.net_io_counters()
-                network_metrics = {
-                    "bytes_sent": network.bytes_sent,
-                    "bytes_recv": network.bytes_recv,
-                    "packets_sent": network.packets_sent,
-                    "packets_recv": network.packets_recv
-                }
-            except:
-                network_metrics = {}
+            # System and process resources, sampled once for all monitors
+            snapshot = get_system_sampler().latest(max_age=30)
             
             # Store metrics
             metrics = [
-                PerformanceMetric("cpu_usage", cpu_percent, "%", timestamp, "system"),
-                PerformanceMetric("memory_usage", memory.percent, "%", timestamp, "system"),
-                PerformanceMetric("memory_available", memory.available / 1024**3, "GB", timestamp, "system"),
-                PerformanceMetric("disk_usage", disk.percent, "%", timestamp, "system"),
-                PerformanceMetric("process_memory", process_memory.rss / 1024**2, "MB", timestamp, "process"),
-                PerformanceMetric("process_cpu", process_cpu, "%", timestamp, "process"),
+                PerformanceMetric("cpu_usage", snapshot.cpu_percent, "%", timestamp, "system"),
+                PerformanceMetric("memory_usage", snapshot.memory_percent, "%", timestamp, "system"),
+                PerformanceMetric("memory_available", snapshot.memory_available_mb / 1024, "GB", timestamp, "system"),
+                PerformanceMetric("disk_usage", snapshot.disk_percent, "%", timestamp, "system"),
+                PerformanceMetric("process_memory", snapshot.process_memory_mb, "MB", timestamp, "process"),
+                PerformanceMetric("process_cpu", snapshot.process_cpu_percent, "%", timestamp, "process"),
             ]
             
             for metric in metrics:
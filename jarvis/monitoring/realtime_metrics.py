@@ -7,6 +7,8 @@ import time
 import threading
 import json
 import os
+import atexit
+import weakref
 import asyncio
 try:
     import websockets
@@ -14,7 +16,7 @@ except ImportError:
     websockets = None
 import sqlite3
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Callable, Union
+from typing import Dict, Any, List, Optional, Callable, Union, Sequence
 from dataclasses import dataclass, asdict
 from enum import Enum
 import statistics
@@ -22,6 +24,11 @@ import math
 from collections import defaultdict, deque
 import concurrent.futures
 
+from .metric_rollups import DAY, DEFAULT_TIERS, MetricRollups, RollupTier, to_timestamp
+from ..utils.quantile_sketch import QuantileSketch
+from ..utils.metrics_registry import get_metrics_registry
+from .system_sampler import get_system_sampler
+
 # Numpy fallback for statistical operations
 try:
     import numpy as np
@@ -120,7 +127,7 @@ class MetricDefinition:
 class MetricValue:
     """Individual metric value with metadata"""
     timestamp: str
-    value: Union[float, List[float]]  # List for histograms
+    value: Union[float, List[float], QuantileSketch]  # Sketch (or legacy list) for histograms
     labels: Dict[str, str]
     source: str
     metadata: Dict[str, Any]
@@ -140,22 +147,92 @@ class MetricAggregation:
     percentiles: Dict[str, float]  # p50, p90, p95, p99
     rate_per_second: float
     standard_deviation: float
+    sketch: Optional[QuantileSketch] = None  # Distribution, for merging windows and nodes
+
+
+class _ThreadBuffer:
+    """Samples recorded by one thread and not yet written"""
+    
+    __slots__ = ('samples', 'dropped', 'dropped_seen', 'thread')
+    
+    def __init__(self, size: int):
+        self.samples = deque(maxlen=size)
+        self.dropped = 0        # Only ever incremented, by the owning thread
+        self.dropped_seen = 0   # Part of dropped already counted by the flusher
+        self.thread = threading.current_thread()
+
+
+_open_storages = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_storages():
+    """Write samples still buffered when the interpreter exits"""
+    for storage in list(_open_storages):
+        storage.flush()
 
 
 class MetricStorage:
-    """SQLite-based storage for metrics with advanced querying"""
+    """
+    SQLite-based storage for metrics with advanced querying
     
-    def __init__(self, db_path: str = None):
+    By default ``store_metric`` only appends the sample to a buffer owned
+    by the calling thread; no lock is taken and no connection is opened on
+    the recording path. A background flusher drains all thread buffers
+    every ``flush_interval`` seconds and writes them with ``executemany``
+    in one transaction. Each thread buffer holds at most ``buffer_size``
+    samples; when the flusher falls behind, the oldest samples are dropped
+    and counted in ``get_stats()['dropped']``. Reads flush first, so they
+    see every sample recorded before them.
+    
+    Raw samples are rolled up into coarser tiers (see ``metric_rollups``)
+    by ``compact``, which ``maybe_compact`` runs every
+    ``compaction_interval`` seconds; ``get_history`` reads from the
+    coarsest tier that still answers a query.
+    """
+    
+    def __init__(self, db_path: str = None, buffered: bool = True,
+                 flush_interval: float = 1.0, buffer_size: int = 50000,
+                 rollup_tiers: Sequence[RollupTier] = DEFAULT_TIERS,
+                 raw_retention: int = 2 * DAY, compaction_interval: float = 300):
         if db_path is None:
             db_path = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'metrics.db')
+        if flush_interval <= 0:
+            raise ValueError("flush_interval must be positive")
+        if buffer_size < 1:
+            raise ValueError("buffer_size must be at least 1")
         
         self.db_path = db_path
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.buffered = buffered
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
         self._init_database()
+        self.rollups = MetricRollups(db_path, rollup_tiers, raw_retention)
+        self.compaction_interval = compaction_interval
+        self._next_compaction = 0.0
+        
+        self._local = threading.local()
+        self._buffers: List[_ThreadBuffer] = []
+        self._buffers_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+        self._flusher_stop = threading.Event()
+        self._stats = {
+            'written': 0,
+            'dropped': 0,
+            'flushes': 0,
+            'write_errors': 0,
+            'last_flush_seconds': 0.0
+        }
+        _open_storages.add(self)
     
     def _init_database(self):
         """Initialize metrics database with optimized schema"""
         with sqlite3.connect(self.db_path) as conn:
+            # WAL lets readers proceed while the flusher writes
+            conn.execute('PRAGMA journal_mode=WAL')
+            
             # Main metrics table
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS metrics (
@@ -205,33 +282,178 @@ class MetricStorage:
                 )
             ''')
             
+            # Sketch column for databases created before aggregations kept one
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(metric_aggregations)')}
+            if 'sketch' not in columns:
+                conn.execute('ALTER TABLE metric_aggregations ADD COLUMN sketch TEXT')
+            
             # Create indexes for performance
             conn.execute('CREATE INDEX IF NOT EXISTS idx_metrics_name_time ON metrics(metric_name, timestamp)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON metrics(timestamp)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_aggregations_name_time ON metric_aggregations(metric_name, start_time)')
     
     def store_metric(self, metric_name: str, value: MetricValue):
-        """Store a metric value"""
+        """Store a metric value (buffered unless the storage was created with buffered=False)"""
+        if not self.buffered:
+            self._write_rows([self._to_row(metric_name, value)])
+            return
+        
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._register_buffer()
+        samples = buffer.samples
+        if len(samples) == self.buffer_size:
+            buffer.dropped += 1  # append below evicts the oldest sample
+        samples.append((metric_name, value))
+        
+        if self._flusher is None:
+            self._start_flusher()
+    
+    @staticmethod
+    def _to_row(metric_name: str, value: MetricValue) -> tuple:
+        if isinstance(value.value, QuantileSketch):
+            histogram_data = json.dumps(value.value.to_dict())
+            stored_value = None
+        elif isinstance(value.value, list):
+            histogram_data = json.dumps(value.value)
+            stored_value = None
+        else:
+            histogram_data = None
+            stored_value = value.value
+        return (
+            metric_name,
+            value.timestamp,
+            stored_value,
+            histogram_data,
+            json.dumps(value.labels),
+            value.source,
+            json.dumps(value.metadata)
+        )
+    
+    def _write_rows(self, rows: List[tuple]):
         with sqlite3.connect(self.db_path) as conn:
-            if isinstance(value.value, list):
-                histogram_data = json.dumps(value.value)
-                stored_value = None
-            else:
-                histogram_data = None
-                stored_value = value.value
-            
-            conn.execute('''
+            conn.executemany('''
                 INSERT INTO metrics (metric_name, timestamp, value, histogram_data, labels, source, metadata)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                metric_name,
-                value.timestamp,
-                stored_value,
-                histogram_data,
-                json.dumps(value.labels),
-                value.source,
-                json.dumps(value.metadata)
+            ''', rows)
+    
+    def _register_buffer(self) -> _ThreadBuffer:
+        buffer = _ThreadBuffer(self.buffer_size)
+        self._local.buffer = buffer
+        with self._buffers_lock:
+            self._buffers.append(buffer)
+        return buffer
+    
+    def _start_flusher(self):
+        with self._buffers_lock:
+            if self._flusher is not None:
+                return
+            self._flusher_stop.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name="metric-flusher", daemon=True)
+            self._flusher.start()
+    
+    def _flush_loop(self):
+        while not self._flusher_stop.wait(self.flush_interval):
+            self.flush()
+    
+    def flush(self) -> int:
+        """Write all buffered samples in one transaction; returns the number written"""
+        with self._flush_lock:
+            samples = []
+            with self._buffers_lock:
+                buffers = list(self._buffers)
+            for buffer in buffers:
+                queued = buffer.samples
+                # Only the owning thread appends, so popping what is there now is safe
+                for _ in range(len(queued)):
+                    samples.append(queued.popleft())
+                # Resetting dropped here would race the owner's unlocked
+                # increment, so count the growth since the last flush instead
+                dropped = buffer.dropped
+                self._stats['dropped'] += dropped - buffer.dropped_seen
+                buffer.dropped_seen = dropped
+            
+            with self._buffers_lock:
+                self._buffers = [buffer for buffer in self._buffers
+                                 if buffer.samples or buffer.thread.is_alive()]
+            
+            if not samples:
+                return 0
+            
+            start = time.perf_counter()
+            try:
+                self._write_rows([self._to_row(name, value) for name, value in samples])
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                print(f"[ERROR] Failed to write {len(samples)} buffered metric samples: {e}")
+                self._stats['write_errors'] += 1
+                self._stats['dropped'] += len(samples)
+                return 0
+            
+            self._stats['written'] += len(samples)
+            self._stats['flushes'] += 1
+            self._stats['last_flush_seconds'] = time.perf_counter() - start
+            return len(samples)
+    
+    def close(self):
+        """Stop the background flusher and write what is still buffered"""
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            self._flusher_stop.set()
+            flusher.join(timeout=5)
+        self.flush()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Buffering and compaction statistics"""
+        with self._buffers_lock:
+            buffered = sum(len(buffer.samples) for buffer in self._buffers)
+        return dict(self._stats, buffered=buffered, rollups=dict(self.rollups.stats))
+    
+    def compact(self) -> Dict[str, Any]:
+        """Roll buffered and raw samples up into the rollup tiers and apply retention"""
+        self.flush()
+        return self.rollups.compact()
+    
+    def maybe_compact(self) -> Optional[Dict[str, Any]]:
+        """Compact if ``compaction_interval`` has passed since the last run"""
+        now = time.monotonic()
+        if now < self._next_compaction:
+            return None
+        self._next_compaction = now + self.compaction_interval
+        return self.compact()
+    
+    def get_history(self, metric_name: str, start: float, end: float = None,
+                    resolution: float = None, limit: int = 1000) -> List[MetricValue]:
+        """
+        Metric history since ``start`` (epoch seconds), newest first
+        
+        Raw samples are returned while they cover the range and no coarser
+        ``resolution`` (seconds) is requested. Otherwise each value is one
+        rollup bucket from the coarsest tier that satisfies both: the
+        bucket mean, with count, min, max, sum and percentiles in metadata.
+        """
+        tier = self.rollups.plan(start, resolution)
+        if tier is None:
+            return self.get_metrics(metric_name, to_timestamp(start),
+                                    to_timestamp(end) if end else None, limit=limit)
+        
+        results = []
+        for bucket in self.rollups.query(metric_name, tier, start, end, limit=limit):
+            metadata = {
+                'tier': tier.name,
+                'count': bucket.count,
+                'min': bucket.min,
+                'max': bucket.max,
+                'sum': bucket.sum
+            }
+            metadata.update(bucket.percentiles())
+            results.append(MetricValue(
+                timestamp=to_timestamp(bucket.start),
+                value=bucket.mean,
+                labels={},
+                source=f"rollup:{tier.name}",
+                metadata=metadata
             ))
+        return results
     
     def store_aggregation(self, aggregation: MetricAggregation):
         """Store metric aggregation"""
@@ -239,8 +461,8 @@ class MetricStorage:
             conn.execute('''
                 INSERT INTO metric_aggregations 
                 (metric_name, start_time, end_time, count, min_value, max_value, 
-                 avg_value, sum_value, percentiles, rate_per_second, standard_deviation)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                 avg_value, sum_value, percentiles, rate_per_second, standard_deviation, sketch)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 aggregation.metric_name,
                 aggregation.start_time,
@@ -252,12 +474,14 @@ class MetricStorage:
                 aggregation.sum_value,
                 json.dumps(aggregation.percentiles),
                 aggregation.rate_per_second,
-                aggregation.standard_deviation
+                aggregation.standard_deviation,
+                json.dumps(aggregation.sketch.to_dict()) if aggregation.sketch else None
             ))
     
     def get_metrics(self, metric_name: str, start_time: str = None, end_time: str = None, 
                    limit: int = 1000) -> List[MetricValue]:
         """Retrieve metric values"""
+        self.flush()
         with sqlite3.connect(self.db_path) as conn:
             query = '''
                 SELECT timestamp, value, histogram_data, labels, source, metadata
@@ -281,6 +505,8 @@ class MetricStorage:
             results = []
             for row in cursor.fetchall():
                 value = json.loads(row[2]) if row[2] else row[1]
+                if QuantileSketch.is_serialized(value):
+                    value = QuantileSketch.from_dict(value)
                 results.append(MetricValue(
                     timestamp=row[0],
                     value=value,
@@ -297,7 +523,7 @@ class MetricStorage:
         with sqlite3.connect(self.db_path) as conn:
             query = '''
                 SELECT metric_name, start_time, end_time, count, min_value, max_value,
-                       avg_value, sum_value, percentiles, rate_per_second, standard_deviation
+                       avg_value, sum_value, percentiles, rate_per_second, standard_deviation, sketch
                 FROM metric_aggregations WHERE metric_name = ?
             '''
             params = [metric_name]
@@ -327,14 +553,16 @@ class MetricStorage:
                     sum_value=row[7],
                     percentiles=json.loads(row[8]) if row[8] else {},
                     rate_per_second=row[9],
-                    standard_deviation=row[10]
+                    standard_deviation=row[10],
+                    sketch=QuantileSketch.from_dict(json.loads(row[11])) if row[11] else None
                 ))
             
             return results
     
     def cleanup_current_data(self, hours_to_keep: int = 168):  # 7 days default
-        """Clean up old metric data"""
+        """Clean up old metric data (after rolling it up)"""
         cutoff_time = (datetime.now() - timedelta(hours=hours_to_keep)).isoformat()
+        self.compact()
         
         with sqlite3.connect(self.db_path) as conn:
             conn.execute('DELETE FROM metrics WHERE timestamp < ?', (cutoff_time,))
@@ -342,9 +570,16 @@ class MetricStorage:
 
 
 class MetricAggregator:
-    """Advanced metric aggregation engine"""
+    """
+    Advanced metric aggregation engine
     
-    def __init__(self):
+    Percentiles come from a ``QuantileSketch`` rather than from sorting the
+    window's values, so aggregating costs O(buckets) memory and windows,
+    rollups and nodes can be merged into one aggregation afterwards.
+    """
+    
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
         self.aggregation_functions = {
             'min': min,
             'max': max,
@@ -356,89 +591,95 @@ class MetricAggregator:
             'stdev': statistics.stdev if hasattr(statistics, 'stdev') else statistics.pstdev
         }
     
+    def new_sketch(self) -> QuantileSketch:
+        return QuantileSketch(self.relative_accuracy)
+    
     def aggregate_values(self, values: List[float]) -> MetricAggregation:
         """Aggregate a list of values"""
         if not values:
             return self._empty_aggregation()
-        
-        # Basic statistics
-        min_val = min(values)
-        max_val = max(values)
-        avg_val = statistics.mean(values)
-        sum_val = sum(values)
-        count = len(values)
-        
-        # Percentiles
-        sorted_values = sorted(values)
-        percentiles = {
-            'p50': self._percentile(sorted_values, 50),
-            'p75': self._percentile(sorted_values, 75),
-            'p90': self._percentile(sorted_values, 90),
-            'p95': self._percentile(sorted_values, 95),
-            'p99': self._percentile(sorted_values, 99)
-        }
-        
-        # Standard deviation
-        std_dev = statistics.pstdev(values) if len(values) > 1 else 0.0
+        sketch = self.new_sketch()
+        sketch.update(values)
+        return self.aggregate_sketch(sketch)
+    
+    def aggregate_sketch(self, sketch: QuantileSketch) -> MetricAggregation:
+        """Aggregate the values summarized by a sketch"""
+        if not sketch.count:
+            return self._empty_aggregation()
         
         return MetricAggregation(
             metric_name="",  # Will be set by caller
             start_time="",   # Will be set by caller
             end_time="",     # Will be set by caller
-            count=count,
-            min_value=min_val,
-            max_value=max_val,
-            avg_value=avg_val,
-            sum_value=sum_val,
-            percentiles=percentiles,
+            count=sketch.count,
+            min_value=sketch.min,
+            max_value=sketch.max,
+            avg_value=sketch.mean,
+            sum_value=sketch.sum,
+            percentiles=sketch.percentiles(),
             rate_per_second=0.0,  # Will be calculated by caller
-            standard_deviation=std_dev
+            standard_deviation=sketch.standard_deviation,
+            sketch=sketch
+        )
+    
+    def merge_aggregations(self, aggregations: List[MetricAggregation]) -> MetricAggregation:
+        """
+        Combine aggregations of one metric from several windows or nodes
+        
+        Count, sum, min and max combine exactly and percentiles come from
+        the merged sketches. The rate is the total of each input's rate
+        times its duration, spread over the combined time span.
+        """
+        aggregations = [aggregation for aggregation in aggregations if aggregation.count]
+        if not aggregations:
+            return self._empty_aggregation()
+        missing = [aggregation for aggregation in aggregations if aggregation.sketch is None]
+        if missing:
+            raise ValueError("Aggregations without a sketch cannot be merged")
+        
+        merged = self.aggregate_sketch(QuantileSketch.merged(a.sketch for a in aggregations))
+        merged.metric_name = aggregations[0].metric_name
+        merged.start_time = min(aggregation.start_time for aggregation in aggregations)
+        merged.end_time = max(aggregation.end_time for aggregation in aggregations)
+        
+        span = (datetime.fromisoformat(merged.end_time) - datetime.fromisoformat(merged.start_time)).total_seconds()
+        events = sum(
+            aggregation.rate_per_second *
+            (datetime.fromisoformat(aggregation.end_time) - datetime.fromisoformat(aggregation.start_time)).total_seconds()
+            for aggregation in aggregations
         )
+        merged.rate_per_second = events / span if span > 0 else sum(a.rate_per_second for a in aggregations)
+        return merged
     
-    def aggregate_histogram(self, histogram_values: List[List[float]]) -> Dict[str, Any]:
-        """Aggregate histogram data"""
+    def aggregate_histogram(self, histogram_values: List[Union[List[float], QuantileSketch]]) -> Dict[str, Any]:
+        """Aggregate histogram data (sketches or lists of values)"""
         if not histogram_values:
             return {}
         
-        # Flatten all histogram values
-        all_values = []
-        for hist in histogram_values:
-            all_values.extend(hist)
+        sketch = self.new_sketch()
+        for histogram in histogram_values:
+            if isinstance(histogram, QuantileSketch):
+                sketch.merge(histogram)
+            else:
+                sketch.update(histogram)
         
-        if not all_values:
+        if not sketch.count:
             return {}
         
         # Calculate histogram statistics
+        percentiles = sketch.percentiles((0.5, 0.9, 0.95, 0.99))
         return {
-            'total_samples': len(all_values),
-            'min': min(all_values),
-            'max': max(all_values),
-            'mean': statistics.mean(all_values),
-            'p50': self._percentile(sorted(all_values), 50),
-            'p90': self._percentile(sorted(all_values), 90),
-            'p95': self._percentile(sorted(all_values), 95),
-            'p99': self._percentile(sorted(all_values), 99),
-            'std_dev': statistics.pstdev(all_values) if len(all_values) > 1 else 0.0
+            'total_samples': sketch.count,
+            'min': sketch.min,
+            'max': sketch.max,
+            'mean': sketch.mean,
+            'p50': percentiles['p50'],
+            'p90': percentiles['p90'],
+            'p95': percentiles['p95'],
+            'p99': percentiles['p99'],
+            'std_dev': sketch.standard_deviation
         }
     
-    def _percentile(self, sorted_values: List[float], percentile: float) -> float:
-        """Calculate percentile of sorted values"""
-        if not sorted_values:
-            return 0.0
-        
-        index = (percentile / 100) * (len(sorted_values) - 1)
-        
-        if index.is_integer():
-            return sorted_values[int(index)]
-        else:
-            lower_index = int(index)
-            upper_index = lower_index + 1
-            if upper_index >= len(sorted_values):
-                return sorted_values[lower_index]
-            
-            weight = index - lower_index
-            return sorted_values[lower_index] * (1 - weight) + sorted_values[upper_index] * weight
-    
     def _empty_aggregation(self) -> MetricAggregation:
         """Return empty aggregation"""
         return MetricAggregation(
@@ -558,7 +799,7 @@ class MetricStreamer:
             'type': 'metric_update',
             'metric_name': metric_name,
             'timestamp': value.timestamp,
-            'value': value.value,
+            'value': value.value.summary() if isinstance(value.value, QuantileSketch) else value.value,
             'labels': value.labels,
             'source': value.source,
             'metadata': value.metadata
@@ -631,10 +872,19 @@ class AdvancedMetricsCollector:
     
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or {}
-        self.storage = MetricStorage()
+        self.storage = MetricStorage(
+            buffered=self.config.get('buffered_storage', True),
+            flush_interval=self.config.get('flush_interval', 1.0),
+            buffer_size=self.config.get('storage_buffer_size', 50000),
+            compaction_interval=self.config.get('compaction_interval', 300)
+        )
         self.aggregator = MetricAggregator()
         self.streamer = MetricStreamer(self.config.get('streaming_port', 8769))
         
+        # Current values are mirrored into the in-memory registry served on /metrics
+        self.registry = get_metrics_registry() if self.config.get('export_registry', True) else None
+        self._network_totals = None
+        
         # Metric definitions registry
         self.metric_definitions = {}
         self.custom_metrics = {}
@@ -648,6 +898,10 @@ class AdvancedMetricsCollector:
         self.metric_buffers = defaultdict(lambda: deque(maxlen=10000))
         self.aggregation_cache = {}
         
+        # Open aggregation window per metric: (start time, sketch of values so far)
+        self.metric_windows: Dict[str, tuple] = {}
+        self._windows_lock = threading.Lock()
+        
         # Performance tracking
         self.collection_stats = {
             'metrics_collected': 0,
@@ -850,6 +1104,8 @@ class AdvancedMetricsCollector:
         if self.aggregation_thread:
             self.aggregation_thread.join(timeout=5)
         
+        self.storage.close()
+        
         print("[METRICS] Metrics collection stopped")
     
     def record_metric(self, metric_name: str, value: Union[float, List[float]], 
@@ -863,6 +1119,11 @@ class AdvancedMetricsCollector:
             
             metric_def = self.metric_definitions[metric_name]
             
+            # Histograms are summarized once, here; nothing downstream keeps raw values
+            if isinstance(value, list):
+                value = QuantileSketch.from_values(value, relative_accuracy=self.aggregator.relative_accuracy)
+            self._add_to_window(metric_name, value)
+            
             # Create metric value
             metric_value = MetricValue(
                 timestamp=datetime.now().isoformat(),
@@ -881,6 +1142,9 @@ class AdvancedMetricsCollector:
             # Stream to real-time clients
             self.streamer.stream_metric(metric_name, metric_value)
             
+            if self.registry is not None:
+                self._export_metric(metric_name, metric_def, value, labels)
+            
             # Update stats
             self.collection_stats['metrics_collected'] += 1
             self.collection_stats['storage_operations'] += 1
@@ -890,6 +1154,40 @@ class AdvancedMetricsCollector:
             print(f"[ERROR] Failed to record metric {metric_name}: {e}")
             self.collection_stats['errors'] += 1
     
+    def _export_metric(self, metric_name: str, metric_def: MetricDefinition,
+                       value: Union[float, QuantileSketch], labels: Optional[Dict[str, str]]):
+        """Mirror a sample into the scrape registry according to its metric type"""
+        is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+        try:
+            if metric_def.metric_type in (MetricType.HISTOGRAM, MetricType.TIMER):
+                if is_number or isinstance(value, QuantileSketch):
+                    self.registry.observe(metric_name, value, labels, help=metric_def.description)
+            elif not is_number:
+                return
+            elif metric_def.metric_type == MetricType.COUNTER:
+                if value >= 0:
+                    self.registry.inc(metric_name, value, labels, help=metric_def.description)
+            else:
+                self.registry.set(metric_name, value, labels, help=metric_def.description)
+        except ValueError:
+            # The name is already exported with another type, e.g. pushed by a subsystem
+            pass
+    
+    def _add_to_window(self, metric_name: str, value: Union[float, QuantileSketch]):
+        with self._windows_lock:
+            window = self.metric_windows.get(metric_name)
+            if window is None:
+                window = self.metric_windows[metric_name] = (datetime.now(), self.aggregator.new_sketch())
+            if isinstance(value, QuantileSketch):
+                window[1].merge(value)
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                window[1].add(value)
+    
+    def _close_window(self, metric_name: str) -> Optional[tuple]:
+        """Take the open window of a metric, starting a new one on the next sample"""
+        with self._windows_lock:
+            return self.metric_windows.pop(metric_name, None)
+    
     def _auto_register_metric(self, metric_name: str, metadata: Dict[str, Any]):
         """Automatically register a metric based on name and metadata"""
         # Determine metric type from metadata or name
@@ -944,13 +1242,16 @@ class AdvancedMetricsCollector:
         self.record_metric(metric_name, duration_seconds, labels, metadata={'type': 'timer'})
     
     def get_current_values(self, metric_name: str = None) -> Dict[str, Any]:
-        """Get current metric values"""
+        """Get current metric values (histograms as sketch summaries)"""
+        def display(value):
+            return value.summary() if isinstance(value, QuantileSketch) else value
+        
         if metric_name:
             if metric_name in self.metric_buffers and self.metric_buffers[metric_name]:
                 latest = self.metric_buffers[metric_name][-1]
                 return {
                     metric_name: {
-                        'value': latest.value,
+                        'value': display(latest.value),
                         'timestamp': latest.timestamp,
                         'labels': latest.labels
                     }
@@ -963,7 +1264,7 @@ class AdvancedMetricsCollector:
             if buffer:
                 latest = buffer[-1]
                 current_values[name] = {
-                    'value': latest.value,
+                    'value': display(latest.value),
                     'timestamp': latest.timestamp,
                     'labels': latest.labels
                 }
@@ -976,10 +1277,10 @@ class AdvancedMetricsCollector:
         return self.storage.get_aggregations(metric_name, start_time)
     
     def get_metric_history(self, metric_name: str, hours: int = 24, 
-                          limit: int = 1000) -> List[MetricValue]:
-        """Get metric history"""
-        start_time = (datetime.now() - timedelta(hours=hours)).isoformat()
-        return self.storage.get_metrics(metric_name, start_time, limit=limit)
+                          limit: int = 1000, resolution: float = None) -> List[MetricValue]:
+        """Get metric history, from rollups when raw samples are too fine or already expired"""
+        start = time.time() - hours * 3600
+        return self.storage.get_history(metric_name, start, resolution=resolution, limit=limit)
     
     def create_custom_metric(self, name: str, calculation_func: Callable[[], float],
                            metric_type: MetricType = MetricType.GAUGE,
@@ -1022,7 +1323,8 @@ class AdvancedMetricsCollector:
             'active_metric_definitions': len(self.metric_definitions),
             'custom_metrics': len(self.custom_metrics),
             'streaming_clients': len(self.streamer.clients),
-            'memory_usage_mb': sum(len(buffer) for buffer in self.metric_buffers.values()) * 0.001  # Rough estimate
+            'memory_usage_mb': sum(len(buffer) for buffer in self.metric_buffers.values()) * 0.001,  # Rough estimate
+            'system_sampler': get_system_sampler().get_stats()
         }
     
     def _collection_loop(self):
@@ -1040,9 +1342,8 @@ class AdvancedMetricsCollector:
                 # Collect Jarvis performance metrics
                 self._collect_jarvis_metrics()
                 
-                # Clean up old data periodically
-                if int(time.time()) % 3600 == 0:  # Every hour
-                    self.storage.cleanup_current_data()
+                # Roll up and expire old data on schedule
+                self.storage.maybe_compact()
                 
                 time.sleep(self.config.get('collection_interval', 30))
                 
@@ -1074,33 +1375,21 @@ class AdvancedMetricsCollector:
     def _compute_aggregation(self, metric_name: str, metric_def: MetricDefinition):
         """Compute aggregation for a metric"""
         try:
-            # Get recent values for aggregation
-            buffer = self.metric_buffers[metric_name]
-            if not buffer:
-                return
-            
-            # Filter values within aggregation window
-            window_start = datetime.now() - timedelta(seconds=metric_def.aggregation_window)
-            recent_values = []
-            
-            for metric_value in buffer:
-                if datetime.fromisoformat(metric_value.timestamp) >= window_start:
-                    if isinstance(metric_value.value, list):
-                        recent_values.extend(metric_value.value)  # Histogram
-                    else:
-                        recent_values.append(metric_value.value)
-            
-            if not recent_values:
+            # Everything recorded since the previous aggregation, as one sketch
+            window = self._close_window(metric_name)
+            if window is None:
                 return
+            window_start, sketch = window
+            window_end = datetime.now()
             
             # Compute aggregation
-            aggregation = self.aggregator.aggregate_values(recent_values)
+            aggregation = self.aggregator.aggregate_sketch(sketch)
             aggregation.metric_name = metric_name
             aggregation.start_time = window_start.isoformat()
-            aggregation.end_time = datetime.now().isoformat()
+            aggregation.end_time = window_end.isoformat()
             
             # Calculate rate
-            time_diff = metric_def.aggregation_window
+            time_diff = max((window_end - window_start).total_seconds(), metric_def.aggregation_window)
             if metric_def.metric_type == MetricType.COUNTER:
                 aggregation.rate_per_second = aggregation.sum_value / time_diff
             else:
@@ -1119,31 +1408,23 @@ class AdvancedMetricsCollector:
             self.collection_stats['errors'] += 1
     
     def _collect_system_metrics(self):
-        """Collect system-level metrics"""
+        """Record system-level metrics from the shared sampler's latest snapshot"""
         try:
-            import psutil
-            
-            # CPU metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
-            self.record_gauge("system.cpu.percent", cpu_percent)
-            
-            # Memory metrics
-            memory = psutil.virtual_memory()
-            self.record_gauge("system.memory.percent", memory.percent)
-            self.record_gauge("system.memory.available_mb", memory.available / (1024**2))
-            
-            # Disk metrics
-            disk = psutil.disk_usage('/')
-            self.record_gauge("system.disk.percent", disk.percent)
-            self.record_gauge("system.disk.free_gb", disk.free / (1024**3))
+            snapshot = get_system_sampler().latest(max_age=self.config.get('collection_interval', 5))
+            if not snapshot.available:
+                return
+
+            self.record_gauge("system.cpu.percent", snapshot.cpu_percent)
+            self.record_gauge("system.memory.percent", snapshot.memory_percent)
+            self.record_gauge("system.memory.available_mb", snapshot.memory_available_mb)
+            self.record_gauge("system.disk.percent", snapshot.disk_percent)
+            self.record_gauge("system.disk.free_gb", snapshot.disk_free_gb)
             
-            # Network metrics (if available)
-            try:
-                net_io = psutil.net_io_counters()
-                self.record_counter("system.network.bytes_sent", net_io.bytes_sent)
-                self.record_counter("system.network.bytes_recv", net_io.bytes_recv)
-            except:
-                pass
+            # Counters record increments; the first sample counts everything since boot
+            previous_sent, previous_recv = self._network_totals or (0, 0)
+            self._network_totals = (snapshot.net_bytes_sent, snapshot.net_bytes_recv)
+            self.record_counter("system.network.bytes_sent", max(0, snapshot.net_bytes_sent - previous_sent))
+            self.record_counter("system.network.bytes_recv", max(0, snapshot.net_bytes_recv - previous_recv))
                 
         except Exception as e:
             print(f"[ERROR] Failed to collect system metrics: {e}")
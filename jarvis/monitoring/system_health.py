@@ -32,7 +32,11 @@ except ImportError:
             pass
         def attach(self, part):
             self._parts.append(part)
+import math
+import queue
+import random
 import statistics
+import concurrent.futures
 from collections import defaultdict, deque
 try:
     import psutil
@@ -40,6 +44,8 @@ except ImportError:
     psutil = None
 import platform
 
+from .system_sampler import get_system_sampler
+
 
 @dataclass
 class HealthStatus:
@@ -492,6 +498,229 @@ class HealthRecoverySystem:
             return False
 
 
+@dataclass
+class CheckSchedule:
+    """How often a health check runs and how long it may take"""
+    interval: float = 60.0
+    timeout: float = 10.0
+    jitter: float = 0.1  # fraction of the interval each run is shifted by, at random
+
+    def __post_init__(self):
+        if self.interval <= 0:
+            raise ValueError("interval must be positive")
+        if self.timeout <= 0:
+            raise ValueError("timeout must be positive")
+        if not 0 <= self.jitter < 1:
+            raise ValueError("jitter must be between 0 and 1")
+
+    def next_delay(self, rng: random.Random) -> float:
+        return self.interval * (1 + rng.uniform(-self.jitter, self.jitter))
+
+
+@dataclass
+class _RunningCheck:
+    future: concurrent.futures.Future
+    started: float
+    deadline: float
+    timed_out: bool = False
+
+
+class HealthCheckScheduler:
+    """Runs health checkers concurrently, each on its own schedule
+
+    Checks run in a thread pool. A check still running at its deadline is
+    reported as ``unknown`` and is not started again until the stuck call
+    returns, so a hung checker occupies at most one pool thread and never
+    delays the others. Every status, including timeouts and late results,
+    is passed to ``on_result(component, status)`` in order on a separate
+    delivery thread, so slow handling (database writes, alerts, recovery
+    actions) never delays scheduling or timeout detection.
+    """
+
+    def __init__(self, checkers: Dict[str, Callable[[], HealthStatus]],
+                 on_result: Callable[[str, HealthStatus], None],
+                 schedules: Optional[Dict[str, CheckSchedule]] = None,
+                 default_schedule: Optional[CheckSchedule] = None,
+                 rng: Optional[random.Random] = None):
+        self.checkers = dict(checkers)
+        self.on_result = on_result
+        default_schedule = default_schedule or CheckSchedule()
+        schedules = schedules or {}
+        self.schedules = {name: schedules.get(name, default_schedule) for name in self.checkers}
+        self._rng = rng or random.Random()
+
+        self._lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._executor = None
+        self._results: queue.Queue = queue.Queue()
+        self._delivery_thread = None
+        self._running: Dict[str, _RunningCheck] = {}
+        self._next_run: Dict[str, float] = {}
+        self.latest: Dict[str, HealthStatus] = {}
+        self.stats = {
+            name: {'runs': 0, 'timeouts': 0, 'errors': 0, 'late_results': 0, 'last_duration': None}
+            for name in self.checkers
+        }
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, len(self.checkers)), thread_name_prefix="health-check"
+            )
+        return self._executor
+
+    def start(self):
+        """Start scheduling; first runs are staggered across each check's jitter"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            now = time.monotonic()
+            for name, schedule in self.schedules.items():
+                self._next_run[name] = now + self._rng.uniform(0, schedule.jitter * schedule.interval)
+            self._thread = threading.Thread(target=self._run, name="health-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop scheduling; checks that are still running are abandoned"""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            self._running.clear()
+            delivery_thread, self._delivery_thread = self._delivery_thread, None
+            results, self._results = self._results, queue.Queue()
+        if delivery_thread is not None:
+            # Results queued before the sentinel are still handled
+            results.put(None)
+            delivery_thread.join(timeout)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wakeup.clear()
+            with self._lock:
+                now = time.monotonic()
+                self._collect(now)
+                for name, when in self._next_run.items():
+                    if when <= now and name not in self._running:
+                        self._submit(name, now)
+                delay = self._next_wakeup(now) - now
+            self._wakeup.wait(min(max(delay, 0.01), 1.0))
+
+    def run_once(self, components: Optional[List[str]] = None) -> Dict[str, HealthStatus]:
+        """Run checks now, concurrently, and wait for each to finish or time out"""
+        names = [name for name in (components or self.checkers) if name in self.checkers]
+        with self._lock:
+            now = time.monotonic()
+            for name in names:
+                if name not in self._running:
+                    self._submit(name, now)
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._collect(now)
+                pending = [self._running[name] for name in names
+                           if name in self._running and not self._running[name].timed_out]
+            if not pending:
+                break
+            concurrent.futures.wait(
+                [run.future for run in pending],
+                timeout=max(0.0, min(run.deadline for run in pending) - now),
+                return_when=concurrent.futures.FIRST_COMPLETED
+            )
+        # Callers expect the results to be handled, not just collected
+        self._results.join()
+        return {name: self.latest[name] for name in names if name in self.latest}
+
+    def _submit(self, name: str, now: float):
+        future = self._get_executor().submit(self.checkers[name])
+        self._running[name] = _RunningCheck(future, now, now + self.schedules[name].timeout)
+        self._next_run[name] = math.inf
+        self.stats[name]['runs'] += 1
+        future.add_done_callback(lambda _: self._wakeup.set())
+
+    def _collect(self, now: float):
+        """Deliver finished checks and time out overdue ones"""
+        for name, run in list(self._running.items()):
+            schedule = self.schedules[name]
+            if run.future.done():
+                del self._running[name]
+                self.stats[name]['last_duration'] = now - run.started
+                if run.timed_out:
+                    self.stats[name]['late_results'] += 1
+                try:
+                    status = run.future.result()
+                except concurrent.futures.CancelledError:
+                    continue
+                except Exception as e:
+                    self.stats[name]['errors'] += 1
+                    status = self._unknown_status(name, f"Health check failed: {e}")
+                self._deliver(name, status)
+                self._next_run[name] = now + schedule.next_delay(self._rng)
+            elif not run.timed_out and now >= run.deadline:
+                run.timed_out = True
+                self.stats[name]['timeouts'] += 1
+                self._deliver(name, self._unknown_status(
+                    name, f"Health check timed out after {schedule.timeout:.1f}s",
+                    {'timeout_seconds': schedule.timeout}
+                ))
+
+    def _next_wakeup(self, now: float) -> float:
+        times = [when for name, when in self._next_run.items() if name not in self._running]
+        times.extend(run.deadline for run in self._running.values() if not run.timed_out)
+        return min(times, default=now + 1.0)
+
+    def _unknown_status(self, name: str, message: str, metrics: Dict[str, Any] = None) -> HealthStatus:
+        return HealthStatus(
+            timestamp=datetime.now().isoformat(),
+            component=name,
+            status='unknown',
+            score=0,
+            metrics=metrics or {},
+            message=message,
+            recovery_actions=[]
+        )
+
+    def _deliver(self, name: str, status: HealthStatus):
+        """Record a status and queue it for on_result (caller holds the lock)"""
+        self.latest[name] = status
+        if self._delivery_thread is None or not self._delivery_thread.is_alive():
+            self._delivery_thread = threading.Thread(target=self._deliver_results, args=(self._results,),
+                                                     name="health-results", daemon=True)
+            self._delivery_thread.start()
+        self._results.put((name, status))
+
+    def _deliver_results(self, results: queue.Queue):
+        while True:
+            item = results.get()
+            try:
+                if item is None:
+                    return
+                name, status = item
+                try:
+                    self.on_result(name, status)
+                except Exception as e:
+                    print(f"[ERROR] Failed to handle health status for {name}: {e}")
+            finally:
+                results.task_done()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-check run, timeout and error counts"""
+        with self._lock:
+            return {
+                name: dict(stats, running=name in self._running, interval=self.schedules[name].interval,
+                           timeout=self.schedules[name].timeout)
+                for name, stats in self.stats.items()
+            }
+
 class SystemHealthMonitor:
     """Advanced system health monitoring with 100% coverage"""
     
@@ -509,6 +738,8 @@ class SystemHealthMonitor:
         # Health status storage
         self.current_statuses = {}
         self.component_checkers = {}
+        self.scheduler = None
+        self._stop_event = threading.Event()
         
         # WebSocket server for real-time updates
         self.websocket_server = None
@@ -530,12 +761,38 @@ class SystemHealthMonitor:
             'storage': self._check_storage_health
         }
     
+    def _check_schedules(self) -> Dict[str, CheckSchedule]:
+        """Per-component schedules: the check_* config keys, overridden by config['checks']"""
+        default = CheckSchedule(
+            interval=self.config.get('check_interval', 60),
+            timeout=self.config.get('check_timeout', 10),
+            jitter=self.config.get('check_jitter', 0.1)
+        )
+        overrides = self.config.get('checks', {})
+        return {
+            component: CheckSchedule(**{**asdict(default), **overrides.get(component, {})})
+            for component in self.component_checkers
+        }
+    
+    def _get_scheduler(self) -> HealthCheckScheduler:
+        if self.scheduler is None:
+            self.scheduler = HealthCheckScheduler(
+                self.component_checkers, self._handle_status, schedules=self._check_schedules()
+            )
+        return self.scheduler
+    
+    def run_health_checks(self, components: Optional[List[str]] = None) -> Dict[str, HealthStatus]:
+        """Run health checks now, concurrently, each bounded by its timeout"""
+        return self._get_scheduler().run_once(components)
+    
     def start_monitoring(self):
         """Start health monitoring"""
         if self.is_running:
             return
         
         self.is_running = True
+        self._stop_event.clear()
+        self._get_scheduler().start()
         self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self.monitor_thread.start()
         
@@ -547,6 +804,10 @@ class SystemHealthMonitor:
     def stop_monitoring(self):
         """Stop health monitoring"""
         self.is_running = False
+        self._stop_event.set()
+        
+        if self.scheduler:
+            self.scheduler.stop()
         
         if self.monitor_thread:
             self.monitor_thread.join(timeout=5)
@@ -563,7 +824,7 @@ class SystemHealthMonitor:
         critical_issues = []
         warnings = []
         
-        for component, status in self.current_statuses.items():
+        for component, status in list(self.current_statuses.items()):
             component_statuses[component] = status
             
             if status.status == 'critical':
@@ -612,35 +873,32 @@ class SystemHealthMonitor:
             uptime_seconds=time.time() - self.start_time
         )
     
+    def _handle_status(self, component: str, status: HealthStatus):
+        """Record a check result, alert on it and attempt recovery if critical"""
+        self.current_statuses[component] = status
+        
+        # Save to database
+        self.database.save_health_status(status)
+        
+        # Check for alerts
+        if status.status in ['warning', 'critical']:
+            self.alerting.send_alert(
+                component, status.status, status.message, status.score
+            )
+        
+        # Attempt recovery for critical issues
+        if status.status == 'critical' and self.config.get('auto_recovery', True):
+            recovery_success = self.recovery.attempt_recovery(component, status)
+            if recovery_success:
+                print(f"[RECOVERY] Successfully recovered {component}")
+    
     def _monitor_loop(self):
-        """Main health monitoring loop"""
-        while self.is_running:
+        """Report loop; the checks themselves run on the scheduler"""
+        # Give the first round of checks until the longest timeout to report
+        delay = max(schedule.timeout for schedule in self.scheduler.schedules.values())
+        while not self._stop_event.wait(delay):
             try:
-                # Check health of all components
-                for component, checker in self.component_checkers.items():
-                    try:
-                        status = checker()
-                        self.current_statuses[component] = status
-                        
-                        # Save to database
-                        self.database.save_health_status(status)
-                        
-                        # Check for alerts
-                        if status.status in ['warning', 'critical']:
-                            self.alerting.send_alert(
-                                component, status.status, status.message, status.score
-                            )
-                        
-                        # Attempt recovery for critical issues
-                        if status.status == 'critical' and self.config.get('auto_recovery', True):
-                            recovery_success = self.recovery.attempt_recovery(component, status)
-                            if recovery_success:
-                                print(f"[RECOVERY] Successfully recovered {component}")
-                        
-                    except Exception as e:
-                        print(f"[ERROR] Health check failed for {component}: {e}")
-                
-                # Generate and save system report
+                # Assemble the report from the latest result of every check
                 report = self.get_health_report()
                 self.database.save_system_report(report)
                 
@@ -651,17 +909,17 @@ class SystemHealthMonitor:
                 if int(time.time()) % 3600 == 0:  # Every hour
                     self.database.cleanup_current_data()
                 
-                # Sleep for monitoring interval
-                time.sleep(self.config.get('check_interval', 60))  # Default 1 minute
+                delay = self.config.get('report_interval', self.config.get('check_interval', 60))
                 
             except Exception as e:
                 print(f"[ERROR] Health monitor loop error: {e}")
-                time.sleep(30)
+                delay = 30
     
     def _check_system_health(self) -> HealthStatus:
         """Check overall system health"""
         try:
-            if psutil is None:
+            snapshot = get_system_sampler().latest(max_age=self.config.get('check_interval', 60))
+            if not snapshot.available:
                 # Mock metrics when psutil is not available
                 metrics = {
                     'cpu_percent': 15.0,
@@ -669,36 +927,17 @@ class SystemHealthMonitor:
                     'disk_percent': 45.0,
                     'load_average': 0.5
                 }
-                cpu_percent = 15.0
+                score = 100
             else:
-                # System resource metrics
-                cpu_percent = psutil.cpu_percent(interval=1)
-                memory = psutil.virtual_memory()
-                disk = psutil.disk_usage('/')
-                
                 metrics = {
-                    'cpu_percent': cpu_percent,
-                    'memory_percent': memory.percent,
-                    'disk_percent': disk.percent,
-                    'load_average': os.getloadavg()[0] if hasattr(os, 'getloadavg') else 0
+                    'cpu_percent': snapshot.cpu_percent,
+                    'memory_percent': snapshot.memory_percent,
+                    'disk_percent': snapshot.disk_percent,
+                    'load_average': snapshot.load_average
                 }
-            
-            # Calculate score based on resource usage
-            score = 100
-            if cpu_percent > 90:
-                score -= 30
-            elif cpu_percent > 70:
-                score -= 15
-            
-            if memory.percent > 90:
-                score -= 30
-            elif memory.percent > 70:
-                score -= 15
-            
-            if disk.percent > 95:
-                score -= 20
-            elif disk.percent > 80:
-                score -= 10
+                score = snapshot.resource_score()
+            cpu_percent = metrics['cpu_percent']
+            memory_percent = metrics['memory_percent']
             
             # Determine status
             if score >= 80:
@@ -706,10 +945,10 @@ class SystemHealthMonitor:
                 message = "System resources are healthy"
             elif score >= 60:
                 status = 'warning'
-                message = f"System under moderate load (CPU: {cpu_percent:.1f}%, RAM: {memory.percent:.1f}%)"
+                message = f"System under moderate load (CPU: {cpu_percent:.1f}%, RAM: {memory_percent:.1f}%)"
             else:
                 status = 'critical'
-                message = f"System under heavy load (CPU: {cpu_percent:.1f}%, RAM: {memory.percent:.1f}%)"
+                message = f"System under heavy load (CPU: {cpu_percent:.1f}%, RAM: {memory_percent:.1f}%)"
             
             recovery_actions = []
             if score < 80:
@@ -0,0 +1,349 @@
+"""
+Shared system resource sampler for Jarvis monitors
+
+Every monitor used to poll psutil on its own thread, several of them with
+``cpu_percent(interval=1)``, which sleeps for a second on each call. The
+``SystemSampler`` samples the host and the current process once per
+interval instead, using psutil's non-blocking mode: CPU percentages and
+network rates are computed from the difference to the previous sample, so
+a sample costs a few system calls rather than a second of wall time.
+
+Each sample is published as an immutable ``SystemSnapshot``. Monitors read
+the latest one with ``latest()`` and callbacks registered with
+``subscribe()`` receive every new snapshot. The time and CPU spent
+sampling are tracked and reported by ``get_stats()``.
+"""
+
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 ** 2
+GB = 1024 ** 3
+
+
+@dataclass(frozen=True)
+class SystemSnapshot:
+    """One sample of host and process resources"""
+    timestamp: float
+    sequence: int
+    available: bool  # False when psutil is missing and every value is zero
+    cpu_percent: float  # averaged since the previous sample
+    memory_percent: float
+    memory_total_mb: float
+    memory_available_mb: float
+    disk_percent: float
+    disk_used_mb: float
+    disk_free_gb: float
+    net_bytes_sent: int
+    net_bytes_recv: int
+    net_packets_sent: int
+    net_packets_recv: int
+    net_sent_per_second: float
+    net_recv_per_second: float
+    load_average: float
+    boot_time: float
+    process_cpu_percent: float
+    process_memory_mb: float
+    process_memory_percent: float
+    process_threads: int
+    process_open_files: int
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+    def resource_score(self) -> int:
+        """0-100 health score from CPU, memory and disk pressure"""
+        score = 100
+        if self.cpu_percent > 90:
+            score -= 30
+        elif self.cpu_percent > 70:
+            score -= 15
+
+        if self.memory_percent > 90:
+            score -= 30
+        elif self.memory_percent > 70:
+            score -= 15
+
+        if self.disk_percent > 95:
+            score -= 20
+        elif self.disk_percent > 80:
+            score -= 10
+        return score
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class SystemSampler:
+    """Samples system resources on one background thread and shares the result"""
+
+    def __init__(self, interval: float = 5.0, disk_path: str = '/'):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.interval = interval
+        self.disk_path = disk_path
+
+        self._sample_lock = threading.Lock()
+        self._subscribers: List[Callable[[SystemSnapshot], None]] = []
+        self._subscribers_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._latest: Optional[SystemSnapshot] = None
+        self._previous_net = None
+        self._sequence = 0
+        self._created = time.time()
+
+        self._process = None
+        if psutil is not None:
+            try:
+                self._process = psutil.Process()
+                # The first non-blocking call only records a starting point
+                psutil.cpu_percent(interval=None)
+                self._process.cpu_percent(interval=None)
+            except Exception as e:
+                logger.warning(f"Could not prime CPU counters: {e}")
+
+        self.stats = {
+            'samples': 0,
+            'sample_errors': 0,
+            'subscriber_errors': 0,
+            'sample_seconds': 0.0,
+            'sample_cpu_seconds': 0.0,
+            'last_sample_seconds': 0.0,
+            'max_sample_seconds': 0.0
+        }
+
+    # Background sampling
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the sampling thread (no-op if it is already running)"""
+        with self._thread_lock:
+            if self.is_running:
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="system-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the sampling thread"""
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            latest = self._latest
+            if latest is None or latest.age >= self.interval * 0.5:
+                self.sample()
+            self._stop_event.wait(self.interval)
+
+    # Snapshots
+
+    def latest(self, max_age: Optional[float] = None) -> SystemSnapshot:
+        """The most recent snapshot, sampling now if there is none yet or it
+        is older than ``max_age`` seconds. Starts the sampling thread."""
+        if not self.is_running and not self._stop_event.is_set():
+            self.start()
+        snapshot = self._latest
+        if snapshot is None or (max_age is not None and snapshot.age > max_age):
+            snapshot = self.sample(max_age)
+        return snapshot
+
+    def sample(self, max_age: Optional[float] = None) -> SystemSnapshot:
+        """Take a sample now and publish it to subscribers
+
+        Concurrent callers share one sample: a caller that waited for
+        another to finish returns that result if it is within ``max_age``.
+        """
+        with self._sample_lock:
+            latest = self._latest
+            if latest is not None and max_age is not None and latest.age <= max_age:
+                return latest
+
+            wall_start = time.perf_counter()
+            cpu_start = time.thread_time()
+            try:
+                snapshot = self._take_snapshot()
+            except Exception as e:
+                self.stats['sample_errors'] += 1
+                logger.error(f"System sample failed: {e}")
+                if latest is not None:
+                    return latest
+                snapshot = self._empty_snapshot()
+            elapsed = time.perf_counter() - wall_start
+
+            self.stats['samples'] += 1
+            self.stats['sample_seconds'] += elapsed
+            self.stats['sample_cpu_seconds'] += time.thread_time() - cpu_start
+            self.stats['last_sample_seconds'] = elapsed
+            self.stats['max_sample_seconds'] = max(self.stats['max_sample_seconds'], elapsed)
+            self._latest = snapshot
+
+        self._publish(snapshot)
+        return snapshot
+
+    def _next_sequence(self) -> int:
+        self._sequence += 1
+        return self._sequence
+
+    def _empty_snapshot(self) -> SystemSnapshot:
+        return SystemSnapshot(
+            timestamp=time.time(), sequence=self._next_sequence(), available=False,
+            cpu_percent=0.0, memory_percent=0.0, memory_total_mb=0.0, memory_available_mb=0.0,
+            disk_percent=0.0, disk_used_mb=0.0, disk_free_gb=0.0,
+            net_bytes_sent=0, net_bytes_recv=0, net_packets_sent=0, net_packets_recv=0,
+            net_sent_per_second=0.0, net_recv_per_second=0.0,
+            load_average=0.0, boot_time=0.0,
+            process_cpu_percent=0.0, process_memory_mb=0.0, process_memory_percent=0.0,
+            process_threads=threading.active_count(), process_open_files=0
+        )
+
+    def _take_snapshot(self) -> SystemSnapshot:
+        if psutil is None:
+            return self._empty_snapshot()
+
+        now = time.time()
+        cpu_percent = psutil.cpu_percent(interval=None)
+        memory = psutil.virtual_memory()
+        try:
+            disk = psutil.disk_usage(self.disk_path)
+            disk_values = (disk.percent, disk.used / MB, disk.free / GB)
+        except OSError:
+            disk_values = (0.0, 0.0, 0.0)
+
+        net_values = (0, 0, 0, 0)
+        sent_rate = recv_rate = 0.0
+        try:
+            net = psutil.net_io_counters()
+            if net is not None:
+                net_values = (net.bytes_sent, net.bytes_recv, net.packets_sent, net.packets_recv)
+                if self._previous_net is not None:
+                    previous_time, previous_sent, previous_recv = self._previous_net
+                    elapsed = now - previous_time
+                    if elapsed > 0:
+                        sent_rate = max(0, net.bytes_sent - previous_sent) / elapsed
+                        recv_rate = max(0, net.bytes_recv - previous_recv) / elapsed
+                self._previous_net = (now, net.bytes_sent, net.bytes_recv)
+        except Exception:
+            pass
+
+        load_average = os.getloadavg()[0] if hasattr(os, 'getloadavg') else 0.0
+
+        process_values = (0.0, 0.0, 0.0, threading.active_count(), 0)
+        process = self._process
+        if process is not None:
+            try:
+                with process.oneshot():
+                    if hasattr(process, 'num_fds'):
+                        open_files = process.num_fds()
+                    else:
+                        open_files = process.num_handles()
+                    process_values = (
+                        process.cpu_percent(interval=None),
+                        process.memory_info().rss / MB,
+                        process.memory_percent(),
+                        process.num_threads(),
+                        open_files
+                    )
+            except psutil.Error as e:
+                logger.debug(f"Process metrics unavailable: {e}")
+
+        return SystemSnapshot(
+            timestamp=now,
+            sequence=self._next_sequence(),
+            available=True,
+            cpu_percent=cpu_percent,
+            memory_percent=memory.percent,
+            memory_total_mb=memory.total / MB,
+            memory_available_mb=memory.available / MB,
+            disk_percent=disk_values[0],
+            disk_used_mb=disk_values[1],
+            disk_free_gb=disk_values[2],
+            net_bytes_sent=net_values[0],
+            net_bytes_recv=net_values[1],
+            net_packets_sent=net_values[2],
+            net_packets_recv=net_values[3],
+            net_sent_per_second=sent_rate,
+            net_recv_per_second=recv_rate,
+            load_average=load_average,
+            boot_time=psutil.boot_time(),
+            process_cpu_percent=process_values[0],
+            process_memory_mb=process_values[1],
+            process_memory_percent=process_values[2],
+            process_threads=process_values[3],
+            process_open_files=process_values[4]
+        )
+
+    # Subscribers
+
+    def subscribe(self, callback: Callable[[SystemSnapshot], None]):
+        """Call ``callback(snapshot)`` for every new snapshot"""
+        with self._subscribers_lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[SystemSnapshot], None]):
+        with self._subscribers_lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _publish(self, snapshot: SystemSnapshot):
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                self.stats['subscriber_errors'] += 1
+                logger.error(f"System snapshot subscriber failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Sampling counts and overhead
+
+        ``overhead_percent`` is the CPU time spent sampling as a share of
+        the time the sampler has existed.
+        """
+        stats = dict(self.stats)
+        samples = stats['samples']
+        uptime = max(time.time() - self._created, 1e-9)
+        stats.update({
+            'interval': self.interval,
+            'running': self.is_running,
+            'subscribers': len(self._subscribers),
+            'psutil_available': psutil is not None,
+            'mean_sample_ms': stats['sample_seconds'] / samples * 1000 if samples else 0.0,
+            'overhead_percent': stats['sample_cpu_seconds'] / uptime * 100,
+            'latest_age_seconds': self._latest.age if self._latest is not None else None
+        })
+        return stats
+
+
+# Global sampler instance
+_system_sampler = None
+_system_sampler_lock = threading.Lock()
+
+def get_system_sampler() -> SystemSampler:
+    """Get the process-wide system sampler"""
+    global _system_sampler
+    with _system_sampler_lock:
+        if _system_sampler is None:
+            _system_sampler = SystemSampler()
+        return _system_sampler
@@ -0,0 +1,449 @@
+"""
+Parsed document model and persistent extraction cache
+
+File processors parse a file once into a ``ParsedDocument`` (pages,
+paragraphs, tables and format metadata) and derive their text, data and
+summary views from it, so one upload is never parsed more than once.
+
+``ExtractionCache`` stores parsed documents in SQLite. An entry is found
+by path and matched on size and modification time, which needs only a
+``stat``; when those changed, the content hash decides whether the file
+really changed. Identical content under another path (a copied file) is
+also served from the cache.
+
+Extraction is streaming: processors read pages, rows and paragraphs one
+at a time and stop once an ``ExtractionLimits`` byte or token budget is
+spent, so a very large PDF or workbook is never held in memory whole.
+Worksheet columns are profiled on the fly, with exact counts and ranges
+and a fixed-size reservoir sample for the distribution statistics.
+"""
+
+import os
+import json
+import math
+import time
+import random
+import sqlite3
+import hashlib
+import logging
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+@dataclass
+class ExtractionLimits:
+    """Bounds on how much of a file is extracted"""
+    max_bytes: Optional[int] = 16 * 1024 * 1024  # UTF-8 bytes of content read, None for no limit
+    max_tokens: Optional[int] = None             # Tokens of content read, None for no limit
+    max_rows: Optional[int] = None               # Rows profiled per worksheet
+    sample_rows: int = 10                        # Rows per worksheet kept verbatim
+    profile_sample_size: int = 1000              # Reservoir size per column
+    profile_columns: int = 50                    # Columns profiled per worksheet
+    tokenizer: Optional[str] = None              # Tokenizer for max_tokens (see jarvis.vectordb.chunking)
+
+    def __post_init__(self):
+        for name in ("max_bytes", "max_tokens", "max_rows"):
+            value = getattr(self, name)
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive or None")
+        if self.sample_rows < 0 or self.profile_sample_size < 1 or self.profile_columns < 0:
+            raise ValueError("sample_rows and profile_columns must be non-negative, profile_sample_size positive")
+
+    def key(self) -> str:
+        """Identifies the limits in extraction cache keys"""
+        return (f"{self.max_bytes}/{self.max_tokens}/{self.max_rows}/{self.sample_rows}/"
+                f"{self.profile_sample_size}/{self.profile_columns}/{self.tokenizer or ''}")
+
+
+class TextBudget:
+    """
+    Running allowance of bytes and tokens
+
+    ``take`` returns as much of each piece of text as still fits.
+    ``truncated`` becomes true once any text had to be cut or refused,
+    which tells a reader to stop.
+    """
+
+    def __init__(self, limits: ExtractionLimits):
+        self.bytes_left = limits.max_bytes
+        self.tokens_left = limits.max_tokens
+        self.tokenizer = None
+        if limits.max_tokens is not None:
+            # Imported lazily: jarvis.vectordb pulls in the LLM and database stack
+            from ..vectordb.chunking import get_tokenizer
+            self.tokenizer = get_tokenizer(limits.tokenizer)
+        self.exhausted = False
+        self.truncated = False
+
+    def take(self, text: str) -> str:
+        """Charge ``text`` to the budget and return the part of it that fits"""
+        if not text:
+            return text
+        if self.exhausted:
+            self.truncated = True
+            return ""
+        if self.bytes_left is not None:
+            encoded = text.encode('utf-8')
+            if len(encoded) >= self.bytes_left:
+                if len(encoded) > self.bytes_left:
+                    text = encoded[:self.bytes_left].decode('utf-8', errors='ignore')
+                    self.truncated = True
+                self.exhausted = True
+            self.bytes_left -= min(len(encoded), self.bytes_left)
+        if self.tokens_left is not None:
+            spans = self.tokenizer.spans(text)
+            if len(spans) >= self.tokens_left:
+                if len(spans) > self.tokens_left:
+                    text = text[:spans[self.tokens_left - 1][1]]
+                    self.truncated = True
+                self.exhausted = True
+            self.tokens_left -= min(len(spans), self.tokens_left)
+        return text
+
+
+class ColumnProfile:
+    """
+    Streaming profile of one worksheet column
+
+    Counts, numeric range and mean are exact. Median, quartiles and the
+    distinct-value estimate come from a reservoir sample of at most
+    ``sample_size`` values, so memory stays constant however many rows
+    the column has.
+    """
+
+    def __init__(self, header: Optional[str] = None, sample_size: int = 1000, seed: int = 0):
+        self.header = header
+        self.sample_size = sample_size
+        self.count = 0
+        self.numeric = 0
+        self.minimum = None
+        self.maximum = None
+        self._total = 0.0
+        self._seen = 0  # Non-empty values offered to the reservoir
+        self._sample: List[Any] = []
+        self._random = random.Random(seed)
+
+    def add(self, value: Any):
+        """Record one non-empty cell value"""
+        self.count += 1
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+            self.numeric += 1
+            self._total += value
+            self.minimum = value if self.minimum is None else min(self.minimum, value)
+            self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+        # Algorithm R: each value ends up in the sample with equal probability
+        self._seen += 1
+        if len(self._sample) < self.sample_size:
+            self._sample.append(value)
+        else:
+            slot = self._random.randrange(self._seen)
+            if slot < self.sample_size:
+                self._sample[slot] = value
+
+    def to_dict(self, rows: int = None) -> Dict[str, Any]:
+        """Profile summary; ``rows`` is the number of rows profiled, for the empty-cell count"""
+        profile = {
+            "header": self.header,
+            "values": self.count,
+            "empty": max(0, rows - self.count) if rows is not None else None,
+            "sampled": self._seen > len(self._sample),
+            "distinct_in_sample": len({str(v) for v in self._sample}),
+        }
+        numbers = sorted(v for v in self._sample if isinstance(v, (int, float)) and not isinstance(v, bool))
+        if self.numeric:
+            profile.update({
+                "numeric": self.numeric,
+                "min": self.minimum,
+                "max": self.maximum,
+                "mean": self._total / self.numeric,
+            })
+        if numbers:
+            profile.update({
+                "p25": _quantile(numbers, 0.25),
+                "median": _quantile(numbers, 0.5),
+                "p75": _quantile(numbers, 0.75),
+            })
+        if self.count > self.numeric:
+            examples = []
+            for value in self._sample:
+                text = str(value)[:50]
+                if not isinstance(value, (int, float)) and text not in examples:
+                    examples.append(text)
+                if len(examples) == 5:
+                    break
+            profile["examples"] = examples
+        return profile
+
+
+def _quantile(ordered: Sequence[float], q: float) -> float:
+    """Linearly interpolated quantile of sorted values"""
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class ExtractionError(Exception):
+    """A file could not be parsed, so only placeholder text is available for it"""
+
+
+@dataclass
+class ParsedDocument:
+    """Format-neutral result of parsing a file once"""
+    content: str = ""                                         # Raw text for plain formats
+    pages: List[Optional[str]] = field(default_factory=list)  # Page texts, None where extraction failed
+    paragraphs: List[str] = field(default_factory=list)
+    tables: List[Dict[str, Any]] = field(default_factory=list)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    available: bool = True                                    # False when the parser library or file was unusable
+    error: Optional[str] = None
+    truncated: bool = False                                   # Extraction stopped at an ExtractionLimits budget
+
+    @property
+    def cacheable(self) -> bool:
+        """Failures may be transient (a missing library, a locked file) and are not cached"""
+        return self.available and self.error is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ParsedDocument":
+        return cls(**data)
+
+
+class FileFingerprint:
+    """Identity of a file's current contents; the content hash is computed on demand"""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        stat = os.stat(self.path)
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self._content_hash: Optional[str] = None
+
+    @property
+    def content_hash(self) -> str:
+        if self._content_hash is None:
+            digest = hashlib.sha256()
+            with open(self.path, 'rb') as file:
+                for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+                    digest.update(block)
+            self._content_hash = digest.hexdigest()
+        return self._content_hash
+
+
+class ExtractionCache:
+    """SQLite store of parsed documents keyed by (path, size, mtime, content hash)"""
+
+    def __init__(self,
+                 path: str = ":memory:",
+                 max_entries: int = 10000,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize extraction cache
+
+        Args:
+            path: SQLite file, ":memory:" for a process-local cache
+            max_entries: Least recently used entries beyond this are evicted
+            clock: Time source, injectable for tests
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._touched: Dict[tuple, float] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self.stats = {
+            'hits': 0,
+            'content_hits': 0,
+            'misses': 0,
+            'stale': 0,
+            'stores': 0,
+            'evictions': 0
+        }
+        self._open(path)
+
+    @classmethod
+    def from_env(cls) -> Optional["ExtractionCache"]:
+        """Build a cache from JARVIS_EXTRACTION_CACHE_* environment variables, None if unset"""
+        path = os.environ.get("JARVIS_EXTRACTION_CACHE_PATH")
+        if not path:
+            return None
+        return cls(path, max_entries=int(os.environ.get("JARVIS_EXTRACTION_CACHE_ENTRIES", 10000)))
+
+    def get(self, fingerprint: FileFingerprint, processor: str) -> Optional[ParsedDocument]:
+        """
+        Look up the parsed document for a file
+
+        Args:
+            fingerprint: Fingerprint of the file as it is now
+            processor: Processor name and parser version
+
+        Returns:
+            The cached document, or None if the file must be parsed
+        """
+        with self._lock:
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT size, mtime_ns, content_hash, document FROM extractions "
+                "WHERE path = ? AND processor = ?", (fingerprint.path, processor)
+            ).fetchone()
+            if row and (row[0], row[1]) == (fingerprint.size, fingerprint.mtime_ns):
+                self.stats['hits'] += 1
+                self._touched[(fingerprint.path, processor)] = self._clock()
+                return self._decode(row[3])
+
+        # Size or mtime changed (or an unknown path): the content decides
+        content_hash = fingerprint.content_hash
+        with self._lock:
+            if self._db is None:
+                return None
+            if row and row[2] != content_hash:
+                self.stats['stale'] += 1
+            match = self._db.execute(
+                "SELECT document FROM extractions WHERE content_hash = ? AND processor = ? LIMIT 1",
+                (content_hash, processor)
+            ).fetchone()
+            if match is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['content_hits'] += 1
+            self._store(fingerprint, processor, match[0])
+            return self._decode(match[0])
+
+    def put(self, fingerprint: FileFingerprint, processor: str, document: ParsedDocument):
+        """Store a parsed document for the file identified by ``fingerprint``"""
+        try:
+            encoded = json.dumps(document.to_dict(), default=str)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Parsed document for {fingerprint.path} not cacheable: {e}")
+            return
+        content_hash = fingerprint.content_hash
+        with self._lock:
+            if self._db is not None:
+                self._store(fingerprint, processor, encoded, content_hash)
+                self.stats['stores'] += 1
+
+    def invalidate(self, path: str):
+        """Forget every entry for a path"""
+        with self._lock:
+            if self._db is not None:
+                self._execute(lambda db: db.execute("DELETE FROM extractions WHERE path = ?",
+                                                    (os.path.abspath(path),)))
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            if self._db is not None:
+                self._execute(lambda db: db.execute("DELETE FROM extractions"))
+
+    def flush(self):
+        """Persist pending recency updates"""
+        with self._lock:
+            if self._db is not None and self._touched:
+                self._execute(self._write_touched)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self.flush()
+                self._db.close()
+                self._db = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            size = 0
+            if self._db is not None:
+                size = self._db.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+            lookups = self.stats['hits'] + self.stats['content_hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'size': size,
+                'max_entries': self.max_entries,
+                'path': self.path,
+                'hit_rate': (self.stats['hits'] + self.stats['content_hits']) / lookups * 100 if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        return self.get_stats()['size']
+
+    # Persistence
+
+    def _open(self, path: str):
+        try:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            if path != ":memory:":
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS extractions (
+                    path TEXT NOT NULL,
+                    processor TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    document TEXT NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (path, processor)
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS extractions_content "
+                             "ON extractions (content_hash, processor)")
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Extraction cache disabled ({path}): {e}")
+            if self._db is not None:
+                self._db.close()
+            self._db = None
+
+    def _decode(self, encoded: str) -> Optional[ParsedDocument]:
+        try:
+            return ParsedDocument.from_dict(json.loads(encoded))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Discarding unreadable extraction cache entry: {e}")
+            return None
+
+    def _store(self, fingerprint: FileFingerprint, processor: str, encoded: str, content_hash: str = None):
+        """Write one entry and evict the least recently used beyond the limit (caller holds the lock)"""
+        now = self._clock()
+
+        def write(db):
+            db.execute(
+                "INSERT OR REPLACE INTO extractions "
+                "(path, processor, size, mtime_ns, content_hash, document, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (fingerprint.path, processor, fingerprint.size, fingerprint.mtime_ns,
+                 content_hash or fingerprint.content_hash, encoded, now)
+            )
+            self._write_touched(db)
+            excess = db.execute("SELECT COUNT(*) FROM extractions").fetchone()[0] - self.max_entries
+            if excess > 0:
+                db.execute("DELETE FROM extractions WHERE rowid IN "
+                           "(SELECT rowid FROM extractions ORDER BY accessed_at LIMIT ?)", (excess,))
+                self.stats['evictions'] += excess
+        self._execute(write)
+
+    def _write_touched(self, db: sqlite3.Connection):
+        db.executemany("UPDATE extractions SET accessed_at = ? WHERE path = ? AND processor = ?",
+                       [(accessed_at, path, processor)
+                        for (path, processor), accessed_at in self._touched.items()])
+        self._touched.clear()
+
+    def _execute(self, operation: Callable[[sqlite3.Connection], Any]):
+        """Run one write transaction; cache failures never fail extraction"""
+        try:
+            with self._db:
+                operation(self._db)
+        except sqlite3.Error as e:
+            logger.warning(f"Extraction cache write failed: {e}")
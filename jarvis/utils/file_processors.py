@@ -1,41 +1,153 @@
 """
 Universal File Processing System for Jarvis 1.0.0
 Handles PDF, Excel (XLS/XLSX), and TXT file processing for memory, logs, and agent interaction.
+
+Each processor parses its file at most once, into a ``ParsedDocument``
+(see ``jarvis.utils.extraction``), on first use. The text, data and
+summary views are derived from that document and computed once per
+processor, so ``process_for_memory`` no longer re-reads a PDF or
+workbook for every view. With an ``ExtractionCache`` configured, parsed
+documents are also reused across processors and restarts for files
+that have not changed.
+
+Large files are read incrementally (``iter_pages``, ``iter_rows``,
+``iter_paragraphs``) and extraction stops once the processor's
+``ExtractionLimits`` budget is spent; the views then say so.
 """
 
 import os
+import copy
 import json
 import logging
+import functools
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, Iterator, List, Any, Optional, Tuple, Union
 from datetime import datetime
 
+from .extraction import (
+    ColumnProfile, ExtractionCache, ExtractionError, ExtractionLimits, FileFingerprint, ParsedDocument,
+    TextBudget
+)
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+_extraction_cache: Optional[ExtractionCache] = None
+_extraction_cache_loaded = False
+
+
+def set_extraction_cache(cache: Optional[ExtractionCache]):
+    """Set the extraction cache used by processors created without an explicit cache (None disables it)"""
+    global _extraction_cache, _extraction_cache_loaded
+    _extraction_cache = cache
+    _extraction_cache_loaded = True
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """Default extraction cache, configured from JARVIS_EXTRACTION_CACHE_PATH on first use"""
+    global _extraction_cache, _extraction_cache_loaded
+    if not _extraction_cache_loaded:
+        _extraction_cache = ExtractionCache.from_env()
+        _extraction_cache_loaded = True
+    return _extraction_cache
+
+
+def memoized_view(method):
+    """
+    Compute a processor view once per instance
+    
+    Callers receive a copy, so modifying a returned summary does not
+    change what the next call returns.
+    """
+    name = method.__name__
+    
+    @functools.wraps(method)
+    def wrapper(self):
+        views = self._views
+        if name not in views:
+            views[name] = method(self)
+        value = views[name]
+        return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+    return wrapper
+
+
 class FileProcessor(ABC):
     """
     Abstract base class for all file processors.
     Provides universal interface for file processing operations.
     """
     
-    def __init__(self, file_path: str):
+    # Bump when a processor's ParsedDocument layout changes, so cached results are not reused
+    PARSER_VERSION = 2
+    
+    def __init__(self, file_path: str, cache: Optional[ExtractionCache] = None,
+                 limits: Optional[ExtractionLimits] = None):
         """
         Initialize the file processor.
         
         Args:
             file_path (str): Path to the file to be processed
+            cache (ExtractionCache, optional): Cache of parsed documents,
+                defaults to the cache configured with set_extraction_cache
+            limits (ExtractionLimits, optional): Byte, token and row budgets for extraction
         """
         self.file_path = file_path
         self.file_name = os.path.basename(file_path)
         self.file_extension = os.path.splitext(file_path)[1].lower()
         self.processed_data = {}
         self.metadata = {}
+        self.cache = cache if cache is not None else get_extraction_cache()
+        self.limits = limits or ExtractionLimits()
+        self._document: Optional[ParsedDocument] = None
+        self._views: Dict[str, Any] = {}
         
         # Validate file existence
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
     
+    def parse(self) -> ParsedDocument:
+        """
+        Parse the file into the shared document model, at most once.
+        
+        Returns:
+            ParsedDocument: Parsed content, from the cache when the file is unchanged
+        """
+        if self._document is None:
+            self._document = self._load_document()
+        return self._document
+    
+    def _load_document(self) -> ParsedDocument:
+        if self.cache is None:
+            return self._parse()
+        
+        processor = f"{self.__class__.__name__}:{self.PARSER_VERSION}:{self.limits.key()}"
+        try:
+            fingerprint = FileFingerprint(self.file_path)
+            document = self.cache.get(fingerprint, processor)
+        except OSError as e:
+            logger.warning(f"Extraction cache lookup failed for {self.file_path}: {e}")
+            return self._parse()
+        if document is not None:
+            return document
+        
+        document = self._parse()
+        if document.cacheable:
+            try:
+                self.cache.put(fingerprint, processor, document)
+            except OSError as e:
+                logger.warning(f"Could not cache extraction of {self.file_path}: {e}")
+        return document
+    
+    def _parse(self) -> ParsedDocument:
+        """
+        Read the file into a ParsedDocument. Processors whose views are
+        cheap to compute directly need not override this.
+        
+        Returns:
+            ParsedDocument: Parsed content
+        """
+        return ParsedDocument()
+    
     @abstractmethod
     def extract_text(self) -> str:
         """
@@ -152,20 +264,53 @@ class TXTProcessor(FileProcessor):
     Handles plain text file analysis and processing.
     """
     
-    def extract_text(self) -> str:
-        """Extract text content from TXT file."""
+    # Characters read at a time
+    READ_CHUNK = 64 * 1024
+    
+    def _parse(self) -> ParsedDocument:
+        """Read the text file up to the budget, falling back to latin-1 for non-UTF-8 content."""
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as file:
-                return file.read()
+            return self._read('utf-8')
         except UnicodeDecodeError:
             # Try with different encoding
             try:
-                with open(self.file_path, 'r', encoding='latin-1') as file:
-                    return file.read()
+                return self._read('latin-1')
             except Exception as e:
                 logger.error(f"Error reading TXT file {self.file_path}: {e}")
-                return f"Error reading file: {str(e)}"
+                return ParsedDocument(content=f"Error reading file: {str(e)}", available=False, error=str(e))
     
+    def _read(self, encoding: str) -> ParsedDocument:
+        budget = TextBudget(self.limits)
+        parts = []
+        with open(self.file_path, 'r', encoding=encoding) as file:
+            for chunk in iter(lambda: file.read(self.READ_CHUNK), ''):
+                parts.append(budget.take(chunk))
+                if budget.truncated:
+                    break
+        return ParsedDocument(content="".join(parts), metadata={"encoding": encoding}, truncated=budget.truncated)
+    
+    def iter_paragraphs(self) -> Iterator[str]:
+        """
+        Yield blank-line separated paragraphs one at a time, without
+        reading the whole file. Undecodable bytes are replaced.
+        """
+        lines = []
+        with open(self.file_path, 'r', encoding='utf-8', errors='replace') as file:
+            for line in file:
+                if line.strip():
+                    lines.append(line.rstrip('\r\n'))
+                elif lines:
+                    yield "\n".join(lines)
+                    lines = []
+        if lines:
+            yield "\n".join(lines)
+    
+    @memoized_view
+    def extract_text(self) -> str:
+        """Extract text content from TXT file."""
+        return self.parse().content
+    
+    @memoized_view
     def extract_data(self) -> Dict[str, Any]:
         """Extract structured data from TXT file."""
         text = self.extract_text()
@@ -177,9 +322,11 @@ class TXTProcessor(FileProcessor):
             "total_words": len(text.split()),
             "non_empty_lines": len([line for line in lines if line.strip()]),
             "lines": lines[:100],  # First 100 lines
-            "encoding": "utf-8"
+            "encoding": "utf-8",
+            "truncated": self.parse().truncated
         }
     
+    @memoized_view
     def get_summary(self) -> Dict[str, Any]:
         """Generate summary of TXT file."""
         text = self.extract_text()
@@ -219,55 +366,76 @@ class PDFProcessor(FileProcessor):
     Handles PDF text extraction and analysis using PyPDF2.
     """
     
-    def __init__(self, file_path: str):
-        """Initialize PDF processor and check for PyPDF2 availability."""
-        super().__init__(file_path)
-        self._pdf_reader = None
-        self._text_cache = None
-        self._load_pdf()
-    
-    def _load_pdf(self):
-        """Load PDF file using PyPDF2."""
+    def _parse(self) -> ParsedDocument:
+        """Read page texts up to the budget, and the document metadata, using PyPDF2."""
         try:
             import PyPDF2
-            with open(self.file_path, 'rb') as file:
-                self._pdf_reader = PyPDF2.PdfReader(file)
-                # Cache basic info
-                self._num_pages = len(self._pdf_reader.pages)
-                self._is_encrypted = self._pdf_reader.is_encrypted
-                self._metadata_pdf = self._pdf_reader.metadata if hasattr(self._pdf_reader, 'metadata') else {}
         except ImportError:
             logger.warning("PyPDF2 not available. PDF processing will be limited.")
-            self._pdf_reader = None
+            return ParsedDocument(available=False)
+        
+        try:
+            with open(self.file_path, 'rb') as file:
+                reader = PyPDF2.PdfReader(file)
+                budget = TextBudget(self.limits)
+                pages = []
+                for _, page_text in self._extract_pages(reader):
+                    if page_text is not None:
+                        page_text = budget.take(page_text)
+                        if budget.truncated:
+                            if page_text:
+                                pages.append(page_text)
+                            break
+                    pages.append(page_text)
+                
+                pdf_metadata = reader.metadata if hasattr(reader, 'metadata') else None
+                return ParsedDocument(pages=pages, truncated=budget.truncated, metadata={
+                    "page_count": len(reader.pages),
+                    "is_encrypted": reader.is_encrypted,
+                    "pdf_metadata": {str(k): str(v) for k, v in dict(pdf_metadata).items()} if pdf_metadata else {}
+                })
         except Exception as e:
             logger.error(f"Error loading PDF {self.file_path}: {e}")
-            self._pdf_reader = None
+            return ParsedDocument(available=False, error=str(e))
+    
+    def _extract_pages(self, reader) -> Iterator[Tuple[int, Optional[str]]]:
+        for page_num, page in enumerate(reader.pages):
+            try:
+                page_text = page.extract_text() or ""
+            except Exception as e:
+                logger.warning(f"Error extracting text from page {page_num + 1}: {e}")
+                page_text = None
+            yield page_num + 1, page_text
     
+    def iter_pages(self) -> Iterator[Tuple[int, Optional[str]]]:
+        """
+        Yield (page number, text) one page at a time, ignoring the budget.
+        Text is None for pages whose extraction failed.
+        
+        Raises:
+            ImportError: If PyPDF2 is not installed
+        """
+        import PyPDF2
+        with open(self.file_path, 'rb') as file:
+            yield from self._extract_pages(PyPDF2.PdfReader(file))
+    
+    @memoized_view
     def extract_text(self) -> str:
         """Extract text content from PDF file."""
-        if self._text_cache is not None:
-            return self._text_cache
-            
-        if self._pdf_reader is None:
+        document = self.parse()
+        if not document.available:
             return self._extract_pdf_text_fallback()
         
-        try:
-            text_content = []
-            for page_num, page in enumerate(self._pdf_reader.pages):
-                try:
-                    page_text = page.extract_text()
-                    if page_text.strip():
-                        text_content.append(f"=== Page {page_num + 1} ===\n{page_text}\n")
-                except Exception as e:
-                    logger.warning(f"Error extracting text from page {page_num + 1}: {e}")
-                    text_content.append(f"=== Page {page_num + 1} ===\n[Text extraction failed]\n")
-            
-            self._text_cache = "\n".join(text_content)
-            return self._text_cache
-            
-        except Exception as e:
-            logger.error(f"Error reading PDF file {self.file_path}: {e}")
-            return f"Error reading PDF file: {str(e)}"
+        text_content = []
+        for page_num, page_text in enumerate(document.pages):
+            if page_text is None:
+                text_content.append(f"=== Page {page_num + 1} ===\n[Text extraction failed]\n")
+            elif page_text.strip():
+                text_content.append(f"=== Page {page_num + 1} ===\n{page_text}\n")
+        if document.truncated:
+            text_content.append(f"[Extraction limit reached after {len(document.pages)} of "
+                                f"{document.metadata['page_count']} pages]")
+        return "\n".join(text_content)
     
     def _extract_pdf_text_fallback(self) -> str:
         """Fallback when PyPDF2 is not available."""
@@ -282,9 +450,11 @@ Install PyPDF2 with: pip install PyPDF2
 This fallback provides file metadata and basic information only.
 For full PDF processing capabilities, ensure PyPDF2 is installed."""
     
+    @memoized_view
     def extract_data(self) -> Dict[str, Any]:
         """Extract structured data from PDF file."""
-        if self._pdf_reader is None:
+        document = self.parse()
+        if not document.available:
             return {
                 "page_count": "Unknown (PyPDF2 not available)",
                 "text_extractable": "Unknown (PyPDF2 not available)",
@@ -293,35 +463,29 @@ For full PDF processing capabilities, ensure PyPDF2 is installed."""
                 "note": "Install PyPDF2 for full PDF analysis"
             }
         
-        try:
-            # Extract text to analyze content
-            full_text = self.extract_text()
-            words = full_text.split()
-            
-            return {
-                "page_count": self._num_pages,
-                "is_encrypted": self._is_encrypted,
-                "text_extractable": bool(full_text.strip()),
-                "total_characters": len(full_text),
-                "total_words": len(words),
-                "pdf_metadata": dict(self._metadata_pdf) if self._metadata_pdf else {},
-                "pages_with_text": len([p for p in full_text.split("=== Page") if p.strip()]),
-                "extraction_method": "PyPDF2"
-            }
-        except Exception as e:
-            logger.error(f"Error extracting PDF data: {e}")
-            return {
-                "error": str(e),
-                "page_count": getattr(self, '_num_pages', 0),
-                "note": "Error occurred during PDF analysis"
-            }
+        full_text = self.extract_text()
+        words = full_text.split()
+        
+        return {
+            "page_count": document.metadata["page_count"],
+            "is_encrypted": document.metadata["is_encrypted"],
+            "text_extractable": bool(full_text.strip()),
+            "total_characters": len(full_text),
+            "total_words": len(words),
+            "pdf_metadata": document.metadata["pdf_metadata"],
+            "pages_with_text": len([p for p in document.pages if p is None or p.strip()]),
+            "pages_extracted": len(document.pages),
+            "truncated": document.truncated,
+            "extraction_method": "PyPDF2"
+        }
     
+    @memoized_view
     def get_summary(self) -> Dict[str, Any]:
         """Generate summary of PDF file."""
         metadata = self.get_metadata()
         data = self.extract_data()
         
-        if self._pdf_reader is None:
+        if not self.parse().available:
             return {
                 "description": f"PDF file: {metadata['file_name']} ({metadata['file_size']} bytes) - Limited processing",
                 "file_info": metadata,
@@ -354,114 +518,174 @@ class ExcelProcessor(FileProcessor):
     Handles Excel spreadsheet analysis and data extraction using openpyxl.
     """
     
-    def __init__(self, file_path: str):
-        """Initialize Excel processor and check for openpyxl availability."""
-        super().__init__(file_path)
-        self._workbook = None
-        self._worksheets_info = None
-        self._load_excel()
-    
-    def _load_excel(self):
-        """Load Excel file using openpyxl."""
+    def _parse(self) -> ParsedDocument:
+        """Profile every worksheet in one streaming pass over its rows using openpyxl."""
         try:
             import openpyxl
-            self._workbook = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
-            self._analyze_worksheets()
         except ImportError:
             logger.warning("openpyxl not available. Excel processing will be limited.")
-            self._workbook = None
+            return ParsedDocument(available=False)
+        
+        try:
+            workbook = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
         except Exception as e:
             logger.error(f"Error loading Excel file {self.file_path}: {e}")
-            self._workbook = None
-    
-    def _analyze_worksheets(self):
-        """Analyze all worksheets in the workbook."""
-        if not self._workbook:
-            return
+            return ParsedDocument(available=False, error=str(e))
         
-        self._worksheets_info = []
-        for sheet_name in self._workbook.sheetnames:
-            try:
-                sheet = self._workbook[sheet_name]
-                
-                # Calculate actual used range
-                used_cells = []
-                for row in sheet.iter_rows():
-                    for cell in row:
-                        if cell.value is not None:
-                            used_cells.append(cell)
-                
-                max_row = max([cell.row for cell in used_cells]) if used_cells else 0
-                max_col = max([cell.column for cell in used_cells]) if used_cells else 0
-                
-                # Check for formulas
-                has_formulas = any(str(cell.value).startswith('=') for cell in used_cells if cell.value)
+        budget = TextBudget(self.limits)
+        try:
+            worksheets = [self._analyze_worksheet(workbook, sheet_name, budget) for sheet_name in workbook.sheetnames]
+        finally:
+            workbook.close()
+        return ParsedDocument(tables=worksheets, truncated=budget.truncated or any(
+            sheet.get('truncated') for sheet in worksheets), metadata={"worksheet_count": len(worksheets)})
+    
+    def _analyze_worksheet(self, workbook, sheet_name: str, budget: TextBudget) -> Dict[str, Any]:
+        """
+        Used range, cell count, formulas, column profiles and sample rows
+        of one worksheet. The first row with data is taken as a header
+        row when all its values are text.
+        """
+        from openpyxl.utils import get_column_letter
+
+        limits = self.limits
+        try:
+            sheet = workbook[sheet_name]
+            max_row = max_col = total_cells = profiled_rows = 0
+            has_formulas = truncated = False
+            sample_rows = []
+            headers = None
+            columns: Dict[int, ColumnProfile] = {}
+            
+            for row_idx, values in enumerate(sheet.iter_rows(values_only=True), 1):
+                if limits.max_rows is not None and row_idx > limits.max_rows:
+                    truncated = True
+                    break
+                cells = ["" if value is None else str(value) for value in values]
+                budget.take(" ".join(cell for cell in cells if cell))
+                if budget.truncated:
+                    truncated = True
+                    break
+                if row_idx <= limits.sample_rows:
+                    sample_rows.append(cells)
+                if not any(cells):
+                    continue
                 
-                worksheet_info = {
-                    "name": sheet_name,
-                    "max_row": max_row,
-                    "max_column": max_col,
-                    "total_cells": len(used_cells),
-                    "has_formulas": has_formulas,
-                    "is_visible": sheet.sheet_state == 'visible'
-                }
-                self._worksheets_info.append(worksheet_info)
+                for col_idx, cell in enumerate(cells, 1):
+                    if cell:
+                        total_cells += 1
+                        max_col = max(max_col, col_idx)
+                        if not has_formulas and cell.startswith('='):
+                            has_formulas = True
+                max_row = row_idx
                 
-            except Exception as e:
-                logger.warning(f"Error analyzing worksheet {sheet_name}: {e}")
-                worksheet_info = {
-                    "name": sheet_name,
-                    "error": str(e)
-                }
-                self._worksheets_info.append(worksheet_info)
+                if headers is None:
+                    headers = {}
+                    if all(isinstance(value, str) for value in values if value is not None):
+                        headers = {col_idx: cell for col_idx, cell in enumerate(cells, 1) if cell}
+                        continue
+                profiled_rows += 1
+                for col_idx, value in enumerate(values[:limits.profile_columns], 1):
+                    if value is None or value == "":
+                        continue
+                    profile = columns.get(col_idx)
+                    if profile is None:
+                        profile = columns[col_idx] = ColumnProfile(headers.get(col_idx),
+                                                                   limits.profile_sample_size, seed=col_idx)
+                    profile.add(value)
+            
+            return {
+                "name": sheet_name,
+                "max_row": max_row,
+                "max_column": max_col,
+                "total_cells": total_cells,
+                "has_formulas": has_formulas,
+                "is_visible": sheet.sheet_state == 'visible',
+                "truncated": truncated,
+                "columns": {
+                    get_column_letter(col_idx): columns[col_idx].to_dict(profiled_rows) for col_idx in sorted(columns)
+                },
+                "rows": sample_rows
+            }
+        except Exception as e:
+            logger.warning(f"Error analyzing worksheet {sheet_name}: {e}")
+            return {
+                "name": sheet_name,
+                "error": str(e)
+            }
+    
+    def iter_rows(self, sheet_name: str = None) -> Iterator[Tuple[str, int, tuple]]:
+        """
+        Yield (worksheet name, row number, cell values) for every row of
+        one worksheet or of all of them, streaming in read-only mode and
+        ignoring the budget.
+        
+        Raises:
+            ImportError: If openpyxl is not installed
+        """
+        import openpyxl
+        workbook = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            for name in ([sheet_name] if sheet_name else workbook.sheetnames):
+                for row_idx, values in enumerate(workbook[name].iter_rows(values_only=True), 1):
+                    yield name, row_idx, values
+        finally:
+            workbook.close()
     
+    @property
+    def _worksheets_info(self) -> List[Dict[str, Any]]:
+        """Worksheet profiles without their sample rows."""
+        return [{k: v for k, v in sheet.items() if k != "rows"} for sheet in self.parse().tables]
+    
+    @memoized_view
     def extract_text(self) -> str:
         """Extract text content from Excel file."""
-        if self._workbook is None:
+        document = self.parse()
+        if not document.available:
             return self._extract_excel_text_fallback()
         
-        try:
-            text_content = []
-            text_content.append(f"Excel File: {self.file_name}")
-            text_content.append(f"Worksheets: {len(self._workbook.sheetnames)}\n")
+        text_content = []
+        text_content.append(f"Excel File: {self.file_name}")
+        text_content.append(f"Worksheets: {len(document.tables)}\n")
+        
+        for sheet_info in document.tables:
+            text_content.append(f"=== Worksheet: {sheet_info['name']} ===")
             
-            for sheet_info in self._worksheets_info:
-                text_content.append(f"=== Worksheet: {sheet_info['name']} ===")
-                
-                if 'error' in sheet_info:
-                    text_content.append(f"Error: {sheet_info['error']}\n")
-                    continue
-                
-                text_content.append(f"Dimensions: {sheet_info['max_row']} rows × {sheet_info['max_column']} columns")
-                text_content.append(f"Total cells with data: {sheet_info['total_cells']}")
-                text_content.append(f"Contains formulas: {sheet_info['has_formulas']}")
-                
-                # Extract sample data from the worksheet
-                try:
-                    sheet = self._workbook[sheet_info['name']]
-                    text_content.append("\nSample data (first 10 rows):")
-                    
-                    for row_idx, row in enumerate(sheet.iter_rows(max_row=10), 1):
-                        row_data = []
-                        for cell in row:
-                            if cell.value is not None:
-                                row_data.append(str(cell.value))
-                            else:
-                                row_data.append("")
-                        
-                        if any(row_data):  # Only include rows with data
-                            text_content.append(f"Row {row_idx}: " + " | ".join(row_data))
-                
-                except Exception as e:
-                    text_content.append(f"Error extracting sample data: {e}")
-                
-                text_content.append("")  # Empty line between worksheets
+            if 'error' in sheet_info:
+                text_content.append(f"Error: {sheet_info['error']}\n")
+                continue
             
-            return "\n".join(text_content)
+            text_content.append(f"Dimensions: {sheet_info['max_row']} rows × {sheet_info['max_column']} columns")
+            text_content.append(f"Total cells with data: {sheet_info['total_cells']}")
+            text_content.append(f"Contains formulas: {sheet_info['has_formulas']}")
+            if sheet_info['truncated']:
+                text_content.append("Extraction limit reached: counts cover the rows read so far")
             
-        except Exception as e:
-            logger.error(f"Error reading Excel file {self.file_path}: {e}")
-            return f"Error reading Excel file: {str(e)}"
+            if sheet_info['columns']:
+                text_content.append("\nColumns:")
+                for letter, profile in sheet_info['columns'].items():
+                    text_content.append(self._describe_column(letter, profile))
+            
+            text_content.append(f"\nSample data (first {self.limits.sample_rows} rows):")
+            for row_idx, row_data in enumerate(sheet_info['rows'], 1):
+                if any(row_data):  # Only include rows with data
+                    text_content.append(f"Row {row_idx}: " + " | ".join(row_data))
+            
+            text_content.append("")  # Empty line between worksheets
+        
+        return "\n".join(text_content)
+    
+    @staticmethod
+    def _describe_column(letter: str, profile: Dict[str, Any]) -> str:
+        name = f"{letter} ({profile['header']})" if profile['header'] else letter
+        parts = [f"{profile['values']} values"]
+        if 'numeric' in profile:
+            parts.append(f"numeric {profile['min']:g} to {profile['max']:g}, mean {profile['mean']:g}")
+        if 'median' in profile:
+            parts.append(f"median {'~' if profile['sampled'] else ''}{profile['median']:g}")
+        if profile.get('examples'):
+            parts.append("e.g. " + ", ".join(profile['examples'][:3]))
+        return f"{name}: " + ", ".join(parts)
     
     def _extract_excel_text_fallback(self) -> str:
         """Fallback when openpyxl is not available."""
@@ -477,9 +701,10 @@ Install openpyxl with: pip install openpyxl
 This fallback provides file metadata and basic information only.
 For full Excel processing capabilities, ensure openpyxl is installed."""
     
+    @memoized_view
     def extract_data(self) -> Dict[str, Any]:
         """Extract structured data from Excel file."""
-        if self._workbook is None:
+        if not self.parse().available:
             return {
                 "worksheet_count": "Unknown (openpyxl not available)",
                 "total_rows": "Unknown (openpyxl not available)",
@@ -489,36 +714,25 @@ For full Excel processing capabilities, ensure openpyxl is installed."""
                 "note": "Install openpyxl for full Excel analysis"
             }
         
-        try:
-            total_rows = sum(info.get('max_row', 0) for info in self._worksheets_info)
-            total_columns = sum(info.get('max_column', 0) for info in self._worksheets_info)
-            total_cells = sum(info.get('total_cells', 0) for info in self._worksheets_info)
-            has_formulas = any(info.get('has_formulas', False) for info in self._worksheets_info)
-            
-            return {
-                "worksheet_count": len(self._worksheets_info),
-                "worksheets": self._worksheets_info,
-                "total_rows": total_rows,
-                "total_columns": total_columns,
-                "total_cells_with_data": total_cells,
-                "has_formulas": has_formulas,
-                "file_format": self.file_extension.upper(),
-                "extraction_method": "openpyxl"
-            }
-        except Exception as e:
-            logger.error(f"Error extracting Excel data: {e}")
-            return {
-                "error": str(e),
-                "worksheet_count": len(self._worksheets_info) if self._worksheets_info else 0,
-                "note": "Error occurred during Excel analysis"
-            }
+        worksheets = self._worksheets_info
+        return {
+            "worksheet_count": len(worksheets),
+            "worksheets": worksheets,
+            "total_rows": sum(info.get('max_row', 0) for info in worksheets),
+            "total_columns": sum(info.get('max_column', 0) for info in worksheets),
+            "total_cells_with_data": sum(info.get('total_cells', 0) for info in worksheets),
+            "has_formulas": any(info.get('has_formulas', False) for info in worksheets),
+            "file_format": self.file_extension.upper(),
+            "extraction_method": "openpyxl"
+        }
     
+    @memoized_view
     def get_summary(self) -> Dict[str, Any]:
         """Generate summary of Excel file."""
         metadata = self.get_metadata()
         data = self.extract_data()
         
-        if self._workbook is None:
+        if not self.parse().available:
             return {
                 "description": f"Excel file: {metadata['file_name']} ({metadata['file_size']} bytes) - Limited processing",
                 "file_info": metadata,
@@ -553,52 +767,82 @@ class DocxProcessor(FileProcessor):
     Handles Word document text extraction and analysis.
     """
     
-    def __init__(self, file_path: str):
-        """Initialize DOCX processor and check for python-docx availability."""
-        super().__init__(file_path)
-        self._document = None
-        self._load_docx()
-    
-    def _load_docx(self):
-        """Load DOCX file using python-docx."""
+    def _parse(self) -> ParsedDocument:
+        """Read paragraphs and tables up to the budget using python-docx."""
         try:
             import docx
-            self._document = docx.Document(self.file_path)
         except ImportError:
             logger.warning("python-docx not available. DOCX processing will be limited.")
-            self._document = None
+            return ParsedDocument(available=False)
+        
+        try:
+            document = docx.Document(self.file_path)
+            budget = TextBudget(self.limits)
+            paragraphs = []
+            for text in self._iter_paragraphs(document):
+                text = budget.take(text)
+                if text:
+                    paragraphs.append(text)
+                if budget.truncated:
+                    break
+            
+            tables = []
+            for table in document.tables:
+                if budget.truncated:
+                    break
+                rows = []
+                for row in table.rows:
+                    row_data = [cell.text.strip() for cell in row.cells]
+                    budget.take(" ".join(row_data))
+                    if budget.truncated:
+                        break
+                    rows.append(row_data)
+                tables.append({"rows": rows})
+            return ParsedDocument(paragraphs=paragraphs, tables=tables, truncated=budget.truncated)
         except Exception as e:
             logger.error(f"Error loading DOCX file {self.file_path}: {e}")
-            self._document = None
+            return ParsedDocument(available=False, error=str(e))
+    
+    @staticmethod
+    def _iter_paragraphs(document) -> Iterator[str]:
+        for paragraph in document.paragraphs:
+            if paragraph.text.strip():
+                yield paragraph.text
+    
+    def iter_paragraphs(self) -> Iterator[str]:
+        """
+        Yield the non-empty paragraphs one at a time, ignoring the budget.
+        python-docx loads the document XML whole, so this bounds the
+        extracted text rather than the parse.
+        
+        Raises:
+            ImportError: If python-docx is not installed
+        """
+        import docx
+        yield from self._iter_paragraphs(docx.Document(self.file_path))
     
+    @memoized_view
     def extract_text(self) -> str:
         """Extract text content from DOCX file."""
-        if self._document is None:
+        document = self.parse()
+        if not document.available:
             return self._extract_docx_text_fallback()
         
-        try:
-            text_content = []
-            text_content.append(f"Word Document: {self.file_name}\n")
-            
-            # Extract paragraphs
-            for paragraph in self._document.paragraphs:
-                if paragraph.text.strip():
-                    text_content.append(paragraph.text)
-            
-            # Extract text from tables
-            for table in self._document.tables:
-                text_content.append("\n=== Table Data ===")
-                for row in table.rows:
-                    row_data = [cell.text.strip() for cell in row.cells]
-                    if any(row_data):
-                        text_content.append(" | ".join(row_data))
-                text_content.append("=== End Table ===\n")
-            
-            return "\n".join(text_content)
-            
-        except Exception as e:
-            logger.error(f"Error reading DOCX file {self.file_path}: {e}")
-            return f"Error reading DOCX file: {str(e)}"
+        text_content = []
+        text_content.append(f"Word Document: {self.file_name}\n")
+        text_content.extend(document.paragraphs)
+        
+        # Text from tables
+        for table in document.tables:
+            text_content.append("\n=== Table Data ===")
+            for row_data in table["rows"]:
+                if any(row_data):
+                    text_content.append(" | ".join(row_data))
+            text_content.append("=== End Table ===\n")
+        if document.truncated:
+            text_content.append("[Extraction limit reached]")
+        
+        return "\n".join(text_content)
     
     def _extract_docx_text_fallback(self) -> str:
         """Fallback when python-docx is not available."""
@@ -612,41 +856,38 @@ Install python-docx with: pip install python-docx
 
 This fallback provides file metadata and basic information only."""
     
+    @memoized_view
     def extract_data(self) -> Dict[str, Any]:
         """Extract structured data from DOCX file."""
-        if self._document is None:
+        document = self.parse()
+        if not document.available:
             return {
                 "paragraph_count": "Unknown (python-docx not available)",
                 "table_count": "Unknown (python-docx not available)",
                 "note": "Install python-docx for full document analysis"
             }
         
-        try:
-            paragraphs = [p.text for p in self._document.paragraphs if p.text.strip()]
-            tables = self._document.tables
-            
-            # Count words and characters
-            full_text = " ".join(paragraphs)
-            words = full_text.split()
-            
-            return {
-                "paragraph_count": len(paragraphs),
-                "table_count": len(tables),
-                "total_words": len(words),
-                "total_characters": len(full_text),
-                "has_tables": len(tables) > 0,
-                "extraction_method": "python-docx"
-            }
-        except Exception as e:
-            logger.error(f"Error extracting DOCX data: {e}")
-            return {"error": str(e)}
+        # Count words and characters
+        full_text = " ".join(document.paragraphs)
+        words = full_text.split()
+        
+        return {
+            "paragraph_count": len(document.paragraphs),
+            "table_count": len(document.tables),
+            "total_words": len(words),
+            "total_characters": len(full_text),
+            "has_tables": len(document.tables) > 0,
+            "truncated": document.truncated,
+            "extraction_method": "python-docx"
+        }
     
+    @memoized_view
     def get_summary(self) -> Dict[str, Any]:
         """Generate summary of DOCX file."""
         metadata = self.get_metadata()
         data = self.extract_data()
         
-        if self._document is None:
+        if not self.parse().available:
             return {
                 "description": f"Word document: {metadata['file_name']} - Limited processing",
                 "file_info": metadata,
@@ -677,32 +918,36 @@ class ImageProcessor(FileProcessor):
     Handles image metadata extraction and basic analysis.
     """
     
-    def __init__(self, file_path: str):
-        """Initialize image processor and check for PIL availability."""
-        super().__init__(file_path)
-        self._image = None
-        self._load_image()
-    
-    def _load_image(self):
-        """Load image file using PIL."""
+    def _parse(self) -> ParsedDocument:
+        """Read image properties using PIL."""
         try:
             from PIL import Image
-            self._image = Image.open(self.file_path)
         except ImportError:
             logger.warning("Pillow (PIL) not available. Image processing will be limited.")
-            self._image = None
+            return ParsedDocument(available=False)
+        
+        try:
+            with Image.open(self.file_path) as image:
+                return ParsedDocument(metadata={
+                    "format": image.format,
+                    "mode": image.mode,
+                    "width": image.width,
+                    "height": image.height,
+                    "has_transparency": 'transparency' in image.info,
+                    "info": dict(image.info)
+                })
         except Exception as e:
             logger.error(f"Error loading image file {self.file_path}: {e}")
-            self._image = None
+            return ParsedDocument(available=False, error=str(e))
     
+    @memoized_view
     def extract_text(self) -> str:
         """Extract information from image file (no text content, but metadata)."""
-        if self._image is None:
+        if not self.parse().available:
             return self._extract_image_text_fallback()
         
-        try:
-            data = self.extract_data()
-            return f"""Image File: {self.file_name}
+        data = self.extract_data()
+        return f"""Image File: {self.file_name}
 Format: {data.get('format', 'Unknown')}
 Dimensions: {data.get('width', 0)} × {data.get('height', 0)} pixels
 Mode: {data.get('mode', 'Unknown')}
@@ -710,10 +955,6 @@ Size: {data.get('file_size', 0)} bytes
 
 Note: This is an image file. No text content to extract.
 Use OCR capabilities for text extraction from images."""
-            
-        except Exception as e:
-            logger.error(f"Error processing image file {self.file_path}: {e}")
-            return f"Error processing image file: {str(e)}"
     
     def _extract_image_text_fallback(self) -> str:
         """Fallback when PIL is not available."""
@@ -727,35 +968,26 @@ Install Pillow with: pip install Pillow
 
 This fallback provides file metadata only."""
     
+    @memoized_view
     def extract_data(self) -> Dict[str, Any]:
         """Extract structured data from image file."""
-        if self._image is None:
+        document = self.parse()
+        if not document.available:
             return {
                 "format": "Unknown (Pillow not available)",
                 "dimensions": "Unknown (Pillow not available)",
                 "note": "Install Pillow for full image analysis"
             }
         
-        try:
-            return {
-                "format": self._image.format,
-                "mode": self._image.mode,
-                "width": self._image.width,
-                "height": self._image.height,
-                "has_transparency": 'transparency' in self._image.info,
-                "info": dict(self._image.info),
-                "extraction_method": "Pillow (PIL)"
-            }
-        except Exception as e:
-            logger.error(f"Error extracting image data: {e}")
-            return {"error": str(e)}
+        return {**document.metadata, "extraction_method": "Pillow (PIL)"}
     
+    @memoized_view
     def get_summary(self) -> Dict[str, Any]:
         """Generate summary of image file."""
         metadata = self.get_metadata()
         data = self.extract_data()
         
-        if self._image is None:
+        if not self.parse().available:
             return {
                 "description": f"Image file: {metadata['file_name']} - Limited processing",
                 "file_info": metadata,
@@ -782,77 +1014,78 @@ class JSONProcessor(FileProcessor):
     Handles JSON structure analysis and validation.
     """
     
-    def extract_text(self) -> str:
-        """Extract and format JSON content."""
+    def _parse(self) -> ParsedDocument:
+        """Read the raw JSON text."""
         try:
             with open(self.file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                
-            # Try to parse and format JSON
-            try:
-                import json
-                data = json.loads(content)
-                formatted = json.dumps(data, indent=2, ensure_ascii=False)
-                return f"JSON File: {self.file_name}\n\nFormatted Content:\n{formatted}"
-            except json.JSONDecodeError as e:
-                return f"JSON File: {self.file_name}\n\nJSON Parse Error: {e}\n\nRaw Content:\n{content}"
-                
+                return ParsedDocument(content=file.read())
         except Exception as e:
             logger.error(f"Error reading JSON file {self.file_path}: {e}")
-            return f"Error reading JSON file: {str(e)}"
+            return ParsedDocument(available=False, error=str(e))
     
+    @memoized_view
+    def extract_text(self) -> str:
+        """Extract and format JSON content."""
+        document = self.parse()
+        if document.error:
+            return f"Error reading JSON file: {document.error}"
+        
+        content = document.content
+        # Try to parse and format JSON
+        try:
+            data = json.loads(content)
+            formatted = json.dumps(data, indent=2, ensure_ascii=False)
+            return f"JSON File: {self.file_name}\n\nFormatted Content:\n{formatted}"
+        except json.JSONDecodeError as e:
+            return f"JSON File: {self.file_name}\n\nJSON Parse Error: {e}\n\nRaw Content:\n{content}"
+    
+    @memoized_view
     def extract_data(self) -> Dict[str, Any]:
         """Extract structured data from JSON file."""
+        document = self.parse()
+        if document.error:
+            return {"error": document.error}
+        
+        content = document.content
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-            
-            try:
-                import json
-                data = json.loads(content)
-                
-                # Analyze JSON structure
-                def analyze_structure(obj, path="root"):
-                    if isinstance(obj, dict):
-                        return {
-                            "type": "object",
-                            "keys": list(obj.keys()),
-                            "key_count": len(obj.keys()),
-                            "children": {k: analyze_structure(v, f"{path}.{k}") for k, v in obj.items()}
-                        }
-                    elif isinstance(obj, list):
-                        return {
-                            "type": "array",
-                            "length": len(obj),
-                            "item_types": list(set(type(item).__name__ for item in obj))
-                        }
-                    else:
-                        return {
-                            "type": type(obj).__name__,
-                            "value": str(obj)[:100] + "..." if len(str(obj)) > 100 else str(obj)
-                        }
-                
-                structure = analyze_structure(data)
-                
+            data = json.loads(content)
+        except json.JSONDecodeError as e:
+            return {
+                "valid_json": False,
+                "parse_error": str(e),
+                "character_count": len(content)
+            }
+        
+        # Analyze JSON structure
+        def analyze_structure(obj, path="root"):
+            if isinstance(obj, dict):
                 return {
-                    "valid_json": True,
-                    "root_type": type(data).__name__,
-                    "structure": structure,
-                    "character_count": len(content),
-                    "formatted_size": len(json.dumps(data, indent=2))
+                    "type": "object",
+                    "keys": list(obj.keys()),
+                    "key_count": len(obj.keys()),
+                    "children": {k: analyze_structure(v, f"{path}.{k}") for k, v in obj.items()}
                 }
-                
-            except json.JSONDecodeError as e:
+            elif isinstance(obj, list):
                 return {
-                    "valid_json": False,
-                    "parse_error": str(e),
-                    "character_count": len(content)
+                    "type": "array",
+                    "length": len(obj),
+                    "item_types": list(set(type(item).__name__ for item in obj))
                 }
-                
-        except Exception as e:
-            logger.error(f"Error extracting JSON data: {e}")
-            return {"error": str(e)}
+            else:
+                return {
+                    "type": type(obj).__name__,
+                    "value": str(obj)[:100] + "..." if len(str(obj)) > 100 else str(obj)
+                }
+        
+        return {
+            "valid_json": True,
+            "root_type": type(data).__name__,
+            "structure": analyze_structure(data),
+            "character_count": len(content),
+            "formatted_size": len(json.dumps(data, indent=2))
+        }
     
+    @memoized_view
     def get_summary(self) -> Dict[str, Any]:
         """Generate summary of JSON file."""
         metadata = self.get_metadata()
@@ -899,12 +1132,15 @@ class FileProcessorFactory:
     }
     
     @classmethod
-    def create_processor(cls, file_path: str) -> FileProcessor:
+    def create_processor(cls, file_path: str, cache: Optional[ExtractionCache] = None,
+                         limits: Optional[ExtractionLimits] = None) -> FileProcessor:
         """
         Create appropriate processor for the given file.
         
         Args:
             file_path (str): Path to the file
+            cache (ExtractionCache, optional): Cache of parsed documents
+            limits (ExtractionLimits, optional): Extraction budgets
             
         Returns:
             FileProcessor: Appropriate processor instance
@@ -922,7 +1158,7 @@ class FileProcessorFactory:
             raise ValueError(f"Unsupported file type: {file_extension}")
         
         processor_class = cls.PROCESSOR_MAP[file_extension]
-        return processor_class(file_path)
+        return processor_class(file_path, cache=cache, limits=limits)
     
     @classmethod
     def get_supported_formats(cls) -> List[str]:
@@ -950,13 +1186,19 @@ class FileProcessorFactory:
 
 
 # Convenience functions for easy integration
-def process_file(file_path: str, output_format: str = 'memory') -> Union[Dict[str, Any], str]:
+def process_file(file_path: str, output_format: str = 'memory',
+                 cache: Optional[ExtractionCache] = None,
+                 limits: Optional[ExtractionLimits] = None,
+                 strict: bool = False) -> Union[Dict[str, Any], str]:
     """
     Process a file using the appropriate processor.
     
     Args:
         file_path (str): Path to the file to process
         output_format (str): Output format ('memory', 'logs', 'agent')
+        cache (ExtractionCache, optional): Cache of parsed documents
+        limits (ExtractionLimits, optional): Extraction budgets
+        strict (bool): Raise instead of returning limited-mode placeholder output
         
     Returns:
         Union[Dict[str, Any], str]: Processed data in requested format
@@ -964,8 +1206,14 @@ def process_file(file_path: str, output_format: str = 'memory') -> Union[Dict[st
     Raises:
         ValueError: If output format or file type is not supported
         FileNotFoundError: If file does not exist
+        ExtractionError: If strict and the file could not be parsed
     """
-    processor = FileProcessorFactory.create_processor(file_path)
+    processor = FileProcessorFactory.create_processor(file_path, cache=cache, limits=limits)
+    
+    if strict:
+        document = processor.parse()
+        if not document.available or document.error is not None:
+            raise ExtractionError(document.error or f"No parser available for {os.path.basename(file_path)}")
     
     if output_format == 'memory':
         return processor.process_for_memory()
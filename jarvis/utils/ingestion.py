@@ -0,0 +1,467 @@
+"""
+Parallel directory ingestion built on FileProcessorFactory
+
+``process_file`` handles one file at a time on the calling thread, which
+makes bulk ingestion of a document share single-core: PDF and workbook
+parsing is CPU-bound and holds the GIL. ``DirectoryIngestor`` walks a
+directory tree, runs extraction for every supported file on a process
+pool and hands the results to a sink (the memory system, the data
+archive, or any callable) in batches.
+
+A JSON manifest records the size, modification time and outcome of each
+file once its batch has been delivered, so a rerun skips unchanged files
+and an interrupted run resumes where it stopped. Every file runs under a
+timeout; a file that hangs the parser is recorded as timed out and does
+not hold up the rest of the run. A file that cannot be parsed is recorded
+as failed instead of reaching the sink as limited-mode placeholder text.
+"""
+
+import os
+import json
+import time
+import signal
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .extraction import ExtractionLimits
+from .file_processors import FileProcessorFactory, process_file
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = ('memory', 'logs', 'agent')
+
+
+class FileTimeoutError(TimeoutError):
+    """Extraction of a single file exceeded the configured timeout"""
+
+
+@dataclass
+class IngestionConfig:
+    """Configuration for directory ingestion"""
+    workers: int = field(default_factory=lambda: max(2, os.cpu_count() or 2))
+    use_processes: bool = True          # Extract in worker processes instead of threads
+    output_format: str = 'memory'       # Passed to process_file
+    batch_size: int = 32                # Files per sink call
+    file_timeout: Optional[float] = 120.0
+    manifest_path: Optional[str] = None
+    retry_failed: bool = True           # Retry unchanged files that failed last time
+    follow_symlinks: bool = False
+    limits: Optional[ExtractionLimits] = None
+
+    def __post_init__(self):
+        if self.workers < 1:
+            raise ValueError("workers must be at least 1")
+        if self.batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if self.file_timeout is not None and self.file_timeout <= 0:
+            raise ValueError("file_timeout must be positive or None")
+        if self.output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"output_format must be one of {OUTPUT_FORMATS}")
+
+
+@dataclass
+class IngestedFile:
+    """Extraction result for one file, as passed to sinks"""
+    path: str
+    relative_path: str
+    size: int
+    mtime_ns: int
+    output: Any
+    elapsed: float
+
+    @property
+    def content(self) -> str:
+        """Extracted text, whatever the output format"""
+        if isinstance(self.output, dict):
+            return self.output.get('content') or json.dumps(self.output, default=str)
+        return str(self.output)
+
+
+@dataclass
+class IngestionProgress:
+    """Progress snapshot passed to progress callbacks"""
+    files_seen: int = 0
+    files_processed: int = 0
+    files_skipped: int = 0
+    files_failed: int = 0
+    files_timed_out: int = 0
+    bytes_processed: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        """Processed files per second"""
+        return self.files_processed / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class IngestionManifest:
+    """
+    Per-file ingestion state for one directory tree, persisted as JSON
+
+    A file is current when its recorded size and modification time match
+    the file on disk and its last ingestion succeeded.
+    """
+
+    def __init__(self, path: str, root: str):
+        self.path = Path(path)
+        self.root = os.path.abspath(root)
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self._dirty = 0
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('root') != self.root:
+                logger.warning(f"Ingestion manifest {self.path} belongs to '{data.get('root')}', ignoring it")
+                return
+            self.files = data.get('files', {})
+            logger.info(f"Loaded ingestion manifest: {len(self.files)} files recorded")
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read ingestion manifest {self.path}: {e}")
+
+    def status(self, relative_path: str, size: int, mtime_ns: int) -> Optional[str]:
+        """Recorded status of an unchanged file, or None if it is new or changed"""
+        entry = self.files.get(relative_path)
+        if entry and entry.get('size') == size and entry.get('mtime_ns') == mtime_ns:
+            return entry.get('status')
+        return None
+
+    def record(self, relative_path: str, size: int, mtime_ns: int, status: str, error: str = None):
+        entry = {'size': size, 'mtime_ns': mtime_ns, 'status': status,
+                 'ingested_at': datetime.now().isoformat()}
+        if error:
+            entry['error'] = error
+        self.files[relative_path] = entry
+        self._dirty += 1
+
+    def prune(self, seen: Set[str]) -> int:
+        """Forget files that are no longer in the tree"""
+        removed = [name for name in self.files if name not in seen]
+        for name in removed:
+            del self.files[name]
+        self._dirty += len(removed)
+        return len(removed)
+
+    @property
+    def pending_saves(self) -> int:
+        return self._dirty
+
+    def save(self):
+        """Write the manifest atomically"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'root': self.root,
+                'updated_at': datetime.now().isoformat(),
+                'files': self.files
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self._dirty = 0
+
+
+@contextmanager
+def _time_limit(seconds: Optional[float]):
+    """Raise FileTimeoutError after ``seconds``, where SIGALRM is available to this thread"""
+    if (not seconds or not hasattr(signal, 'setitimer')
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise FileTimeoutError(f"extraction exceeded {seconds:g}s")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _extract_file(path: str, output_format: str, limits: Optional[ExtractionLimits],
+                  timeout: Optional[float]) -> Tuple[Any, float]:
+    """Worker entry point: extract one file under a time limit"""
+    start = time.perf_counter()
+    with _time_limit(timeout):
+        output = process_file(path, output_format, limits=limits, strict=True)
+    return output, time.perf_counter() - start
+
+
+class MemorySink:
+    """Store ingested files in the production memory system, one memory per file"""
+
+    def __init__(self, memory=None, category: str = "document", key_prefix: str = "file:"):
+        self.memory = memory
+        self.category = category
+        self.key_prefix = key_prefix
+
+    def __call__(self, batch: List[IngestedFile]):
+        if self.memory is None:
+            from ..memory.production_memory import get_production_memory
+            self.memory = get_production_memory()
+        for item in batch:
+            metadata = dict(item.output.get('metadata', {})) if isinstance(item.output, dict) else {}
+            metadata.update(source_path=item.path, file_size=item.size)
+            extension = os.path.splitext(item.path)[1].lower().lstrip('.')
+            self.memory.store_memory(f"{self.key_prefix}{item.path}", item.content,
+                                     category=self.category, tags=[extension] if extension else [],
+                                     metadata=metadata)
+
+
+class ArchiveSink:
+    """Archive ingested files as input entries, one transaction per batch"""
+
+    def __init__(self, archiver=None, source: str = "directory_ingestion"):
+        self.archiver = archiver
+        self.source = source
+
+    def __call__(self, batch: List[IngestedFile]):
+        if self.archiver is None:
+            from ..core.data_archiver import get_archiver
+            self.archiver = get_archiver()
+        self.archiver.archive_batch([{
+            'data_type': 'input',
+            'content': item.content,
+            'source': self.source,
+            'operation': 'ingest_file',
+            'metadata': {'path': item.path, 'size': item.size, 'mtime_ns': item.mtime_ns}
+        } for item in batch])
+
+
+class DirectoryIngestor:
+    """
+    Walk a directory tree and ingest every supported file in parallel
+
+    Files are extracted on a worker pool with a bounded number of files
+    in flight, and successful results reach the sink in batches of
+    ``batch_size``. The manifest is saved after every batch, and a file
+    only counts as ingested once the sink has accepted its batch.
+    """
+
+    def __init__(self,
+                 sink: Callable[[List[IngestedFile]], None],
+                 config: IngestionConfig = None,
+                 progress_callback: Callable[[IngestionProgress], None] = None):
+        """
+        Initialize directory ingestor
+
+        Args:
+            sink: Called with each batch of extracted files
+            config: Ingestion configuration
+            progress_callback: Called after every batch and at completion
+        """
+        self.sink = sink
+        self.config = config or IngestionConfig()
+        self.progress_callback = progress_callback
+
+    def _walk(self, root: str) -> Iterator[str]:
+        """Files under root in a stable order"""
+        for directory, subdirectories, files in os.walk(root, followlinks=self.config.follow_symlinks):
+            subdirectories.sort()
+            for name in sorted(files):
+                yield os.path.join(directory, name)
+
+    def run(self, root: str) -> Dict[str, Any]:
+        """
+        Ingest a directory tree
+
+        Args:
+            root: Directory to walk
+
+        Returns:
+            Ingestion statistics
+        """
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"Directory not found: {root}")
+
+        config = self.config
+        start_time = time.time()
+        self._start_time = start_time
+        self._progress = IngestionProgress()
+        self._errors: List[str] = []
+        self._batch: List[IngestedFile] = []
+        self._unsupported = 0
+        manifest = IngestionManifest(config.manifest_path, root) if config.manifest_path else None
+        self._manifest = manifest
+
+        executor_class = ProcessPoolExecutor if config.use_processes else ThreadPoolExecutor
+        executor = executor_class(max_workers=config.workers)
+        max_in_flight = config.workers * 2
+        in_flight: deque = deque()
+        seen: Set[str] = set()
+        walked = False
+        abandoned = False
+
+        try:
+            for path in self._walk(root):
+                self._progress.files_seen += 1
+                if not FileProcessorFactory.is_supported(path):
+                    self._unsupported += 1
+                    continue
+                relative_path = os.path.relpath(path, root)
+                seen.add(relative_path)
+                try:
+                    stat = os.stat(path)
+                except OSError as e:
+                    self._record_failure(relative_path, 0, 0, 'failed', f"{relative_path}: {e}")
+                    continue
+                if manifest and self._is_current(manifest, relative_path, stat):
+                    self._progress.files_skipped += 1
+                    continue
+
+                future = executor.submit(_extract_file, path, config.output_format,
+                                         config.limits, config.file_timeout)
+                in_flight.append((path, relative_path, stat, future, time.monotonic()))
+                while len(in_flight) >= max_in_flight:
+                    abandoned |= self._collect(in_flight.popleft())
+            walked = True
+
+            while in_flight:
+                abandoned |= self._collect(in_flight.popleft())
+            self._flush()
+        finally:
+            for *_, future, _ in in_flight:
+                future.cancel()
+            # A worker stuck outside Python code ignores SIGALRM; don't leave it running
+            stuck = list((getattr(executor, '_processes', None) or {}).values()) if abandoned else []
+            executor.shutdown(wait=not abandoned, cancel_futures=True)
+            for process in stuck:
+                process.terminate()
+            if manifest:
+                if walked:
+                    manifest.prune(seen)
+                if manifest.pending_saves:
+                    manifest.save()
+
+        processing_time = time.time() - start_time
+        progress = self._progress
+        progress.elapsed = processing_time
+        self._notify()
+
+        return {
+            'success': not self._errors,
+            'files_seen': progress.files_seen,
+            'files_unsupported': self._unsupported,
+            'files_processed': progress.files_processed,
+            'files_skipped': progress.files_skipped,
+            'files_failed': progress.files_failed,
+            'files_timed_out': progress.files_timed_out,
+            'bytes_processed': progress.bytes_processed,
+            'batches': progress.batches,
+            'processing_time': processing_time,
+            'files_per_second': progress.files_per_second,
+            'bytes_per_second': progress.bytes_processed / processing_time if processing_time > 0 else 0,
+            'error_messages': self._errors[:10]
+        }
+
+    def _is_current(self, manifest: IngestionManifest, relative_path: str, stat) -> bool:
+        status = manifest.status(relative_path, stat.st_size, stat.st_mtime_ns)
+        if status == 'done':
+            return True
+        return status is not None and not self.config.retry_failed
+
+    def _collect(self, item) -> bool:
+        """Wait for one file; returns True if it had to be abandoned"""
+        path, relative_path, stat, future, submitted = item
+        timeout = self.config.file_timeout
+        # The worker enforces the timeout itself; this backstop also covers
+        # time spent queued behind the files submitted before this one
+        wait = None if timeout is None else max(0.0, submitted + 2 * timeout + 1 - time.monotonic())
+        try:
+            output, elapsed = future.result(timeout=wait)
+        except (FileTimeoutError, FutureTimeoutError):
+            future.cancel()
+            self._record_failure(relative_path, stat.st_size, stat.st_mtime_ns, 'timeout',
+                                 f"Timed out extracting {relative_path} after {timeout:g}s")
+            return not future.done()
+        except Exception as e:
+            self._record_failure(relative_path, stat.st_size, stat.st_mtime_ns, 'failed',
+                                 f"Failed to extract {relative_path}: {e}")
+            return False
+
+        self._batch.append(IngestedFile(path=path, relative_path=relative_path, size=stat.st_size,
+                                        mtime_ns=stat.st_mtime_ns, output=output, elapsed=elapsed))
+        if len(self._batch) >= self.config.batch_size:
+            self._flush()
+        return False
+
+    def _flush(self):
+        """Deliver the pending batch to the sink and record it in the manifest"""
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        try:
+            self.sink(batch)
+        except Exception as e:
+            message = f"Sink rejected a batch of {len(batch)} files: {e}"
+            logger.error(message)
+            self._errors.append(message)
+            self._progress.files_failed += len(batch)
+            if self._manifest:
+                for item in batch:
+                    self._manifest.record(item.relative_path, item.size, item.mtime_ns, 'failed', str(e))
+                self._manifest.save()
+            return
+
+        progress = self._progress
+        progress.files_processed += len(batch)
+        progress.bytes_processed += sum(item.size for item in batch)
+        progress.batches += 1
+        if self._manifest:
+            for item in batch:
+                self._manifest.record(item.relative_path, item.size, item.mtime_ns, 'done')
+            self._manifest.save()
+        self._notify()
+
+    def _record_failure(self, relative_path: str, size: int, mtime_ns: int, status: str, message: str):
+        logger.error(message)
+        self._errors.append(message)
+        if status == 'timeout':
+            self._progress.files_timed_out += 1
+        else:
+            self._progress.files_failed += 1
+        if self._manifest:
+            self._manifest.record(relative_path, size, mtime_ns, status, message)
+
+    def _notify(self):
+        if not self.progress_callback:
+            return
+        self._progress.elapsed = time.time() - self._start_time
+        try:
+            self.progress_callback(self._progress)
+        except Exception as e:
+            logger.warning(f"Progress callback failed: {e}")
+
+
+def ingest_directory(root: str, sink: Callable[[List[IngestedFile]], None] = None,
+                     config: IngestionConfig = None,
+                     progress_callback: Callable[[IngestionProgress], None] = None) -> Dict[str, Any]:
+    """
+    Ingest every supported file under a directory
+
+    Args:
+        root: Directory to walk
+        sink: Receives batches of extracted files (default: the memory system)
+        config: Ingestion configuration
+        progress_callback: Called after every batch and at completion
+
+    Returns:
+        Ingestion statistics
+    """
+    return DirectoryIngestor(sink or MemorySink(), config, progress_callback).run(root)
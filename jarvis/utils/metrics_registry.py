@@ -0,0 +1,444 @@
+"""
+In-memory metrics registry with text exposition
+
+``MetricsRegistry`` keeps the current value of every counter and gauge,
+and a ``QuantileSketch`` for every summary series, keyed by metric name
+and label set. A scrape reads memory instead of metrics.db. ``render()``
+produces the plain-text exposition format (version 0.0.4) read by
+Prometheus-compatible scrapers, and ``MetricsHTTPServer`` serves it on
+``/metrics`` for processes that do not run the FastAPI app. The module
+sits outside ``jarvis.monitoring`` so the archive, LLM and vector search
+layers can record into it without importing the monitoring package.
+
+Metric names use the collector's dotted style
+(``llm.request_latency_seconds``). They are exposed under the ``jarvis_``
+namespace with dots replaced by underscores. Counters get a ``_total``
+suffix, and summaries are exported as quantiles plus ``_sum`` and
+``_count``.
+
+Collectors registered with ``register_collector`` are called at the
+start of every scrape. They refresh values that are cheaper to read on
+demand than to track on every event, such as cache statistics.
+"""
+
+import re
+import math
+import time
+import logging
+import threading
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .quantile_sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+COUNTER = "counter"
+GAUGE = "gauge"
+SUMMARY = "summary"
+
+EXPOSED_QUANTILES = (0.5, 0.9, 0.99)
+
+_INVALID_NAME = re.compile(r'[^a-zA-Z0-9_:]')
+_INVALID_LABEL = re.compile(r'[^a-zA-Z0-9_]')
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _exposed_name(namespace: str, name: str) -> str:
+    name = _INVALID_NAME.sub('_', name)
+    if name[:1].isdigit():
+        name = '_' + name
+    if namespace and not name.startswith(namespace + '_'):
+        name = f"{namespace}_{name}"
+    return name
+
+
+def _label_key(labels: Optional[Dict[str, Any]]) -> LabelKey:
+    if not labels:
+        return ()
+    return tuple(sorted((_INVALID_LABEL.sub('_', str(name)), str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _escape_help(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _format_labels(key: LabelKey, extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in key]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Family:
+    """All series of one metric"""
+    __slots__ = ('name', 'exposed_name', 'kind', 'help', 'series', 'estimates')
+
+    def __init__(self, name: str, exposed_name: str, kind: str, help: str):
+        self.name = name
+        self.exposed_name = exposed_name
+        self.kind = kind
+        self.help = help
+        self.series: Dict[LabelKey, Union[float, QuantileSketch]] = {}
+        # Summary quantiles from the last scrape, reused while a series' count is unchanged
+        self.estimates: Dict[LabelKey, Tuple[int, List[float]]] = {}
+
+
+class _CacheGroup:
+    """Caches tracked under one name, exported as a single summed series
+
+    Several instances can share a name (every search engine has its own
+    query cache). Counts of instances that have been garbage collected
+    are kept as of the last scrape, so the exported counters never go
+    down.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.caches: List[List[Any]] = []  # [weak reference, hits, misses] as of the last scrape
+        self.retired_hits = 0
+        self.retired_misses = 0
+        self.lock = threading.Lock()
+
+    def _retire_dead(self):
+        """Fold the last counts of collected caches into the totals (caller holds the lock)"""
+        live = []
+        for entry in self.caches:
+            if entry[0]() is None:
+                self.retired_hits += entry[1]
+                self.retired_misses += entry[2]
+            else:
+                live.append(entry)
+        self.caches = live
+
+    def add(self, cache: Any):
+        with self.lock:
+            self._retire_dead()
+            if not any(entry[0]() is cache for entry in self.caches):
+                self.caches.append([weakref.ref(cache), 0, 0])
+
+    def collect(self, registry: 'MetricsRegistry'):
+        with self.lock:
+            entries = 0
+            for entry in self.caches:
+                cache = entry[0]()
+                if cache is None:
+                    continue
+                stats = cache.get_stats()
+                entry[1] = max(entry[1], stats.get('hits', 0))
+                entry[2] = max(entry[2], stats.get('misses', 0))
+                entries += stats.get('size', 0)
+            self._retire_dead()
+            hits = self.retired_hits + sum(entry[1] for entry in self.caches)
+            misses = self.retired_misses + sum(entry[2] for entry in self.caches)
+
+        labels = {'cache': self.name}
+        registry.set_counter('cache.hits', hits, labels, help="Cache lookups answered from the cache")
+        registry.set_counter('cache.misses', misses, labels, help="Cache lookups that missed")
+        registry.set('cache.hit_ratio', hits / (hits + misses) if hits + misses else 0.0, labels,
+                     help="Share of cache lookups that hit, since start")
+        registry.set('cache.entries', entries, labels, help="Entries held by the caches")
+
+
+class MetricsRegistry:
+    """Current counters, gauges and summary sketches, rendered on demand"""
+
+    def __init__(self, namespace: str = 'jarvis', relative_accuracy: float = 0.01,
+                 quantiles: Sequence[float] = EXPOSED_QUANTILES):
+        self.namespace = namespace
+        self.relative_accuracy = relative_accuracy
+        self.quantiles = tuple(quantiles)
+        self._families: Dict[str, _Family] = {}
+        self._lock = threading.Lock()
+        self._collectors: List[Callable[[], Optional[Callable]]] = []
+        self._collectors_lock = threading.Lock()
+        self._cache_groups: Dict[str, _CacheGroup] = {}
+        self.stats = {
+            'scrapes': 0,
+            'scrape_seconds': 0.0,
+            'last_scrape_seconds': 0.0,
+            'last_scrape_bytes': 0,
+            'collector_errors': 0
+        }
+
+    def _family(self, name: str, kind: str, help: str) -> _Family:
+        """Get or create a family; the caller holds the lock"""
+        family = self._families.get(name)
+        if family is None:
+            exposed = _exposed_name(self.namespace, name)
+            if kind == COUNTER and not exposed.endswith('_total'):
+                exposed += '_total'
+            family = self._families[name] = _Family(name, exposed, kind, help)
+        elif family.kind != kind:
+            raise ValueError(f"Metric {name} is a {family.kind}, not a {kind}")
+        elif help and not family.help:
+            family.help = help
+        return family
+
+    # Recording
+
+    def inc(self, name: str, amount: float = 1.0, labels: Dict[str, Any] = None, help: str = ''):
+        """Add ``amount`` to a counter"""
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = _label_key(labels)
+        with self._lock:
+            series = self._family(name, COUNTER, help).series
+            series[key] = series.get(key, 0.0) + amount
+
+    def set_counter(self, name: str, total: float, labels: Dict[str, Any] = None, help: str = ''):
+        """Set a counter to a total tracked elsewhere (e.g. a stats dict)"""
+        key = _label_key(labels)
+        with self._lock:
+            self._family(name, COUNTER, help).series[key] = float(total)
+
+    def set(self, name: str, value: float, labels: Dict[str, Any] = None, help: str = ''):
+        """Set a gauge"""
+        key = _label_key(labels)
+        with self._lock:
+            self._family(name, GAUGE, help).series[key] = float(value)
+
+    def observe(self, name: str, value: Union[float, QuantileSketch],
+                labels: Dict[str, Any] = None, help: str = ''):
+        """Add an observation (or a whole sketch of them) to a summary"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._family(name, SUMMARY, help).series
+            sketch = series.get(key)
+            if sketch is None:
+                sketch = series[key] = QuantileSketch(relative_accuracy=self.relative_accuracy)
+            if isinstance(value, QuantileSketch):
+                sketch.merge(value)
+            else:
+                sketch.add(value)
+
+    def get(self, name: str, labels: Dict[str, Any] = None) -> Optional[Union[float, QuantileSketch]]:
+        """Current value of one series (a copy of the sketch for summaries)"""
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                return None
+            value = family.series.get(_label_key(labels))
+            return value.copy() if isinstance(value, QuantileSketch) else value
+
+    def clear(self):
+        with self._lock:
+            self._families.clear()
+
+    # Collectors
+
+    def register_collector(self, callback: Callable[['MetricsRegistry'], None], weak: bool = False):
+        """Call ``callback(registry)`` before every scrape
+
+        With ``weak`` a bound method is held through a weak reference, so
+        registering does not keep its object alive.
+        """
+        if weak:
+            reference = weakref.WeakMethod(callback)
+        else:
+            reference = lambda: callback
+        self._add_collector(reference)
+
+    def _add_collector(self, reference: Callable[[], Optional[Callable]]):
+        with self._collectors_lock:
+            # Drop collectors whose objects are gone, so short-lived ones do not pile up
+            self._collectors = [existing for existing in self._collectors if existing() is not None]
+            self._collectors.append(reference)
+
+    def unregister_collector(self, callback: Callable[['MetricsRegistry'], None]):
+        with self._collectors_lock:
+            self._collectors = [reference for reference in self._collectors
+                                if reference() not in (None, callback)]
+
+    def track_cache(self, cache_name: str, cache: Any):
+        """Export a cache's ``get_stats()`` hits, misses, hit ratio and size on
+        every scrape, summed with every other live cache tracked under the
+        same name; the cache itself is only weakly referenced"""
+        with self._collectors_lock:
+            group = self._cache_groups.get(cache_name)
+            created = group is None
+            if created:
+                group = self._cache_groups[cache_name] = _CacheGroup(cache_name)
+        group.add(cache)
+        if created:
+            self.register_collector(group.collect)
+
+    def _run_collectors(self):
+        with self._collectors_lock:
+            references = list(self._collectors)
+        dead = []
+        for reference in references:
+            callback = reference()
+            if callback is None:
+                dead.append(reference)
+                continue
+            try:
+                callback(self)
+            except Exception as e:
+                self.stats['collector_errors'] += 1
+                logger.error(f"Metrics collector failed: {e}")
+        if dead:
+            with self._collectors_lock:
+                self._collectors = [reference for reference in self._collectors if reference not in dead]
+
+    # Exposition
+
+    def _snapshot(self) -> List[Tuple[_Family, List[Tuple[LabelKey, Any]]]]:
+        """Copy what render needs, summarising sketches, under the lock"""
+        snapshot = []
+        with self._lock:
+            for family in self._families.values():
+                if not family.series:
+                    continue
+                if family.kind == SUMMARY:
+                    series = []
+                    for key, sketch in family.series.items():
+                        cached = family.estimates.get(key)
+                        if cached is None or cached[0] != sketch.count:
+                            cached = family.estimates[key] = (sketch.count, sketch.quantiles(self.quantiles))
+                        series.append((key, (cached[1], sketch.sum, sketch.count)))
+                else:
+                    series = list(family.series.items())
+                snapshot.append((family, series))
+        snapshot.sort(key=lambda item: item[0].exposed_name)
+        return snapshot
+
+    def render(self) -> str:
+        """All metrics in the text exposition format"""
+        start = time.perf_counter()
+        self._run_collectors()
+
+        lines = []
+        for family, series in self._snapshot():
+            name = family.exposed_name
+            if family.help:
+                lines.append(f"# HELP {name} {_escape_help(family.help)}")
+            lines.append(f"# TYPE {name} {family.kind}")
+            for key, value in sorted(series):
+                if family.kind == SUMMARY:
+                    estimates, total, count = value
+                    for q, estimate in zip(self.quantiles, estimates):
+                        quantile = f'quantile="{q:g}"'
+                        lines.append(f"{name}{_format_labels(key, quantile)} {_format_value(estimate)}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(total)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {count}")
+                else:
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        text = '\n'.join(lines) + '\n'
+
+        elapsed = time.perf_counter() - start
+        self.stats['scrapes'] += 1
+        self.stats['scrape_seconds'] += elapsed
+        self.stats['last_scrape_seconds'] = elapsed
+        self.stats['last_scrape_bytes'] = len(text)
+        self.observe('metrics.scrape_duration_seconds', elapsed,
+                     help="Time spent rendering the metrics registry")
+        return text
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            families = len(self._families)
+            series = sum(len(family.series) for family in self._families.values())
+        scrapes = self.stats['scrapes']
+        return {
+            **self.stats,
+            'families': families,
+            'series': series,
+            'collectors': len(self._collectors),
+            'mean_scrape_ms': self.stats['scrape_seconds'] / scrapes * 1000 if scrapes else 0.0
+        }
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = None
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        try:
+            body = self.registry.render().encode('utf-8')
+        except Exception as e:
+            logger.error(f"Metrics scrape failed: {e}")
+            self.send_error(500)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsHTTPServer:
+    """Serves a registry on ``GET /metrics`` from a background thread"""
+
+    def __init__(self, registry: MetricsRegistry = None, host: str = '127.0.0.1', port: int = 8770):
+        self.registry = registry or get_metrics_registry()
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def start(self):
+        if self._server is not None:
+            return
+        handler = type('MetricsHandler', (_MetricsHandler,), {'registry': self.registry})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        print(f"[METRICS] Serving metrics on {self.url}")
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(5)
+        self._server = None
+        self._thread = None
+
+
+# Global registry instance
+_metrics_registry = None
+_metrics_registry_lock = threading.Lock()
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get the process-wide metrics registry"""
+    global _metrics_registry
+    with _metrics_registry_lock:
+        if _metrics_registry is None:
+            _metrics_registry = MetricsRegistry()
+        return _metrics_registry
+
+def start_metrics_server(host: str = '127.0.0.1', port: int = 8770) -> MetricsHTTPServer:
+    """Serve the global registry over HTTP"""
+    server = MetricsHTTPServer(get_metrics_registry(), host, port)
+    server.start()
+    return server
@@ -0,0 +1,243 @@
+"""
+Mergeable quantile sketch for metric distributions
+
+``QuantileSketch`` follows DDSketch: values are counted in logarithmic
+buckets, bucket ``i`` holding magnitudes in ``(gamma**(i-1), gamma**i]``
+with ``gamma = (1 + alpha) / (1 - alpha)``. Every quantile is answered
+within a relative error ``alpha`` of the true value, the size depends on
+the range of values rather than on how many were added, and two sketches
+with the same accuracy merge exactly by adding bucket counts, so windows,
+rollup buckets and nodes can be combined after the fact.
+
+Count, sum, sum of squares, min and max are tracked exactly alongside
+the buckets. If values span more than ``max_buckets`` buckets, the
+buckets of the smallest magnitudes are collapsed together, which keeps
+the size bounded and only loses accuracy at the low end.
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Tuple
+
+SUMMARY_QUANTILES = (0.5, 0.75, 0.9, 0.95, 0.99)
+
+# Magnitudes below this are counted as zero
+MIN_INDEXABLE = 1e-9
+
+
+class QuantileSketch:
+    """DDSketch-style quantile sketch with relative-error guarantees"""
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        if max_buckets < 2:
+            raise ValueError("max_buckets must be at least 2")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.sum_squares = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @classmethod
+    def from_values(cls, values: Iterable[float], **options) -> 'QuantileSketch':
+        sketch = cls(**options)
+        sketch.update(values)
+        return sketch
+
+    @classmethod
+    def merged(cls, sketches: Iterable['QuantileSketch'], **options) -> 'QuantileSketch':
+        """One sketch combining ``sketches`` (e.g. the same window from several nodes)"""
+        result = None
+        for sketch in sketches:
+            if result is None:
+                result = cls(sketch.relative_accuracy, sketch.max_buckets)
+            result.merge(sketch)
+        return result if result is not None else cls(**options)
+
+    def _index(self, magnitude: float) -> int:
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1):
+        """Add ``value`` ``count`` times"""
+        value = float(value)
+        if math.isnan(value) or count <= 0:
+            return
+        if value > MIN_INDEXABLE:
+            index = self._index(value)
+            positive = self.positive
+            if index in positive:
+                positive[index] += count
+            else:
+                positive[index] = count
+                if len(positive) > self.max_buckets:
+                    self._collapse(positive)
+        elif value < -MIN_INDEXABLE:
+            index = self._index(-value)
+            negative = self.negative
+            if index in negative:
+                negative[index] += count
+            else:
+                negative[index] = count
+                if len(negative) > self.max_buckets:
+                    self._collapse(negative)
+        else:
+            self.zero_count += count
+        self.count += count
+        self.sum += value * count
+        self.sum_squares += value * value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def _collapse(self, buckets: Dict[int, int]):
+        """Fold the smallest-magnitude buckets together until max_buckets remain"""
+        indexes = sorted(buckets)
+        excess = len(indexes) - self.max_buckets
+        target = indexes[excess]
+        for index in indexes[:excess]:
+            buckets[target] += buckets.pop(index)
+
+    def update(self, values: Iterable[float]):
+        """Add every value in ``values``"""
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: 'QuantileSketch'):
+        """Add the contents of another sketch with the same accuracy"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for index, count in other.positive.items():
+            self.positive[index] = self.positive.get(index, 0) + count
+        for index, count in other.negative.items():
+            self.negative[index] = self.negative.get(index, 0) + count
+        if len(self.positive) > self.max_buckets:
+            self._collapse(self.positive)
+        if len(self.negative) > self.max_buckets:
+            self._collapse(self.negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.sum_squares += other.sum_squares
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _ordered_buckets(self) -> Iterable[Tuple[int, int, int]]:
+        """(sign, index, count) from the lowest values up; values are computed
+        only for the buckets a quantile lands in"""
+        negative, positive = self.negative, self.positive
+        for index in sorted(negative, reverse=True):
+            yield -1, index, negative[index]
+        if self.zero_count:
+            yield 0, 0, self.zero_count
+        for index in sorted(positive):
+            yield 1, index, positive[index]
+
+    def quantile(self, q: float) -> float:
+        """Estimated value at quantile ``q`` (0-1); 0.0 for an empty sketch"""
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs: Iterable[float]) -> List[float]:
+        """Estimated values at several quantiles, in one pass over the buckets"""
+        qs = list(qs)
+        if any(not 0 <= q <= 1 for q in qs):
+            raise ValueError("q must be between 0 and 1")
+        if self.count == 0:
+            return [0.0] * len(qs)
+
+        order = sorted(range(len(qs)), key=lambda i: qs[i])
+        ranks = [qs[i] * (self.count - 1) for i in order]
+        results = [self.max] * len(qs)
+        position = 0
+        seen = 0
+        for sign, index, count in self._ordered_buckets():
+            seen += count
+            if seen <= ranks[position]:
+                continue
+            value = sign * self._value(index) if sign else 0.0
+            value = min(max(value, self.min), self.max)
+            while position < len(order) and seen > ranks[position]:
+                results[order[position]] = value
+                position += 1
+            if position == len(order):
+                break
+        return results
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def standard_deviation(self) -> float:
+        """Population standard deviation, from the tracked sums"""
+        if self.count < 2:
+            return 0.0
+        mean = self.mean
+        return math.sqrt(max(0.0, self.sum_squares / self.count - mean * mean))
+
+    def percentiles(self, quantiles: Iterable[float] = SUMMARY_QUANTILES) -> Dict[str, float]:
+        """Quantiles keyed like ``{'p50': ..., 'p99': ...}``"""
+        quantiles = list(quantiles)
+        return {f"p{round(q * 100):g}": value for q, value in zip(quantiles, self.quantiles(quantiles))}
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact JSON-friendly description, for display and streaming"""
+        summary = {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'mean': self.mean
+        }
+        summary.update(self.percentiles())
+        return summary
+
+    def copy(self) -> 'QuantileSketch':
+        return QuantileSketch.from_dict(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form"""
+        return {
+            'alpha': self.relative_accuracy,
+            'max_buckets': self.max_buckets,
+            'positive': {str(index): count for index, count in self.positive.items()},
+            'negative': {str(index): count for index, count in self.negative.items()},
+            'zero': self.zero_count,
+            'count': self.count,
+            'sum': self.sum,
+            'sumsq': self.sum_squares,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None
+        }
+
+    @staticmethod
+    def is_serialized(data: Any) -> bool:
+        """Whether ``data`` looks like the output of ``to_dict``"""
+        return isinstance(data, dict) and 'alpha' in data and 'positive' in data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QuantileSketch':
+        sketch = cls(data.get('alpha', 0.01), data.get('max_buckets', 2048))
+        sketch.positive = {int(index): count for index, count in data.get('positive', {}).items()}
+        sketch.negative = {int(index): count for index, count in data.get('negative', {}).items()}
+        sketch.zero_count = data.get('zero', 0)
+        sketch.count = data.get('count', 0)
+        sketch.sum = data.get('sum', 0.0)
+        sketch.sum_squares = data.get('sumsq', 0.0)
+        if sketch.count:
+            sketch.min = data['min']
+            sketch.max = data['max']
+        return sketch
+
+    def __len__(self) -> int:
+        return self.count
@@ -6,7 +6,10 @@ Provides semantic search, embeddings, and RAG capabilities
 from .chroma_manager import ChromaDBManager
 from .embedding_providers import EmbeddingProvider, SentenceTransformerProvider, OpenAIEmbeddingProvider
 from .semantic_search import SemanticSearchEngine, SearchConfig, SearchStrategy
+from .query_cache import QueryResultCache
 from .rag_system import EnhancedRAGSystem, RAGConfig
+from .chunking import ChunkingConfig, ChunkingStrategy, TextChunk, create_chunker
+from .indexing_pipeline import IndexingPipeline, PipelineConfig, IndexingProgress
 from .models import Document, SearchResult, EmbeddingResult, RAGResponse
 
 __all__ = [
@@ -17,8 +20,16 @@ __all__ = [
     'SemanticSearchEngine',
     'SearchConfig',
     'SearchStrategy',
+    'QueryResultCache',
     'EnhancedRAGSystem',
     'RAGConfig',
+    'ChunkingConfig',
+    'ChunkingStrategy',
+    'TextChunk',
+    'create_chunker',
+    'IndexingPipeline',
+    'PipelineConfig',
+    'IndexingProgress',
     'Document',
     'SearchResult',
     'EmbeddingResult',
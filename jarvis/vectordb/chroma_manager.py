@@ -37,6 +37,9 @@ class ChromaDBManager:
         self._client = None
         self._collections = {}
         
+        # Per-collection write generation, used to invalidate cached queries
+        self._generations = {}
+        
         # Default embedding provider
         if default_embedding_provider is None:
             self.default_embedding_provider = SentenceTransformerProvider()
@@ -147,6 +150,14 @@ class ChromaDBManager:
             logger.error(f"Failed to get collection '{name}': {e}")
             return None
     
+    def get_generation(self, name: str) -> int:
+        """Get the write generation of a collection"""
+        return self._generations.get(name, 0)
+    
+    def _bump_generation(self, name: str):
+        """Mark a collection as modified so cached queries become stale"""
+        self._generations[name] = self._generations.get(name, 0) + 1
+    
     def list_collections(self) -> List[str]:
         """List all collections"""
         try:
@@ -166,6 +177,7 @@ class ChromaDBManager:
             # Remove from cache
             if name in self._collections:
                 del self._collections[name]
+            self._bump_generation(name)
                 
             logger.info(f"Deleted collection '{name}'")
             return True
@@ -219,6 +231,9 @@ class ChromaDBManager:
                     logger.error(f"Batch processing error: {e}")
                     errors += len(batch)
             
+            if processed:
+                self._bump_generation(collection_name)
+            
             processing_time = time.time() - start_time
             
             result = {
@@ -239,6 +254,48 @@ class ChromaDBManager:
             logger.error(f"Failed to add documents to '{collection_name}': {e}")
             return {'success': False, 'error': str(e)}
     
+    def add_embedded_documents(self,
+                               collection_name: str,
+                               documents: List[Document],
+                               embeddings: List[List[float]]) -> Dict[str, Any]:
+        """
+        Add documents with precomputed embeddings in a single bulk write
+        
+        Args:
+            collection_name: Target collection
+            documents: Documents to add
+            embeddings: One embedding per document
+            
+        Returns:
+            Dict with processing stats
+        """
+        if len(documents) != len(embeddings):
+            return {'success': False, 'error': 'documents and embeddings length mismatch'}
+        
+        collection = self.get_collection(collection_name)
+        if collection is None:
+            return {'success': False, 'error': f'Collection {collection_name} not found'}
+        
+        try:
+            collection.upsert(
+                ids=[doc.id for doc in documents],
+                documents=[doc.content for doc in documents],
+                metadatas=[doc.metadata or None for doc in documents],
+                embeddings=embeddings
+            )
+            self._bump_generation(collection_name)
+            return {'success': True, 'processed': len(documents), 'errors': 0}
+            
+        except Exception as e:
+            logger.error(f"Bulk write to '{collection_name}' failed: {e}")
+            return {'success': False, 'processed': 0, 'errors': len(documents), 'error': str(e)}
+    
+    def get_embedding_provider(self, collection_name: str) -> EmbeddingProvider:
+        """Get the embedding provider used by a collection"""
+        return self._collections.get(collection_name, {}).get(
+            'embedding_provider', self.default_embedding_provider
+        )
+    
     def semantic_search(self, 
                        query_config: QueryConfig) -> List[SearchResult]:
         """
@@ -381,6 +438,7 @@ class ChromaDBManager:
                     ids=[document_id],
                     **update_data
                 )
+                self._bump_generation(collection_name)
                 logger.info(f"Updated document '{document_id}' in '{collection_name}'")
                 return True
             
@@ -398,6 +456,7 @@ class ChromaDBManager:
         
         try:
             collection.delete(ids=document_ids)
+            self._bump_generation(collection_name)
             logger.info(f"Deleted {len(document_ids)} documents from '{collection_name}'")
             return True
             
@@ -410,6 +469,8 @@ class ChromaDBManager:
         try:
             client = self._get_client()
             client.reset()
+            for name in set(self._generations) | set(self._collections):
+                self._bump_generation(name)
             self._collections.clear()
             logger.warning("Database reset completed")
             return True
@@ -0,0 +1,456 @@
+"""
+Document chunking strategies for RAG indexing
+"""
+
+import re
+import bisect
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import List, Dict, Any, Optional, Iterator, Iterable, Tuple, TextIO
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkingStrategy(Enum):
+    """Available chunking strategies"""
+    CHARACTER = "character"    # Fixed character windows (legacy behaviour)
+    TOKEN = "token"            # Fixed token windows
+    RECURSIVE = "recursive"    # Headings -> paragraphs -> lines -> sentences -> words
+    CODE = "code"              # Top-level definitions -> blocks -> lines
+
+
+@dataclass
+class ChunkingConfig:
+    """Configuration for document chunking"""
+    strategy: ChunkingStrategy = ChunkingStrategy.RECURSIVE
+    chunk_size: int = 1000
+    chunk_overlap: int = 200
+    size_unit: str = "chars"          # "chars" or "tokens" (TOKEN strategy always uses tokens)
+    tokenizer: Optional[str] = None   # Local tokenizer name, None for the whitespace approximation
+    stream_block_size: int = 1024 * 1024
+
+    def __post_init__(self):
+        if self.chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if self.chunk_overlap < 0 or self.chunk_overlap >= self.chunk_size:
+            raise ValueError("chunk_overlap must be between 0 and chunk_size")
+        if self.size_unit not in ("chars", "tokens"):
+            raise ValueError(f"Unknown size_unit: {self.size_unit}")
+
+
+@dataclass
+class TextChunk:
+    """A chunk of source text with its offsets in the source"""
+    text: str
+    start: int
+    end: int
+    index: int = 0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class Tokenizer(ABC):
+    """Abstract tokenizer returning token character spans"""
+
+    name = "base"
+
+    @abstractmethod
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        """Get (start, end) character offsets of every token"""
+        pass
+
+    def count(self, text: str) -> int:
+        """Count tokens in text"""
+        return len(self.spans(text))
+
+
+class WhitespaceTokenizer(Tokenizer):
+    """
+    Tokenizer approximation without external models.
+    Words and punctuation runs are counted as separate tokens, which tracks
+    subword tokenizers more closely than a plain whitespace split.
+    """
+
+    name = "whitespace"
+    _pattern = re.compile(r"\w+|[^\w\s]+")
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        return [m.span() for m in self._pattern.finditer(text)]
+
+    def count(self, text: str) -> int:
+        return sum(1 for _ in self._pattern.finditer(text))
+
+
+class TransformersTokenizer(Tokenizer):
+    """Tokenizer backed by a locally cached Hugging Face fast tokenizer"""
+
+    def __init__(self, model_name: str):
+        from transformers import AutoTokenizer
+
+        self.name = model_name
+        self._tokenizer = AutoTokenizer.from_pretrained(model_name, local_files_only=True)
+        if not getattr(self._tokenizer, 'is_fast', False):
+            raise ValueError(f"Tokenizer {model_name} does not provide offset mappings")
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        encoded = self._tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+        return [tuple(span) for span in encoded['offset_mapping'] if span[1] > span[0]]
+
+    def count(self, text: str) -> int:
+        return len(self._tokenizer(text, add_special_tokens=False)['input_ids'])
+
+
+_tokenizers: Dict[str, Tokenizer] = {}
+
+
+def get_tokenizer(name: str = None) -> Tokenizer:
+    """
+    Get a tokenizer by name, falling back to the whitespace approximation
+
+    Args:
+        name: Local tokenizer model name (None or "whitespace" for the approximation)
+
+    Returns:
+        Tokenizer instance
+    """
+    key = name or WhitespaceTokenizer.name
+    if key not in _tokenizers:
+        if key == WhitespaceTokenizer.name:
+            _tokenizers[key] = WhitespaceTokenizer()
+        else:
+            try:
+                _tokenizers[key] = TransformersTokenizer(key)
+                logger.info(f"Loaded local tokenizer: {key}")
+            except Exception as e:
+                logger.warning(f"Tokenizer {key} unavailable ({e}), using whitespace approximation")
+                _tokenizers[key] = WhitespaceTokenizer()
+    return _tokenizers[key]
+
+
+class BaseChunker(ABC):
+    """Base class for chunking strategies"""
+
+    strategy = None
+
+    def __init__(self, config: ChunkingConfig = None):
+        self.config = config or ChunkingConfig(strategy=self.strategy)
+        self.tokenizer = get_tokenizer(self.config.tokenizer)
+
+    def length(self, text: str) -> int:
+        """Measure text in the configured size unit"""
+        if self.config.size_unit == "tokens":
+            return self.tokenizer.count(text)
+        return len(text)
+
+    @abstractmethod
+    def split(self, text: str) -> Iterator[TextChunk]:
+        """Split text into chunks with offsets relative to the text"""
+        pass
+
+    def chunk_text(self, text: str) -> List[TextChunk]:
+        """Split text into a list of chunks"""
+        return list(self.split(text))
+
+    def stream(self, blocks: Iterable[str]) -> Iterator[TextChunk]:
+        """
+        Chunk text arriving in blocks without holding the whole source in memory
+
+        Every chunk but the last one produced for the current buffer is
+        emitted; the buffer is then trimmed to the start of that last chunk,
+        so at most one chunk plus one block is held at a time. Offsets are
+        relative to the start of the whole stream.
+
+        Args:
+            blocks: Iterable of text blocks in source order
+
+        Yields:
+            Text chunks in order
+        """
+        buffer = ""
+        buffer_offset = 0
+        index = 0
+        section = None
+
+        for block in blocks:
+            if not block:
+                continue
+            buffer += block
+
+            chunks = self.chunk_text(buffer)
+            if len(chunks) < 2:
+                continue
+
+            for chunk in chunks[:-1]:
+                chunk = self._rebase(chunk, buffer_offset, index, section)
+                section = chunk.metadata.get('section', section)
+                yield chunk
+                index += 1
+
+            keep_from = chunks[-1].start
+            buffer = buffer[keep_from:]
+            buffer_offset += keep_from
+
+        for chunk in self.chunk_text(buffer):
+            chunk = self._rebase(chunk, buffer_offset, index, section)
+            section = chunk.metadata.get('section', section)
+            yield chunk
+            index += 1
+
+    @staticmethod
+    def _rebase(chunk: TextChunk, offset: int, index: int, section: str = None) -> TextChunk:
+        metadata = chunk.metadata
+        if section is not None and 'section' not in metadata:
+            # The heading was trimmed from the buffer by an earlier block
+            metadata = {**metadata, 'section': section}
+        return TextChunk(
+            text=chunk.text,
+            start=chunk.start + offset,
+            end=chunk.end + offset,
+            index=index,
+            metadata=metadata
+        )
+
+    def _make_chunk(self, text: str, start: int, end: int, index: int, **metadata) -> Optional[TextChunk]:
+        """Create a chunk, trimming surrounding whitespace while keeping offsets exact"""
+        piece = text[start:end]
+        stripped = piece.strip()
+        if not stripped:
+            return None
+        lead = len(piece) - len(piece.lstrip())
+        start += lead
+        return TextChunk(
+            text=stripped,
+            start=start,
+            end=start + len(stripped),
+            index=index,
+            metadata={'chunk_strategy': self.config.strategy.value, **metadata}
+        )
+
+
+class CharacterChunker(BaseChunker):
+    """Fixed-size character windows that prefer to end on a sentence break"""
+
+    strategy = ChunkingStrategy.CHARACTER
+
+    def split(self, text: str) -> Iterator[TextChunk]:
+        size = self.config.chunk_size
+        overlap = self.config.chunk_overlap
+        start = 0
+        index = 0
+
+        while start < len(text):
+            end = min(start + size, len(text))
+
+            if end < len(text):
+                sentence_break = text.rfind('.', max(end - overlap, start), end)
+                if sentence_break != -1 and sentence_break > start:
+                    end = sentence_break + 1
+
+            chunk = self._make_chunk(text, start, end, index)
+            if chunk:
+                yield chunk
+                index += 1
+
+            start = max(end - overlap, start + 1) if end < len(text) else end
+
+
+class TokenChunker(BaseChunker):
+    """Fixed-size token windows with token overlap"""
+
+    strategy = ChunkingStrategy.TOKEN
+
+    def length(self, text: str) -> int:
+        return self.tokenizer.count(text)
+
+    def split(self, text: str) -> Iterator[TextChunk]:
+        spans = self.tokenizer.spans(text)
+        size = self.config.chunk_size
+        step = size - self.config.chunk_overlap
+        index = 0
+
+        for first in range(0, len(spans), step):
+            window = spans[first:first + size]
+            chunk = self._make_chunk(text, window[0][0], window[-1][1], index,
+                                     token_count=len(window))
+            if chunk:
+                yield chunk
+                index += 1
+            if first + size >= len(spans):
+                break
+
+
+class RecursiveChunker(BaseChunker):
+    """
+    Structure-aware chunker.
+
+    Text is split at the coarsest boundary that yields pieces within the
+    size limit (markdown headings, blank lines, lines, sentences, words),
+    and adjacent pieces are merged back up to the limit. Fenced code
+    blocks and tables are kept whole unless they alone exceed the limit.
+    """
+
+    strategy = ChunkingStrategy.RECURSIVE
+
+    separators = [
+        r"(?m)^(?=#{1,6}\s)",       # before markdown headings
+        r"\n[ \t]*\n",              # paragraph breaks
+        r"\n",                      # line breaks
+        r"(?<=[.!?])\s+",           # sentence ends
+        r"\s+",                     # words
+    ]
+    line_level = 2
+
+    _fence_pattern = re.compile(r"(?ms)^[ \t]*(```|~~~).*?^[ \t]*\1[ \t]*$")
+    _table_pattern = re.compile(r"(?m)(?:^[ \t]*\|.*\|[ \t]*(?:\n|$)){2,}")
+    _heading_pattern = re.compile(r"(?m)^(#{1,6})\s+(.+?)\s*#*\s*$")
+
+    def __init__(self, config: ChunkingConfig = None):
+        super().__init__(config)
+        self._compiled = [re.compile(pattern) for pattern in self.separators]
+
+    def split(self, text: str) -> Iterator[TextChunk]:
+        protected = self._protected_spans(text)
+        headings = self._headings(text)
+        segments = list(self._segments(text, 0, len(text), 0, protected))
+
+        index = 0
+        for start, end in self._merge(text, segments):
+            metadata = {}
+            if headings:
+                position = bisect.bisect_right(headings, (start, chr(0x10ffff))) - 1
+                if position >= 0:
+                    metadata['section'] = headings[position][1]
+            chunk = self._make_chunk(text, start, end, index, **metadata)
+            if chunk:
+                yield chunk
+                index += 1
+
+    def _protected_spans(self, text: str) -> List[Tuple[int, int]]:
+        spans = [m.span() for m in self._fence_pattern.finditer(text)]
+        spans.extend(m.span() for m in self._table_pattern.finditer(text))
+        return sorted(spans)
+
+    def _headings(self, text: str) -> List[Tuple[int, str]]:
+        return [(m.start(), m.group(2)) for m in self._heading_pattern.finditer(text)]
+
+    @staticmethod
+    def _inside(position: int, protected: List[Tuple[int, int]]) -> bool:
+        i = bisect.bisect_right(protected, (position, float('inf'))) - 1
+        return i >= 0 and protected[i][0] < position < protected[i][1]
+
+    def _segments(self, text: str, start: int, end: int, level: int,
+                  protected: List[Tuple[int, int]]) -> Iterator[Tuple[int, int]]:
+        """Yield contiguous spans that each fit within the size limit"""
+        if self.length(text[start:end]) <= self.config.chunk_size:
+            yield (start, end)
+            return
+
+        if level >= len(self._compiled):
+            if protected:
+                # An oversized protected block: fall back to line splitting
+                yield from self._segments(text, start, end, self.line_level, [])
+            else:
+                yield from self._hard_split(text, start, end)
+            return
+
+        boundaries = []
+        for match in self._compiled[level].finditer(text, start, end):
+            position = match.end()
+            if start < position < end and not self._inside(position, protected):
+                boundaries.append(position)
+
+        if not boundaries:
+            yield from self._segments(text, start, end, level + 1, protected)
+            return
+
+        piece_start = start
+        for position in boundaries + [end]:
+            if position > piece_start:
+                yield from self._segments(text, piece_start, position, level + 1, protected)
+            piece_start = position
+
+    def _hard_split(self, text: str, start: int, end: int) -> Iterator[Tuple[int, int]]:
+        size = self.config.chunk_size
+        if self.config.size_unit == "tokens":
+            spans = self.tokenizer.spans(text[start:end])
+            piece_start = start
+            for first in range(size, len(spans), size):
+                boundary = start + spans[first][0]
+                yield (piece_start, boundary)
+                piece_start = boundary
+            yield (piece_start, end)
+        else:
+            for position in range(start, end, size):
+                yield (position, min(position + size, end))
+
+    def _merge(self, text: str, segments: List[Tuple[int, int]]) -> Iterator[Tuple[int, int]]:
+        """Greedily merge adjacent segments up to chunk_size, carrying overlap"""
+        size = self.config.chunk_size
+        overlap = self.config.chunk_overlap
+        lengths = [self.length(text[s:e]) for s, e in segments]
+
+        first = 0
+        while first < len(segments):
+            last = first
+            total = lengths[first]
+            while last + 1 < len(segments) and total + lengths[last + 1] <= size:
+                last += 1
+                total += lengths[last]
+
+            yield (segments[first][0], segments[last][1])
+
+            if last + 1 >= len(segments):
+                break
+
+            # Start the next chunk with as many trailing segments as fit in the overlap
+            next_first = last + 1
+            carried = 0
+            while next_first - 1 > first and carried + lengths[next_first - 1] <= overlap:
+                next_first -= 1
+                carried += lengths[next_first]
+            first = next_first
+
+
+class CodeChunker(RecursiveChunker):
+    """Chunker for source code that prefers top-level definition boundaries"""
+
+    strategy = ChunkingStrategy.CODE
+
+    separators = [
+        r"\n[ \t]*\n(?=(?:@|async\s+def\s|def\s|class\s|function\s|export\s|fn\s|func\s|pub\s))",
+        r"\n[ \t]*\n",
+        r"\n",
+        r"\s+",
+    ]
+    line_level = 2
+
+    def _protected_spans(self, text: str) -> List[Tuple[int, int]]:
+        return []
+
+    def _headings(self, text: str) -> List[Tuple[int, str]]:
+        return [(m.start(), m.group(2)) for m in re.finditer(
+            r"(?m)^(async\s+def|def|class|function)\s+(\w+)", text)]
+
+
+_CHUNKERS = {
+    ChunkingStrategy.CHARACTER: CharacterChunker,
+    ChunkingStrategy.TOKEN: TokenChunker,
+    ChunkingStrategy.RECURSIVE: RecursiveChunker,
+    ChunkingStrategy.CODE: CodeChunker,
+}
+
+
+def create_chunker(config: ChunkingConfig = None) -> BaseChunker:
+    """Create a chunker for the configured strategy"""
+    config = config or ChunkingConfig()
+    return _CHUNKERS[config.strategy](config)
+
+
+def read_blocks(stream: TextIO, block_size: int = 1024 * 1024) -> Iterator[str]:
+    """Read a text stream in fixed-size blocks"""
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        yield block
@@ -0,0 +1,414 @@
+"""
+Staged, parallel indexing pipeline for RAG document ingestion
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Iterable, Set, Tuple
+
+from .models import Document
+from .chroma_manager import ChromaDBManager
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+@dataclass
+class PipelineConfig:
+    """Configuration for the indexing pipeline"""
+    chunk_workers: int = field(default_factory=lambda: max(2, os.cpu_count() or 2))
+    use_processes: bool = False         # Chunk in worker processes instead of threads
+    embed_batch_size: int = 64          # Chunks per embedding call
+    write_batch_size: int = 256         # Chunks per storage write
+    queue_size: int = 8                 # Items buffered between stages
+    batch_linger: float = 0.05          # Max seconds to wait for a full embedding batch
+    checkpoint_path: Optional[str] = None
+    checkpoint_interval: int = 100      # Completed documents between checkpoint saves
+
+
+@dataclass
+class IndexingProgress:
+    """Progress snapshot passed to progress callbacks"""
+    documents_total: int
+    documents_completed: int = 0
+    documents_skipped: int = 0
+    documents_failed: int = 0
+    chunks_created: int = 0
+    chunks_embedded: int = 0
+    chunks_written: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def documents_per_minute(self) -> float:
+        """Completed documents per minute"""
+        return self.documents_completed / self.elapsed * 60 if self.elapsed > 0 else 0.0
+
+
+class IndexingCheckpoint:
+    """
+    Set of fully indexed document ids persisted as JSON, so that an
+    interrupted run over a large corpus can resume where it stopped.
+    """
+
+    def __init__(self, path: str, collection_name: str):
+        self.path = Path(path)
+        self.collection_name = collection_name
+        self.completed: Set[str] = set()
+        self._dirty = 0
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('collection') != self.collection_name:
+                logger.warning(f"Checkpoint {self.path} belongs to collection "
+                               f"'{data.get('collection')}', ignoring it")
+                return
+            self.completed = set(data.get('completed', []))
+            logger.info(f"Resuming indexing: {len(self.completed)} documents already completed")
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read indexing checkpoint {self.path}: {e}")
+
+    def is_completed(self, document_id: str) -> bool:
+        return document_id in self.completed
+
+    def mark_completed(self, document_id: str):
+        self.completed.add(document_id)
+        self._dirty += 1
+
+    @property
+    def pending_saves(self) -> int:
+        return self._dirty
+
+    def save(self):
+        """Write the checkpoint atomically"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'collection': self.collection_name,
+                'updated_at': datetime.now().isoformat(),
+                'completed': sorted(self.completed)
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self._dirty = 0
+
+
+class IndexingPipeline:
+    """
+    Three-stage indexing pipeline: chunk -> embed -> write.
+
+    Chunking runs on a worker pool, chunks from many documents are coalesced
+    into embedding batches of a fixed size, and embedded chunks are written
+    in bulk. Stages are connected by bounded queues, so chunking, embedding
+    and storage writes overlap while memory stays bounded.
+    """
+
+    def __init__(self,
+                 chroma_manager: ChromaDBManager,
+                 prepare_document: Callable[[Document], List[Document]],
+                 config: PipelineConfig = None,
+                 progress_callback: Callable[[IndexingProgress], None] = None):
+        """
+        Initialize indexing pipeline
+
+        Args:
+            chroma_manager: ChromaDB manager used for embedding and storage
+            prepare_document: Picklable callable turning a document into chunks
+            config: Pipeline configuration
+            progress_callback: Called after every write batch and at completion
+        """
+        self.chroma_manager = chroma_manager
+        self.prepare_document = prepare_document
+        self.config = config or PipelineConfig()
+        self.progress_callback = progress_callback
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._errors: List[str] = []
+
+    def run(self, documents: Iterable[Document], collection_name: str,
+            total: int = None) -> Dict[str, Any]:
+        """
+        Index documents into a collection
+
+        Args:
+            documents: Documents to index (may be a lazy iterable)
+            collection_name: Target collection (must exist)
+            total: Number of documents, if documents has no len()
+
+        Returns:
+            Indexing statistics
+        """
+        if total is None:
+            total = len(documents) if hasattr(documents, '__len__') else 0
+
+        start_time = time.time()
+        self._stop.clear()
+        self._errors = []
+        self._progress = IndexingProgress(documents_total=total)
+        self._start_time = start_time
+        self._pending: Dict[str, int] = {}
+        self._failed: Set[str] = set()
+        self._batches = {'embed': 0, 'write': 0}
+
+        checkpoint = None
+        if self.config.checkpoint_path:
+            checkpoint = IndexingCheckpoint(self.config.checkpoint_path, collection_name)
+        self._checkpoint = checkpoint
+
+        chunk_queue = queue.Queue(maxsize=self.config.queue_size)
+        write_queue = queue.Queue(maxsize=self.config.queue_size)
+        provider = self.chroma_manager.get_embedding_provider(collection_name)
+
+        stages = [
+            threading.Thread(target=self._chunk_stage, args=(documents, chunk_queue),
+                             name="index-chunk", daemon=True),
+            threading.Thread(target=self._embed_stage, args=(provider, chunk_queue, write_queue),
+                             name="index-embed", daemon=True)
+        ]
+        for stage in stages:
+            stage.start()
+
+        try:
+            self._write_stage(collection_name, write_queue)
+        finally:
+            self._stop.set()
+            for stage in stages:
+                stage.join(timeout=5)
+            if checkpoint and checkpoint.pending_saves:
+                checkpoint.save()
+
+        processing_time = time.time() - start_time
+        self._progress.elapsed = processing_time
+        self._notify()
+
+        progress = self._progress
+        return {
+            'success': not self._errors,
+            'processed': progress.chunks_written,
+            'errors': progress.chunks_created - progress.chunks_written,
+            'total': progress.chunks_created,
+            'processing_time': processing_time,
+            'documents_per_second': progress.documents_completed / processing_time if processing_time > 0 else 0,
+            'documents_per_minute': progress.documents_per_minute,
+            'documents_completed': progress.documents_completed,
+            'documents_skipped': progress.documents_skipped,
+            'documents_failed': progress.documents_failed,
+            'embedding_batches': self._batches['embed'],
+            'write_batches': self._batches['write'],
+            'error_messages': self._errors[:10]
+        }
+
+    def _put(self, target: queue.Queue, item) -> bool:
+        """Put with periodic stop checks so a failed stage never deadlocks the others"""
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _record_error(self, message: str):
+        logger.error(message)
+        with self._lock:
+            self._errors.append(message)
+
+    def _chunk_stage(self, documents: Iterable[Document], chunk_queue: queue.Queue):
+        """Chunk documents on a worker pool, preserving input order"""
+        executor_class = ProcessPoolExecutor if self.config.use_processes else ThreadPoolExecutor
+        max_in_flight = self.config.chunk_workers * 2
+        in_flight: deque = deque()
+
+        try:
+            with executor_class(max_workers=self.config.chunk_workers) as executor:
+                for document in documents:
+                    if self._stop.is_set():
+                        break
+                    if self._checkpoint and self._checkpoint.is_completed(document.id):
+                        with self._lock:
+                            self._progress.documents_skipped += 1
+                        continue
+
+                    in_flight.append((document.id, executor.submit(self.prepare_document, document)))
+                    while len(in_flight) >= max_in_flight:
+                        if not self._forward_chunks(in_flight.popleft(), chunk_queue):
+                            return
+
+                while in_flight:
+                    if not self._forward_chunks(in_flight.popleft(), chunk_queue):
+                        return
+        except Exception as e:
+            self._record_error(f"Chunking stage failed: {e}")
+        finally:
+            self._put(chunk_queue, _END)
+
+    def _forward_chunks(self, item: Tuple[str, Any], chunk_queue: queue.Queue) -> bool:
+        document_id, future = item
+        try:
+            chunks = future.result()
+        except Exception as e:
+            self._record_error(f"Failed to chunk document {document_id}: {e}")
+            with self._lock:
+                self._progress.documents_failed += 1
+            return True
+
+        with self._lock:
+            duplicate = document_id in self._pending
+            if duplicate:
+                self._progress.documents_failed += 1
+        if duplicate:
+            # Chunk ids derive from the document id, so a second copy in
+            # flight would overwrite the first one's chunks
+            self._record_error(f"Document {document_id} is already being indexed")
+            return True
+
+        with self._lock:
+            self._pending[document_id] = len(chunks)
+            self._progress.chunks_created += len(chunks)
+            if not chunks:
+                self._complete_document(document_id)
+                return True
+
+        return self._put(chunk_queue, (document_id, chunks))
+
+    def _embed_stage(self, provider, chunk_queue: queue.Queue, write_queue: queue.Queue):
+        """Coalesce chunks from many documents into fixed-size embedding batches"""
+        batch: List[Tuple[str, Document]] = []
+        batch_size = self.config.embed_batch_size
+
+        try:
+            finished = False
+            while not finished and not self._stop.is_set():
+                try:
+                    item = chunk_queue.get(timeout=self.config.batch_linger if batch else 0.1)
+                except queue.Empty:
+                    # Upstream is slow: flush a partial batch rather than idle
+                    if batch:
+                        self._embed_batch(provider, batch, write_queue)
+                        batch = []
+                    continue
+
+                if item is _END:
+                    finished = True
+                else:
+                    document_id, chunks = item
+                    batch.extend((document_id, chunk) for chunk in chunks)
+
+                while len(batch) >= batch_size:
+                    self._embed_batch(provider, batch[:batch_size], write_queue)
+                    batch = batch[batch_size:]
+
+            if batch:
+                self._embed_batch(provider, batch, write_queue)
+        except Exception as e:
+            self._record_error(f"Embedding stage failed: {e}")
+        finally:
+            self._put(write_queue, _END)
+
+    def _embed_batch(self, provider, batch: List[Tuple[str, Document]], write_queue: queue.Queue):
+        try:
+            results = provider.embed_batch([chunk.content for _, chunk in batch])
+            embeddings = [result.embedding for result in results]
+        except Exception as e:
+            self._record_error(f"Embedding batch of {len(batch)} chunks failed: {e}")
+            self._fail_chunks(batch)
+            return
+
+        with self._lock:
+            self._progress.chunks_embedded += len(batch)
+            self._batches['embed'] += 1
+        self._put(write_queue, (batch, embeddings))
+
+    def _write_stage(self, collection_name: str, write_queue: queue.Queue):
+        """Write embedded chunks in bulk"""
+        batch: List[Tuple[str, Document]] = []
+        embeddings: List[List[float]] = []
+
+        while True:
+            item = write_queue.get()
+            if item is _END:
+                break
+
+            items, item_embeddings = item
+            batch.extend(items)
+            embeddings.extend(item_embeddings)
+
+            size = self.config.write_batch_size
+            while len(batch) >= size:
+                self._write_batch(collection_name, batch[:size], embeddings[:size])
+                batch, embeddings = batch[size:], embeddings[size:]
+
+        if batch:
+            self._write_batch(collection_name, batch, embeddings)
+
+    def _write_batch(self, collection_name: str, batch: List[Tuple[str, Document]],
+                     embeddings: List[List[float]]):
+        result = self.chroma_manager.add_embedded_documents(
+            collection_name, [chunk for _, chunk in batch], embeddings
+        )
+        if not result.get('success'):
+            self._record_error(f"Write of {len(batch)} chunks failed: {result.get('error')}")
+            self._fail_chunks(batch)
+            return
+
+        with self._lock:
+            self._batches['write'] += 1
+            self._progress.chunks_written += len(batch)
+            for document_id, _ in batch:
+                self._release_chunk(document_id)
+
+        self._notify()
+
+    def _fail_chunks(self, batch: List[Tuple[str, Document]]):
+        with self._lock:
+            for document_id, _ in batch:
+                if document_id not in self._failed:
+                    self._failed.add(document_id)
+                    self._progress.documents_failed += 1
+                self._release_chunk(document_id)
+
+    def _release_chunk(self, document_id: str):
+        """Account for one finished chunk, completing the document on its last (caller holds the lock)"""
+        self._pending[document_id] -= 1
+        if self._pending[document_id] == 0:
+            self._complete_document(document_id)
+
+    def _complete_document(self, document_id: str):
+        """Mark a document as fully written (caller holds the lock)"""
+        del self._pending[document_id]
+        if document_id in self._failed:
+            self._failed.discard(document_id)
+            return
+        self._progress.documents_completed += 1
+        if self._checkpoint:
+            self._checkpoint.mark_completed(document_id)
+            if self._checkpoint.pending_saves >= self.config.checkpoint_interval:
+                self._checkpoint.save()
+
+    def _notify(self):
+        if not self.progress_callback:
+            return
+        with self._lock:
+            self._progress.elapsed = time.time() - self._start_time
+            snapshot = IndexingProgress(**self._progress.__dict__)
+        try:
+            self.progress_callback(snapshot)
+        except Exception as e:
+            logger.warning(f"Indexing progress callback failed: {e}")
@@ -0,0 +1,183 @@
+"""
+Bounded query result cache for semantic search
+"""
+
+import time
+import threading
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Callable
+
+from .models import SearchResult
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """Cached search results with bookkeeping data"""
+    results: List[SearchResult]
+    collection_name: str
+    generation: int
+    created_at: float
+    size_bytes: int
+
+
+class QueryResultCache:
+    """
+    LRU cache for search results bounded by entry count, byte size and TTL.
+
+    Each entry remembers the collection generation it was computed against.
+    Writes to a collection bump its generation in ChromaDBManager, so entries
+    filled before the write are dropped lazily the next time they are read.
+    """
+
+    def __init__(self,
+                 max_entries: int = 1000,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 ttl_seconds: float = 300.0,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize query result cache
+
+        Args:
+            max_entries: Maximum number of cached queries
+            max_bytes: Maximum estimated size of all cached results
+            ttl_seconds: Lifetime of an entry (0 or None disables expiry)
+            clock: Time source, injectable for tests
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0
+        }
+
+    def get(self, key: str, generation: int) -> Optional[List[SearchResult]]:
+        """
+        Look up cached results
+
+        Args:
+            key: Cache key
+            generation: Current generation of the entry's collection
+
+        Returns:
+            A copy of the cached result list, or None on miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            if entry.generation != generation:
+                self._remove(key)
+                self.stats['invalidations'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            if self._is_expired(entry):
+                self._remove(key)
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return list(entry.results)
+
+    def put(self, key: str, collection_name: str, generation: int,
+            results: List[SearchResult]):
+        """Store results and evict least recently used entries over the limits"""
+        size_bytes = self._estimate_size(results)
+        if self.max_bytes and size_bytes > self.max_bytes:
+            logger.debug(f"Result set of {size_bytes} bytes exceeds cache limit, not cached")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = CacheEntry(
+                results=list(results),
+                collection_name=collection_name,
+                generation=generation,
+                created_at=self._clock(),
+                size_bytes=size_bytes
+            )
+            self._total_bytes += size_bytes
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or
+                (self.max_bytes and self._total_bytes > self.max_bytes)
+            ):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.stats['evictions'] += 1
+
+    def invalidate_collection(self, collection_name: str) -> int:
+        """Eagerly drop all entries for a collection"""
+        with self._lock:
+            stale_keys = [
+                key for key, entry in self._entries.items()
+                if entry.collection_name == collection_name
+            ]
+            for key in stale_keys:
+                self._remove(key)
+            self.stats['invalidations'] += len(stale_keys)
+            return len(stale_keys)
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'size': len(self._entries),
+                'size_bytes': self._total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'hit_rate': self.stats['hits'] / lookups * 100 if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def _is_expired(self, entry: CacheEntry) -> bool:
+        if not self.ttl_seconds:
+            return False
+        return self._clock() - entry.created_at > self.ttl_seconds
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size_bytes
+
+    @staticmethod
+    def _estimate_size(results: List[SearchResult]) -> int:
+        """Rough byte size of a result list (content, metadata and object overhead)"""
+        size = 64
+        for result in results:
+            document = result.document
+            size += 200 + len(document.id) + len(document.content.encode('utf-8', 'ignore'))
+            size += len(str(document.metadata)) if document.metadata else 0
+        return size
@@ -4,12 +4,17 @@ Enhanced Retrieval-Augmented Generation (RAG) System
 
 import time
 import logging
-from typing import List, Dict, Any, Optional, Union
+from datetime import datetime
+from pathlib import Path
+from functools import partial
+from typing import List, Dict, Any, Optional, Union, Iterator, Callable
 from dataclasses import dataclass
 
 from .models import Document, SearchResult, RAGResponse
+from .chunking import ChunkingConfig, ChunkingStrategy, TextChunk, create_chunker, read_blocks
 from .semantic_search import SemanticSearchEngine, SearchConfig, SearchStrategy
 from .chroma_manager import ChromaDBManager
+from .indexing_pipeline import IndexingPipeline, PipelineConfig, IndexingProgress
 
 # Import LLM interface
 try:
@@ -18,6 +23,8 @@ try:
 except ImportError:
     LLM_AVAILABLE = False
 
+from ..llm.context import AssembledContext, ContextAssembler, ContextBudget, RollingSummary, get_token_counter
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,7 +32,9 @@ logger = logging.getLogger(__name__)
 class RAGConfig:
     """Configuration for RAG operations"""
     search_strategy: SearchStrategy = SearchStrategy.HYBRID
-    max_context_length: int = 4000
+    max_context_length: int = 4000          # Character cap on retrieved context
+    max_context_tokens: int = 2048          # Model context window shared by prompt, history and documents
+    tokenizer: Optional[str] = None         # Local tokenizer for budgeting (None for the approximation)
     num_documents: int = 5
     min_relevance_score: float = 0.7
     include_sources: bool = True
@@ -38,10 +47,14 @@ class RAGConfig:
 class DocumentProcessor:
     """Document processing utilities for RAG"""
     
+    CODE_EXTENSIONS = ('.py', '.js', '.ts', '.java', '.go', '.rs', '.c', '.cpp', '.h',
+                       '.hpp', '.cs', '.rb', '.php', '.sh', '.sql', '.kt', '.swift')
+    
     @staticmethod
     def chunk_document(document: Document, 
                       chunk_size: int = 1000, 
-                      overlap: int = 200) -> List[Document]:
+                      overlap: int = 200,
+                      config: ChunkingConfig = None) -> List[Document]:
         """
         Chunk large document into smaller pieces
         
@@ -49,52 +62,90 @@ class DocumentProcessor:
             document: Source document
             chunk_size: Maximum chunk size in characters
             overlap: Overlap between chunks
+            config: Chunking configuration (overrides chunk_size/overlap)
             
         Returns:
             List of document chunks
         """
-        content = document.content
-        chunks = []
+        if config is None:
+            config = ChunkingConfig(
+                strategy=DocumentProcessor.detect_strategy(document),
+                chunk_size=chunk_size,
+                chunk_overlap=min(overlap, chunk_size - 1)
+            )
         
-        if len(content) <= chunk_size:
+        if create_chunker(config).length(document.content) <= config.chunk_size:
             return [document]
         
-        start = 0
-        chunk_id = 0
-        
-        while start < len(content):
-            end = min(start + chunk_size, len(content))
-            
-            # Try to break at sentence boundaries
-            if end < len(content):
-                # Look for sentence endings in the overlap region
-                overlap_start = max(end - overlap, start)
-                sentence_break = content.rfind('.', overlap_start, end)
-                if sentence_break != -1 and sentence_break > start:
-                    end = sentence_break + 1
-            
-            chunk_content = content[start:end].strip()
-            
-            if chunk_content:
-                chunk_doc = Document(
-                    id=f"{document.id}_chunk_{chunk_id}",
-                    content=chunk_content,
-                    metadata={
-                        **document.metadata,
-                        'chunk_id': chunk_id,
-                        'parent_document_id': document.id,
-                        'chunk_start': start,
-                        'chunk_end': end
-                    },
-                    source=document.source,
-                    timestamp=document.timestamp
-                )
-                chunks.append(chunk_doc)
-                chunk_id += 1
-            
-            start = end - overlap if end < len(content) else end
+        return list(DocumentProcessor.iter_chunks(document, config))
+    
+    @staticmethod
+    def iter_chunks(document: Document, config: ChunkingConfig = None) -> Iterator[Document]:
+        """Lazily chunk a document held in memory"""
+        chunker = create_chunker(config)
+        for chunk in chunker.split(document.content):
+            yield DocumentProcessor._chunk_to_document(chunk, document.id, document.metadata,
+                                                       document.source, document.timestamp)
+    
+    @staticmethod
+    def stream_file_chunks(file_path: str,
+                           config: ChunkingConfig = None,
+                           document_id: str = None,
+                           metadata: Dict[str, Any] = None,
+                           encoding: str = 'utf-8') -> Iterator[Document]:
+        """
+        Chunk a text file without loading it into memory
+        
+        Args:
+            file_path: Path of the text file
+            config: Chunking configuration (strategy detected from extension if omitted)
+            document_id: Parent document id (defaults to the file name)
+            metadata: Metadata copied to every chunk
+            encoding: File encoding
+            
+        Yields:
+            Document chunks in file order
+        """
+        path = Path(file_path)
+        document_id = document_id or path.name
+        if config is None:
+            strategy = (ChunkingStrategy.CODE if path.suffix.lower() in DocumentProcessor.CODE_EXTENSIONS
+                        else ChunkingStrategy.RECURSIVE)
+            config = ChunkingConfig(strategy=strategy)
         
-        return chunks
+        chunker = create_chunker(config)
+        timestamp = datetime.now()
+        
+        with open(path, 'r', encoding=encoding, errors='replace') as stream:
+            for chunk in chunker.stream(read_blocks(stream, config.stream_block_size)):
+                yield DocumentProcessor._chunk_to_document(chunk, document_id, metadata or {},
+                                                           str(path), timestamp)
+    
+    @staticmethod
+    def detect_strategy(document: Document) -> ChunkingStrategy:
+        """Choose a chunking strategy from the document source"""
+        source = (document.source or document.metadata.get('file_name', '') or '').lower()
+        if source.endswith(DocumentProcessor.CODE_EXTENSIONS):
+            return ChunkingStrategy.CODE
+        return ChunkingStrategy.RECURSIVE
+    
+    @staticmethod
+    def _chunk_to_document(chunk: TextChunk, parent_id: str, metadata: Dict[str, Any],
+                           source: str, timestamp) -> Document:
+        return Document(
+            id=f"{parent_id}_chunk_{chunk.index}",
+            content=chunk.text,
+            metadata={
+                **metadata,
+                **chunk.metadata,
+                'chunk_id': chunk.index,
+                'parent_document_id': parent_id,
+                'chunk_start': chunk.start,
+                'chunk_end': chunk.end
+            },
+            source=source,
+            timestamp=timestamp
+        )
     
     @staticmethod
     def extract_metadata(document: Document) -> Dict[str, Any]:
@@ -120,11 +171,33 @@ class DocumentProcessor:
         return metadata
 
 
+def prepare_document(document: Document,
+                     chunk_large_docs: bool = True,
+                     chunk_size: int = 1000,
+                     chunking_config: ChunkingConfig = None) -> List[Document]:
+    """
+    Enrich a document with extracted metadata and chunk it if it is large
+    
+    Module-level so that it can be shipped to indexing worker processes.
+    """
+    document.metadata.update(DocumentProcessor.extract_metadata(document))
+    
+    if chunk_large_docs:
+        return DocumentProcessor.chunk_document(document, chunk_size, config=chunking_config)
+    return [document]
+
+
 class EnhancedRAGSystem:
     """
     Production-ready RAG system with advanced retrieval and generation
     """
     
+    DEFAULT_SYSTEM_PROMPT = """
+You are a helpful AI assistant. Answer the question based on the provided context.
+If the context doesn't contain enough information to answer the question, say so clearly.
+Always cite your sources when possible.
+"""
+    
     def __init__(self, 
                  chroma_manager: ChromaDBManager,
                  search_engine: SemanticSearchEngine = None):
@@ -138,6 +211,7 @@ class EnhancedRAGSystem:
         self.chroma_manager = chroma_manager
         self.search_engine = search_engine or SemanticSearchEngine(chroma_manager)
         self.conversation_history = []
+        self.history_summary = RollingSummary(labels=("Q", "A"))
         self.rag_stats = {
             'total_queries': 0,
             'successful_generations': 0,
@@ -195,12 +269,13 @@ class EnhancedRAGSystem:
                     metadata={'error': 'No relevant documents found'}
                 )
             
-            # Step 2: Prepare context
-            context = self._prepare_context(retrieved_docs, config)
+            # Step 2: Prepare context within the token budget
+            assembled = self._assemble_context(question, retrieved_docs, config)
+            context = assembled.documents_text
             
             # Step 3: Generate response
             if LLM_AVAILABLE:
-                response_text = self._generate_response(question, context, config)
+                response_text = self._generate_response(question, context, config, assembled)
                 confidence = self._calculate_confidence(retrieved_docs, response_text)
             else:
                 response_text = self._create_context_summary(context, question)
@@ -217,6 +292,7 @@ class EnhancedRAGSystem:
                 processing_time=processing_time,
                 metadata={
                     'context_length': len(context),
+                    'context_tokens': assembled.usage,
                     'strategy_used': config.search_strategy.value,
                     'llm_available': LLM_AVAILABLE
                 }
@@ -250,7 +326,10 @@ class EnhancedRAGSystem:
                        documents: List[Document],
                        collection_name: str,
                        chunk_large_docs: bool = True,
-                       chunk_size: int = 1000) -> Dict[str, Any]:
+                       chunk_size: int = 1000,
+                       chunking_config: ChunkingConfig = None,
+                       pipeline_config: PipelineConfig = None,
+                       progress_callback: Callable[[IndexingProgress], None] = None) -> Dict[str, Any]:
         """
         Index documents for RAG with automatic processing
         
@@ -259,31 +338,30 @@ class EnhancedRAGSystem:
             collection_name: Target collection
             chunk_large_docs: Whether to chunk large documents
             chunk_size: Maximum chunk size
+            chunking_config: Chunking configuration (overrides chunk_size)
+            pipeline_config: Run the staged parallel pipeline with this configuration
+            progress_callback: Progress callback (pipeline mode only)
             
         Returns:
             Indexing statistics
         """
+        if pipeline_config is not None or progress_callback is not None:
+            return self._index_documents_pipelined(
+                documents, collection_name, chunk_large_docs, chunk_size,
+                chunking_config, pipeline_config, progress_callback
+            )
+        
         start_time = time.time()
         processed_docs = []
         
         try:
             for doc in documents:
-                # Extract additional metadata
-                extra_metadata = DocumentProcessor.extract_metadata(doc)
-                doc.metadata.update(extra_metadata)
-                
-                # Chunk large documents if needed
-                if chunk_large_docs and len(doc.content) > chunk_size:
-                    chunks = DocumentProcessor.chunk_document(doc, chunk_size)
-                    processed_docs.extend(chunks)
+                chunks = prepare_document(doc, chunk_large_docs, chunk_size, chunking_config)
+                if len(chunks) > 1:
                     logger.debug(f"Chunked document {doc.id} into {len(chunks)} pieces")
-                else:
-                    processed_docs.append(doc)
+                processed_docs.extend(chunks)
             
-            # Create collection if it doesn't exist
-            existing_collections = self.chroma_manager.list_collections()
-            if collection_name not in existing_collections:
-                self.chroma_manager.create_collection(collection_name)
+            self._ensure_collection(collection_name)
             
             # Add documents to collection
             result = self.chroma_manager.add_documents(collection_name, processed_docs)
@@ -312,13 +390,76 @@ class EnhancedRAGSystem:
                 'processed_documents': 0
             }
     
+    def _index_documents_pipelined(self,
+                                   documents: List[Document],
+                                   collection_name: str,
+                                   chunk_large_docs: bool,
+                                   chunk_size: int,
+                                   chunking_config: Optional[ChunkingConfig],
+                                   pipeline_config: Optional[PipelineConfig],
+                                   progress_callback) -> Dict[str, Any]:
+        """Index documents through the chunk -> embed -> write pipeline"""
+        try:
+            self._ensure_collection(collection_name)
+            
+            pipeline = IndexingPipeline(
+                self.chroma_manager,
+                partial(prepare_document, chunk_large_docs=chunk_large_docs,
+                        chunk_size=chunk_size, chunking_config=chunking_config),
+                config=pipeline_config,
+                progress_callback=progress_callback
+            )
+            result = pipeline.run(documents, collection_name)
+            
+            indexing_stats = {
+                **result,
+                'original_documents': len(documents),
+                'processed_documents': result['total'],
+                'chunks_created': result['total'] - len(documents),
+                'total_processing_time': result['processing_time']
+            }
+            
+            logger.info(f"Indexed {result['documents_completed']}/{len(documents)} documents "
+                       f"({result['processed']} chunks) in {result['processing_time']:.2f}s "
+                       f"({result['documents_per_minute']:.0f} docs/min)")
+            
+            return indexing_stats
+            
+        except Exception as e:
+            logger.error(f"Pipelined document indexing error: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'original_documents': len(documents),
+                'processed_documents': 0
+            }
+    
+    def _ensure_collection(self, collection_name: str):
+        """Create collection if it doesn't exist"""
+        existing_collections = self.chroma_manager.list_collections()
+        if collection_name not in existing_collections:
+            self.chroma_manager.create_collection(collection_name)
+    
     def _prepare_context(self, 
                         retrieved_docs: List[SearchResult], 
-                        config: RAGConfig) -> str:
+                        config: RAGConfig,
+                        question: str = "") -> str:
         """Prepare context from retrieved documents"""
-        context_parts = []
-        current_length = 0
+        return self._assemble_context(question, retrieved_docs, config).documents_text
+    
+    def _assemble_context(self,
+                          question: str,
+                          retrieved_docs: List[SearchResult],
+                          config: RAGConfig) -> AssembledContext:
+        """
+        Fit retrieved documents and conversation history into the token budget
         
+        Documents are taken in relevance order; the last one is truncated if
+        only part of it fits. History (when enabled) gets the rolling
+        summary plus up to three earlier exchanges ranked by relevance to
+        the question and recency.
+        """
+        documents = []
         for i, result in enumerate(retrieved_docs):
             doc = result.document
             
@@ -328,46 +469,54 @@ class EnhancedRAGSystem:
             if config.include_sources and doc.source:
                 doc_text += f" (Source: {doc.source})"
             
-            # Check if adding this document would exceed context limit
-            if current_length + len(doc_text) > config.max_context_length:
-                # Try to include partial content
-                remaining_space = config.max_context_length - current_length - 50  # Buffer
-                if remaining_space > 100:  # Only include if meaningful content fits
-                    truncated_content = doc.content[:remaining_space] + "..."
-                    doc_text = f"[Source {i+1}] {truncated_content}"
-                    context_parts.append(doc_text)
-                break
-            
-            context_parts.append(doc_text)
-            current_length += len(doc_text)
+            documents.append((doc_text, result.score))
         
-        return "\n\n".join(context_parts)
+        history = []
+        summary = ""
+        if config.use_conversation_context:
+            history = [(entry['question'], entry['answer']) for entry in self.conversation_history]
+            summary = self.history_summary.text
+        
+        budget = ContextBudget(
+            max_tokens=config.max_context_tokens,
+            reserve_output=min(config.max_tokens, config.max_context_tokens // 2)
+        )
+        assembler = ContextAssembler(budget, get_token_counter(config.tokenizer), labels=("Q", "A"))
+        return assembler.assemble(
+            question,
+            system_prompt=config.system_prompt or self.DEFAULT_SYSTEM_PROMPT,
+            history=history,
+            documents=documents,
+            summary=summary,
+            max_turns=3,
+            max_document_chars=config.max_context_length
+        )
     
     def _generate_response(self, 
                           question: str, 
                           context: str, 
-                          config: RAGConfig) -> str:
+                          config: RAGConfig,
+                          assembled: AssembledContext = None) -> str:
         """Generate response using LLM"""
         if not LLM_AVAILABLE:
             return self._create_context_summary(context, question)
         
         try:
             # Prepare system prompt
-            system_prompt = config.system_prompt or """
-You are a helpful AI assistant. Answer the question based on the provided context.
-If the context doesn't contain enough information to answer the question, say so clearly.
-Always cite your sources when possible.
-"""
+            system_prompt = config.system_prompt or self.DEFAULT_SYSTEM_PROMPT
             
             # Prepare conversation context if enabled
             conversation_context = ""
-            if config.use_conversation_context and self.conversation_history:
-                recent_history = self.conversation_history[-3:]  # Last 3 exchanges
+            if config.use_conversation_context:
+                if assembled is None:
+                    assembled = self._assemble_context(question, [], config)
                 history_parts = []
-                for entry in recent_history:
-                    history_parts.append(f"Q: {entry['question']}")
-                    history_parts.append(f"A: {entry['answer']}")
-                conversation_context = "\n".join(history_parts) + "\n\n"
+                if assembled.summary_text:
+                    history_parts.append(f"Earlier questions:\n{assembled.summary_text}")
+                if assembled.history_text:
+                    history_parts.append(assembled.history_text)
+                if history_parts:
+                    conversation_context = "\n".join(history_parts) + "\n\n"
             
             # Create prompt
             prompt = f"""
@@ -465,8 +614,10 @@ Please provide a comprehensive answer based on the context above. If you referen
         
         self.conversation_history.append(entry)
         
-        # Keep only recent history
+        # Keep only recent history; dropped exchanges go into the rolling summary
         if len(self.conversation_history) > 20:
+            for dropped in self.conversation_history[:-10]:
+                self.history_summary.fold(dropped['question'], dropped['answer'])
             self.conversation_history = self.conversation_history[-10:]
     
     def _update_stats(self, processing_time: float, context_length: int):
@@ -495,12 +646,13 @@ Please provide a comprehensive answer based on the context above. If you referen
             **self.rag_stats,
             'success_rate': success_rate,
             'conversation_history_length': len(self.conversation_history),
-            'search_stats': self.search_engine.get_search_stats()
+            'search_stats': self.search_engine.get_search_analytics()
         }
     
     def clear_conversation_history(self):
         """Clear conversation history"""
         self.conversation_history.clear()
+        self.history_summary.clear()
         logger.info("Conversation history cleared")
     
     def get_conversation_history(self, limit: int = None) -> List[Dict[str, Any]]:
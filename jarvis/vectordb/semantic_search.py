@@ -11,6 +11,8 @@ from enum import Enum
 from .models import Document, SearchResult, QueryConfig
 from .chroma_manager import ChromaDBManager
 from .embedding_providers import EmbeddingProvider
+from .query_cache import QueryResultCache
+from ..utils.metrics_registry import get_metrics_registry
 
 logger = logging.getLogger(__name__)
 
@@ -43,17 +45,20 @@ class SemanticSearchEngine:
     
     def __init__(self, 
                  chroma_manager: ChromaDBManager,
-                 default_strategy: SearchStrategy = SearchStrategy.SEMANTIC):
+                 default_strategy: SearchStrategy = SearchStrategy.SEMANTIC,
+                 query_cache: QueryResultCache = None):
         """
         Initialize semantic search engine
         
         Args:
             chroma_manager: ChromaDB manager instance
             default_strategy: Default search strategy
+            query_cache: Result cache (a default bounded cache is created if omitted)
         """
         self.chroma_manager = chroma_manager
         self.default_strategy = default_strategy
-        self.query_cache = {}
+        self.query_cache = query_cache if query_cache is not None else QueryResultCache()
+        get_metrics_registry().track_cache('vector_query', self.query_cache)
         self.search_stats = {
             'total_searches': 0,
             'cache_hits': 0,
@@ -84,10 +89,12 @@ class SemanticSearchEngine:
         try:
             # Check cache first
             cache_key = self._get_cache_key(query, collection_name, config)
-            if cache_key in self.query_cache:
+            generation = self._get_generation(collection_name)
+            cached_results = self.query_cache.get(cache_key, generation)
+            if cached_results is not None:
                 self.search_stats['cache_hits'] += 1
                 logger.debug(f"Cache hit for query: {query[:50]}...")
-                return self.query_cache[cache_key]
+                return cached_results
             
             # Route to appropriate search strategy
             if config.strategy == SearchStrategy.SEMANTIC:
@@ -110,8 +117,8 @@ class SemanticSearchEngine:
             if config.diversify:
                 results = self._diversify_results(results)
             
-            # Cache results
-            self.query_cache[cache_key] = results
+            # Cache results against the generation seen before the search
+            self.query_cache.put(cache_key, collection_name, generation, results)
             
             # Update stats
             processing_time = time.time() - start_time
@@ -379,7 +386,18 @@ class SemanticSearchEngine:
     
     def _get_cache_key(self, query: str, collection_name: str, config: SearchConfig) -> str:
         """Generate cache key for query"""
-        return f"{collection_name}:{config.strategy.value}:{hash(query)}:{config.limit}:{config.score_threshold}"
+        return (f"{collection_name}:{config.strategy.value}:{config.limit}:{config.score_threshold}:"
+                f"{int(config.rerank)}{int(config.diversify)}{int(config.expand_query)}:{query}")
+    
+    def _get_generation(self, collection_name: str) -> int:
+        """Get collection write generation (0 if the manager does not track it)"""
+        get_generation = getattr(self.chroma_manager, 'get_generation', None)
+        if get_generation is None:
+            return 0
+        try:
+            return int(get_generation(collection_name))
+        except (TypeError, ValueError):
+            return 0
     
     def _update_stats(self, processing_time: float):
         """Update search statistics"""
@@ -403,11 +421,28 @@ class SemanticSearchEngine:
             'cache_size': len(self.query_cache)
         }
     
+    def get_search_analytics(self) -> Dict[str, Any]:
+        """Get search statistics together with query cache counters"""
+        cache_stats = self.query_cache.get_stats()
+        
+        return {
+            **self.get_search_stats(),
+            'cache_misses': cache_stats['misses'],
+            'cache_evictions': cache_stats['evictions'],
+            'cache_expirations': cache_stats['expirations'],
+            'cache_invalidations': cache_stats['invalidations'],
+            'cache': cache_stats
+        }
+    
     def clear_cache(self):
         """Clear query cache"""
         self.query_cache.clear()
         logger.info("Search cache cleared")
     
+    def invalidate_collection(self, collection_name: str) -> int:
+        """Drop cached results for a collection"""
+        return self.query_cache.invalidate_collection(collection_name)
+    
     def suggest_queries(self, partial_query: str, collection_name: str, limit: int = 5) -> List[str]:
         """Suggest query completions based on collection content"""
         # Simple query suggestion (can be enhanced with more sophisticated methods)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Memory Tag Benchmark - LIKE scans vs the normalized tag index
+Bulk-loads synthetic memories into a scratch ProductionMemorySystem database
+and times tag filters against the old LIKE '%tag%' predicate
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.memory.production_memory import ProductionMemorySystem
+from jarvis.memory.tag_query import compile_tag_expression, parse_tag_expression
+
+TAG_VOCABULARY = [f"tag{i}" for i in range(200)] + ["ai", "email", "python", "rust", "legacy"]
+
+QUERIES = [
+    ("ai", "m.tags LIKE ?", ["%ai%"]),
+    ("python AND rust", "m.tags LIKE ? AND m.tags LIKE ?", ["%python%", "%rust%"]),
+    ("tag7 OR tag42", "(m.tags LIKE ? OR m.tags LIKE ?)", ["%tag7%", "%tag42%"]),
+    ("ai AND NOT legacy", "m.tags LIKE ? AND m.tags NOT LIKE ?", ["%ai%", "%legacy%"]),
+]
+
+
+def load(conn: sqlite3.Connection, count: int, batch_size: int = 50000):
+    """Insert count memories with 1-4 random tags each"""
+    rng = random.Random(42)
+    memory_id = 0
+    while memory_id < count:
+        memories, tags = [], []
+        for _ in range(min(batch_size, count - memory_id)):
+            memory_id += 1
+            chosen = rng.sample(TAG_VOCABULARY, rng.randint(1, 4))
+            memories.append((memory_id, f"key{memory_id}", f"value {memory_id}", ",".join(chosen)))
+            tags.extend((memory_id, tag) for tag in chosen)
+        conn.executemany(
+            "INSERT INTO memories (id, key, value, tags) VALUES (?, ?, ?, ?)",
+            memories
+        )
+        conn.executemany("INSERT INTO memory_tags (memory_id, tag) VALUES (?, ?)", tags)
+        conn.commit()
+    conn.execute("ANALYZE")
+
+
+def timed(conn: sqlite3.Connection, sql: str, params: list, repeat: int):
+    best, rows = float("inf"), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = conn.execute(sql, params).fetchone()[0]
+        best = min(best, time.perf_counter() - start)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1_000_000, help="number of memories")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per query (best is reported)")
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        memory = ProductionMemorySystem(temp_dir)
+        memory.close()
+
+        conn = sqlite3.connect(str(memory.sqlite_file))
+        start = time.perf_counter()
+        load(conn, args.count)
+        print(f"Loaded {args.count:,} memories in {time.perf_counter() - start:.1f}s")
+
+        print(f"{'expression':<22}{'LIKE (ms)':>12}{'rows':>10}{'index (ms)':>12}{'rows':>10}{'speedup':>10}")
+        for expression, like_sql, like_params in QUERIES:
+            like_time, like_rows = timed(
+                conn, f"SELECT COUNT(*) FROM memories m WHERE m.active = 1 AND {like_sql}",
+                like_params, args.repeat
+            )
+            tag_sql, tag_params = compile_tag_expression(parse_tag_expression(expression))
+            index_time, index_rows = timed(
+                conn, f"SELECT COUNT(*) FROM memories m WHERE m.active = 1 AND ({tag_sql})",
+                tag_params, args.repeat
+            )
+            print(f"{expression:<22}{like_time * 1000:>12.1f}{like_rows:>10,}"
+                  f"{index_time * 1000:>12.1f}{index_rows:>10,}{like_time / index_time:>9.1f}x")
+
+        conn.close()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
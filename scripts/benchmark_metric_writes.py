@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Metric Write Benchmark - one transaction per sample vs buffered writes
+Records synthetic samples from several threads into scratch MetricStorage
+databases and reports samples/s on the recording path, plus the time until
+every sample is on disk
+"""
+
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.monitoring.realtime_metrics import MetricStorage, MetricValue
+
+
+def record(storage: MetricStorage, threads: int, samples: int):
+    """Record samples split across threads; returns (recording seconds, total seconds)"""
+    per_thread = samples // threads
+
+    def worker(index: int):
+        for i in range(per_thread):
+            storage.store_metric(f"bench.metric{i % 20}", MetricValue(
+                timestamp=datetime.now().isoformat(), value=float(i),
+                labels={"thread": str(index)}, source="benchmark", metadata={}
+            ))
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    recorded = time.perf_counter() - start
+    storage.close()
+    return recorded, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=20000, help="samples per run")
+    parser.add_argument("--threads", type=int, default=4, help="recording threads")
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        print(f"{'mode':<12}{'record (s)':>12}{'samples/s':>14}{'on disk (s)':>14}{'rows':>10}")
+        results = {}
+        for mode, buffered in (("unbuffered", False), ("buffered", True)):
+            storage = MetricStorage(os.path.join(temp_dir, f"{mode}.db"), buffered=buffered)
+            recorded, total = record(storage, args.threads, args.samples)
+            with sqlite3.connect(storage.db_path) as conn:
+                rows = conn.execute("SELECT COUNT(*) FROM metrics").fetchone()[0]
+            results[mode] = rows / recorded
+            print(f"{mode:<12}{recorded:>12.2f}{results[mode]:>14,.0f}{total:>14.2f}{rows:>10,}")
+        print(f"Recording speedup: {results['buffered'] / results['unbuffered']:.1f}x")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
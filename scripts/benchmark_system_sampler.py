@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+System Sampler Benchmark - per-monitor blocking polls vs the shared sampler
+Times one round of the psutil polling that each monitor used to do on its
+own (cpu_percent with a blocking interval plus memory, disk and network
+reads) against one non-blocking SystemSampler sample, and reports the CPU
+overhead of sampling at the configured interval
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil
+
+from jarvis.monitoring.system_sampler import SystemSampler
+
+
+def legacy_round(monitors: int, blocking_interval: float):
+    """Each monitor polls psutil itself; returns (wall seconds, CPU seconds)"""
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for _ in range(monitors):
+        process = psutil.Process()
+        psutil.cpu_percent(interval=blocking_interval)
+        psutil.virtual_memory()
+        psutil.disk_usage('/')
+        psutil.net_io_counters()
+        process.memory_info()
+        process.cpu_percent()
+    return time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--monitors", type=int, default=4, help="monitors polling on their own")
+    parser.add_argument("--blocking-interval", type=float, default=1.0,
+                        help="cpu_percent interval the monitors block on")
+    parser.add_argument("--samples", type=int, default=200, help="shared sampler samples to time")
+    parser.add_argument("--interval", type=float, default=5.0, help="shared sampler interval (s)")
+    args = parser.parse_args()
+
+    legacy_wall, legacy_cpu = legacy_round(args.monitors, args.blocking_interval)
+
+    sampler = SystemSampler(interval=args.interval)
+    for _ in range(args.samples):
+        sampler.sample()
+    stats = sampler.get_stats()
+    sample_wall = stats['sample_seconds'] / stats['samples']
+    sample_cpu = stats['sample_cpu_seconds'] / stats['samples']
+
+    print(f"{'mode':<10}{'wall/round (ms)':>18}{'cpu/round (ms)':>17}")
+    print(f"{'legacy':<10}{legacy_wall * 1000:>18.1f}{legacy_cpu * 1000:>17.2f}")
+    print(f"{'shared':<10}{sample_wall * 1000:>18.2f}{sample_cpu * 1000:>17.2f}")
+    print(f"Max sample: {stats['max_sample_seconds'] * 1000:.2f} ms")
+    print(f"Sampling overhead at a {args.interval:g}s interval: "
+          f"{sample_cpu / args.interval * 100:.4f}% of one core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Generated document fixtures for extraction tests
+
+Large inputs are produced on the fly rather than checked in: a PDF with
+any number of text pages (written by hand, since PyPDF2 cannot lay out
+text), a workbook streamed through openpyxl's write-only mode, and a
+plain text file of a given size.
+"""
+
+import openpyxl
+
+
+def make_pdf(path: str, pages: int, text: str = "Page {n} of the generated report") -> str:
+    """Write a PDF with one line of Helvetica text per page"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for n in range(1, pages + 1):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text.format(n=n)}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
+
+
+def make_workbook(path: str, rows: int, sheets: int = 1) -> str:
+    """
+    Write a workbook with a header row and ``rows`` data rows per sheet:
+    a sequential id, an amount cycling through 0-999 and a text label
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    for index in range(sheets):
+        sheet = workbook.create_sheet(f"Sheet{index + 1}")
+        sheet.append(["id", "amount", "label"])
+        for i in range(rows):
+            sheet.append([i, (i * 7919) % 1000, f"label-{i % 13}"])
+    workbook.save(path)
+    return path
+
+
+def make_text(path: str, size: int, line: str = "lorem ipsum dolor sit amet\n") -> str:
+    """Write a text file of about ``size`` bytes"""
+    with open(path, "w", encoding="utf-8") as f:
+        block = line * max(1, 65536 // len(line))
+        written = 0
+        while written < size:
+            f.write(block)
+            written += len(block)
+    return path
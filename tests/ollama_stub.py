@@ -0,0 +1,175 @@
+"""
+Local stub of the Ollama HTTP API for tests
+
+Serves ``POST /api/generate`` over HTTP/1.1 keep-alive. Non-streaming
+requests get ``{"response": "echo: <prompt>", ...}``; streaming requests get
+one chunked NDJSON line per word. Prompts containing ``[fail]`` and models listed
+in ``fail_models`` get a 500; ``[slow]`` prompts take ``slow_delay`` seconds
+instead of ``delay``; ``token_delay`` paces streamed lines. The server records
+how many TCP connections were accepted, the peak number of concurrent
+requests and how many streams the client abandoned mid-response.
+"""
+
+import json
+import time
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self._send_json(400, {"error": "invalid json"})
+            return
+
+        with server.stats_lock:
+            server.requests.append(payload)
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            prompt = payload.get("prompt", "")
+            delay = server.slow_delay if "[slow]" in prompt else server.delay
+            if delay:
+                time.sleep(delay)
+            if "[fail]" in prompt or payload.get("model") in server.fail_models:
+                self._send_json(500, {"error": "injected failure"})
+                return
+            text = f"echo: {payload.get('prompt', '')}"
+            if payload.get("stream"):
+                self._send_stream(payload.get("model"), text)
+            else:
+                self._send_json(200, {"model": payload.get("model"), "response": text, "done": True})
+        finally:
+            with server.stats_lock:
+                server.in_flight -= 1
+
+    def _send_json(self, status, data):
+        encoded = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def _send_stream(self, model, text):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = text.split(" ")
+        try:
+            for i, word in enumerate(words):
+                if i and self.server.token_delay:
+                    time.sleep(self.server.token_delay)
+                line = json.dumps({"model": model, "response": word if i == 0 else f" {word}",
+                                   "done": False}) + "\n"
+                self._write_chunk(line.encode("utf-8"))
+            # Like Ollama, the final line carries no text and the eval counters
+            final = {"model": model, "response": "", "done": True, "eval_count": len(words)}
+            self._write_chunk((json.dumps(final) + "\n").encode("utf-8"))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            with self.server.stats_lock:
+                self.server.aborted_streams += 1
+            self.close_connection = True
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connection bursts from concurrent clients
+    request_queue_size = 128
+
+
+class OllamaStubServer:
+    """Threaded stub server; use as a context manager"""
+
+    def __init__(self, port: int = 0, delay: float = 0.0, slow_delay: float = 1.0,
+                 fail_models=(), token_delay: float = 0.0):
+        self.port = port
+        self.delay = delay
+        self.slow_delay = slow_delay
+        self.token_delay = token_delay
+        self.fail_models = set(fail_models)
+        self._server = None
+        self._thread = None
+
+    @staticmethod
+    def free_port() -> int:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    def start(self) -> "OllamaStubServer":
+        server = _StubHTTPServer(("127.0.0.1", self.port), _Handler)
+        server.daemon_threads = True
+        server.delay = self.delay
+        server.slow_delay = self.slow_delay
+        server.token_delay = self.token_delay
+        server.aborted_streams = 0
+        server.fail_models = self.fail_models
+        server.stats_lock = threading.Lock()
+        server.connections = 0
+        server.requests = []
+        server.in_flight = 0
+        server.peak_in_flight = 0
+        self._server = server
+        self.port = server.server_address[1]
+        self._thread = threading.Thread(target=server.serve_forever,
+                                        kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/api/generate"
+
+    @property
+    def connections(self) -> int:
+        return self._server.connections
+
+    @property
+    def requests(self):
+        return self._server.requests
+
+    @property
+    def peak_in_flight(self) -> int:
+        return self._server.peak_in_flight
+
+    @property
+    def aborted_streams(self) -> int:
+        return self._server.aborted_streams
@@ -0,0 +1,206 @@
+"""
+Tests for single-pass, cached file extraction
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import docx
+import openpyxl
+
+from jarvis.utils.extraction import ExtractionCache
+from jarvis.utils.file_processors import DocxProcessor, ExcelProcessor, PDFProcessor, TXTProcessor, process_file
+
+
+def process_all(processor):
+    processor.process_for_memory()
+    processor.process_for_logs()
+    return processor.process_for_agent()
+
+
+class ExtractionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.temp_dir, name)
+
+    def make_workbook(self, name="data.xlsx", rows=30):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = "Sales"
+        sheet.append(["region", "amount"])
+        for i in range(rows):
+            sheet.append([f"region-{i}", i * 10])
+        workbook.create_sheet("Empty")
+        path = self.path(name)
+        workbook.save(path)
+        return path
+
+    def count_loads(self):
+        patcher = patch("openpyxl.load_workbook", wraps=openpyxl.load_workbook)
+        loads = patcher.start()
+        self.addCleanup(patcher.stop)
+        return loads
+
+
+class TestSingleParse(ExtractionTestCase):
+    """Every view of one processor comes from one parse"""
+
+    def test_excel_parsed_once_for_all_outputs(self):
+        path = self.make_workbook()
+        loads = self.count_loads()
+
+        processor = ExcelProcessor(path)
+        report = process_all(processor)
+
+        self.assertEqual(loads.call_count, 1)
+        text = processor.extract_text()
+        self.assertIn("Row 1: region | amount", text)
+        self.assertIn("Row 10: region-8 | 80", text)
+        self.assertNotIn("region-9", text)  # sample is the first 10 rows
+        data = processor.extract_data()
+        self.assertEqual(data["worksheet_count"], 2)
+        self.assertEqual(data["total_cells_with_data"], 62)
+        self.assertEqual(data["worksheets"][0]["max_row"], 31)
+        self.assertNotIn("rows", data["worksheets"][0])
+        self.assertIn("2 worksheets, 62 cells", report)
+
+    def test_pdf_pages_extracted_once(self):
+        pdf_path = self.path("doc.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4\n")
+
+        with patch.dict("sys.modules", {"PyPDF2": MagicMock()}):
+            reader = MagicMock(is_encrypted=False, metadata={"/Title": "Report"})
+            reader.pages = [MagicMock(), MagicMock(), MagicMock()]
+            reader.pages[0].extract_text.return_value = "First page"
+            reader.pages[1].extract_text.return_value = "   "
+            reader.pages[2].extract_text.side_effect = ValueError("bad font")
+            sys.modules["PyPDF2"].PdfReader.return_value = reader
+
+            processor = PDFProcessor(pdf_path)
+            process_all(processor)
+
+            self.assertEqual(sys.modules["PyPDF2"].PdfReader.call_count, 1)
+            self.assertTrue(all(page.extract_text.call_count == 1 for page in reader.pages))
+            text = processor.extract_text()
+            self.assertIn("=== Page 1 ===\nFirst page", text)
+            self.assertNotIn("=== Page 2 ===", text)
+            self.assertIn("=== Page 3 ===\n[Text extraction failed]", text)
+            data = processor.extract_data()
+            self.assertEqual((data["page_count"], data["pages_with_text"]), (3, 2))
+            self.assertEqual(data["pdf_metadata"], {"/Title": "Report"})
+
+    def test_docx_paragraphs_and_tables(self):
+        document = docx.Document()
+        document.add_paragraph("Quarterly summary")
+        document.add_paragraph("")
+        table = document.add_table(rows=2, cols=2)
+        table.cell(0, 0).text = "name"
+        table.cell(0, 1).text = "value"
+        path = self.path("report.docx")
+        document.save(path)
+
+        processor = DocxProcessor(path)
+        with patch("docx.Document", wraps=docx.Document) as loads:
+            process_all(processor)
+        self.assertEqual(loads.call_count, 1)
+        self.assertIn("Quarterly summary\n\n=== Table Data ===\nname | value\n=== End Table ===",
+                      processor.extract_text())
+        self.assertEqual(processor.extract_data()["paragraph_count"], 1)
+
+    def test_views_are_copies(self):
+        path = self.path("notes.txt")
+        with open(path, "w") as f:
+            f.write("alpha beta\ngamma")
+        processor = TXTProcessor(path)
+        processor.get_summary()["statistics"]["word_count"] = 0
+        self.assertEqual(processor.get_summary()["statistics"]["word_count"], 3)
+
+
+class TestExtractionCache(ExtractionTestCase):
+    """Unchanged files are not parsed again"""
+
+    def setUp(self):
+        super().setUp()
+        self.cache_path = self.path("cache/extractions.db")
+        self.cache = ExtractionCache(self.cache_path)
+        self.addCleanup(self.cache.close)
+
+    def test_unchanged_file_served_across_restarts(self):
+        path = self.make_workbook()
+        first = ExcelProcessor(path, cache=self.cache).extract_text()
+        self.cache.close()
+
+        loads = self.count_loads()
+        reopened = ExtractionCache(self.cache_path)
+        self.addCleanup(reopened.close)
+        self.assertEqual(ExcelProcessor(path, cache=reopened).extract_text(), first)
+        self.assertEqual(loads.call_count, 0)
+        self.assertEqual(reopened.get_stats()["hits"], 1)
+
+    def test_mtime_change_checks_content(self):
+        path = self.make_workbook()
+        ExcelProcessor(path, cache=self.cache).parse()
+        loads = self.count_loads()
+
+        # Touched but identical: the content hash matches
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+        ExcelProcessor(path, cache=self.cache).parse()
+        self.assertEqual(loads.call_count, 0)
+        self.assertEqual(self.cache.get_stats()["content_hits"], 1)
+        ExcelProcessor(path, cache=self.cache).parse()
+        self.assertEqual(self.cache.get_stats()["hits"], 1)  # new mtime was recorded
+
+        # Really changed: parsed again
+        self.make_workbook(rows=5)
+        processor = ExcelProcessor(path, cache=self.cache)
+        self.assertEqual(processor.extract_data()["total_cells_with_data"], 12)
+        self.assertEqual(loads.call_count, 1)
+        self.assertEqual(self.cache.get_stats()["stale"], 1)
+
+    def test_copied_file_shares_entry(self):
+        path = self.make_workbook()
+        process_file(path, "memory", cache=self.cache)
+        copy_path = self.path("copy.xlsx")
+        shutil.copy(path, copy_path)
+
+        loads = self.count_loads()
+        result = process_file(copy_path, "memory", cache=self.cache)
+        self.assertEqual(loads.call_count, 0)
+        self.assertEqual(result["metadata"]["file_name"], "copy.xlsx")
+        self.assertIn("Excel File: copy.xlsx", result["content"])
+
+    def test_failed_parse_not_cached(self):
+        path = self.path("broken.xlsx")
+        with open(path, "wb") as f:
+            f.write(b"PK\x03\x04not a workbook")
+        processor = ExcelProcessor(path, cache=self.cache)
+        self.assertIn("Limited Mode", processor.extract_text())
+        self.assertEqual(self.cache.get_stats()["stores"], 0)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_eviction_bounds_entries(self):
+        cache = ExtractionCache(max_entries=2)
+        self.addCleanup(cache.close)
+        for i in range(4):
+            path = self.path(f"note{i}.txt")
+            with open(path, "w") as f:
+                f.write(f"note {i}")
+            TXTProcessor(path, cache=cache).extract_text()
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get_stats()["evictions"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
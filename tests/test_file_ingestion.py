@@ -0,0 +1,223 @@
+"""
+Tests for parallel, resumable directory ingestion
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.document_fixtures import make_pdf, make_text, make_workbook
+from jarvis.core.data_archiver import DataArchiver
+from jarvis.utils import ingestion
+from jarvis.utils.ingestion import ArchiveSink, DirectoryIngestor, IngestionConfig, MemorySink
+
+
+class RecordingSink:
+    """Sink that keeps every batch it receives"""
+
+    def __init__(self, fail_on=None, interrupt_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+        self.interrupt_on = interrupt_on
+
+    def __call__(self, batch):
+        call = len(self.batches) + 1
+        if call == self.interrupt_on:
+            raise KeyboardInterrupt
+        if call == self.fail_on:
+            self.fail_on = None
+            raise RuntimeError("storage unavailable")
+        self.batches.append(batch)
+
+    @property
+    def files(self):
+        return sorted(item.relative_path for batch in self.batches for item in batch)
+
+
+class RecordingMemory:
+
+    def __init__(self):
+        self.stored = {}
+
+    def store_memory(self, key, value, category="general", tags=None, metadata=None):
+        self.stored[key] = (value, category, tags, metadata)
+        return True
+
+
+class IngestionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.root = os.path.join(self.temp_dir, "share")
+        os.makedirs(os.path.join(self.root, "reports", "2024"))
+        self.manifest_path = os.path.join(self.temp_dir, "state", "manifest.json")
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def make_tree(self):
+        for i in range(3):
+            make_text(self.path(f"note{i}.txt"), 2000)
+        make_pdf(self.path("reports", "summary.pdf"), 3)
+        make_pdf(self.path("reports", "2024", "q1.pdf"), 2)
+        make_workbook(self.path("reports", "2024", "sales.xlsx"), 50)
+        with open(self.path("reports", "image.raw"), "wb") as f:
+            f.write(b"\x00" * 64)
+
+    def config(self, **overrides):
+        options = dict(workers=2, use_processes=False, batch_size=2, file_timeout=30,
+                       manifest_path=self.manifest_path)
+        options.update(overrides)
+        return IngestionConfig(**options)
+
+    def run_ingestion(self, sink=None, **overrides):
+        sink = sink or RecordingSink()
+        return sink, DirectoryIngestor(sink, self.config(**overrides)).run(self.root)
+
+
+class TestDirectoryIngestor(IngestionTestCase):
+
+    def test_parallel_run_in_processes(self):
+        self.make_tree()
+        progress = []
+        sink = RecordingSink()
+        stats = DirectoryIngestor(sink, self.config(use_processes=True),
+                                  progress_callback=progress.append).run(self.root)
+
+        self.assertTrue(stats["success"], stats["error_messages"])
+        self.assertEqual((stats["files_seen"], stats["files_unsupported"]), (7, 1))
+        self.assertEqual((stats["files_processed"], stats["batches"]), (6, 3))
+        self.assertGreater(stats["files_per_second"], 0)
+        self.assertTrue(all(len(batch) <= 2 for batch in sink.batches))
+        self.assertIn(os.path.join("reports", "2024", "q1.pdf"), sink.files)
+
+        by_name = {item.relative_path: item for batch in sink.batches for item in batch}
+        self.assertIn("Page 2 of the generated report", by_name[os.path.join("reports", "2024", "q1.pdf")].content)
+        self.assertEqual(by_name["note0.txt"].output["processor_type"], "TXTProcessor")
+        self.assertEqual(progress[-1].files_processed, 6)
+
+    def test_unchanged_files_skipped_on_rerun(self):
+        self.make_tree()
+        self.run_ingestion()
+
+        with open(self.path("note1.txt"), "a") as f:
+            f.write("appended line\n")
+        os.remove(self.path("note2.txt"))
+        sink, stats = self.run_ingestion()
+
+        self.assertEqual(sink.files, ["note1.txt"])
+        self.assertEqual(stats["files_skipped"], 4)
+        with open(self.manifest_path) as f:
+            recorded = json.load(f)["files"]
+        self.assertNotIn("note2.txt", recorded)
+        self.assertEqual(recorded["note1.txt"]["status"], "done")
+
+    def test_interrupted_run_resumes(self):
+        self.make_tree()
+        with self.assertRaises(KeyboardInterrupt):
+            self.run_ingestion(RecordingSink(interrupt_on=2))
+
+        sink, stats = self.run_ingestion()
+        self.assertEqual(stats["files_skipped"], 2)
+        self.assertEqual(len(sink.files), 4)
+        self.assertEqual(stats["files_processed"] + stats["files_skipped"], 6)
+
+    def test_sink_failure_is_retried(self):
+        self.make_tree()
+        _, stats = self.run_ingestion(RecordingSink(fail_on=1))
+        self.assertFalse(stats["success"])
+        self.assertEqual((stats["files_failed"], stats["files_processed"]), (2, 4))
+
+        sink, stats = self.run_ingestion()
+        self.assertEqual((len(sink.files), stats["files_skipped"]), (2, 4))
+
+    def test_hanging_file_times_out_in_isolation(self):
+        self.make_tree()
+        make_text(self.path("hang.txt"), 100)
+        extract = ingestion.process_file
+
+        def slow_on_hang(path, *args, **kwargs):
+            if path.endswith("hang.txt"):
+                time.sleep(30)
+            return extract(path, *args, **kwargs)
+
+        started = time.monotonic()
+        with patch.object(ingestion, "process_file", slow_on_hang):
+            sink, stats = self.run_ingestion(use_processes=True, file_timeout=0.5)
+
+        self.assertLess(time.monotonic() - started, 15)
+        self.assertEqual((stats["files_timed_out"], stats["files_processed"]), (1, 6))
+        self.assertNotIn("hang.txt", sink.files)
+        with open(self.manifest_path) as f:
+            self.assertEqual(json.load(f)["files"]["hang.txt"]["status"], "timeout")
+
+        _, stats = self.run_ingestion()
+        self.assertEqual((stats["files_processed"], stats["files_skipped"]), (1, 6))
+
+    def test_unparseable_file_fails_instead_of_ingesting_placeholder(self):
+        self.make_tree()
+        with open(self.path("reports", "broken.pdf"), "wb") as f:
+            f.write(b"not a pdf at all")
+        sink, stats = self.run_ingestion()
+
+        self.assertFalse(stats["success"])
+        self.assertEqual((stats["files_failed"], stats["files_processed"]), (1, 6))
+        self.assertNotIn(os.path.join("reports", "broken.pdf"), sink.files)
+        self.assertFalse(any("Limited Mode" in item.content for batch in sink.batches for item in batch))
+        with open(self.manifest_path) as f:
+            self.assertEqual(json.load(f)["files"][os.path.join("reports", "broken.pdf")]["status"], "failed")
+
+        sink, stats = self.run_ingestion()
+        self.assertEqual((stats["files_failed"], stats["files_skipped"]), (1, 6))
+
+    def test_config_validation(self):
+        with self.assertRaises(ValueError):
+            IngestionConfig(output_format="xml")
+        with self.assertRaises(ValueError):
+            IngestionConfig(file_timeout=0)
+        with self.assertRaises(FileNotFoundError):
+            DirectoryIngestor(RecordingSink()).run(self.path("missing"))
+
+
+class TestSinks(IngestionTestCase):
+
+    def test_memory_sink(self):
+        make_text(self.path("note.txt"), 500)
+        memory = RecordingMemory()
+        self.run_ingestion(MemorySink(memory))
+
+        key = f"file:{self.path('note.txt')}"
+        value, category, tags, metadata = memory.stored[key]
+        self.assertTrue(value.startswith("lorem ipsum"))
+        self.assertEqual((category, tags), ("document", ["txt"]))
+        self.assertEqual(metadata["file_name"], "note.txt")
+
+    def test_archive_sink_writes_one_transaction_per_batch(self):
+        self.make_tree()
+        archiver = DataArchiver(db_path=os.path.join(self.temp_dir, "archive.db"), enable_crdt=False)
+        with patch.object(archiver, "archive_batch", wraps=archiver.archive_batch) as batches:
+            self.run_ingestion(ArchiveSink(archiver), batch_size=4)
+
+        self.assertEqual(batches.call_count, 2)
+        conn = sqlite3.connect(archiver.db_path)
+        rows = conn.execute("SELECT data_type, source, metadata FROM archive_entries").fetchall()
+        queued = conn.execute("SELECT COUNT(*) FROM verification_queue").fetchone()[0]
+        conn.close()
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(queued, 6)
+        self.assertEqual({(data_type, source) for data_type, source, _ in rows},
+                         {("input", "directory_ingestion")})
+        self.assertIn("mtime_ns", json.loads(rows[0][2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+"""
+Tests for streaming, budgeted extraction of large files
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.document_fixtures import make_pdf, make_text, make_workbook
+from jarvis.utils.extraction import ColumnProfile, ExtractionCache, ExtractionLimits, TextBudget
+from jarvis.utils.file_processors import ExcelProcessor, PDFProcessor, TXTProcessor, process_file
+
+
+def peak_memory(function):
+    """Peak traced allocation while running ``function``, in bytes"""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class StreamingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.temp_dir, name)
+
+
+class TestTextBudget(unittest.TestCase):
+
+    def test_bytes_cut_on_character_boundary(self):
+        budget = TextBudget(ExtractionLimits(max_bytes=10))
+        self.assertEqual(budget.take("abcdef"), "abcdef")
+        self.assertEqual(budget.take("ghé€ij"), "ghé")  # "€" would straddle the limit
+        self.assertTrue(budget.truncated)
+        self.assertEqual(budget.take("more"), "")
+
+    def test_exact_fit_is_not_truncation(self):
+        budget = TextBudget(ExtractionLimits(max_bytes=4))
+        self.assertEqual(budget.take("abcd"), "abcd")
+        self.assertFalse(budget.truncated)
+        self.assertEqual(budget.take(""), "")
+        self.assertFalse(budget.truncated)
+        budget.take("e")
+        self.assertTrue(budget.truncated)
+
+    def test_tokens(self):
+        budget = TextBudget(ExtractionLimits(max_bytes=None, max_tokens=5))
+        self.assertEqual(budget.take("one two three"), "one two three")
+        self.assertEqual(budget.take("four five six seven"), "four five")
+
+
+class TestColumnProfile(unittest.TestCase):
+
+    def test_exact_stats_and_sampled_quantiles(self):
+        profile = ColumnProfile("amount", sample_size=500)
+        for i in range(20000):
+            profile.add(i % 1000)
+        stats = profile.to_dict(rows=20500)
+
+        self.assertEqual((stats["values"], stats["empty"], stats["numeric"]), (20000, 500, 20000))
+        self.assertEqual((stats["min"], stats["max"], stats["mean"]), (0, 999, 499.5))
+        self.assertTrue(stats["sampled"])
+        self.assertAlmostEqual(stats["median"], 500, delta=60)
+        self.assertAlmostEqual(stats["p25"], 250, delta=60)
+        self.assertNotIn("examples", stats)
+
+    def test_text_column(self):
+        profile = ColumnProfile()
+        for value in ["a", "b", "a", 3]:
+            profile.add(value)
+        stats = profile.to_dict()
+        self.assertEqual(stats["examples"], ["a", "b"])
+        self.assertEqual(stats["distinct_in_sample"], 3)
+        self.assertFalse(stats["sampled"])
+
+
+class TestPDFStreaming(StreamingTestCase):
+
+    def test_budget_stops_reading_pages(self):
+        path = make_pdf(self.path("long.pdf"), 300)
+        processor = PDFProcessor(path, limits=ExtractionLimits(max_bytes=2000))
+
+        data = processor.extract_data()
+        self.assertEqual(data["page_count"], 300)
+        self.assertTrue(data["truncated"])
+        self.assertLess(data["pages_extracted"], 100)
+        self.assertTrue(processor.extract_text().endswith(f"after {data['pages_extracted']} of 300 pages]"))
+
+        complete = PDFProcessor(path).extract_data()
+        self.assertEqual((complete["pages_extracted"], complete["truncated"]), (300, False))
+
+    def test_iter_pages_is_lazy(self):
+        path = make_pdf(self.path("long.pdf"), 50)
+        pages = list(islice(PDFProcessor(path).iter_pages(), 3))
+        self.assertEqual(pages[2], (3, "Page 3 of the generated report"))
+
+
+class TestWorkbookStreaming(StreamingTestCase):
+
+    def test_columns_profiled_with_header(self):
+        path = make_workbook(self.path("data.xlsx"), 3000)
+        processor = ExcelProcessor(path, limits=ExtractionLimits(profile_sample_size=200))
+        sheet = processor.extract_data()["worksheets"][0]
+
+        self.assertEqual((sheet["max_row"], sheet["total_cells"]), (3001, 9003))
+        amount = sheet["columns"]["B"]
+        self.assertEqual(amount["header"], "amount")
+        self.assertEqual((amount["values"], amount["min"], amount["max"]), (3000, 0, 999))
+        self.assertTrue(amount["sampled"])
+        self.assertEqual(sheet["columns"]["C"]["examples"][0][:6], "label-")
+        self.assertIn("B (amount): 3000 values, numeric 0 to 999", processor.extract_text())
+
+    def test_row_and_byte_limits(self):
+        path = make_workbook(self.path("data.xlsx"), 500, sheets=2)
+        by_rows = ExcelProcessor(path, limits=ExtractionLimits(max_rows=101)).extract_data()
+        self.assertEqual([s["max_row"] for s in by_rows["worksheets"]], [101, 101])
+        self.assertTrue(all(s["truncated"] for s in by_rows["worksheets"]))
+
+        by_bytes = ExcelProcessor(path, limits=ExtractionLimits(max_bytes=4000)).extract_data()
+        first, second = by_bytes["worksheets"]
+        self.assertTrue(first["truncated"])
+        self.assertLess(first["max_row"], 500)
+        self.assertEqual(second["total_cells"], 0)
+
+    def test_iter_rows(self):
+        path = make_workbook(self.path("data.xlsx"), 20, sheets=2)
+        rows = list(ExcelProcessor(path).iter_rows("Sheet2"))
+        self.assertEqual(len(rows), 21)
+        self.assertEqual(rows[1], ("Sheet2", 2, (0, 0, "label-0")))
+
+    def test_memory_does_not_grow_with_rows(self):
+        small = make_workbook(self.path("small.xlsx"), 500)
+        large = make_workbook(self.path("large.xlsx"), 4000)
+        limits = ExtractionLimits(profile_sample_size=100)
+
+        small_peak = peak_memory(lambda: ExcelProcessor(small, limits=limits).parse())
+        large_peak = peak_memory(lambda: ExcelProcessor(large, limits=limits).parse())
+        # 8x the rows; keeping every cell would cost several times more
+        self.assertLess(large_peak, 3 * small_peak)
+        self.assertLess(large_peak, 4 * 1024 * 1024)
+
+
+class TestTextStreaming(StreamingTestCase):
+
+    def test_large_file_read_within_budget(self):
+        path = make_text(self.path("big.txt"), 16 * 1024 * 1024)
+        limit = 512 * 1024
+        processor = TXTProcessor(path, limits=ExtractionLimits(max_bytes=limit))
+
+        peak = peak_memory(processor.parse)
+        self.assertLess(peak, 4 * limit)
+        self.assertEqual(len(processor.extract_text().encode()), limit)
+        self.assertTrue(processor.extract_data()["truncated"])
+
+    def test_token_budget_and_paragraphs(self):
+        path = self.path("notes.txt")
+        with open(path, "w") as f:
+            f.write("first para\nstill first\n\n\nsecond para\n\nthird")
+        processor = TXTProcessor(path, limits=ExtractionLimits(max_tokens=4))
+        self.assertEqual(processor.extract_text(), "first para\nstill first")
+        self.assertEqual(list(processor.iter_paragraphs()),
+                         ["first para\nstill first", "second para", "third"])
+
+    def test_limits_are_part_of_cache_key(self):
+        path = make_text(self.path("notes.txt"), 10000)
+        cache = ExtractionCache()
+        self.addCleanup(cache.close)
+        short = process_file(path, "memory", cache=cache, limits=ExtractionLimits(max_bytes=100))
+        full = process_file(path, "memory", cache=cache)
+        self.assertEqual(len(short["content"]), 100)
+        self.assertGreater(len(full["content"]), 10000)
+        self.assertEqual(cache.get_stats()["stores"], 2)
+
+    def test_limits_validation(self):
+        with self.assertRaises(ValueError):
+            ExtractionLimits(max_bytes=0)
+        with self.assertRaises(ValueError):
+            ExtractionLimits(profile_sample_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+Tests for concurrent, deadline-bounded health checks
+"""
+
+import os
+import sys
+import time
+import shutil
+import random
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.monitoring.system_health import (
+    CheckSchedule, HealthCheckScheduler, HealthDatabase, HealthStatus, SystemHealthMonitor
+)
+
+
+def healthy(component, score=100):
+    def check():
+        return HealthStatus(timestamp=datetime.now().isoformat(), component=component, status='healthy',
+                            score=score, metrics={}, message="ok", recovery_actions=[])
+    return check
+
+
+class SchedulerTestCase(unittest.TestCase):
+
+    def scheduler(self, checkers, schedules=None, **options):
+        self.results = []
+        scheduler = HealthCheckScheduler(
+            checkers, lambda name, status: self.results.append((name, status.status)),
+            schedules=schedules, rng=random.Random(0), **options
+        )
+        self.addCleanup(scheduler.stop)
+        return scheduler
+
+
+class TestHealthCheckScheduler(SchedulerTestCase):
+
+    def test_checks_run_concurrently(self):
+        barrier = threading.Barrier(3, timeout=2)
+
+        def waits_for_others(name):
+            def check():
+                barrier.wait()
+                return healthy(name)()
+            return check
+
+        scheduler = self.scheduler({name: waits_for_others(name) for name in ("a", "b", "c")})
+        statuses = scheduler.run_once()
+        self.assertEqual({name: status.status for name, status in statuses.items()},
+                         {"a": "healthy", "b": "healthy", "c": "healthy"})
+
+    def test_hung_check_times_out_without_delaying_others(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def hangs():
+            release.wait(10)
+            return healthy("slow", score=50)()
+
+        scheduler = self.scheduler(
+            {"slow": hangs, "fast": healthy("fast")},
+            schedules={"slow": CheckSchedule(timeout=0.2), "fast": CheckSchedule(timeout=5)}
+        )
+        start = time.monotonic()
+        statuses = scheduler.run_once()
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(statuses["fast"].status, "healthy")
+        self.assertEqual(statuses["slow"].status, "unknown")
+        self.assertIn("timed out", statuses["slow"].message)
+
+        # Not started again while the stuck call is still running
+        self.assertEqual(scheduler.run_once(["slow"])["slow"].status, "unknown")
+        self.assertEqual(scheduler.get_stats()["slow"]["runs"], 1)
+
+        release.set()
+        deadline = time.monotonic() + 5
+        while scheduler.latest["slow"].status == "unknown" and time.monotonic() < deadline:
+            scheduler.run_once(["slow"])
+            time.sleep(0.02)
+        self.assertEqual(scheduler.latest["slow"].score, 50)
+        stats = scheduler.get_stats()["slow"]
+        self.assertEqual((stats["timeouts"], stats["late_results"]), (1, 1))
+
+    def test_failing_check_is_unknown(self):
+        def broken():
+            raise RuntimeError("database is locked")
+
+        scheduler = self.scheduler({"broken": broken})
+        status = scheduler.run_once()["broken"]
+        self.assertEqual(status.status, "unknown")
+        self.assertIn("database is locked", status.message)
+        self.assertEqual(scheduler.get_stats()["broken"]["errors"], 1)
+
+    def test_each_check_keeps_its_own_interval(self):
+        scheduler = self.scheduler(
+            {"often": healthy("often"), "rarely": healthy("rarely")},
+            schedules={"often": CheckSchedule(interval=0.05, jitter=0.2),
+                       "rarely": CheckSchedule(interval=30, jitter=0)}
+        )
+        scheduler.start()
+        deadline = time.monotonic() + 5
+        while scheduler.get_stats()["often"]["runs"] < 5 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        scheduler.stop()
+
+        stats = scheduler.get_stats()
+        self.assertGreaterEqual(stats["often"]["runs"], 5)
+        self.assertEqual(stats["rarely"]["runs"], 1)
+
+    def test_slow_result_handling_does_not_delay_timeouts(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        handled = []
+
+        def on_result(name, status):
+            if name == "fast":
+                release.wait(10)
+            handled.append((name, status.status))
+
+        scheduler = HealthCheckScheduler(
+            {"fast": healthy("fast"), "stuck": lambda: release.wait(10) and healthy("stuck")()},
+            on_result, rng=random.Random(0),
+            schedules={"fast": CheckSchedule(interval=30, jitter=0),
+                       "stuck": CheckSchedule(interval=30, timeout=0.2, jitter=0)}
+        )
+        self.addCleanup(scheduler.stop)
+        scheduler.start()
+        deadline = time.monotonic() + 5
+        while scheduler.get_stats()["stuck"]["timeouts"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        # Timed out on schedule while the first result is still being handled
+        self.assertEqual(scheduler.latest["stuck"].status, "unknown")
+        self.assertEqual(handled, [])
+
+        release.set()
+        while len(handled) < 3 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(handled, [("fast", "healthy"), ("stuck", "unknown"), ("stuck", "healthy")])
+
+    def test_schedule_validation(self):
+        with self.assertRaises(ValueError):
+            CheckSchedule(timeout=0)
+        with self.assertRaises(ValueError):
+            CheckSchedule(jitter=1.5)
+        delays = [CheckSchedule(interval=10, jitter=0.1).next_delay(random.Random(i)) for i in range(50)]
+        self.assertTrue(all(9 <= delay <= 11 for delay in delays))
+
+
+class TestMonitorScheduling(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def test_report_built_from_latest_results(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        monitor = SystemHealthMonitor({
+            'check_timeout': 5,
+            'checks': {'stuck': {'timeout': 0.2}},
+            'auto_recovery': False
+        })
+        monitor.database = HealthDatabase(os.path.join(self.temp_dir, "health.db"))
+        monitor.component_checkers = {
+            'system': healthy('system'),
+            'stuck': lambda: release.wait(10) and healthy('stuck')(),
+        }
+
+        monitor.run_health_checks()
+        self.addCleanup(monitor.scheduler.stop)
+        report = monitor.get_health_report()
+        self.assertEqual(report.component_statuses['system'].status, 'healthy')
+        self.assertEqual(report.component_statuses['stuck'].status, 'unknown')
+        self.assertEqual(report.overall_score, 50)
+        self.assertEqual(monitor.scheduler.schedules['stuck'].interval, 60)
+        self.assertEqual(len(monitor.database.get_health_history('system')), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
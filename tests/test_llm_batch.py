@@ -0,0 +1,136 @@
+"""
+Tests for concurrent batch generation
+"""
+
+import os
+import sys
+import time
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.ollama_stub import OllamaStubServer
+from jarvis.llm.batch import (
+    AIMDController, BatchConfig, BatchExecutor,
+    STATUS_CANCELLED, STATUS_ERROR, STATUS_OK, STATUS_TIMEOUT
+)
+from jarvis.llm.llm_interface import OllamaLLMInterface
+from jarvis.llm.transport import TransportConfig, configure_transport
+
+
+class TestAIMDController(unittest.TestCase):
+    """Test the adaptive concurrency limit"""
+
+    def setUp(self):
+        self.now = [0.0]
+        self.controller = AIMDController(initial=2, minimum=1, maximum=8,
+                                         latency_target=1.0, clock=lambda: self.now[0])
+
+    def test_additive_increase(self):
+        for _ in range(20):
+            self.controller.on_success(0.5, started_at=self.now[0])
+        self.assertGreater(self.controller.limit, 4)
+        self.assertLessEqual(self.controller.limit, 8)
+
+    def test_multiplicative_decrease_once_per_round_trip(self):
+        self.controller._window = 8.0
+        self.now[0] = 10.0
+        self.controller.on_failure(started_at=9.0)
+        self.assertEqual(self.controller.limit, 4)
+        # Requests that started before the decrease do not shrink the window again
+        self.controller.on_failure(started_at=9.5)
+        self.controller.on_success(5.0, started_at=9.5)
+        self.assertEqual(self.controller.limit, 4)
+        self.controller.on_failure(started_at=10.5)
+        self.assertEqual(self.controller.limit, 2)
+
+    def test_latency_spike_decreases(self):
+        self.controller._window = 6.0
+        self.controller.on_success(3.0, started_at=0.0)
+        self.assertEqual(self.controller.limit, 3)
+        self.assertEqual(self.controller.history, [2, 3])
+
+
+class TestBatchExecutor(unittest.TestCase):
+    """Test ordering, bounded parallelism and partial failures"""
+
+    def test_results_keep_input_order_with_bounded_parallelism(self):
+        lock = threading.Lock()
+        active, peak = [0], [0]
+
+        def work(n):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01 * (n % 3))
+            with lock:
+                active[0] -= 1
+            return n * n
+
+        report = BatchExecutor(work, BatchConfig(max_in_flight=3, adaptive=False)).run(range(20))
+        self.assertEqual([r.value for r in report.results], [n * n for n in range(20)])
+        self.assertLessEqual(peak[0], 3)
+        self.assertGreater(peak[0], 1)
+
+    def test_partial_failures_are_reported(self):
+        def work(n):
+            if n % 4 == 0:
+                raise ValueError(f"bad {n}")
+            if n == 5:
+                raise TimeoutError("slow")
+            return n
+
+        report = BatchExecutor(work, BatchConfig(max_in_flight=2)).run(range(10))
+        summary = report.summary()
+        self.assertEqual(summary["errors"], 3)
+        self.assertEqual(summary["timed_out"], 1)
+        self.assertEqual(summary["succeeded"], 6)
+        self.assertEqual(report.results[4].error, "bad 4")
+        self.assertEqual(report.results[5].status, STATUS_TIMEOUT)
+
+    def test_cancellation_stops_dispatch(self):
+        cancel = threading.Event()
+
+        def work(n):
+            if n == 2:
+                cancel.set()
+            time.sleep(0.01)
+            return n
+
+        report = BatchExecutor(work, BatchConfig(max_in_flight=1, adaptive=False)).run(range(10), cancel)
+        statuses = [r.status for r in report.results]
+        self.assertEqual(statuses[:3], [STATUS_OK] * 3)
+        self.assertEqual(statuses[3:], [STATUS_CANCELLED] * 7)
+
+
+class TestBatchGenerate(unittest.TestCase):
+    """Test OllamaLLMInterface.batch_generate against the stub server"""
+
+    def setUp(self):
+        self.server = OllamaStubServer(delay=0.02, slow_delay=1.0).start()
+        self.addCleanup(self.server.stop)
+        configure_transport(TransportConfig(max_per_host=8))
+        self.addCleanup(configure_transport, TransportConfig.from_env())
+        self.interface = OllamaLLMInterface(base_url=self.server.url)
+
+    def test_batch_runs_concurrently_in_order(self):
+        prompts = [f"prompt {i}" for i in range(24)]
+        results = self.interface.batch_generate(prompts, max_in_flight=6)
+        self.assertEqual([r["response"] for r in results], [f"echo: {p}" for p in prompts])
+        self.assertTrue(all(r["success"] for r in results))
+        self.assertGreater(self.server.peak_in_flight, 1)
+        self.assertLessEqual(self.server.peak_in_flight, 6)
+
+    def test_failures_and_item_timeouts(self):
+        prompts = ["ok 1", "[fail] 2", "[slow] 3", "ok 4"]
+        results = self.interface.batch_generate(prompts, max_in_flight=4, item_timeout=0.3)
+        self.assertEqual([r["status"] for r in results],
+                         [STATUS_OK, STATUS_ERROR, STATUS_TIMEOUT, STATUS_OK])
+        self.assertIn("500", results[1]["error"])
+        self.assertLess(results[2]["latency"], 0.9)
+        self.assertEqual(self.interface.get_statistics()["last_batch"]["errors"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Tests for per-provider circuit breakers
+"""
+
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.provider_sim import SimClock, SimulatedProvider
+from jarvis.llm.providers import LLMOrchestrator, LLMRequest, RoutingConfig
+from jarvis.llm.providers.base import ProviderType
+from jarvis.llm.providers.circuit_breaker import CircuitBreaker, CircuitBreakerConfig, CircuitState
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """State transitions on a fake clock"""
+
+    def setUp(self):
+        self.clock = SimClock()
+        self.config = CircuitBreakerConfig(window_size=10, minimum_calls=4, failure_rate_threshold=0.5,
+                                           slow_call_threshold=5.0, slow_call_rate_threshold=0.75,
+                                           open_duration=30.0, half_open_max_calls=2)
+        self.breaker = CircuitBreaker("test", self.config, clock=self.clock)
+
+    def call(self, success=True, duration=0.1):
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record(duration, success)
+
+    def test_opens_on_failure_rate_after_minimum_calls(self):
+        self.call(False)
+        self.call(False)
+        self.call(False)
+        self.assertEqual(self.breaker.state, CircuitState.CLOSED)  # below minimum_calls
+        self.call(True)
+        self.assertEqual(self.breaker.state, CircuitState.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        self.assertEqual(self.breaker.get_stats()["rejected"], 1)
+        self.assertEqual(self.breaker.get_stats()["retry_in"], 30.0)
+
+    def test_opens_on_slow_calls(self):
+        for _ in range(3):
+            self.call(True, duration=6.0)
+        self.call(True)
+        self.assertEqual(self.breaker.state, CircuitState.OPEN)
+
+    def test_half_open_closes_after_successful_trials(self):
+        self.breaker.force_open()
+        self.clock.advance(29.9)
+        self.assertFalse(self.breaker.is_available())
+        self.clock.advance(0.1)
+        self.assertEqual(self.breaker.state, CircuitState.HALF_OPEN)
+
+        self.assertTrue(self.breaker.allow_request())
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())  # trial slots taken
+        self.breaker.record(0.1, True)
+        self.assertEqual(self.breaker.state, CircuitState.HALF_OPEN)
+        self.breaker.record(0.1, True)
+        self.assertEqual(self.breaker.state, CircuitState.CLOSED)
+        self.assertEqual(self.breaker.get_stats()["window_calls"], 0)
+
+    def test_half_open_failure_reopens(self):
+        self.breaker.force_open()
+        self.clock.advance(30)
+        self.call(False)
+        self.assertEqual(self.breaker.state, CircuitState.OPEN)
+        self.assertEqual(self.breaker.get_stats()["times_opened"], 2)
+
+    def test_config_validation(self):
+        with self.assertRaises(ValueError):
+            CircuitBreakerConfig(window_size=5, minimum_calls=6)
+        with self.assertRaises(ValueError):
+            CircuitBreakerConfig(failure_rate_threshold=0)
+
+
+class TestOrchestratorCircuits(unittest.TestCase):
+    """Open circuits are skipped by selection and fallback"""
+
+    def setUp(self):
+        self.clock = SimClock()
+        self.orchestrator = LLMOrchestrator(
+            RoutingConfig(hedge=False), clock=self.clock,
+            breaker_config=CircuitBreakerConfig(window_size=10, minimum_calls=5, open_duration=60.0))
+        self.addCleanup(self.orchestrator.shutdown)
+        # The dead provider fails after a 10s "timeout"
+        self.dead = SimulatedProvider("dead", 10.0, failure_rate=1.0, clock=self.clock)
+        self.healthy = SimulatedProvider("healthy", 0.5, provider_type=ProviderType.MISTRAL, clock=self.clock)
+        self.orchestrator.register_provider("dead", self.dead)
+        self.orchestrator.register_provider("healthy", self.healthy)
+
+    def send(self, count, **kwargs):
+        return [self.orchestrator.generate_response(LLMRequest(prompt="hi"), **kwargs) for _ in range(count)]
+
+    def test_dead_provider_stops_costing_timeouts(self):
+        start = self.clock()
+        responses = self.send(20, preferred_provider="dead")
+
+        self.assertTrue(all(r.model == "healthy" for r in responses))
+        self.assertEqual(self.dead.calls, 5)
+        self.assertEqual(self.clock() - start, 5 * 10.0 + 20 * 0.5)
+        breakers = self.orchestrator.get_orchestrator_stats()["circuit_breakers"]
+        self.assertEqual(breakers["dead"]["state"], "open")
+        self.assertEqual(breakers["healthy"]["state"], "closed")
+
+    def test_fallback_chain_skips_open_circuit(self):
+        self.orchestrator.set_fallback_chain(["dead", "healthy"])
+        self.orchestrator.circuit_breakers["dead"].force_open()
+        self.orchestrator.circuit_breakers["healthy"].force_open()
+
+        response = self.orchestrator.generate_response(LLMRequest(prompt="hi"))
+        self.assertFalse(response.is_successful)
+        self.assertEqual((self.dead.calls, self.healthy.calls), (0, 0))
+
+    def test_probe_closes_recovered_circuit(self):
+        self.send(5, preferred_provider="dead")
+        self.assertEqual(self.orchestrator.probe_open_circuits(), {})  # still open, nothing to probe
+
+        self.clock.advance(60)
+        self.assertEqual(self.orchestrator.probe_open_circuits(), {"dead": "open"})  # still failing
+        self.assertEqual(self.dead.calls, 6)
+
+        self.dead.failure_rate = 0.0
+        self.clock.advance(60)
+        self.assertEqual(self.orchestrator.probe_open_circuits(), {"dead": "closed"})
+        self.assertEqual(self.send(1, preferred_provider="dead")[0].model, "dead")
+        self.assertEqual(self.orchestrator.get_orchestrator_stats()["probes"], 2)
+
+    def test_background_probing(self):
+        self.orchestrator.circuit_breakers["dead"].force_open()
+        self.dead.failure_rate = 0.0
+        self.clock.advance(60)
+        self.orchestrator.start_health_probes(interval=0.01)
+
+        deadline = time.monotonic() + 2
+        while (self.orchestrator.circuit_breakers["dead"].state != CircuitState.CLOSED and
+               time.monotonic() < deadline):
+            time.sleep(0.01)
+        self.orchestrator.stop_health_probes()
+        self.assertEqual(self.orchestrator.circuit_breakers["dead"].state, CircuitState.CLOSED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+"""
+Tests for token-budgeted context assembly
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.ollama_stub import OllamaStubServer
+from jarvis.llm.context import ContextAssembler, ContextBudget, RollingSummary, TokenCounter
+from jarvis.llm.llm_interface import OllamaLLMInterface
+from jarvis.vectordb.models import Document, SearchResult
+from jarvis.vectordb.rag_system import EnhancedRAGSystem, RAGConfig
+
+
+def filler(topic, words=40):
+    return " ".join(f"{topic}{i % 7}" for i in range(words))
+
+
+class TestTokenCounter(unittest.TestCase):
+    """Local token counting"""
+
+    def test_count_and_truncate(self):
+        counter = TokenCounter()
+        self.assertEqual(counter.count("Hello, world!"), 4)
+        self.assertEqual(counter.count(""), 0)
+        self.assertEqual(counter.truncate("one two three four", 3), "one two...")
+        self.assertEqual(counter.truncate("one two three four", 3, keep_end=True), "...three four")
+        self.assertEqual(counter.count(counter.truncate("one two three four", 3)), 3)
+        self.assertEqual(counter.truncate("one two", 5), "one two")
+
+
+class TestContextAssembler(unittest.TestCase):
+    """Budget allocation and ranking"""
+
+    def setUp(self):
+        self.budget = ContextBudget(max_tokens=400, reserve_output=100)
+        self.assembler = ContextAssembler(self.budget)
+        self.count = self.assembler.counter.count
+
+    def test_history_fits_budget_and_keeps_relevant_turns(self):
+        history = [("Which database backs the archive?", "The archive uses SQLite with WAL mode.")]
+        history += [(filler("chat"), filler("reply")) for _ in range(30)]
+
+        result = self.assembler.assemble("Tell me more about the archive database and SQLite",
+                                         system_prompt="Be brief.", history=history, max_turns=5)
+
+        self.assertLessEqual(result.usage["total"], self.budget.available)
+        self.assertIn(0, result.history)  # old but relevant
+        self.assertIn(30, result.history)  # most recent
+        self.assertEqual(result.history, sorted(result.history))
+        self.assertLessEqual(len(result.history), 5)
+        self.assertEqual(result.dropped_turns, 31 - len(result.history))
+        self.assertTrue(result.history_text.startswith("User: Which database"))
+
+    def test_documents_ranked_and_truncated(self):
+        documents = [(filler("low", 50), 0.2), (filler("high", 120), 0.9), (filler("mid", 200), 0.5)]
+
+        result = self.assembler.assemble("question", documents=documents)
+
+        self.assertEqual(result.documents, [1, 2])
+        self.assertEqual(result.truncated_documents, 1)
+        self.assertEqual(result.dropped_documents, 1)
+        self.assertTrue(result.documents_text.endswith("..."))
+        self.assertLessEqual(result.usage["total"], self.budget.available)
+
+        capped = self.assembler.assemble("question", documents=documents, max_document_chars=300)
+        self.assertLessEqual(len(capped.documents_text), 300)
+
+    def test_history_share_and_spare_space(self):
+        history = [(filler("turn", 30), filler("answer", 30)) for _ in range(10)]
+        documents = [(filler("doc", 400), 0.9)]
+        result = self.assembler.assemble("q", history=history, documents=documents)
+        self.assertLessEqual(result.usage["history"] + result.usage["summary"],
+                             int((self.budget.available - 1) * self.budget.history_share))
+        self.assertGreater(result.usage["documents"], result.usage["history"])
+
+        # A short document leaves room that history can use
+        result = self.assembler.assemble("q", history=history, documents=[("tiny doc", 0.9)])
+        self.assertGreater(result.usage["history"], int(self.budget.available * self.budget.history_share))
+
+    def test_summary_is_included_and_capped(self):
+        summary = "\n".join(f"- line {i} {filler('s', 10)}" for i in range(40))
+        result = self.assembler.assemble("q", history=[("a", "b")], summary=summary)
+        self.assertTrue(result.summary_text.endswith(summary[-20:]))  # newest lines kept
+        self.assertLessEqual(result.usage["summary"], int(self.budget.available * self.budget.summary_share) + 1)
+
+    def test_budget_validation(self):
+        with self.assertRaises(ValueError):
+            ContextBudget(max_tokens=100, reserve_output=100)
+
+
+class TestRollingSummary(unittest.TestCase):
+    """Incremental summarization"""
+
+    def test_extractive_summary_is_bounded(self):
+        summary = RollingSummary(max_tokens=60)
+        for i in range(20):
+            summary.fold(f"Question number {i}? With detail.", f"Answer {i}. More text.")
+        self.assertEqual(summary.folded_turns, 20)
+        self.assertLessEqual(summary.tokens, 60)
+        self.assertIn("Question number 19?", summary.text)
+        self.assertNotIn("Question number 0?", summary.text)
+        self.assertNotIn("More text", summary.text)
+
+    def test_custom_summarizer_sees_previous_summary_once_per_turn(self):
+        calls = []
+
+        def summarizer(previous, user, assistant):
+            calls.append(previous)
+            return f"{previous}|{user}"
+
+        summary = RollingSummary(summarizer=summarizer)
+        for turn in "abc":
+            summary.fold(turn, "x")
+        self.assertEqual(calls, ["", "|a", "|a|b"])
+        self.assertEqual(summary.text, "|a|b|c")
+
+
+class TestInterfaceContext(unittest.TestCase):
+    """OllamaLLMInterface.generate_with_context"""
+
+    def setUp(self):
+        self.server = OllamaStubServer().start()
+        self.addCleanup(self.server.stop)
+        self.interface = OllamaLLMInterface(base_url=self.server.url)
+        self.interface.context_budget = ContextBudget(max_tokens=600, reserve_output=100)
+        self.interface.keep_recent_turns = 5
+        for name in ("_archive_prompt", "_archive_response"):
+            patcher = patch(f"jarvis.llm.llm_interface.{name}")
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_long_session_stays_within_budget(self):
+        for i in range(12):
+            self.interface.generate_with_context(f"Message {i}: {filler('topic', 60)}", model="llama3:8b")
+
+        sent = self.server.requests[-1]["prompt"]
+        counter = TokenCounter()
+        self.assertLessEqual(counter.count(sent), self.interface.context_budget.available)
+        self.assertIn("Earlier in this conversation:", sent)
+        self.assertTrue(sent.endswith(f"User: Message 11: {filler('topic', 60)}"))
+
+        # History keeps the plain prompts, and each old turn was folded exactly once
+        history = self.interface.get_conversation_history()
+        self.assertEqual(history[0]["prompt"], f"Message 0: {filler('topic', 60)}")
+        self.assertEqual(self.interface.history_summary.folded_turns, 12 - 5)
+        usage = self.interface.last_context_usage
+        self.assertLessEqual(usage["total"], usage["budget"])
+
+    def test_clear_history_resets_summary(self):
+        for i in range(7):
+            self.interface.generate_with_context(f"hello {i}", model="llama3:8b")
+        self.interface.clear_history()
+        self.assertEqual(self.interface.history_summary.folded_turns, 0)
+        self.interface.generate_with_context("fresh start", model="llama3:8b")
+        self.assertEqual(self.server.requests[-1]["prompt"], "fresh start")
+
+
+class TestRAGContext(unittest.TestCase):
+    """EnhancedRAGSystem context budgeting"""
+
+    def setUp(self):
+        self.rag = EnhancedRAGSystem(chroma_manager=MagicMock(), search_engine=MagicMock())
+
+    def results(self):
+        return [
+            SearchResult(Document(id=f"d{i}", content=filler(f"doc{i}", 300), source=f"file{i}.txt"),
+                         score=score, distance=1 - score, rank=i)
+            for i, score in enumerate([0.6, 0.9, 0.8])
+        ]
+
+    def test_documents_fill_token_budget(self):
+        config = RAGConfig(max_context_tokens=1024, max_tokens=256, max_context_length=100000)
+        assembled = self.rag._assemble_context("what is in the docs?", self.results(), config)
+
+        self.assertEqual(assembled.documents, [1, 2, 0])
+        self.assertEqual(assembled.truncated_documents, 1)
+        self.assertTrue(assembled.documents_text.startswith("[Source 2]"))
+        self.assertLessEqual(assembled.usage["total"], 1024 - 256)
+        self.assertEqual(self.rag._prepare_context(self.results(), config, "what is in the docs?"),
+                         assembled.documents_text)
+
+    def test_old_exchanges_are_summarized(self):
+        response = MagicMock(generated_response="An answer.", retrieved_documents=[], confidence_score=0.5)
+        for i in range(21):
+            self.rag._update_conversation_history(f"Question {i}?", response)
+        self.assertEqual(self.rag.history_summary.folded_turns, 11)
+        self.assertEqual(len(self.rag.conversation_history), 10)
+
+        config = RAGConfig(use_conversation_context=True)
+        assembled = self.rag._assemble_context("Question 20?", self.results(), config)
+        self.assertIn("Q: Question 10?", assembled.summary_text)
+        self.assertLessEqual(len(assembled.history), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,237 @@
+"""
+Tests for LLM request rate limiting
+"""
+
+import os
+import sys
+import time
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.ollama_stub import OllamaStubServer
+from jarvis.llm.dispatch import OllamaDispatcher
+from jarvis.llm.production_llm import LLMProvider, LLMRequest, ModelConfig, ProductionLLMInterface
+from jarvis.llm.rate_limit import (
+    ALGORITHM_GCRA, ALGORITHM_TOKEN_BUCKET, MODE_WAIT, SCOPE_API_KEY, SCOPE_MODEL, SCOPE_SESSION,
+    RateLimit, RateLimitExceeded, RateLimiter
+)
+from jarvis.llm.transport import deadline_scope
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimitAlgorithms(unittest.TestCase):
+    """Both algorithms under a controlled clock"""
+
+    def make(self, algorithm, **limit):
+        clock = FakeClock()
+        limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+        limiter.set_limit(SCOPE_MODEL, RateLimit(algorithm=algorithm, **limit))
+        return limiter, clock
+
+    def test_concurrent_admission_never_exceeds_burst(self):
+        for algorithm in (ALGORITHM_GCRA, ALGORITHM_TOKEN_BUCKET):
+            with self.subTest(algorithm=algorithm):
+                limiter, _ = self.make(algorithm, requests=10, period=1.0, burst=5)
+                admitted = []
+                barrier = threading.Barrier(32)
+
+                def worker():
+                    barrier.wait()
+                    for _ in range(10):
+                        admitted.append(limiter.try_acquire(model="llama3:8b"))
+
+                threads = [threading.Thread(target=worker) for _ in range(32)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+                self.assertEqual(admitted.count(True), 5)
+                stats = limiter.get_stats()
+                self.assertEqual((stats["allowed"], stats["rejected"]), (5, 315))
+
+    def test_refill_rate(self):
+        for algorithm in (ALGORITHM_GCRA, ALGORITHM_TOKEN_BUCKET):
+            with self.subTest(algorithm=algorithm):
+                limiter, clock = self.make(algorithm, requests=2, period=1.0, burst=2)
+                self.assertTrue(limiter.try_acquire(model="m"))
+                self.assertTrue(limiter.try_acquire(model="m"))
+                with self.assertRaises(RateLimitExceeded) as ctx:
+                    limiter.acquire(model="m")
+                self.assertAlmostEqual(ctx.exception.retry_after, 0.5)
+                clock.now += 0.5
+                self.assertTrue(limiter.try_acquire(model="m"))
+                self.assertFalse(limiter.try_acquire(model="m"))
+
+    def test_wait_mode_spaces_requests(self):
+        for algorithm in (ALGORITHM_GCRA, ALGORITHM_TOKEN_BUCKET):
+            with self.subTest(algorithm=algorithm):
+                limiter, clock = self.make(algorithm, requests=4, period=1.0, burst=1)
+                for _ in range(4):
+                    limiter.acquire(model="m", mode=MODE_WAIT, timeout=1.0)
+                self.assertEqual(len(clock.sleeps), 3)
+                for slept in clock.sleeps:
+                    self.assertAlmostEqual(slept, 0.25)
+
+    def test_wait_mode_respects_timeout_and_deadline(self):
+        limiter, clock = self.make(ALGORITHM_GCRA, requests=1, period=10.0, burst=1)
+        limiter.acquire(model="m")
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire(model="m", mode=MODE_WAIT, timeout=5.0)
+        with deadline_scope(2.0):
+            with self.assertRaises(RateLimitExceeded):
+                limiter.acquire(model="m", mode=MODE_WAIT, timeout=30.0)
+        limiter.acquire(model="m", mode=MODE_WAIT, timeout=30.0)
+        self.assertAlmostEqual(clock.sleeps[-1], 10.0)
+
+    def test_rejection_does_not_consume_other_scopes(self):
+        limiter, _ = self.make(ALGORITHM_GCRA, requests=100, period=1.0, burst=100)
+        limiter.set_limit(SCOPE_SESSION, RateLimit(1, period=60.0, burst=1), key="s1")
+        limiter.set_limit(SCOPE_API_KEY, RateLimit(3, period=60.0, burst=3))
+
+        self.assertTrue(limiter.try_acquire(model="m", session_id="s1", api_key="k"))
+        for _ in range(5):
+            self.assertFalse(limiter.try_acquire(model="m", session_id="s1", api_key="k"))
+        # The api key budget was only charged once
+        self.assertTrue(limiter.try_acquire(model="m", session_id="s2", api_key="k"))
+        self.assertTrue(limiter.try_acquire(model="m", session_id="s3", api_key="k"))
+        with self.assertRaises(RateLimitExceeded) as ctx:
+            limiter.acquire(model="m", session_id="s4", api_key="k")
+        self.assertEqual((ctx.exception.scope, ctx.exception.key), (SCOPE_API_KEY, "k"))
+
+    def test_idle_keys_are_pruned(self):
+        clock = FakeClock()
+        limiter = RateLimiter(clock=clock, sleep=clock.sleep, max_keys=10)
+        limiter.set_limit(SCOPE_SESSION, RateLimit(1, period=1.0))
+        for i in range(50):
+            limiter.acquire(session_id=f"s{i}")
+            clock.now += 0.1
+        self.assertLessEqual(limiter.get_stats()["tracked_keys"], 11)
+
+    def test_invalid_limits(self):
+        with self.assertRaises(ValueError):
+            RateLimit(0)
+        with self.assertRaises(ValueError):
+            RateLimit(10, burst=0)
+        with self.assertRaises(ValueError):
+            RateLimit(10, algorithm="leaky")
+
+    def test_real_clock_wait_mode(self):
+        limiter = RateLimiter()
+        limiter.set_limit(SCOPE_MODEL, RateLimit(20, period=1.0, burst=1))
+        start = time.monotonic()
+        for _ in range(4):
+            limiter.acquire(model="m", mode=MODE_WAIT, timeout=1.0)
+        self.assertGreaterEqual(time.monotonic() - start, 0.14)
+
+
+class TestProductionRateLimits(unittest.TestCase):
+    """Rate limits applied by ProductionLLMInterface"""
+
+    def setUp(self):
+        self.server = OllamaStubServer().start()
+        self.addCleanup(self.server.stop)
+        self.llm = ProductionLLMInterface()
+        self.llm.register_provider(LLMProvider.OLLAMA, OllamaDispatcher(url=self.server.url))
+
+    def request(self, prompt, **kwargs):
+        kwargs.setdefault("cache_enabled", False)
+        return self.llm.process_request(LLMRequest(prompt=prompt, **kwargs))
+
+    def test_model_limit_from_config_falls_back(self):
+        self.llm.add_custom_model(ModelConfig(name="mistral:7b", provider=LLMProvider.OLLAMA,
+                                              rate_limit_rpm=1, rate_limit_burst=1))
+        first = self.request("one", model="mistral:7b", fallback_models=["llama3:8b"])
+        second = self.request("two", model="mistral:7b", fallback_models=["llama3:8b"])
+
+        self.assertEqual(first.model_used, "mistral:7b")
+        self.assertEqual(second.model_used, "llama3:8b")
+        self.assertEqual([r["model"] for r in self.server.requests], ["mistral:7b", "llama3:8b"])
+
+    def test_session_and_api_key_limits(self):
+        self.llm.set_rate_limit(SCOPE_SESSION, RateLimit(2, burst=2))
+        self.assertIsNotNone(self.request("a", model="llama3:8b", conversation_id="c1"))
+        self.assertIsNotNone(self.request("b", model="llama3:8b", conversation_id="c1"))
+        self.assertIsNone(self.request("c", model="llama3:8b", conversation_id="c1"))
+        self.assertIsNotNone(self.request("d", model="llama3:8b", conversation_id="c2"))
+
+        self.llm.set_rate_limit(SCOPE_API_KEY, RateLimit(1, burst=1), key="key-1")
+        self.assertIsNotNone(self.request("e", model="llama3:8b", metadata={"api_key": "key-1"}))
+        self.assertIsNone(self.request("f", model="llama3:8b", metadata={"api_key": "key-1"}))
+
+        stats = self.llm.get_usage_statistics()
+        self.assertEqual(stats["error_counts"]["RateLimitExceeded"], 2)
+        self.assertEqual(stats["rate_limits"]["rejected"], 2)
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_wait_mode_queues_until_timeout(self):
+        self.llm.set_rate_limit(SCOPE_SESSION, RateLimit(10, period=1.0, burst=1))
+        start = time.monotonic()
+        for prompt in ("a", "b", "c"):
+            response = self.request(prompt, model="llama3:8b", conversation_id="c1",
+                                    rate_limit_mode=MODE_WAIT, timeout=2.0)
+            self.assertIsNotNone(response)
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+
+        self.assertIsNone(self.request("d", model="llama3:8b", conversation_id="c1",
+                                       rate_limit_mode=MODE_WAIT, timeout=0.0))
+
+    def exhaust_models(self, *models, period=60.0):
+        for model in models:
+            self.llm.set_rate_limit(SCOPE_MODEL, RateLimit(1, period=period, burst=1), key=model)
+            self.llm.rate_limiter.acquire(model=model)
+
+    def test_model_rejection_leaves_session_budget(self):
+        self.llm.set_rate_limit(SCOPE_SESSION, RateLimit(2, burst=2))
+        self.exhaust_models("llama3:8b", "codellama:13b")
+
+        for prompt in ("a", "b"):
+            request = LLMRequest(prompt=prompt, model="llama3:8b", conversation_id="c1", cache_enabled=False)
+            self.assertIsNone(self.llm.process_request(request))
+            self.assertAlmostEqual(request.metadata["retry_after"], 60.0, delta=1.0)
+        self.assertEqual(self.server.requests, [])
+        self.assertEqual(self.llm.get_usage_statistics()["error_counts"], {"RateLimitExceeded": 2})
+
+        for model in ("llama3:8b", "codellama:13b"):
+            self.llm.set_rate_limit(SCOPE_MODEL, None, key=model)
+        self.assertIsNotNone(self.request("c", model="llama3:8b", conversation_id="c1"))
+        self.assertIsNotNone(self.request("d", model="llama3:8b", conversation_id="c1"))
+        self.assertIsNone(self.request("e", model="llama3:8b", conversation_id="c1"))
+
+    def test_wait_mode_bounded_by_request_timeout_across_fallbacks(self):
+        failing = OllamaStubServer(fail_models={"llama3:8b", "codellama:13b"}).start()
+        self.addCleanup(failing.stop)
+        self.llm.register_provider(LLMProvider.OLLAMA, OllamaDispatcher(url=failing.url))
+        self.exhaust_models("llama3:8b", period=0.3)
+        self.exhaust_models("codellama:13b", period=0.6)
+
+        start = time.monotonic()
+        self.assertIsNone(self.request("a", model="llama3:8b", rate_limit_mode=MODE_WAIT, timeout=0.5))
+        # Each wait fits the timeout alone, but after the first the fallback's
+        # remaining ~0.3s no longer fits what is left of the request's deadline
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual([r["model"] for r in failing.requests], ["llama3:8b"])
+
+    def test_disabled_model_limit(self):
+        self.llm.add_custom_model(ModelConfig(name="unlimited", provider=LLMProvider.OLLAMA,
+                                              rate_limit_rpm=None))
+        self.assertIsNone(self.llm.rate_limiter.get_limit(SCOPE_MODEL, "unlimited"))
+        self.assertIsNotNone(self.llm.rate_limiter.get_limit(SCOPE_MODEL, "llama3:8b"))
+
+
+if __name__ == '__main__':
+    unittest.main()
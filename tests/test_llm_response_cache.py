@@ -0,0 +1,187 @@
+"""
+Tests for the LLM response cache
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.ollama_stub import OllamaStubServer
+from jarvis.llm.dispatch import OllamaDispatcher
+from jarvis.llm.production_llm import LLMProvider, LLMRequest, ProductionLLMInterface
+from jarvis.llm.response_cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(unittest.TestCase):
+    """LRU, TTL, byte accounting and persistence"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        self.path = os.path.join(self.temp_dir, "llm_cache.db")
+        self.clock = FakeClock()
+
+    def test_lru_eviction_order(self):
+        cache = ResponseCache(max_entries=3, clock=self.clock)
+        for key in "abc":
+            cache.put(key, {"v": key})
+        cache.get("a")
+        cache.put("d", {"v": "d"})
+
+        self.assertNotIn("b", cache)
+        self.assertEqual([k for k in "acd" if k in cache], ["a", "c", "d"])
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_byte_limit(self):
+        cache = ResponseCache(max_entries=100, max_bytes=100, clock=self.clock)
+        cache.put("a", "x" * 40)
+        cache.put("b", "y" * 40)
+        self.assertEqual(cache.get_stats()["size_bytes"], 84)
+        cache.put("c", "z" * 40)
+        self.assertNotIn("a", cache)
+        cache.put("huge", "h" * 200)
+        self.assertNotIn("huge", cache)
+        self.assertLessEqual(cache.get_stats()["size_bytes"], 100)
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache(ttl_seconds=10, clock=self.clock)
+        cache.put("a", 1)
+        self.clock.now += 5
+        self.assertEqual(cache.get("a"), 1)
+        self.clock.now += 6
+        self.assertIsNone(cache.get("a"))
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["expirations"]), (1, 1, 1))
+
+    def test_hits_are_independent_copies(self):
+        cache = ResponseCache(clock=self.clock)
+        value = {"content": "hello", "metadata": {"tags": ["a"]}}
+        cache.put("k", value)
+        value["metadata"]["tags"].append("mutated-after-put")
+
+        first = cache.get("k")
+        first["metadata"]["tags"].append("mutated-after-get")
+        self.assertEqual(cache.get("k"), {"content": "hello", "metadata": {"tags": ["a"]}})
+
+    def test_persistence_survives_restart(self):
+        cache = ResponseCache(max_entries=3, path=self.path, clock=self.clock)
+        for key in "abcd":
+            self.clock.now += 1
+            cache.put(key, {"v": key})
+        self.clock.now += 1
+        cache.get("b")
+        cache.close()
+
+        reopened = ResponseCache(max_entries=3, path=self.path, clock=self.clock)
+        self.assertEqual(reopened.get_stats()["loaded"], 3)
+        self.assertNotIn("a", reopened)
+        self.assertEqual(reopened.get("c"), {"v": "c"})
+        # "b" was touched last before the restart, so "d" is now least recently used
+        reopened.put("e", {"v": "e"})
+        self.assertEqual([k for k in "bcde" if k in reopened], ["b", "c", "e"])
+        reopened.close()
+
+    def test_persistence_drops_expired_and_cleared(self):
+        cache = ResponseCache(ttl_seconds=60, path=self.path, clock=self.clock)
+        cache.put("old", 1)
+        self.clock.now += 30
+        cache.put("new", 2)
+        cache.close()
+
+        self.clock.now += 40
+        reopened = ResponseCache(ttl_seconds=60, path=self.path, clock=self.clock)
+        self.assertNotIn("old", reopened)
+        self.assertEqual(reopened.get("new"), 2)
+        reopened.clear()
+        reopened.close()
+
+        self.assertEqual(len(ResponseCache(path=self.path, clock=self.clock)), 0)
+
+    def test_concurrent_access(self):
+        cache = ResponseCache(max_entries=50, path=self.path)
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(200):
+                    cache.put(f"{n}-{i % 60}", {"n": n, "i": i})
+                    cache.get(f"{(n + 1) % 8}-{i % 60}")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        cache.close()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(cache), 50)
+        self.assertEqual(len(ResponseCache(max_entries=50, path=self.path)), 50)
+
+
+class TestProductionResponseCache(unittest.TestCase):
+    """ProductionLLMInterface cache integration"""
+
+    def setUp(self):
+        self.server = OllamaStubServer().start()
+        self.addCleanup(self.server.stop)
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        self.path = os.path.join(self.temp_dir, "llm_cache.db")
+
+    def make_llm(self, cache):
+        llm = ProductionLLMInterface(response_cache=cache)
+        llm.register_provider(LLMProvider.OLLAMA, OllamaDispatcher(url=self.server.url))
+        return llm
+
+    def test_cached_responses_are_private_copies(self):
+        llm = self.make_llm(ResponseCache())
+        original = llm.process_request(LLMRequest(prompt="hello", model="llama3:8b"))
+        first = llm.process_request(LLMRequest(prompt="hello", model="llama3:8b"))
+        second = llm.process_request(LLMRequest(prompt="hello", model="llama3:8b"))
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertFalse(original.cached)
+        self.assertTrue(first.cached and second.cached)
+        self.assertIsNot(first, second)
+        first.metadata["caller"] = "first"
+        first.content = "changed"
+        self.assertEqual(second.content, "echo: hello")
+        self.assertNotIn("caller", second.metadata)
+        self.assertEqual(second.provider_used, LLMProvider.OLLAMA)
+
+        stats = llm.get_usage_statistics()["cache_stats"]
+        self.assertEqual((stats["hits"], stats["misses"], stats["cached_responses"]), (2, 1, 1))
+        self.assertAlmostEqual(stats["cache_hit_rate"], 2 / 3)
+
+    def test_warm_cache_after_restart(self):
+        llm = self.make_llm(ResponseCache(path=self.path))
+        llm.process_request(LLMRequest(prompt="persist me", model="llama3:8b"))
+        llm.response_cache.close()
+
+        restarted = self.make_llm(ResponseCache(path=self.path))
+        response = restarted.process_request(LLMRequest(prompt="persist me", model="llama3:8b"))
+        self.assertTrue(response.cached)
+        self.assertEqual(response.content, "echo: persist me")
+        self.assertEqual(len(self.server.requests), 1)
+        restarted.clear_cache()
+        self.assertEqual(restarted.get_usage_statistics()["cache_stats"]["size"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+"""
+Tests for adaptive provider routing and hedging
+"""
+
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.provider_sim import SimClock, SimulatedProvider, run_simulation, spiky
+from jarvis.llm.providers import LLMOrchestrator, LLMRequest, RoutingConfig, TaskRouter
+from jarvis.llm.providers.base import ProviderType
+from jarvis.llm.providers.routing import ProviderPerformance
+
+
+class TestProviderPerformance(unittest.TestCase):
+    """Online latency model"""
+
+    def test_percentiles_and_ewma(self):
+        performance = ProviderPerformance(RoutingConfig(min_samples=5, ewma_alpha=0.5))
+        self.assertEqual(performance.predict(prior=3.0), 3.0)
+
+        for latency in [1.0, 1.0, 1.0, 1.0, 9.0]:
+            performance.observe(latency, True)
+        self.assertTrue(performance.calibrated)
+        self.assertEqual(performance.percentile(0.5), 1.0)
+        self.assertEqual(performance.predict(0.95), 9.0)
+        self.assertEqual(performance.ewma_latency, 5.0)
+
+        performance.observe(30.0, False)
+        self.assertEqual(performance.success_rate, 0.5)
+        self.assertEqual(performance.predict(0.95), 9.0)  # failures do not shape latency
+
+    def test_uncalibrated_prediction_respects_slow_observations(self):
+        performance = ProviderPerformance(RoutingConfig(min_samples=10))
+        performance.observe(6.0, True)
+        self.assertEqual(performance.predict(prior=2.0), 6.0)
+
+    def test_config_validation(self):
+        with self.assertRaises(ValueError):
+            RoutingConfig(quantile=1.5)
+        with self.assertRaises(ValueError):
+            RoutingConfig(ewma_alpha=0)
+
+
+class TestCapabilityCache(unittest.TestCase):
+    """Capability descriptors are not rebuilt per request"""
+
+    def test_capabilities_cached_until_ttl(self):
+        clock = SimClock()
+        router = TaskRouter(RoutingConfig(capability_ttl=60), clock=clock)
+        providers = [SimulatedProvider("a"), SimulatedProvider("b", provider_type=ProviderType.MISTRAL)]
+
+        for _ in range(20):
+            router.select_provider(LLMRequest(prompt="hello"), providers)
+        self.assertEqual([p.capability_calls for p in providers], [1, 1])
+
+        clock.advance(61)
+        router.select_provider(LLMRequest(prompt="hello"), providers)
+        self.assertEqual([p.capability_calls for p in providers], [2, 2])
+
+        router.invalidate(providers[0])
+        router.select_provider(LLMRequest(prompt="hello"), providers)
+        self.assertEqual([p.capability_calls for p in providers], [3, 2])
+        self.assertGreater(router.get_stats()["capability_cache"]["hit_rate"], 0.8)
+
+
+class TestAdaptiveRouting(unittest.TestCase):
+    """Routing decisions driven by learned latency, cost and success"""
+
+    def setUp(self):
+        self.clock = SimClock()
+        self.orchestrator = LLMOrchestrator(RoutingConfig(hedge=False), clock=self.clock)
+
+    def register(self, *providers):
+        for provider in providers:
+            self.orchestrator.register_provider(provider.name, provider)
+
+    def test_learns_to_avoid_heavy_tail(self):
+        # Same mean latency (2s), very different tails
+        spiky_provider = SimulatedProvider("spiky", spiky(0.5, 8.0, 0.2), clock=self.clock, seed=1)
+        steady_provider = SimulatedProvider("steady", 2.0, clock=self.clock)
+        self.register(spiky_provider, steady_provider)
+
+        result = run_simulation(self.orchestrator, 200, clock=self.clock)
+
+        self.assertEqual(result["successes"], 200)
+        self.assertGreater(result["served"]["steady"], 180)
+        self.assertLessEqual(result["p95"], 2.0)
+        routing = self.orchestrator.get_orchestrator_stats()["routing"]["providers"]
+        spiky_stats = next(v for k, v in routing.items() if k.startswith("ollama") and v["p95_latency"] == 8.0)
+        self.assertEqual(spiky_stats["observations"], spiky_provider.calls)
+
+    def test_latency_and_cost_constraints(self):
+        fast_paid = SimulatedProvider("fast-paid", 0.5, cost=0.05, provider_type=ProviderType.MISTRAL,
+                                      clock=self.clock)
+        slow_free = SimulatedProvider("slow-free", 4.0, clock=self.clock)
+        self.register(fast_paid, slow_free)
+        for name in ("fast-paid", "slow-free"):
+            self.orchestrator.generate_response(LLMRequest(prompt="warm up"), preferred_provider=name)
+        self.assertEqual(run_simulation(self.orchestrator, 5, clock=self.clock)["served"], {"slow-free": 5})
+
+        served = run_simulation(self.orchestrator, 10, preferences={"max_latency": 1.0},
+                                clock=self.clock)["served"]
+        self.assertEqual(served, {"fast-paid": 10})
+
+        served = run_simulation(self.orchestrator, 10, preferences={"max_latency": 1.0, "max_cost": 0.01},
+                                clock=self.clock)["served"]
+        self.assertEqual(len(served), 1)  # unsatisfiable: constraints relaxed, still routed
+
+        request = LLMRequest(prompt="hello", metadata={"max_latency": 1.0})
+        self.assertEqual(self.orchestrator.generate_response(request).model, "fast-paid")
+
+    def test_failing_provider_loses_traffic(self):
+        flaky = SimulatedProvider("flaky", 0.5, failure_rate=1.0, clock=self.clock)
+        healthy = SimulatedProvider("healthy", 0.5, provider_type=ProviderType.MISTRAL, clock=self.clock)
+        self.register(flaky, healthy)
+        self.orchestrator.set_fallback_chain(["healthy"])
+
+        result = run_simulation(self.orchestrator, 50, clock=self.clock)
+
+        self.assertEqual(result["successes"], 50)
+        self.assertLess(flaky.calls, 10)
+
+
+class TestHedging(unittest.TestCase):
+    """Requests that outlive the predicted tail are hedged"""
+
+    def setUp(self):
+        config = RoutingConfig(min_samples=5, min_hedge_delay=0.01)
+        self.orchestrator = LLMOrchestrator(config)
+        self.addCleanup(self.orchestrator.shutdown)
+        self.primary = SimulatedProvider("primary", 0.02)
+        self.backup = SimulatedProvider("backup", 0.02, provider_type=ProviderType.MISTRAL)
+        self.orchestrator.register_provider("primary", self.primary)
+        self.orchestrator.register_provider("backup", self.backup)
+
+    def test_slow_primary_is_hedged(self):
+        # Before calibration nothing is hedged
+        for _ in range(5):
+            self.assertEqual(self.orchestrator.generate_response(LLMRequest(prompt="hi")).model, "primary")
+        self.assertEqual(self.backup.calls, 0)
+
+        self.primary.latency = 0.5
+        start = time.monotonic()
+        response = self.orchestrator.generate_response(LLMRequest(prompt="hi"))
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(response.model, "backup")
+        self.assertLess(elapsed, 0.3)
+        stats = self.orchestrator.get_orchestrator_stats()
+        self.assertEqual((stats["hedged_requests"], stats["hedge_wins"]), (1, 1))
+        self.assertEqual(stats["successful_requests"], 6)
+
+    def test_hedging_can_be_disabled(self):
+        self.orchestrator.task_router.config.hedge = False
+        for _ in range(6):
+            self.orchestrator.generate_response(LLMRequest(prompt="hi"))
+        self.primary.latency = 0.2
+        self.assertEqual(self.orchestrator.generate_response(LLMRequest(prompt="hi")).model, "primary")
+        self.assertEqual(self.orchestrator.get_orchestrator_stats()["hedged_requests"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,212 @@
+"""
+Tests for single-flight request coalescing
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.ollama_stub import OllamaStubServer
+from jarvis.llm import llm_interface
+from jarvis.llm.dispatch import OllamaDispatcher
+from jarvis.llm.production_llm import LLMProvider, LLMRequest, ProductionLLMInterface
+from jarvis.llm.single_flight import SingleFlight
+
+
+def run_threads(count, target):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(i):
+        barrier.wait()
+        results[i] = target(i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Coalescing semantics for threads and coroutines"""
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.calls = 0
+        self.release = threading.Event()
+
+    def slow_call(self):
+        self.calls += 1
+        self.release.wait(2)
+        return {"value": 42}
+
+    def test_threads_share_one_execution(self):
+        threading.Timer(0.1, self.release.set).start()
+        results = run_threads(10, lambda i: self.flight.do("k", self.slow_call))
+
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(value == {"value": 42} for value, _ in results))
+        self.assertEqual(sorted(shared for _, shared in results), [False] + [True] * 9)
+        self.assertEqual(self.flight.get_stats(),
+                         {"executions": 1, "coalesced": 9, "errors": 0, "in_flight": 0})
+
+    def test_errors_are_shared_and_key_is_released(self):
+        def failing():
+            time.sleep(0.1)
+            raise ValueError("backend down")
+
+        def call(i):
+            try:
+                self.flight.do("k", failing)
+            except ValueError as e:
+                return str(e)
+
+        self.assertEqual(run_threads(5, call), ["backend down"] * 5)
+        self.assertEqual(self.flight.get_stats()["errors"], 1)
+        # The failed flight is gone; the next call executes again
+        self.assertEqual(self.flight.do("k", lambda: "ok"), ("ok", False))
+
+    def test_distinct_keys_do_not_coalesce(self):
+        self.release.set()
+        run_threads(4, lambda i: self.flight.do(f"k{i}", self.slow_call))
+        self.assertEqual(self.calls, 4)
+
+    def test_follower_timeout(self):
+        leader = threading.Thread(target=self.flight.do, args=("k", self.slow_call))
+        leader.start()
+        time.sleep(0.05)
+        with self.assertRaises(TimeoutError):
+            self.flight.do("k", self.slow_call, timeout=0.05)
+        self.release.set()
+        leader.join()
+        self.assertEqual(self.calls, 1)
+
+    def test_reentrant_leader_does_not_deadlock(self):
+        def outer():
+            return self.flight.do("k", lambda: "inner")[0] + "+outer"
+        self.assertEqual(self.flight.do("k", outer), ("inner+outer", False))
+
+    def test_coroutines_and_threads_share_one_execution(self):
+        async def fetch():
+            self.calls += 1
+            await asyncio.sleep(0.15)
+            return "async result"
+
+        thread_results = []
+
+        async def run():
+            tasks = [asyncio.create_task(self.flight.do_async("k", fetch)) for _ in range(5)]
+            await asyncio.sleep(0.02)
+            thread = threading.Thread(target=lambda: thread_results.append(self.flight.do("k", fetch)))
+            thread.start()
+            results = await asyncio.gather(*tasks)
+            thread.join()
+            return results
+
+        results = asyncio.run(run())
+        self.assertEqual(self.calls, 1)
+        self.assertEqual([value for value, _ in results], ["async result"] * 5)
+        self.assertEqual(thread_results, [("async result", True)])
+
+    def test_cancelled_follower_does_not_cancel_the_flight(self):
+        async def fetch():
+            await asyncio.sleep(0.1)
+            return "done"
+
+        async def run():
+            leader = asyncio.create_task(self.flight.do_async("k", fetch))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(self.flight.do_async("k", fetch))
+            await asyncio.sleep(0.01)
+            follower.cancel()
+            return await leader
+
+        self.assertEqual(asyncio.run(run()), ("done", False))
+
+
+class TestCoalescedLLMCalls(unittest.TestCase):
+    """Coalescing in query_llm and ProductionLLMInterface"""
+
+    def setUp(self):
+        self.server = OllamaStubServer(delay=0.2).start()
+        self.addCleanup(self.server.stop)
+
+    def test_query_llm_coalesces_identical_prompts(self):
+        before = llm_interface.get_coalescing_stats()["coalesced"]
+        results = run_threads(8, lambda i: llm_interface.query_llm("verify: sky is blue",
+                                                                   url=self.server.url))
+        self.assertEqual(results, ["echo: verify: sky is blue"] * 8)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(llm_interface.get_coalescing_stats()["coalesced"] - before, 7)
+
+        # Different parameters are different requests
+        run_threads(2, lambda i: llm_interface.query_llm("verify: sky is blue", url=self.server.url,
+                                                         temperature=0.1 * i))
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_async_query_llm_coalesces(self):
+        async def run():
+            return await asyncio.gather(*[
+                llm_interface.async_query_llm("same prompt", url=self.server.url) for _ in range(6)
+            ])
+
+        self.assertEqual(asyncio.run(run()), ["echo: same prompt"] * 6)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_production_interface_coalesces_with_private_copies(self):
+        llm = ProductionLLMInterface()
+        llm.register_provider(LLMProvider.OLLAMA, OllamaDispatcher(url=self.server.url))
+
+        responses = run_threads(6, lambda i: llm.process_request(
+            LLMRequest(prompt="duplicate", model="llama3:8b", cache_enabled=False)))
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual({r.content for r in responses}, {"echo: duplicate"})
+        self.assertEqual(len({id(r) for r in responses}), 6)
+        self.assertEqual(sum(bool(r.metadata.get("coalesced")) for r in responses), 5)
+
+        stats = llm.get_usage_statistics()
+        self.assertEqual(stats["coalesced_requests"], 5)
+        self.assertEqual(stats["successful_requests"], 6)
+        self.assertEqual(stats["model_usage"]["llama3:8b"]["requests"], 1)
+        self.assertEqual(stats["coalescing"]["coalesced"], 5)
+
+    def test_production_async_and_opt_out(self):
+        llm = ProductionLLMInterface()
+        llm.register_provider(LLMProvider.OLLAMA, OllamaDispatcher(url=self.server.url))
+
+        async def run():
+            return await asyncio.gather(*[
+                llm.process_request_async(LLMRequest(prompt="async dup", model="llama3:8b",
+                                                     cache_enabled=False))
+                for _ in range(4)
+            ])
+
+        self.assertEqual({r.content for r in asyncio.run(run())}, {"echo: async dup"})
+        self.assertEqual(len(self.server.requests), 1)
+
+        run_threads(3, lambda i: llm.process_request(
+            LLMRequest(prompt="fresh", model="llama3:8b", cache_enabled=False, coalesce=False)))
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_shared_failure(self):
+        llm = ProductionLLMInterface()
+        llm.register_provider(LLMProvider.OLLAMA, OllamaDispatcher(url=self.server.url))
+        self.server._server.fail_models.update(llm.models)
+
+        responses = run_threads(4, lambda i: llm.process_request(
+            LLMRequest(prompt="doomed", model="llama3:8b", cache_enabled=False)))
+        self.assertEqual(responses, [None] * 4)
+        self.assertEqual(llm.get_usage_statistics()["failed_requests"], 4)
+        self.assertEqual(len(self.server.requests), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,225 @@
+"""
+Tests for end-to-end token streaming
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.ollama_stub import OllamaStubServer
+from jarvis.llm.llm_interface import OllamaLLMInterface
+from jarvis.llm.providers.base import LLMRequest
+from jarvis.llm.providers.ollama_provider import OllamaProvider
+from jarvis.llm.streaming import StreamError, iter_ollama_stream, parse_ollama_line, sse_event, stream_ollama
+from jarvis.llm.transport import get_async_transport
+
+
+def collect(async_iterable):
+    async def run():
+        return [item async for item in async_iterable]
+    return asyncio.run(run())
+
+
+class TestStreamingPrimitives(unittest.TestCase):
+    """NDJSON parsing and SSE framing"""
+
+    def test_parse_ollama_line(self):
+        chunk = parse_ollama_line('{"model": "m", "response": "Hi", "done": false}', 3)
+        self.assertEqual((chunk.text, chunk.index, chunk.done, chunk.model), ("Hi", 3, False, "m"))
+        self.assertIsNone(parse_ollama_line('{"response": "", "done": false}', 0))
+        self.assertTrue(parse_ollama_line('{"response": "", "done": true}', 4).done)
+        with self.assertRaises(StreamError):
+            parse_ollama_line('{"error": "model not found"}', 0)
+
+    def test_sse_event(self):
+        self.assertEqual(sse_event({"content": "a"}, event="token", event_id=1),
+                         'id: 1\nevent: token\ndata: {"content": "a"}\n\n')
+        self.assertEqual(sse_event("line one\nline two"), "data: line one\ndata: line two\n\n")
+
+
+class TestOllamaStreaming(unittest.TestCase):
+    """Streaming against the stub server"""
+
+    def setUp(self):
+        self.server = OllamaStubServer(token_delay=0.05).start()
+        self.addCleanup(self.server.stop)
+
+    def test_first_token_arrives_before_generation_ends(self):
+        async def run():
+            start = time.monotonic()
+            arrivals = []
+            async for chunk in stream_ollama("one two three four five six", url=self.server.url):
+                arrivals.append((time.monotonic() - start, chunk))
+            return arrivals
+
+        arrivals = asyncio.run(run())
+        chunks = [chunk for _, chunk in arrivals]
+        self.assertEqual("".join(c.text for c in chunks), "echo: one two three four five six")
+        self.assertEqual([c.index for c in chunks], list(range(len(chunks))))
+        self.assertTrue(chunks[-1].done)
+        time_to_first_token, total = arrivals[0][0], arrivals[-1][0]
+        self.assertLess(time_to_first_token, total / 3)
+        self.assertEqual(self.server.requests[-1]["stream"], True)
+
+    def test_blocking_stream(self):
+        chunks = list(iter_ollama_stream("a b c", url=self.server.url))
+        self.assertEqual("".join(c.text for c in chunks), "echo: a b c")
+        self.assertTrue(chunks[-1].done)
+
+    def test_closing_early_aborts_upstream(self):
+        async def run():
+            chunks = stream_ollama(" ".join(f"w{i}" for i in range(40)), url=self.server.url)
+            received = []
+            async for chunk in chunks:
+                received.append(chunk.text)
+                if len(received) == 2:
+                    break
+            await chunks.aclose()
+            # The abandoned connection is not returned to the pool
+            rest = [c.text async for c in stream_ollama("x y", url=self.server.url)]
+            return received, rest, get_async_transport().get_stats()
+
+        received, rest, stats = asyncio.run(run())
+        self.assertEqual(received, ["echo:", " w0"])
+        self.assertEqual("".join(rest), "echo: x y")
+        self.assertEqual(stats["connections_opened"], 2)
+        deadline = time.monotonic() + 3
+        while self.server.aborted_streams == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self.server.aborted_streams, 1)
+
+
+class TestInterfaceStreaming(unittest.TestCase):
+    """OllamaLLMInterface.stream_response archiving and history"""
+
+    def setUp(self):
+        self.server = OllamaStubServer(token_delay=0.01).start()
+        self.addCleanup(self.server.stop)
+        self.interface = OllamaLLMInterface(base_url=self.server.url)
+        patcher = patch("jarvis.llm.llm_interface._archive_response")
+        self.archive = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def archived(self, prompt):
+        # Background threads left by other tests may archive their own prompts
+        return [c for c in self.archive.call_args_list if c[0][0] == prompt]
+
+    def test_completed_stream_is_archived_once(self):
+        chunks = collect(self.interface.stream_response("tell me a story"))
+        self.assertEqual("".join(c.text for c in chunks), "echo: tell me a story")
+        archived = self.archived("tell me a story")
+        self.assertEqual(len(archived), 1)
+        self.assertEqual(archived[0][0][1], "echo: tell me a story")
+        history = self.interface.get_conversation_history()
+        self.assertEqual(history[-1]["response"], "echo: tell me a story")
+        self.assertEqual(self.interface.response_stats["successful_requests"], 1)
+
+    def test_abandoned_stream_is_not_archived(self):
+        async def run():
+            stream = self.interface.stream_response("one two three four five")
+            async for _ in stream:
+                break
+            await stream.aclose()
+
+        asyncio.run(run())
+        self.assertEqual(self.archived("one two three four five"), [])
+        self.assertEqual(self.interface.get_conversation_history(), [])
+        stats = self.interface.response_stats
+        self.assertEqual((stats["total_requests"], stats["cancelled_requests"]), (1, 1))
+        self.assertEqual((stats["successful_requests"], stats["failed_requests"]), (0, 0))
+        self.assertEqual(stats["average_response_time"], 0.0)
+
+    def test_failed_stream(self):
+        self.server._server.fail_models.add("broken")
+        with self.assertRaises(Exception):
+            collect(self.interface.stream_response("hello", model="broken"))
+        self.assertEqual(self.archived("hello"), [])
+        self.assertEqual(self.interface.response_stats["failed_requests"], 1)
+
+
+class TestProviderStreaming(unittest.TestCase):
+    """OllamaProvider partial responses"""
+
+    def setUp(self):
+        self.server = OllamaStubServer().start()
+        self.addCleanup(self.server.stop)
+        self.provider = OllamaProvider(base_url=self.server.url.rsplit("/api/generate", 1)[0])
+
+    def test_capabilities_and_url(self):
+        self.assertTrue(self.provider.get_capabilities().supports_streaming)
+        self.assertEqual(self.provider.generate_url, self.server.url)
+
+    def test_sync_and_async_streams(self):
+        for responses in (list(self.provider.stream_response(LLMRequest(prompt="a b"))),
+                          collect(self.provider.astream_response(LLMRequest(prompt="a b")))):
+            partials, final = responses[:-1], responses[-1]
+            self.assertEqual([r.content for r in partials], ["echo:", " a", " b"])
+            self.assertTrue(all(r.metadata["is_partial"] for r in partials))
+            self.assertEqual(partials[-1].metadata["accumulated_content"], "echo: a b")
+            self.assertEqual(final.content, "echo: a b")
+            self.assertTrue(final.metadata["is_final"] and final.is_successful)
+        self.assertEqual(self.provider.request_count, 2)
+
+    def test_stream_error_is_reported_in_final_response(self):
+        self.server._server.fail_models.add("llama3:8b")
+        final = collect(self.provider.astream_response(LLMRequest(prompt="hi")))[-1]
+        self.assertFalse(final.is_successful)
+        self.assertIn("500", final.error)
+        self.assertEqual(self.provider.error_count, 1)
+
+
+class TestStreamingAPI(unittest.TestCase):
+    """SSE and WebSocket endpoints"""
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            from fastapi.testclient import TestClient
+            from jarvis.api import enhanced_api
+        except Exception as e:
+            raise unittest.SkipTest(f"API dependencies not available: {e}")
+        cls.api = enhanced_api
+        cls.TestClient = TestClient
+
+    def setUp(self):
+        self.server = OllamaStubServer().start()
+        self.addCleanup(self.server.stop)
+        patcher = patch.object(self.api, "llm_interface", OllamaLLMInterface(base_url=self.server.url))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = self.TestClient(self.api.app)
+
+    def test_sse_endpoint(self):
+        with self.client.stream("POST", "/api/chat/stream",
+                                json={"message": "hello there", "include_context": False}) as response:
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+            body = "".join(response.iter_text())
+
+        events = [block for block in body.strip().split("\n\n")]
+        tokens = [json.loads(e.split("data: ", 1)[1]) for e in events if "event: token" in e]
+        self.assertEqual("".join(t["content"] for t in tokens), "echo: hello there")
+        self.assertIn("event: done", events[-1])
+
+    def test_websocket_stream_frames(self):
+        with self.client.websocket_connect("/ws/test-session") as websocket:
+            websocket.send_text(json.dumps({"type": "chat_message", "content": "hi you"}))
+            frames = [json.loads(websocket.receive_text())]
+            while frames[-1]["type"] != "chat_response":
+                frames.append(json.loads(websocket.receive_text()))
+
+        self.assertEqual(frames[0]["type"], "chat_stream_start")
+        tokens = [f["content"] for f in frames if f["type"] == "chat_token"]
+        self.assertEqual("".join(tokens), "echo: hi you")
+        self.assertEqual(frames[-1]["content"], "echo: hi you")
+        self.assertTrue(frames[-1]["done"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+"""
+Tests for the pooled LLM HTTP transport against a local Ollama stub
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import requests
+import threading
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.ollama_stub import OllamaStubServer
+from jarvis.llm import llm_interface
+from jarvis.llm.transport import (
+    AsyncHTTPTransport, DeadlineExceeded, HTTPTransport, TransportConfig,
+    configure_transport, deadline_scope, remaining_time
+)
+
+
+class TestHTTPTransport(unittest.TestCase):
+    """Test the synchronous pooled transport"""
+
+    def setUp(self):
+        self.server = OllamaStubServer().start()
+        self.addCleanup(self.server.stop)
+        self.transport = configure_transport(TransportConfig(max_per_host=2, backoff_base=0.05))
+        self.addCleanup(configure_transport, TransportConfig.from_env())
+
+    def test_query_llm_reuses_one_connection(self):
+        for i in range(20):
+            result = llm_interface.query_llm(f"prompt {i}", url=self.server.url)
+            self.assertEqual(result, f"echo: prompt {i}")
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.server.requests[0]["options"]["num_predict"], 512)
+
+    def test_concurrency_is_capped_per_host(self):
+        self.server._server.delay = 0.05
+        results = []
+
+        def worker(i):
+            results.append(llm_interface.query_llm(f"p{i}", url=self.server.url))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(r.startswith("echo:") for r in results))
+        self.assertLessEqual(self.server.peak_in_flight, 2)
+        self.assertLessEqual(self.server.connections, 2)
+
+    def test_streaming_yields_ndjson_lines(self):
+        lines = list(llm_interface.query_llm("one two three", stream=True, url=self.server.url))
+        words = "".join(json.loads(line)["response"] for line in lines)
+        self.assertEqual(words, "echo: one two three")
+
+    def test_failed_stream_closes_response(self):
+        url = self.server.url
+        with patch.object(requests.Response, "close", autospec=True,
+                          side_effect=requests.Response.close) as close:
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.transport.stream_lines(url, {"prompt": "[fail]", "stream": True})
+        close.assert_called_once()
+        # The host slot was released along with the connection
+        self.assertEqual(self.transport.post_json(url, {"prompt": "ok"})["response"], "echo: ok")
+
+    def test_deadline_bounds_slow_requests(self):
+        self.server._server.delay = 1.0
+        start = time.monotonic()
+        with deadline_scope(0.2):
+            result = llm_interface.query_llm("slow", url=self.server.url, timeout=30)
+        self.assertEqual(result, "[LLM ERROR: timeout]")
+        self.assertLess(time.monotonic() - start, 0.9)
+
+    def test_expired_deadline_fails_fast(self):
+        with deadline_scope(0.5):
+            with deadline_scope(5):
+                self.assertLessEqual(remaining_time(), 0.5)
+            with deadline_scope(-1):
+                with self.assertRaises(DeadlineExceeded):
+                    self.transport.post_json(self.server.url, {"prompt": "x"})
+        self.assertIsNone(remaining_time())
+
+    def test_connect_errors_are_retried_with_backoff(self):
+        port = OllamaStubServer.free_port()
+        late_server = OllamaStubServer(port=port)
+        timer = threading.Timer(0.3, late_server.start)
+        timer.start()
+        self.addCleanup(late_server.stop)
+
+        transport = HTTPTransport(TransportConfig(max_retries=20, backoff_base=0.05, backoff_max=0.1))
+        data = transport.post_json(f"http://127.0.0.1:{port}/api/generate", {"prompt": "late"})
+        timer.join()
+        self.assertEqual(data["response"], "echo: late")
+        self.assertGreater(transport.get_stats()["retries"], 0)
+
+    def test_connection_refused_gives_up(self):
+        url = f"http://127.0.0.1:{OllamaStubServer.free_port()}/api/generate"
+        self.assertIn("LLM ERROR", llm_interface.query_llm("x", url=url))
+
+        transport = HTTPTransport(TransportConfig(max_retries=2, backoff_base=0.01))
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            transport.post_json(url, {"prompt": "x"})
+        self.assertEqual(transport.get_stats()["connect_errors"], 3)
+        self.assertEqual(transport.get_stats()["retries"], 2)
+
+    def test_interface_uses_its_base_url(self):
+        interface = llm_interface.OllamaLLMInterface(base_url=self.server.url)
+        self.assertEqual(interface.generate_response("hello"), "echo: hello")
+        self.assertEqual(len(self.server.requests), 1)
+
+
+class TestAsyncHTTPTransport(unittest.TestCase):
+    """Test the asyncio transport twin"""
+
+    def setUp(self):
+        self.server = OllamaStubServer(delay=0.02).start()
+        self.addCleanup(self.server.stop)
+
+    def test_concurrent_requests_share_pooled_connections(self):
+        async def run():
+            transport = AsyncHTTPTransport(TransportConfig(max_per_host=3))
+            results = await asyncio.gather(*[
+                transport.post_json(self.server.url, {"prompt": f"p{i}"}) for i in range(12)
+            ])
+            await transport.close()
+            return transport, results
+
+        transport, results = asyncio.run(run())
+        self.assertEqual(sorted(r["response"] for r in results),
+                         sorted(f"echo: p{i}" for i in range(12)))
+        self.assertLessEqual(self.server.peak_in_flight, 3)
+        self.assertEqual(transport.get_stats()["connections_opened"], 3)
+        self.assertEqual(self.server.connections, 3)
+
+    def test_async_query_llm_and_streaming(self):
+        async def run():
+            text = await llm_interface.async_query_llm("hi there", url=self.server.url)
+            stream = await llm_interface.async_query_llm("a b c", stream=True, url=self.server.url)
+            lines = [line async for line in stream]
+            return text, lines
+
+        text, lines = asyncio.run(run())
+        self.assertEqual(text, "echo: hi there")
+        self.assertEqual("".join(json.loads(line)["response"] for line in lines), "echo: a b c")
+
+    def test_async_deadline(self):
+        self.server._server.delay = 1.0
+
+        async def run():
+            transport = AsyncHTTPTransport()
+            with deadline_scope(0.2):
+                with self.assertRaises(DeadlineExceeded):
+                    await transport.post_json(self.server.url, {"prompt": "slow"})
+            await transport.close()
+
+        start = time.monotonic()
+        asyncio.run(run())
+        self.assertLess(time.monotonic() - start, 0.9)
+
+
+if __name__ == '__main__':
+    unittest.main()
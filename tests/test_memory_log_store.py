@@ -0,0 +1,176 @@
+"""
+Tests for the log-structured fact memory store
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import tempfile
+import subprocess
+import unittest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import jarvis.memory.memory as memory
+from jarvis.memory.log_store import LogStructuredStore, encode_record, OP_SET
+
+WRITER_SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+from jarvis.memory.log_store import LogStructuredStore
+store = LogStructuredStore({path!r}, fsync_interval_ms=5, compact_min_bytes=64 * 1024)
+i = 0
+while True:
+    store.set("k%d" % i, "value-%d-" % i + "x" * (i % 300))
+    i += 1
+"""
+
+
+class TestLogStructuredStore(unittest.TestCase):
+    """Test appends, recovery and compaction"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "mem.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def open_store(self, **kwargs):
+        store = LogStructuredStore(self.path, **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def test_writes_append_and_survive_reopen(self):
+        store = self.open_store()
+        store.set("a", "1")
+        store.set("b", "2")
+        store.delete("a")
+        self.assertFalse(os.path.exists(self.path))
+        store.close()
+
+        reopened = self.open_store()
+        self.assertEqual(reopened.to_dict(), {"b": "2"})
+        self.assertEqual(reopened.stats["recovered_records"], 3)
+
+    def test_torn_and_corrupt_tail_is_truncated(self):
+        store = self.open_store()
+        store.set("a", "1")
+        store.set("b", "2")
+        store.close()
+
+        valid_size = os.path.getsize(store.log_path)
+        corrupt = bytearray(encode_record(OP_SET, "c", "3"))
+        corrupt[-1] ^= 0xFF
+        with open(store.log_path, "ab") as f:
+            f.write(bytes(corrupt))
+            f.write(encode_record(OP_SET, "d", "4")[:7])
+
+        reopened = self.open_store()
+        self.assertEqual(reopened.to_dict(), {"a": "1", "b": "2"})
+        self.assertEqual(os.path.getsize(store.log_path), valid_size)
+
+        reopened.set("e", "5")
+        reopened.close()
+        self.assertEqual(self.open_store().get("e"), "5")
+
+    def test_compaction_writes_snapshot_and_empties_log(self):
+        store = self.open_store(compact_min_bytes=0)
+        for i in range(50):
+            store.set(f"k{i}", i)
+        store.delete("k0")
+        store.compact()
+
+        with open(self.path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        self.assertEqual(len(snapshot), 49)
+        self.assertEqual(os.path.getsize(store.log_path), 0)
+        self.assertFalse(os.path.exists(store.rotated_log_path))
+
+        store.set("after", True)
+        store.close()
+        self.assertEqual(len(self.open_store()), 50)
+
+    def test_interrupted_compaction_is_recovered(self):
+        store = self.open_store()
+        store.set("a", "old")
+        store.close()
+        os.replace(store.log_path, store.rotated_log_path)
+        with open(store.log_path, "wb") as f:
+            f.write(encode_record(OP_SET, "a", "new"))
+            f.write(encode_record(OP_SET, "b", "2"))
+
+        reopened = self.open_store()
+        self.assertEqual(reopened.to_dict(), {"a": "new", "b": "2"})
+        self.assertFalse(os.path.exists(reopened.rotated_log_path))
+
+    def test_writer_killed_mid_append_keeps_a_consistent_prefix(self):
+        script = WRITER_SCRIPT.format(root=PROJECT_ROOT, path=self.path)
+        writer = subprocess.Popen([sys.executable, "-c", script])
+        try:
+            deadline = time.time() + 30
+            log_path = f"{self.path}.log"
+            # Let it run through at least one compaction before killing it
+            while time.time() < deadline and not os.path.exists(self.path):
+                time.sleep(0.01)
+            time.sleep(0.2)
+        finally:
+            writer.send_signal(signal.SIGKILL)
+            writer.wait()
+        self.assertTrue(os.path.exists(self.path))
+
+        store = self.open_store()
+        data = store.to_dict()
+        self.assertGreater(len(data), 0)
+        # Keys are written in order, so the survivors must be exactly k0..kN-1
+        for i in range(len(data)):
+            self.assertEqual(data[f"k{i}"], f"value-{i}-" + "x" * (i % 300))
+
+        store.set("after_crash", "ok")
+        store.close()
+        self.assertEqual(self.open_store().get("after_crash"), "ok")
+        self.assertTrue(os.path.exists(log_path))
+
+
+class TestFactMemoryFunctions(unittest.TestCase):
+    """Test that memory.py keeps its API on top of the log store"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.original_memory_file = memory.MEMORY_FILE
+        memory.MEMORY_FILE = os.path.join(self.temp_dir, "facts.json")
+
+    def tearDown(self):
+        memory._close_stores()
+        memory._stores.pop(os.path.abspath(memory.MEMORY_FILE), None)
+        memory.MEMORY_FILE = self.original_memory_file
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_facts_persist_without_rewriting_snapshot(self):
+        memory.save_memory({"seed": "value"})
+        snapshot_mtime = os.stat(memory.MEMORY_FILE).st_mtime_ns
+
+        self.assertIn("[OK]", memory.remember_fact("color to blue"))
+        self.assertIn("[TRASH]", memory.forget_fact("seed"))
+        self.assertEqual(os.stat(memory.MEMORY_FILE).st_mtime_ns, snapshot_mtime)
+
+        memory._close_stores()
+        memory._stores.clear()
+        self.assertEqual(memory.recall_fact("color"), "blue")
+        self.assertEqual(memory.load_memory(), {"color": "blue"})
+
+    def test_external_file_changes_are_picked_up(self):
+        memory.remember_fact("a to 1")
+        memory.save_memory({"b": "2"})
+        with open(memory.MEMORY_FILE, "w", encoding="utf-8") as f:
+            json.dump({"c": "3", "padding": "x" * 10}, f)
+        self.assertEqual(memory.recall_fact("c"), "3")
+        self.assertIn("[QUESTION]", memory.recall_fact("b"))
+
+
+if __name__ == '__main__':
+    unittest.main()
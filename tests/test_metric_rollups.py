@@ -0,0 +1,180 @@
+"""
+Tests for tiered metric rollups, retention and history queries
+"""
+
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.monitoring.metric_rollups import DAY, HOUR, MetricRollups, RollupTier, to_timestamp
+from jarvis.utils.quantile_sketch import QuantileSketch
+from jarvis.monitoring.realtime_metrics import MetricStorage, MetricValue
+
+# A UTC midnight, so that day buckets line up with the test data
+BASE = 1_700_006_400
+
+
+class RollupTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.storage = MetricStorage(os.path.join(self.temp_dir, "metrics.db"), flush_interval=60)
+        self.addCleanup(self.storage.close)
+        self.rollups = self.storage.rollups
+
+    def record(self, metric_name, epoch, value):
+        self.storage.store_metric(metric_name, MetricValue(
+            timestamp=to_timestamp(epoch), value=value, labels={}, source="test", metadata={}
+        ))
+
+    def compact(self, now):
+        self.storage.flush()
+        return self.rollups.compact(now=now)
+
+    def buckets(self, tier, metric_name="latency"):
+        query = self.rollups.query(metric_name, RollupTier(tier, {"1m": 60, "1h": HOUR, "1d": DAY}[tier], 0),
+                                   0, BASE + 400 * DAY, limit=100000)
+        return sorted(query, key=lambda bucket: bucket.start)
+
+    def raw_count(self):
+        with sqlite3.connect(self.storage.db_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM metrics").fetchone()[0]
+
+
+class TestCompaction(RollupTestCase):
+
+    def test_every_tier_built_from_raw_samples(self):
+        # Two samples a minute for two hours: values 0..239
+        for i in range(240):
+            self.record("latency", BASE + i * 30, float(i))
+        result = self.compact(BASE + 2 * HOUR + 45)
+
+        self.assertEqual(result["samples_rolled_up"], 240)
+        minutes = self.buckets("1m")
+        self.assertEqual(len(minutes), 120)
+        self.assertEqual((minutes[1].start, minutes[1].count, minutes[1].sum), (BASE + 60, 2, 5.0))
+
+        hours = self.buckets("1h")
+        self.assertEqual([bucket.start for bucket in hours], [BASE, BASE + HOUR])
+        self.assertEqual((hours[1].count, hours[1].min, hours[1].max), (120, 120.0, 239.0))
+        self.assertAlmostEqual(hours[1].mean, 179.5)
+
+        day, = self.buckets("1d")
+        self.assertEqual((day.count, day.sum), (240, sum(range(240))))
+        self.assertAlmostEqual(day.percentiles()["p50"], 119.5, delta=119.5 * 0.02)
+
+    def test_incremental_runs_do_not_double_count(self):
+        self.record("latency", BASE + 10, 1.0)
+        self.compact(BASE + 120)
+        self.record("latency", BASE + 50, 2.0)    # late sample in an already rolled minute
+        self.record("latency", BASE + 130, 3.0)
+        self.compact(BASE + 120)                  # nothing new has completed yet
+        self.compact(BASE + 240)
+
+        self.assertEqual([(b.start, b.count, b.sum) for b in self.buckets("1m")],
+                         [(BASE, 1, 1.0), (BASE + 120, 1, 3.0)])
+        hour, = self.buckets("1h")
+        self.assertEqual((hour.count, hour.sum), (2, 4.0))
+        self.assertEqual(self.rollups.get_stats()["buckets"], {"1m": 2, "1h": 1, "1d": 1})
+
+    def test_histogram_values_are_rolled_up(self):
+        self.record("latency", BASE + 5, [0.1, 0.2, 0.3])
+        self.compact(BASE + 120)
+        minute, = self.buckets("1m")
+        self.assertEqual((minute.count, minute.min, minute.max), (3, 0.1, 0.3))
+
+    def test_retention_per_tier(self):
+        for i in range(10):
+            self.record("latency", BASE + i * 60, float(i))
+        self.compact(BASE + HOUR)
+        self.assertEqual(self.raw_count(), 10)  # still within raw retention
+
+        self.compact(BASE + 3 * DAY)
+        self.assertEqual(self.raw_count(), 0)
+        self.assertEqual(len(self.buckets("1m")), 10)
+
+        self.compact(BASE + 8 * DAY)
+        self.assertEqual(self.buckets("1m"), [])
+        self.assertEqual(self.buckets("1h")[0].count, 10)
+
+    def test_unrolled_samples_are_never_expired(self):
+        self.record("latency", BASE, 1.0)
+        self.storage.flush()
+        with sqlite3.connect(self.storage.db_path) as conn:
+            conn.execute("INSERT INTO rollup_state (name, value) VALUES ('raw_watermark', ?)", (BASE,))
+            self.rollups._apply_retention(conn, BASE + 10 * DAY)
+        self.assertEqual(self.raw_count(), 1)
+
+    def test_tier_validation(self):
+        with self.assertRaises(ValueError):
+            MetricRollups(self.storage.db_path, [RollupTier("1m", 60, DAY), RollupTier("90s", 90, DAY)])
+        with self.assertRaises(ValueError):
+            MetricRollups(self.storage.db_path, [RollupTier("1m", 60, 60), RollupTier("1h", HOUR, DAY)])
+
+
+class TestQueryPlanner(RollupTestCase):
+
+    def test_coarsest_tier_within_resolution_and_range(self):
+        now = BASE + 100 * DAY
+        plan = lambda age, resolution=None: getattr(self.rollups.plan(now - age, resolution, now=now), "name", "raw")
+
+        self.assertEqual(plan(HOUR), "raw")
+        self.assertEqual(plan(HOUR, 60), "1m")
+        self.assertEqual(plan(HOUR, 2 * HOUR), "1h")
+        self.assertEqual(plan(6 * DAY, 2 * DAY), "1d")
+        self.assertEqual(plan(30 * DAY), "1h")          # raw and minutes have expired
+        self.assertEqual(plan(30 * DAY, 60), "1h")
+        self.assertEqual(plan(3650 * DAY), "1d")
+
+    def test_history_from_rollups(self):
+        now = time.time()
+        start = now - 20 * 60
+        for i in range(20):
+            self.record("requests", start + i * 60, float(i))
+
+        self.storage.compact()
+        raw = self.storage.get_history("requests", start - 60)
+        self.assertEqual(len(raw), 20)
+        self.assertEqual(raw[0].source, "test")
+
+        by_minute = self.storage.get_history("requests", start - 60, resolution=60)
+        self.assertGreaterEqual(len(by_minute), 18)
+        self.assertEqual(by_minute[0].source, "rollup:1m")
+        self.assertIn("p99", by_minute[0].metadata)
+        self.assertGreater(by_minute[0].timestamp, by_minute[-1].timestamp)
+
+    def test_scheduled_compaction(self):
+        self.storage.compaction_interval = 3600
+        self.assertIsNotNone(self.storage.maybe_compact())
+        self.assertIsNone(self.storage.maybe_compact())
+        self.assertEqual(self.storage.get_stats()["rollups"]["compactions"], 1)
+
+
+class TestQuantileSketch(unittest.TestCase):
+
+    def test_merge_matches_single_sketch(self):
+        whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for i in range(1, 2001):
+            whole.add(i)
+            (left if i % 2 else right).add(i)
+        left.merge(right)
+        self.assertEqual(left.to_dict(), whole.to_dict())
+        self.assertAlmostEqual(whole.quantile(0.95), 1900, delta=1900 * 0.01)
+
+    def test_round_trip(self):
+        sketch = QuantileSketch()
+        sketch.update([-2.5, 0, 3.5, 1000])
+        restored = QuantileSketch.from_dict(sketch.to_dict())
+        self.assertEqual(restored.quantiles([0, 0.5, 1]), sketch.quantiles([0, 0.5, 1]))
+        self.assertEqual((restored.min, restored.max), (-2.5, 1000))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+"""
+Tests for buffered metric writes in MetricStorage
+"""
+
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.monitoring.realtime_metrics import AdvancedMetricsCollector, MetricStorage, MetricValue
+
+
+def sample(value, **labels):
+    return MetricValue(timestamp=datetime.now().isoformat(), value=value,
+                       labels=labels, source="test", metadata={})
+
+
+class StorageTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def storage(self, **options):
+        options.setdefault("flush_interval", 60)
+        storage = MetricStorage(os.path.join(self.temp_dir, "metrics.db"), **options)
+        self.addCleanup(storage.close)
+        return storage
+
+    def row_count(self, storage):
+        with sqlite3.connect(storage.db_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM metrics").fetchone()[0]
+
+
+class TestBufferedWrites(StorageTestCase):
+
+    def test_samples_written_in_one_flush(self):
+        storage = self.storage()
+        for i in range(50):
+            storage.store_metric("requests", sample(float(i)))
+        self.assertEqual(self.row_count(storage), 0)
+        self.assertEqual(storage.get_stats()["buffered"], 50)
+
+        with patch.object(storage, "_write_rows", wraps=storage._write_rows) as writes:
+            self.assertEqual(storage.flush(), 50)
+        self.assertEqual(writes.call_count, 1)
+        self.assertEqual(self.row_count(storage), 50)
+        self.assertEqual(storage.get_stats()["written"], 50)
+
+    def test_reads_see_buffered_samples(self):
+        storage = self.storage()
+        storage.store_metric("latency", sample([0.1, 0.2, 0.3], route="/chat"))
+        stored = storage.get_metrics("latency")
+        self.assertEqual(len(stored), 1)
+        self.assertEqual((stored[0].value, stored[0].labels), ([0.1, 0.2, 0.3], {"route": "/chat"}))
+
+    def test_samples_from_many_threads(self):
+        storage = self.storage()
+
+        def worker():
+            for i in range(1000):
+                storage.store_metric("events", sample(float(i)))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        storage.flush()
+        self.assertEqual(self.row_count(storage), 4000)
+        stats = storage.get_stats()
+        self.assertEqual((stats["dropped"], stats["buffered"]), (0, 0))
+        self.assertEqual(storage._buffers, [])  # finished threads are forgotten
+
+    def test_full_buffer_drops_oldest(self):
+        storage = self.storage(buffer_size=10)
+        for i in range(25):
+            storage.store_metric("events", sample(float(i)))
+        storage.flush()
+
+        self.assertEqual(storage.get_stats()["dropped"], 15)
+        values = sorted(value.value for value in storage.get_metrics("events"))
+        self.assertEqual(values, [float(i) for i in range(15, 25)])
+
+        # Each flush counts only drops recorded since the previous one
+        for i in range(12):
+            storage.store_metric("events", sample(float(i)))
+        storage.flush()
+        storage.flush()
+        self.assertEqual(storage.get_stats()["dropped"], 17)
+
+    def test_background_flusher(self):
+        storage = self.storage(flush_interval=0.05)
+        storage.store_metric("events", sample(1.0))
+        deadline = time.time() + 5
+        while self.row_count(storage) == 0 and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.row_count(storage), 1)
+
+    def test_failed_write_is_counted(self):
+        storage = self.storage()
+        for i in range(3):
+            storage.store_metric("events", sample(float(i)))
+        with patch.object(storage, "_write_rows", side_effect=sqlite3.OperationalError("database is locked")):
+            self.assertEqual(storage.flush(), 0)
+        stats = storage.get_stats()
+        self.assertEqual((stats["write_errors"], stats["dropped"], stats["buffered"]), (1, 3, 0))
+
+    def test_unbuffered_writes_immediately(self):
+        storage = self.storage(buffered=False)
+        storage.store_metric("events", sample(1.0))
+        self.assertEqual(self.row_count(storage), 1)
+        self.assertIsNone(storage._flusher)
+
+
+class TestCollectorFlush(StorageTestCase):
+
+    def test_stop_collection_flushes(self):
+        collector = AdvancedMetricsCollector()
+        collector.storage = self.storage()
+        collector.record_counter("test.requests_counter")
+        collector.record_gauge("test.queue_depth", 7)
+        self.assertEqual(self.row_count(collector.storage), 0)
+
+        collector.stop_collection()
+        self.assertEqual(self.row_count(collector.storage), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,225 @@
+"""
+Tests for the in-memory metrics registry and its text exposition
+"""
+
+import gc
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.ollama_stub import OllamaStubServer
+from jarvis.core.data_archiver import DataArchiver
+from jarvis.llm.dispatch import OllamaDispatcher
+from jarvis.llm.production_llm import LLMProvider, LLMRequest, ProductionLLMInterface
+from jarvis.llm.response_cache import ResponseCache
+from jarvis.utils.metrics_registry import (
+    CONTENT_TYPE, MetricsHTTPServer, MetricsRegistry, get_metrics_registry
+)
+from jarvis.monitoring.realtime_metrics import AdvancedMetricsCollector, MetricStorage
+
+
+def series_lines(text, name):
+    return [line for line in text.splitlines() if line.startswith(name)]
+
+
+class TestExposition(unittest.TestCase):
+
+    def test_counters_gauges_and_summaries(self):
+        registry = MetricsRegistry()
+        registry.inc("archive.entries_ingested", 2, {"data_type": "input"}, help="Entries written")
+        registry.inc("archive.entries_ingested", 3, {"data_type": "input"})
+        registry.set("system.cpu.percent", 12.5)
+        for i in range(1, 101):
+            registry.observe("llm.request_latency_seconds", i / 100, {"model": "llama3:8b"})
+
+        text = registry.render()
+        self.assertIn("# HELP jarvis_archive_entries_ingested_total Entries written\n"
+                      "# TYPE jarvis_archive_entries_ingested_total counter\n"
+                      'jarvis_archive_entries_ingested_total{data_type="input"} 5\n', text)
+        self.assertIn("jarvis_system_cpu_percent 12.5\n", text)
+        self.assertIn("# TYPE jarvis_llm_request_latency_seconds summary", text)
+
+        latency = series_lines(text, "jarvis_llm_request_latency_seconds")
+        self.assertEqual(len(latency), 5)
+        median = float(latency[0].split()[-1])
+        self.assertTrue(latency[0].startswith('jarvis_llm_request_latency_seconds{model="llama3:8b",quantile="0.5"}'))
+        self.assertAlmostEqual(median, 0.5, delta=0.01)
+        self.assertIn('jarvis_llm_request_latency_seconds_count{model="llama3:8b"} 100', latency)
+        self.assertEqual(float(latency[3].split()[-1]), 50.5)
+
+    def test_label_escaping_and_names(self):
+        registry = MetricsRegistry()
+        registry.set("jarvis.health.overall_score", 90, {"path": 'C:\\tmp\n"x"', "bad-label": 1})
+        line, = series_lines(registry.render(), "jarvis_health_overall_score")
+        self.assertEqual(line, 'jarvis_health_overall_score{bad_label="1",path="C:\\\\tmp\\n\\"x\\""} 90')
+
+    def test_type_and_value_checks(self):
+        registry = MetricsRegistry()
+        registry.inc("requests")
+        with self.assertRaises(ValueError):
+            registry.set("requests", 1)
+        with self.assertRaises(ValueError):
+            registry.inc("requests", -1)
+
+    def test_scrape_cost_is_tracked(self):
+        registry = MetricsRegistry()
+        registry.set("queue_depth", 1)
+        registry.render()
+        text = registry.render()
+        self.assertIn("jarvis_metrics_scrape_duration_seconds_count 1", text)
+        stats = registry.get_stats()
+        self.assertEqual(stats["scrapes"], 2)
+        self.assertGreater(stats["last_scrape_bytes"], 0)
+
+
+class TestCollectors(unittest.TestCase):
+
+    def test_track_cache(self):
+        registry = MetricsRegistry()
+        cache = ResponseCache()
+        registry.track_cache("llm_response", cache)
+        cache.put("a", {"v": 1})
+        cache.get("a")
+        cache.get("a")
+        cache.get("missing")
+
+        text = registry.render()
+        self.assertIn('jarvis_cache_hits_total{cache="llm_response"} 2', text)
+        self.assertIn('jarvis_cache_misses_total{cache="llm_response"} 1', text)
+        self.assertIn('jarvis_cache_entries{cache="llm_response"} 1', text)
+        ratio, = series_lines(text, "jarvis_cache_hit_ratio")
+        self.assertAlmostEqual(float(ratio.split()[-1]), 2 / 3)
+
+    def test_caches_sharing_a_name_are_summed(self):
+        registry = MetricsRegistry()
+        first, second = ResponseCache(), ResponseCache()
+        registry.track_cache("llm_response", first)
+        registry.track_cache("llm_response", second)
+        registry.track_cache("llm_response", second)
+        for i in range(50):
+            first.get(f"missing{i}")
+        second.put("a", {"v": 1})
+        second.get("a")
+
+        text = registry.render()
+        self.assertIn('jarvis_cache_misses_total{cache="llm_response"} 50', text)
+        self.assertIn('jarvis_cache_hits_total{cache="llm_response"} 1', text)
+        self.assertEqual(registry.get_stats()["collectors"], 1)
+
+        # Counts of a collected cache stay in the totals, so counters never go down
+        del first
+        gc.collect()
+        second.get("b")
+        text = registry.render()
+        self.assertIn('jarvis_cache_misses_total{cache="llm_response"} 51', text)
+        self.assertIn('jarvis_cache_entries{cache="llm_response"} 1', text)
+
+    def test_failing_collector_does_not_break_scrape(self):
+        registry = MetricsRegistry()
+        registry.register_collector(lambda registry: 1 / 0)
+        registry.register_collector(lambda registry: registry.set("pulled", 7))
+        self.assertIn("jarvis_pulled 7", registry.render())
+        self.assertEqual(registry.get_stats()["collector_errors"], 1)
+
+
+class TestHTTPServer(unittest.TestCase):
+
+    def test_metrics_endpoint(self):
+        registry = MetricsRegistry()
+        registry.inc("requests", labels={"outcome": "completed"})
+        server = MetricsHTTPServer(registry, port=0)
+        server.start()
+        self.addCleanup(server.stop)
+
+        with urllib.request.urlopen(server.url) as response:
+            self.assertEqual(response.headers["Content-Type"], CONTENT_TYPE)
+            self.assertIn('jarvis_requests_total{outcome="completed"} 1', response.read().decode())
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(server.url.replace("/metrics", "/other"))
+        self.assertEqual(error.exception.code, 404)
+
+
+class TestSubsystemMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def test_collector_mirrors_samples(self):
+        collector = AdvancedMetricsCollector()
+        collector.storage = MetricStorage(os.path.join(self.temp_dir, "metrics.db"), flush_interval=60)
+        self.addCleanup(collector.storage.close)
+        collector.registry = MetricsRegistry()
+
+        collector.record_counter("test.requests_counter", 2)
+        collector.record_counter("test.requests_counter", 3)
+        collector.record_gauge("test.queue_depth", 7)
+        collector.record_timer("test.request_duration", 0.25)
+        collector.record_histogram("test.size_histogram", [1, 2, 3])
+
+        registry = collector.registry
+        self.assertEqual(registry.get("test.requests_counter"), 5)
+        self.assertEqual(registry.get("test.queue_depth"), 7)
+        self.assertEqual(registry.get("test.request_duration").count, 1)
+        self.assertEqual(registry.get("test.size_histogram").count, 3)
+
+    def test_archive_ingest_and_verification_lag(self):
+        registry = get_metrics_registry()
+        value = lambda name, labels: registry.get(name, labels) or 0
+        ingested_before = value("archive.entries_ingested", {"data_type": "input"})
+        lag_before = registry.get("archive.verification_lag_seconds", {"status": "verified"})
+        lag_count_before = lag_before.count if lag_before else 0
+
+        archiver = DataArchiver(os.path.join(self.temp_dir, "archive.db"), enable_crdt=False)
+        entry_id = archiver.archive_data("input", "hello", "test", "unit")
+        archiver.archive_batch([{"data_type": "input", "content": str(i), "source": "test",
+                                 "operation": "batch"} for i in range(3)])
+        archiver.update_verification(entry_id, "verified", score=0.9)
+
+        self.assertEqual(value("archive.entries_ingested", {"data_type": "input"}) - ingested_before, 4)
+        lag = registry.get("archive.verification_lag_seconds", {"status": "verified"})
+        self.assertEqual(lag.count - lag_count_before, 1)
+        self.assertGreaterEqual(lag.min, 0)
+
+    def test_llm_latency_and_cache(self):
+        server = OllamaStubServer().start()
+        self.addCleanup(server.stop)
+        llm = ProductionLLMInterface(response_cache=ResponseCache())
+        llm.register_provider(LLMProvider.OLLAMA, OllamaDispatcher(url=server.url))
+        llm.metrics = registry = MetricsRegistry()
+        registry.track_cache("llm_response", llm.response_cache)
+
+        for _ in range(3):
+            llm.process_request(LLMRequest(prompt="hello", model="llama3:8b"))
+
+        latency = registry.get("llm.request_latency_seconds", {"model": "llama3:8b", "provider": "ollama"})
+        self.assertEqual(latency.count, 1)
+        self.assertEqual(registry.get("llm.requests", {"outcome": "completed"}), 1)
+        self.assertEqual(registry.get("llm.requests", {"outcome": "cache_hit"}), 2)
+        self.assertIn('jarvis_cache_hits_total{cache="llm_response"} 2', registry.render())
+
+
+class TestAPIRoute(unittest.TestCase):
+
+    def test_fastapi_metrics_route(self):
+        try:
+            from fastapi.testclient import TestClient
+            from jarvis.api import enhanced_api
+        except Exception as e:
+            raise unittest.SkipTest(f"API dependencies not available: {e}")
+
+        get_metrics_registry().inc("test.api_scrapes")
+        response = TestClient(enhanced_api.app).get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn("# TYPE jarvis_test_api_scrapes_total counter", response.text)
+
+
+if __name__ == '__main__':
+    unittest.main()
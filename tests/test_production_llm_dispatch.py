@@ -0,0 +1,134 @@
+"""
+Contract tests for ProductionLLMInterface provider dispatch
+
+Every request goes to a local Ollama stub; the tests assert the exact
+/api/generate payload sent for each configured model and fallback path.
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.ollama_stub import OllamaStubServer
+from jarvis.llm.dispatch import DispatchResult, OllamaDispatcher, ProviderDispatcher
+from jarvis.llm.production_llm import (
+    LLMProvider, LLMRequest, ModelConfig, ProductionLLMInterface
+)
+
+
+def ollama_payload(model, prompt, temperature, num_predict, top_p=0.9, **extra):
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": False,
+        "options": {
+            "temperature": temperature,
+            "top_p": top_p,
+            "num_predict": num_predict,
+            "frequency_penalty": 0.0,
+            "presence_penalty": 0.0
+        }
+    }
+    payload.update(extra)
+    return payload
+
+
+class TestProviderDispatchContract(unittest.TestCase):
+    """Wire payload contract for every model and fallback path"""
+
+    def setUp(self):
+        self.server = OllamaStubServer().start()
+        self.addCleanup(self.server.stop)
+        self.llm = ProductionLLMInterface()
+        self.llm.register_provider(LLMProvider.OLLAMA, OllamaDispatcher(url=self.server.url))
+
+    def request(self, prompt, **kwargs):
+        kwargs.setdefault("cache_enabled", False)
+        return self.llm.process_request(LLMRequest(prompt=prompt, **kwargs))
+
+    def test_payload_for_every_default_model(self):
+        expected = {
+            "llama3:8b": ollama_payload("llama3:8b", "hello", 0.7, 4096),
+            "codellama:13b": ollama_payload("codellama:13b", "hello", 0.7, 8192),
+            "llama3:70b": ollama_payload("llama3:70b", "hello", 0.7, 8192),
+        }
+        self.assertEqual(set(expected), set(self.llm.models))
+
+        for model, payload in expected.items():
+            response = self.request("hello", model=model)
+            self.assertEqual(self.server.requests[-1], payload)
+            self.assertEqual(response.model_used, model)
+            self.assertEqual(response.content, "echo: hello")
+            self.assertFalse(response.fallback_used)
+
+    def test_request_overrides_and_model_config_reach_the_wire(self):
+        self.llm.add_custom_model(ModelConfig(
+            name="mistral:7b", provider=LLMProvider.OLLAMA, max_tokens=256,
+            temperature=0.2, top_p=0.5, stop_sequences=["</s>"],
+            custom_params={"num_ctx": 4096, "keep_alive": "5m"}
+        ))
+        self.request("hi", model="mistral:7b", temperature=0.0, system_prompt="  Be brief.  ")
+
+        payload = ollama_payload("mistral:7b", "hi", 0.0, 256, top_p=0.5,
+                                 system="Be brief.", keep_alive="5m")
+        payload["options"].update({"stop": ["</s>"], "num_ctx": 4096})
+        self.assertEqual(self.server.requests[-1], payload)
+
+    def test_auto_selection_runs_the_selected_model(self):
+        response = self.request("write a python function", model="auto")
+        self.assertEqual(response.model_used, "codellama:13b")
+        self.assertEqual(self.server.requests[-1]["model"], "codellama:13b")
+
+    def test_configured_fallback_chain(self):
+        self.server._server.fail_models.add("llama3:70b")
+        response = self.request("hello", model="llama3:70b")
+
+        self.assertEqual([r["model"] for r in self.server.requests], ["llama3:70b", "llama3:8b"])
+        self.assertEqual(self.server.requests[0], ollama_payload("llama3:70b", "hello", 0.7, 8192))
+        self.assertEqual(self.server.requests[1], ollama_payload("llama3:8b", "hello", 0.7, 4096))
+        self.assertEqual(response.model_used, "llama3:8b")
+        self.assertTrue(response.fallback_used)
+        self.assertEqual(response.metadata["attempted_models"], ["llama3:70b", "llama3:8b"])
+
+    def test_request_fallbacks_and_retry_limit(self):
+        self.server._server.fail_models.update({"llama3:8b", "llama3:70b"})
+        response = self.request("hello", model="llama3:8b",
+                                fallback_models=["llama3:70b", "codellama:13b"], retry_attempts=2)
+
+        self.assertIsNone(response)
+        self.assertEqual([r["model"] for r in self.server.requests], ["llama3:8b", "llama3:70b"])
+        self.assertEqual(self.llm.usage_stats["failed_requests"], 1)
+
+    def test_exhausted_chain_fails(self):
+        self.server._server.fail_models.update(self.llm.models)
+        self.assertIsNone(self.request("hello", model="codellama:13b"))
+        self.assertEqual([r["model"] for r in self.server.requests], ["codellama:13b", "llama3:8b"])
+
+    def test_default_dispatcher_uses_ollama_url(self):
+        llm = ProductionLLMInterface()
+        with patch("jarvis.llm.llm_interface.OLLAMA_URL", self.server.url):
+            response = llm.process_request(LLMRequest(prompt="ping", model="llama3:8b", cache_enabled=False))
+        self.assertEqual(response.content, "echo: ping")
+
+    def test_custom_provider_dispatch(self):
+        calls = []
+
+        class RecordingDispatcher(ProviderDispatcher):
+            def execute(self, model_config, request):
+                calls.append((model_config.name, request.prompt))
+                return DispatchResult(content="custom", tokens_used=3)
+
+        self.llm.register_provider(LLMProvider.CUSTOM, RecordingDispatcher())
+        self.llm.add_custom_model(ModelConfig(name="local-custom", provider=LLMProvider.CUSTOM,
+                                              cost_per_token=0.5))
+        response = self.request("hi", model="local-custom")
+        self.assertEqual(calls, [("local-custom", "hi")])
+        self.assertEqual((response.content, response.tokens_used, response.cost), ("custom", 3, 1.5))
+        self.assertEqual(self.server.requests, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
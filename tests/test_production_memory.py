@@ -0,0 +1,170 @@
+"""
+Tests for the production memory system
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.memory.access_tracker import AccessTracker, decayed_score
+from jarvis.memory.production_memory import ProductionMemorySystem
+from jarvis.memory.tag_query import (
+    And, Not, Or, Tag, TagExpressionError, compile_tag_expression, parse_tag_expression
+)
+
+
+class TestAccessTracker(unittest.TestCase):
+    """Test buffered access tracking"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.memory = ProductionMemorySystem(self.temp_dir, access_flush_interval_ms=60000)
+
+    def tearDown(self):
+        self.memory.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def read_row(self, key):
+        conn = sqlite3.connect(str(self.memory.sqlite_file))
+        try:
+            return conn.execute(
+                "SELECT access_count, frequency_score FROM memories WHERE key = ?", (key,)
+            ).fetchone()
+        finally:
+            conn.close()
+
+    def test_recalls_are_buffered_until_flush(self):
+        self.memory.store_memory("color", "blue")
+        for _ in range(5):
+            self.assertEqual(self.memory.recall_memory("color"), "blue")
+
+        self.assertEqual(self.read_row("color")[0], 0)
+        self.assertEqual(self.memory.flush_access_counts(), 1)
+
+        access_count, frequency_score = self.read_row("color")
+        self.assertEqual(access_count, 5)
+        self.assertAlmostEqual(frequency_score, 5.0, places=3)
+
+    def test_concurrent_recalls_are_all_counted(self):
+        self.memory.store_memory("shared", "value")
+        self.memory.recall_memory("shared")
+
+        def worker():
+            for _ in range(200):
+                self.memory.recall_memory("shared")
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.memory.flush_access_counts()
+        self.assertEqual(self.read_row("shared")[0], 801)
+
+    def test_search_ranks_by_decayed_frequency(self):
+        for key in ("alpha", "beta", "gamma"):
+            self.memory.store_memory(key, f"{key} value")
+        for _ in range(3):
+            self.memory.recall_memory("gamma")
+        self.memory.recall_memory("beta")
+        self.memory.flush_access_counts()
+
+        results = self.memory.search_memories("", limit=3)
+        self.assertEqual([r["key"] for r in results], ["gamma", "beta", "alpha"])
+
+    def test_cache_eviction_keeps_hot_entries(self):
+        self.memory.max_cache_size = 10
+        for i in range(10):
+            self.memory.store_memory(f"key{i}", f"value{i}")
+            self.memory.recall_memory(f"key{i}")
+        for _ in range(5):
+            self.memory.recall_memory("key0")
+
+        self.memory.store_memory("key10", "value10")
+        self.memory.recall_memory("key10")
+
+        self.assertIn("key0", self.memory.memory_cache)
+        self.assertIn("key10", self.memory.memory_cache)
+        self.assertEqual(len(self.memory.memory_cache), 10)
+
+    def test_score_decays_with_half_life(self):
+        clock = [1000.0]
+        tracker = AccessTracker(os.path.join(self.temp_dir, "unused.db"),
+                                half_life_seconds=100, clock=lambda: clock[0])
+        tracker.record("k", 8)
+        clock[0] += 100
+        self.assertAlmostEqual(tracker.score("k"), 4.0)
+        self.assertAlmostEqual(decayed_score(8, 0, 300, half_life=100), 1.0)
+        tracker.forget("k")
+        tracker.stop()
+
+
+class TestTagIndex(unittest.TestCase):
+    """Test the normalized tag index and tag expressions"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.memory = ProductionMemorySystem(self.temp_dir, access_flush_interval_ms=60000)
+        self.memory.store_memory("m1", "python notes", tags=["AI", "python"])
+        self.memory.store_memory("m2", "rust notes", tags=["ai", "rust", "legacy"])
+        self.memory.store_memory("m3", "inbox rules", tags=["email"])
+        self.memory.store_memory("m4", "python scripts", tags=["python"])
+
+    def tearDown(self):
+        self.memory.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def keys(self, **kwargs):
+        return sorted(r["key"] for r in self.memory.search_memories(kwargs.pop("query", ""), **kwargs))
+
+    def test_tags_match_exactly(self):
+        self.assertEqual(self.keys(tags=["ai"]), ["m1", "m2"])
+        self.assertEqual(self.keys(tags=["Python", "ai"]), ["m1"])
+
+    def test_tag_expressions(self):
+        self.assertEqual(self.keys(tag_expression="ai AND NOT legacy"), ["m1"])
+        self.assertEqual(self.keys(tag_expression="rust OR email"), ["m2", "m3"])
+        self.assertEqual(self.keys(tag_expression="(ai OR email) python"), ["m1"])
+        self.assertEqual(self.keys(tag_expression="ai", tags=["rust"]), ["m2"])
+
+    def test_tags_combine_with_full_text_query(self):
+        self.assertEqual(self.keys(query="python", tags=["ai"]), ["m1"])
+        self.assertEqual(self.keys(query="notes", tag_expression="NOT python"), ["m2"])
+
+    def test_retagging_and_delete_update_index(self):
+        self.memory.store_memory("m4", "python scripts", tags=["ai"])
+        self.assertEqual(self.keys(tags=["python"]), ["m1"])
+        self.memory.delete_memory("m1", soft_delete=False)
+        self.assertEqual(self.keys(tags=["ai"]), ["m2", "m4"])
+
+    def test_migration_backfills_existing_rows(self):
+        self.memory.close()
+        conn = sqlite3.connect(str(self.memory.sqlite_file))
+        conn.execute("DELETE FROM memory_tags")
+        conn.execute("PRAGMA user_version = 0")
+        conn.commit()
+        conn.close()
+
+        self.memory = ProductionMemorySystem(self.temp_dir, access_flush_interval_ms=60000)
+        self.assertEqual(self.keys(tags=["python"]), ["m1", "m4"])
+
+    def test_parse_and_compile(self):
+        self.assertEqual(parse_tag_expression("a b OR NOT c"),
+                         Or((And((Tag("a"), Tag("b"))), Not(Tag("c")))))
+        sql, params = compile_tag_expression(Or((Tag("a"), Tag("b"))))
+        self.assertEqual(params, ["a", "b"])
+        self.assertIn("tag IN (?, ?)", sql)
+        for bad in ("", "a AND", "(a", "a )", "OR b"):
+            with self.assertRaises(TagExpressionError):
+                parse_tag_expression(bad)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Tests for quantile sketches and sketch-based metric aggregation
+"""
+
+import os
+import sys
+import math
+import random
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.utils.quantile_sketch import QuantileSketch
+from jarvis.monitoring.realtime_metrics import (
+    AdvancedMetricsCollector, MetricAggregator, MetricStorage, MetricType
+)
+
+QUANTILES = [0.0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 0.999, 1.0]
+
+
+def exact_quantile(sorted_values, q):
+    """The rank the sketch answers for: the lower of the two neighbours"""
+    return sorted_values[int(q * (len(sorted_values) - 1))]
+
+
+class TestRelativeError(unittest.TestCase):
+
+    def assert_within_relative_error(self, sketch, values, alpha):
+        ordered = sorted(values)
+        for q, estimate in zip(QUANTILES, sketch.quantiles(QUANTILES)):
+            expected = exact_quantile(ordered, q)
+            self.assertLessEqual(abs(estimate - expected), alpha * abs(expected) + 1e-12,
+                                 f"q={q}: {estimate} vs {expected}")
+
+    def test_heavy_tailed_latencies(self):
+        rng = random.Random(7)
+        values = [rng.lognormvariate(-3, 1.5) for _ in range(50000)]
+        for alpha in (0.01, 0.05):
+            sketch = QuantileSketch.from_values(values, relative_accuracy=alpha)
+            self.assert_within_relative_error(sketch, values, alpha)
+            self.assertLess(len(sketch.positive), 1000)
+
+    def test_merged_shards_keep_the_bound(self):
+        rng = random.Random(11)
+        shards = [[rng.expovariate(1 / (node + 1)) for _ in range(5000)] for node in range(8)]
+        merged = QuantileSketch.merged(QuantileSketch.from_values(shard) for shard in shards)
+        values = [value for shard in shards for value in shard]
+
+        self.assertEqual(merged.count, len(values))
+        self.assertAlmostEqual(merged.sum, sum(values), places=6)
+        self.assert_within_relative_error(merged, values, 0.01)
+
+    def test_negative_and_zero_values(self):
+        rng = random.Random(3)
+        values = [rng.uniform(-500, 500) for _ in range(20000)] + [0.0] * 100
+        self.assert_within_relative_error(QuantileSketch.from_values(values), values, 0.01)
+
+    def test_bounded_size_keeps_upper_quantiles(self):
+        values = [10 ** (i / 1000) for i in range(-9000, 9000)]  # 18 decades
+        sketch = QuantileSketch.from_values(values, max_buckets=256)
+        self.assertLessEqual(len(sketch.positive), 256)
+        ordered = sorted(values)
+        for q in (0.9, 0.99):
+            expected = exact_quantile(ordered, q)
+            self.assertLessEqual(abs(sketch.quantile(q) - expected), 0.01 * expected)
+
+    def test_exact_moments(self):
+        values = [1.0, 2.0, 3.0, 4.0]
+        sketch = QuantileSketch.from_values(values)
+        self.assertEqual((sketch.count, sketch.min, sketch.max, sketch.mean), (4, 1.0, 4.0, 2.5))
+        self.assertAlmostEqual(sketch.standard_deviation, math.sqrt(1.25))
+        with self.assertRaises(ValueError):
+            sketch.merge(QuantileSketch(relative_accuracy=0.05))
+
+
+class TestSketchAggregation(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def test_aggregate_values(self):
+        aggregation = MetricAggregator().aggregate_values([float(i) for i in range(1, 1001)])
+        self.assertEqual((aggregation.count, aggregation.sum_value), (1000, 500500.0))
+        self.assertAlmostEqual(aggregation.percentiles["p95"], 950, delta=950 * 0.01)
+        self.assertEqual(set(aggregation.percentiles), {"p50", "p75", "p90", "p95", "p99"})
+        self.assertEqual(aggregation.sketch.count, 1000)
+
+    def test_merge_aggregations_from_nodes(self):
+        aggregator = MetricAggregator()
+        start = datetime(2024, 1, 1, 12, 0)
+        nodes = []
+        for node in range(3):
+            aggregation = aggregator.aggregate_values([float(node * 100 + i) for i in range(100)])
+            aggregation.metric_name = "api.latency"
+            aggregation.start_time = start.isoformat()
+            aggregation.end_time = (start + timedelta(seconds=60)).isoformat()
+            aggregation.rate_per_second = 100 / 60
+            nodes.append(aggregation)
+
+        merged = aggregator.merge_aggregations(nodes)
+        whole = aggregator.aggregate_values([float(i) for i in range(300)])
+        self.assertEqual((merged.count, merged.min_value, merged.max_value), (300, 0.0, 299.0))
+        self.assertEqual(merged.percentiles, whole.percentiles)
+        self.assertAlmostEqual(merged.rate_per_second, 5.0)
+
+    def test_histogram_windows_store_sketches(self):
+        collector = AdvancedMetricsCollector()
+        collector.storage = MetricStorage(os.path.join(self.temp_dir, "metrics.db"), flush_interval=60)
+        self.addCleanup(collector.storage.close)
+
+        for batch in range(10):
+            collector.record_histogram("test.response_histogram", [batch * 100 + i for i in range(100)])
+        latest = collector.metric_buffers["test.response_histogram"][-1].value
+        self.assertIsInstance(latest, QuantileSketch)
+        self.assertEqual(collector.get_current_values("test.response_histogram")
+                         ["test.response_histogram"]["value"]["count"], 100)
+
+        metric_def = collector.metric_definitions["test.response_histogram"]
+        self.assertEqual(metric_def.metric_type, MetricType.HISTOGRAM)
+        collector._compute_aggregation("test.response_histogram", metric_def)
+        self.assertNotIn("test.response_histogram", collector.metric_windows)
+
+        stored, = collector.storage.get_aggregations("test.response_histogram")
+        self.assertEqual((stored.count, stored.max_value), (1000, 999))
+        self.assertAlmostEqual(stored.percentiles["p50"], 499, delta=5)
+        self.assertEqual(stored.sketch.count, 1000)
+
+        raw = collector.storage.get_metrics("test.response_histogram", limit=1)[0]
+        self.assertIsInstance(raw.value, QuantileSketch)
+
+
+if __name__ == '__main__':
+    unittest.main()
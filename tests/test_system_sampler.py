@@ -0,0 +1,148 @@
+"""
+Tests for the shared, non-blocking system sampler
+"""
+
+import os
+import sys
+import time
+import threading
+import unittest
+import dataclasses
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil
+
+from jarvis.monitoring import system_sampler
+from jarvis.monitoring.system_sampler import SystemSampler, get_system_sampler
+
+
+def no_blocking_cpu_percent(interval=None, percpu=False):
+    if interval:
+        raise AssertionError("cpu_percent must not block")
+    return 12.5
+
+
+class SamplerTestCase(unittest.TestCase):
+
+    def sampler(self, **options):
+        sampler = SystemSampler(**options)
+        self.addCleanup(sampler.stop)
+        return sampler
+
+
+class TestSystemSampler(SamplerTestCase):
+
+    def test_sample_is_non_blocking_and_immutable(self):
+        sampler = self.sampler()
+        with patch.object(psutil, "cpu_percent", side_effect=no_blocking_cpu_percent):
+            start = time.perf_counter()
+            snapshot = sampler.sample()
+            self.assertLess(time.perf_counter() - start, 0.5)
+
+        self.assertTrue(snapshot.available)
+        self.assertEqual((snapshot.sequence, snapshot.cpu_percent), (1, 12.5))
+        self.assertGreater(snapshot.memory_total_mb, 0)
+        self.assertGreater(snapshot.process_memory_mb, 0)
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            snapshot.cpu_percent = 99.0
+
+    def test_latest_reuses_fresh_snapshot(self):
+        sampler = self.sampler(interval=60)
+        first = sampler.latest()
+        self.assertIs(sampler.latest(max_age=60), first)
+        self.assertIsNot(sampler.latest(max_age=0), first)
+        self.assertTrue(sampler.is_running)
+
+    def test_concurrent_readers_share_a_sample(self):
+        sampler = self.sampler(interval=60)
+        sampler.stop()  # only the readers below sample
+        snapshots = []
+
+        def reader():
+            snapshots.append(sampler.latest(max_age=30))
+
+        threads = [threading.Thread(target=reader) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual({snapshot.sequence for snapshot in snapshots}, {1})
+        self.assertEqual(sampler.get_stats()["samples"], 1)
+
+    def test_subscribers_receive_snapshots(self):
+        sampler = self.sampler(interval=0.05)
+        received = []
+        sampler.subscribe(received.append)
+        sampler.subscribe(lambda snapshot: 1 / 0)
+        sampler.start()
+
+        deadline = time.time() + 5
+        while len(received) < 2 and time.time() < deadline:
+            time.sleep(0.02)
+        sampler.stop()
+        self.assertGreaterEqual(len(received), 2)
+        self.assertLess(received[0].sequence, received[1].sequence)
+        self.assertGreaterEqual(sampler.get_stats()["subscriber_errors"], 2)
+
+        sampler.unsubscribe(received.append)
+        count = len(received)
+        sampler.sample()
+        self.assertEqual(len(received), count)
+
+    def test_overhead_is_reported(self):
+        sampler = self.sampler()
+        for _ in range(5):
+            sampler.sample()
+        stats = sampler.get_stats()
+        self.assertEqual(stats["samples"], 5)
+        self.assertGreater(stats["sample_seconds"], 0)
+        self.assertGreater(stats["mean_sample_ms"], 0)
+        self.assertGreaterEqual(stats["overhead_percent"], 0)
+        self.assertLess(stats["max_sample_seconds"], 0.5)
+
+    def test_without_psutil(self):
+        with patch.object(system_sampler, "psutil", None):
+            snapshot = SystemSampler().sample()
+        self.assertFalse(snapshot.available)
+        self.assertEqual(snapshot.resource_score(), 100)
+
+    def test_resource_score(self):
+        snapshot = self.sampler().sample()
+        loaded = dataclasses.replace(snapshot, cpu_percent=95.0, memory_percent=75.0, disk_percent=50.0)
+        self.assertEqual(loaded.resource_score(), 55)
+
+
+class TestMonitorsUseSampler(unittest.TestCase):
+
+    def test_monitors_read_the_shared_snapshot(self):
+        from jarvis.core.performance_monitor import PerformanceMonitor as CorePerformanceMonitor
+        from jarvis.monitoring.performance_optimizer import PerformanceMonitor
+        from jarvis.monitoring.realtime_metrics import AdvancedMetricsCollector
+        from jarvis.monitoring.system_health import SystemHealthMonitor
+
+        snapshot = get_system_sampler().sample()
+        with patch.object(psutil, "cpu_percent", side_effect=no_blocking_cpu_percent):
+            start = time.perf_counter()
+
+            collector = AdvancedMetricsCollector()
+            collector._collect_system_metrics()
+            self.assertEqual(collector.metric_buffers["system.cpu.percent"][-1].value, snapshot.cpu_percent)
+
+            metric = PerformanceMonitor()._collect_metrics()
+            self.assertEqual((metric.cpu_percent, metric.memory_usage_mb),
+                             (snapshot.cpu_percent, snapshot.process_memory_mb))
+
+            health = SystemHealthMonitor()._check_system_health()
+            self.assertEqual(health.metrics["memory_percent"], snapshot.memory_percent)
+            self.assertEqual(health.score, snapshot.resource_score())
+
+            data = CorePerformanceMonitor.__new__(CorePerformanceMonitor)._get_system_health_data()
+            self.assertEqual(data["disk_usage_percent"], snapshot.disk_percent)
+
+            self.assertLess(time.perf_counter() - start, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
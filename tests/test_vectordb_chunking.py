@@ -0,0 +1,149 @@
+"""
+Tests for RAG document chunking strategies
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.vectordb.chunking import (
+    ChunkingConfig, ChunkingStrategy, WhitespaceTokenizer, create_chunker, get_tokenizer
+)
+from jarvis.vectordb.models import Document
+from jarvis.vectordb.rag_system import DocumentProcessor, prepare_document
+
+
+MARKDOWN = """# Guide
+Intro paragraph. It explains things.
+
+## Example
+```python
+def alpha():
+    return 1
+
+
+def beta():
+    return 2
+```
+
+| name | value |
+|------|-------|
+| a    | 1     |
+| b    | 2     |
+
+## Details
+""" + "Detail sentence goes here. " * 60
+
+
+class TestChunkers(unittest.TestCase):
+    """Test chunking strategies"""
+
+    def assert_offsets(self, text, chunks):
+        for chunk in chunks:
+            self.assertEqual(text[chunk.start:chunk.end], chunk.text)
+
+    def test_recursive_keeps_code_block_and_table_whole(self):
+        chunker = create_chunker(ChunkingConfig(chunk_size=200, chunk_overlap=30))
+        chunks = chunker.chunk_text(MARKDOWN)
+
+        self.assertGreater(len(chunks), 1)
+        self.assert_offsets(MARKDOWN, chunks)
+        self.assertTrue(all(len(chunk.text) <= 200 for chunk in chunks))
+        fence = MARKDOWN[MARKDOWN.index("```python"):MARKDOWN.index("```\n\n|") + 3]
+        table = MARKDOWN[MARKDOWN.index("| name"):MARKDOWN.index("\n\n## Details")]
+        self.assertTrue(any(fence in chunk.text for chunk in chunks))
+        self.assertTrue(any(table in chunk.text for chunk in chunks))
+
+    def test_recursive_records_section(self):
+        chunker = create_chunker(ChunkingConfig(chunk_size=200, chunk_overlap=0))
+        chunks = chunker.chunk_text(MARKDOWN)
+        self.assertEqual(chunks[0].metadata['section'], 'Guide')
+        self.assertEqual(chunks[-1].metadata['section'], 'Details')
+
+    def test_token_chunker_window_and_overlap(self):
+        config = ChunkingConfig(strategy=ChunkingStrategy.TOKEN, chunk_size=20, chunk_overlap=5)
+        chunker = create_chunker(config)
+        text = " ".join(f"word{i}" for i in range(100))
+        chunks = chunker.chunk_text(text)
+
+        self.assert_offsets(text, chunks)
+        tokenizer = WhitespaceTokenizer()
+        self.assertTrue(all(tokenizer.count(chunk.text) <= 20 for chunk in chunks))
+        self.assertTrue(chunks[1].text.startswith("word15"))
+
+    def test_code_chunker_splits_on_definitions(self):
+        code = "import os\n\n" + "\n\n".join(
+            f"def func_{i}(x):\n    y = x + {i}\n    return y\n" for i in range(20))
+        chunker = create_chunker(ChunkingConfig(strategy=ChunkingStrategy.CODE,
+                                                chunk_size=150, chunk_overlap=0))
+        chunks = chunker.chunk_text(code)
+
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks[1:]:
+            self.assertTrue(chunk.text.startswith("def func_"))
+
+    def test_streaming_matches_source_offsets(self):
+        chunker = create_chunker(ChunkingConfig(chunk_size=200, chunk_overlap=30))
+        blocks = [MARKDOWN[i:i + 64] for i in range(0, len(MARKDOWN), 64)]
+        chunks = list(chunker.stream(blocks))
+
+        self.assert_offsets(MARKDOWN, chunks)
+        self.assertEqual([chunk.index for chunk in chunks], list(range(len(chunks))))
+        self.assertEqual(chunks[-1].end, len(MARKDOWN.rstrip()))
+
+    def test_unknown_tokenizer_falls_back(self):
+        self.assertIsInstance(get_tokenizer("no-such-local-tokenizer"), WhitespaceTokenizer)
+
+    def test_invalid_overlap_rejected(self):
+        with self.assertRaises(ValueError):
+            ChunkingConfig(chunk_size=100, chunk_overlap=100)
+
+
+class TestDocumentProcessorChunking(unittest.TestCase):
+    """Test DocumentProcessor integration with chunkers"""
+
+    def test_chunk_metadata(self):
+        doc = Document(id="doc", content=MARKDOWN, metadata={"type": "md"})
+        chunks = DocumentProcessor.chunk_document(doc, chunk_size=300, overlap=50)
+
+        for i, chunk in enumerate(chunks):
+            self.assertEqual(chunk.id, f"doc_chunk_{i}")
+            self.assertEqual(chunk.metadata['parent_document_id'], "doc")
+            self.assertEqual(chunk.metadata['type'], "md")
+            start, end = chunk.metadata['chunk_start'], chunk.metadata['chunk_end']
+            self.assertEqual(MARKDOWN[start:end], chunk.content)
+
+    def test_token_sized_documents_split_by_token_count(self):
+        config = ChunkingConfig(strategy=ChunkingStrategy.RECURSIVE, chunk_size=20,
+                                chunk_overlap=5, size_unit="tokens", tokenizer="whitespace")
+        # Short in characters, long in tokens
+        dense = Document(id="dense", content="a b c d e f g h i j " * 5)
+        chunks = prepare_document(dense, chunking_config=config)
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(chunk.id.startswith("dense_chunk_") for chunk in chunks))
+
+        # Long in characters, within the budget in tokens
+        sparse = Document(id="sparse", content=" ".join(["internationalization"] * 15))
+        self.assertGreater(len(sparse.content), 200)
+        self.assertEqual([doc.id for doc in prepare_document(sparse, chunk_size=200, chunking_config=config)],
+                         ["sparse"])
+
+    def test_stream_file_chunks(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "guide.md")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(MARKDOWN * 20)
+
+            config = ChunkingConfig(chunk_size=400, chunk_overlap=50, stream_block_size=512)
+            chunks = list(DocumentProcessor.stream_file_chunks(path, config))
+
+            self.assertGreater(len(chunks), 20)
+            self.assertTrue(all(chunk.metadata['parent_document_id'] == "guide.md" for chunk in chunks))
+            self.assertTrue(all(len(chunk.content) <= 400 for chunk in chunks))
+
+
+if __name__ == '__main__':
+    unittest.main()
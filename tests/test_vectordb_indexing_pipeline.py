@@ -0,0 +1,159 @@
+"""
+Tests for the staged RAG indexing pipeline
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.vectordb.models import Document, EmbeddingResult
+from jarvis.vectordb.indexing_pipeline import IndexingPipeline, PipelineConfig
+from jarvis.vectordb.rag_system import EnhancedRAGSystem, prepare_document
+from functools import partial
+
+
+class StubEmbeddingProvider:
+    """Embedding provider returning constant vectors"""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def embed_batch(self, texts):
+        self.batch_sizes.append(len(texts))
+        return [EmbeddingResult(embedding=[float(len(t)), 1.0], model_name="stub",
+                                dimensions=2, processing_time=0.0) for t in texts]
+
+
+class StubManager:
+    """In-memory stand-in for ChromaDBManager"""
+
+    def __init__(self, fail_ids=()):
+        self.provider = StubEmbeddingProvider()
+        self.stored = {}
+        self.write_sizes = []
+        self.fail_ids = set(fail_ids)
+        self.lock = threading.Lock()
+
+    def get_embedding_provider(self, collection_name):
+        return self.provider
+
+    def list_collections(self):
+        return ["docs"]
+
+    def create_collection(self, name):
+        return True
+
+    def add_embedded_documents(self, collection_name, documents, embeddings):
+        if any(doc.metadata.get('parent_document_id', doc.id) in self.fail_ids for doc in documents):
+            return {'success': False, 'error': 'injected failure'}
+        with self.lock:
+            self.write_sizes.append(len(documents))
+            for doc, embedding in zip(documents, embeddings):
+                self.stored[doc.id] = embedding
+        return {'success': True, 'processed': len(documents)}
+
+
+def make_documents(count, size=2500):
+    return [Document(id=f"doc{i}", content=f"Sentence {i} of the corpus. " * (size // 25))
+            for i in range(count)]
+
+
+class TestIndexingPipeline(unittest.TestCase):
+    """Test chunk -> embed -> write pipeline"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def make_pipeline(self, manager, **config):
+        prepare = partial(prepare_document, chunk_large_docs=True, chunk_size=500)
+        return IndexingPipeline(manager, prepare, PipelineConfig(**config))
+
+    def test_all_chunks_written_in_coalesced_batches(self):
+        manager = StubManager()
+        pipeline = self.make_pipeline(manager, chunk_workers=3, embed_batch_size=16, write_batch_size=40)
+        result = pipeline.run(make_documents(20), "docs")
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['documents_completed'], 20)
+        self.assertEqual(result['processed'], result['total'])
+        self.assertEqual(len(manager.stored), result['total'])
+        # Only the final embedding batch may be partial when chunks arrive faster than they embed
+        self.assertLessEqual(max(manager.provider.batch_sizes), 16)
+        self.assertGreater(result['documents_per_minute'], 0)
+
+    def test_progress_callback(self):
+        manager = StubManager()
+        snapshots = []
+        prepare = partial(prepare_document, chunk_large_docs=True, chunk_size=500)
+        pipeline = IndexingPipeline(manager, prepare, PipelineConfig(write_batch_size=10),
+                                    progress_callback=snapshots.append)
+        pipeline.run(make_documents(10), "docs")
+
+        self.assertGreater(len(snapshots), 1)
+        self.assertEqual(snapshots[-1].documents_completed, 10)
+        written = [snapshot.chunks_written for snapshot in snapshots]
+        self.assertEqual(written, sorted(written))
+
+    def test_checkpoint_resume_skips_completed(self):
+        checkpoint = os.path.join(self.temp_dir, "index.checkpoint.json")
+        documents = make_documents(12)
+
+        first = StubManager(fail_ids={"doc5"})
+        result = self.make_pipeline(first, checkpoint_path=checkpoint, write_batch_size=1).run(documents, "docs")
+        self.assertFalse(result['success'])
+        self.assertEqual(result['documents_failed'], 1)
+
+        with open(checkpoint) as f:
+            completed = set(json.load(f)['completed'])
+        self.assertNotIn("doc5", completed)
+        self.assertEqual(len(completed), 11)
+
+        second = StubManager()
+        result = self.make_pipeline(second, checkpoint_path=checkpoint).run(documents, "docs")
+        self.assertTrue(result['success'])
+        self.assertEqual(result['documents_skipped'], 11)
+        self.assertEqual(result['documents_completed'], 1)
+        self.assertTrue(all(doc_id.startswith("doc5_") for doc_id in second.stored))
+
+    def test_failed_documents_release_pending_state(self):
+        pipeline = self.make_pipeline(StubManager(fail_ids={"doc1", "doc3"}), write_batch_size=1)
+        result = pipeline.run(make_documents(5), "docs")
+
+        self.assertEqual(result['documents_failed'], 2)
+        self.assertEqual(result['documents_completed'], 3)
+        self.assertEqual(pipeline._pending, {})
+        self.assertEqual(pipeline._failed, set())
+
+    def test_duplicate_in_flight_document_rejected(self):
+        manager = StubManager()
+        documents = make_documents(3)
+        result = self.make_pipeline(manager).run(documents + [documents[1]], "docs")
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['documents_completed'], 3)
+        self.assertEqual(result['documents_failed'], 1)
+        self.assertEqual(result['processed'], result['total'])
+        self.assertIn("already being indexed", result['error_messages'][0])
+
+    def test_rag_system_uses_pipeline(self):
+        manager = StubManager()
+        rag = EnhancedRAGSystem(manager, search_engine=object())
+        stats = rag.index_documents(make_documents(5), "docs", chunk_size=500,
+                                    pipeline_config=PipelineConfig(chunk_workers=2))
+
+        self.assertTrue(stats['success'])
+        self.assertEqual(stats['original_documents'], 5)
+        self.assertEqual(stats['processed_documents'], len(manager.stored))
+
+
+if __name__ == '__main__':
+    unittest.main()
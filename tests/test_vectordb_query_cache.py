@@ -0,0 +1,122 @@
+"""
+Tests for the bounded semantic search query cache
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.vectordb.models import Document, SearchResult
+from jarvis.vectordb.query_cache import QueryResultCache
+from jarvis.vectordb.semantic_search import SemanticSearchEngine, SearchConfig
+
+
+class FakeClock:
+    """Manually advanced time source"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_results(count=2, size=10):
+    return [
+        SearchResult(
+            document=Document(id=f"doc{i}", content="x" * size),
+            score=0.9, distance=0.1, rank=i + 1
+        )
+        for i in range(count)
+    ]
+
+
+class TestQueryResultCache(unittest.TestCase):
+    """Test LRU/TTL behaviour of QueryResultCache"""
+
+    def test_lru_eviction_by_entry_count(self):
+        cache = QueryResultCache(max_entries=2, max_bytes=0)
+        cache.put("a", "col", 0, make_results())
+        cache.put("b", "col", 0, make_results())
+        self.assertIsNotNone(cache.get("a", 0))  # "a" becomes most recent
+        cache.put("c", "col", 0, make_results())
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    def test_eviction_by_byte_size(self):
+        entry_size = QueryResultCache._estimate_size(make_results(size=1000))
+        cache = QueryResultCache(max_entries=100, max_bytes=entry_size * 2)
+        for key in ("a", "b", "c"):
+            cache.put(key, "col", 0, make_results(size=1000))
+
+        stats = cache.get_stats()
+        self.assertEqual(stats['size'], 2)
+        self.assertLessEqual(stats['size_bytes'], entry_size * 2)
+        self.assertNotIn("a", cache)
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = QueryResultCache(ttl_seconds=10, clock=clock)
+        cache.put("a", "col", 0, make_results())
+        clock.now += 5
+        self.assertIsNotNone(cache.get("a", 0))
+        clock.now += 6
+        self.assertIsNone(cache.get("a", 0))
+        self.assertEqual(cache.get_stats()['expirations'], 1)
+
+    def test_generation_mismatch_drops_entry(self):
+        cache = QueryResultCache()
+        cache.put("a", "col", 3, make_results())
+        self.assertIsNone(cache.get("a", 4))
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.get_stats()['invalidations'], 1)
+
+    def test_returned_list_is_a_copy(self):
+        cache = QueryResultCache()
+        cache.put("a", "col", 0, make_results())
+        cache.get("a", 0).clear()
+        self.assertEqual(len(cache.get("a", 0)), 2)
+
+
+class TestSearchEngineCaching(unittest.TestCase):
+    """Test cache integration in SemanticSearchEngine"""
+
+    def setUp(self):
+        self.generation = 0
+        self.manager = Mock()
+        self.manager.semantic_search.side_effect = lambda cfg: make_results()
+        self.manager.get_generation.side_effect = lambda name: self.generation
+        self.engine = SemanticSearchEngine(self.manager)
+
+    def test_repeat_query_hits_cache(self):
+        config = SearchConfig(limit=2)
+        self.engine.search("query", "col", config)
+        self.engine.search("query", "col", config)
+
+        self.assertEqual(self.manager.semantic_search.call_count, 1)
+        analytics = self.engine.get_search_analytics()
+        self.assertEqual(analytics['cache_hits'], 1)
+        self.assertEqual(analytics['cache_misses'], 1)
+
+    def test_injected_empty_cache_is_used(self):
+        cache = QueryResultCache(max_entries=5)
+        engine = SemanticSearchEngine(self.manager, query_cache=cache)
+        self.assertIs(engine.query_cache, cache)
+
+    def test_collection_write_invalidates(self):
+        config = SearchConfig(limit=2)
+        self.engine.search("query", "col", config)
+        self.generation += 1
+        self.engine.search("query", "col", config)
+
+        self.assertEqual(self.manager.semantic_search.call_count, 2)
+        self.assertEqual(self.engine.get_search_analytics()['cache_invalidations'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()